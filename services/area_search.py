@@ -10,9 +10,10 @@ NTT西日本の提供エリア検索サービス
 - 番地・号の入力
 - 建物情報の選択
 - 提供エリア判定
+- HTTPエンジン（services.area_search_http）への切り替えとブラウザへのフォールバック
 
 制限事項：
-- キャッシュ機能は使用しません
+- 検索結果は area_search_cache.db にキャッシュします（force_refresh で再検索）
 - エラー発生時は詳細なログを出力します
 """
 
@@ -22,8 +23,9 @@ import re
 import os
 import json
 import base64
+import threading
+from contextlib import contextmanager
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoSuchElementException, TimeoutException
 from selenium.webdriver.common.action_chains import ActionChains
@@ -31,30 +33,53 @@ from selenium.webdriver.common.keys import Keys
 from selenium import webdriver
 
 from services.web_driver import create_driver, load_browser_settings
+from services.cancellation import (
+    CancellableWait,
+    CancellationError,
+    cancellable_sleep,
+    current_token,
+    register_driver,
+    use_token,
+)
+from services.area_search_cache import get_area_search_cache
+from services.driver_pool import get_driver_pool, get_site_url, release_driver
+from services.page_wait import PageWaiter, build_result_image_selectors
+from services.dom_probe import probe_elements, any_visible
+from services.screenshot_pipeline import get_screenshot_writer, save_viewport_screenshot
+from services.search_trace import finish_trace, set_trace_site, start_trace, trace_mark, trace_span
+from services.replay_harness import apply_harness_options, attach_replay_recorder
+from services.request_blocking import apply_blocking_options, apply_blocking_profile, log_blocking_stats
+from services.browser_sessions import claim_restored_driver, detach_options, register_browser
 from utils.string_utils import normalize_string, calculate_similarity
+from utils.address_matcher import AddressMatcher
 from utils.address_utils import split_address, normalize_address
+from utils.address_parser import EAST_JAPAN_PREFECTURES, parse_address
+from utils.postal_index import check_postal_address, infer_prefecture
 
 # グローバル変数でブラウザドライバーを保持
 global_driver = None
 _global_cancel_flag = False
 
 
-def close_global_driver():
-    """提供判定のブラウザを終了する。"""
-    global global_driver
-    if global_driver is None:
+def close_driver(driver):
+    """提供判定のブラウザを終了する（ドライバープールから借りたものは返却する）。"""
+    if driver is None:
         return
     try:
-        global_driver.quit()
+        if release_driver(driver):
+            logging.info("提供判定のブラウザをドライバープールへ返却しました")
+            return
+        driver.quit()
         logging.info("提供判定のブラウザを終了しました")
     except Exception as e:
         logging.warning(f"ブラウザの終了中にエラー: {str(e)}")
-    finally:
-        global_driver = None
 
-class CancellationError(Exception):
-    """検索キャンセル時に発生する例外"""
-    pass
+
+def close_global_driver():
+    """提供判定のブラウザを終了する。"""
+    global global_driver
+    driver, global_driver = global_driver, None
+    close_driver(driver)
 
 def set_cancel_flag(value=True):
     """キャンセルフラグを設定
@@ -81,37 +106,93 @@ def is_cancelled():
     return _global_cancel_flag
 
 def check_cancellation():
-    """キャンセル要求をチェックし、必要に応じて例外を発生"""
+    """キャンセル要求をチェックし、必要に応じて例外を発生
+
+    検索ごとのキャンセルトークンが結び付いている場合はトークンだけを確認する
+    （同時に動く他の検索のキャンセルフラグの影響を受けない）。
+    """
+    token = current_token()
+    if token is not None:
+        if token.is_cancelled:
+            logging.info("★★★ キャンセル要求を検出：検索を中断します ★★★")
+        token.raise_if_cancelled()
+        return
     global _global_cancel_flag
     if _global_cancel_flag:
         logging.info("★★★ キャンセル要求を検出：検索を中断します ★★★")
         raise CancellationError("検索がキャンセルされました")
 
-def is_east_japan(address):
+def is_east_japan(address, postal_code=None):
     """
     住所が東日本かどうかを判定する
     
     Args:
         address (str): 判定する住所
+        postal_code (str): 郵便番号（住所から都道府県が判定できない場合に使用）
         
     Returns:
         bool: 東日本ならTrue、西日本ならFalse
     """
-    # 東日本の都道府県リスト
-    east_japan_prefectures = [
-        "北海道", "青森県", "岩手県", "宮城県", "秋田県", "山形県", "福島県",
-        "茨城県", "栃木県", "群馬県", "埼玉県", "千葉県", "東京都", "神奈川県",
-        "新潟県", "山梨県", "長野県"
-    ]
-    
-    # 住所から都道府県を抽出
-    prefecture_pattern = r'^(東京都|北海道|(?:京都|大阪)府|.+?県)'
-    prefecture_match = re.match(prefecture_pattern, address)
-    if not prefecture_match:
-        return False
-    
-    prefecture = prefecture_match.group(1)
-    return prefecture in east_japan_prefectures
+    # 住所から都道府県を判定（省略時は市区町村名から補完）
+    parsed = parse_address(address)
+    if parsed.prefecture is None and postal_code:
+        # 市区町村名でも判定できない場合は郵便番号索引の都道府県で判定する
+        prefecture = infer_prefecture(postal_code)
+        if prefecture:
+            return prefecture in EAST_JAPAN_PREFECTURES
+    return parsed.region == "east"
+
+# 検索結果画面の画像パターン（提供可能、調査中、提供不可）
+RESULT_IMAGE_PATTERNS = {
+    "available": {
+        "src_contains": [
+            "img_available_03.png",
+            "available"
+        ],
+        "alt_contains": ["提供可能"],
+        "status": "available",
+        "message": "提供可能",
+        "details": {
+            "判定結果": "OK",
+            "提供エリア": "提供可能エリアです",
+            "備考": "フレッツ光のサービスがご利用いただけます"
+        }
+    },
+    "investigation": {
+        "src_contains": [
+            "img_investigation_03",
+            "investigation"
+        ],
+        "alt_contains": [],
+        "status": "failure",
+        "message": "要手動再検索（住所をご確認ください）",
+        "details": {
+            "判定結果": "要手動再検索",
+            "提供エリア": "調査が必要なエリアです",
+            "備考": "建物名や枝番の影響で自動判定できない場合があります。住所を確認して手動で再検索してください"
+        }
+    },
+    "not_provided": {
+        "src_contains": [
+            "img_not_provided",
+            "not_provided"
+        ],
+        "alt_contains": ["提供不可", "未提供"],
+        "status": "unavailable",
+        "message": "未提供",
+        "details": {
+            "判定結果": "NG",
+            "提供エリア": "提供対象外エリアです",
+            "備考": "申し訳ございませんが、このエリアではサービスを提供しておりません"
+        }
+    }
+}
+
+
+def _result_image_allowlist():
+    """通信遮断で画像を止める場合でも読み込む、判定結果画像のURLの部分文字列"""
+    return [token for pattern in RESULT_IMAGE_PATTERNS.values() for token in pattern["src_contains"]]
+
 
 def normalize_address(address):
     """
@@ -137,156 +218,24 @@ def normalize_address(address):
 
 def split_address(address):
     """
-    住所を分割して各要素を抽出する
+    住所を分割して各要素を抽出する（市区町村辞書による分割）
 
     Args:
         address (str): 分割する住所
         
     Returns:
-        dict: 分割された住所の要素
+        ParsedAddress: 分割された住所の要素（辞書と同じキーで参照可能）
             - prefecture: 都道府県
             - city: 市区町村
             - town: 町名（大字・字を除く）
             - block: 丁目
             - number: 番地
-            - building_id: 建物ID
+            - number_prefix: 番地の接頭記号（甲乙丙丁・イロハ等）
+            - number_suffix: 番地の接尾記号
+            - building_id: 建物部分
     """
     try:
-        # 都道府県を抽出
-        prefecture_match = re.match(r'^(.+?[都道府県])', address)
-        prefecture = prefecture_match.group(1) if prefecture_match else None
-        block = None
-        number_part = None
-        town = ""
-        number_prefix = None
-        number_suffix = None
-        
-        if prefecture:
-            remaining_address = address[len(prefecture):].strip()
-            # 市区町村を抽出（郡がある場合も考慮）
-            city_match = re.match(r'^(.+?郡.+?[町村]|.+?[市区町村])', remaining_address)
-            city = city_match.group(1) if city_match else None
-            
-            if city:
-                # 残りの住所から基本住所と番地を分離
-                remaining = remaining_address[len(city):].strip()
-                
-                # 甲乙丙丁・イロハを含む番地表記を優先的に抽出
-                symbolic_number_match = re.match(r'^(.*?)([甲乙丙丁ァ-ヶぁ-ん])(\d+(?:[-－]\d+)?)([ァ-ヶぁ-ん])?$', remaining)
-                trailing_symbol_match = re.match(r'^(.*?)(\d+(?:[-－]\d+)?)(?:[-－]?)([ァ-ヶぁ-ん])$', remaining)
-                prefix_only_match = re.match(r'^(.*?)([甲乙丙丁ァ-ヶぁ-ん])$', remaining)
-
-                if symbolic_number_match:
-                    town = symbolic_number_match.group(1).strip()
-                    number_prefix = symbolic_number_match.group(2)
-                    number_part = symbolic_number_match.group(3)
-                    number_suffix = symbolic_number_match.group(4)
-                elif trailing_symbol_match:
-                    town = trailing_symbol_match.group(1).strip()
-                    number_part = trailing_symbol_match.group(2)
-                    number_suffix = trailing_symbol_match.group(3)
-                elif prefix_only_match:
-                    town = prefix_only_match.group(1).strip()
-                    number_prefix = prefix_only_match.group(2)
-                    number_part = None
-                else:
-                    # 特殊な表記（大字、字、甲乙丙丁）を含む部分を抽出
-                    special_location_match = re.search(r'(大字.+?字.*?|大字.*?|字.*?)([甲乙丙丁])?(\d+)', remaining)
-                    
-                    if special_location_match:
-                        # 番地のみを抽出（甲乙丙丁は除外）
-                        number_part = special_location_match.group(3)
-                        # 基本住所は市区町村までとする
-                        town = ""
-                    else:
-                        # 丁目を含む場合は、丁目の後ろの番地を抽出
-                        chome_match = re.search(r'(\d+)丁目', remaining)
-                        if chome_match:
-                            # 丁目より後ろの部分から番地を探す
-                            after_chome = remaining[remaining.find('丁目') + 2:].strip()
-                            # ハイフンを含む番地のパターンを優先的に検索
-                            number_match = re.search(r'(\d+(?:[-－]\d+)?)', after_chome)
-                            if number_match:
-                                number_part = number_match.group(1)
-                                town = remaining[:remaining.find('丁目') - len(chome_match.group(1))].strip()
-                            else:
-                                number_part = None
-                                town = remaining[:remaining.find('丁目')].strip()
-                            block = chome_match.group(1)
-                        else:
-                            # ハイフンが2つある場合は、最初の数字を丁目として扱う
-                            double_hyphen_match = re.search(r'(\d+)-(\d+)-(\d+)', remaining)
-                            if double_hyphen_match:
-                                first_number = double_hyphen_match.group(1)
-                                second_number = double_hyphen_match.group(2)
-                                third_number = double_hyphen_match.group(3)
-                                town_candidate = remaining[:double_hyphen_match.start()].strip()
-
-                                # 先頭数値が基本住所側に含まれている場合のみ「丁目相当」とみなす
-                                # それ以外は 3-1-1 のように番地としてそのまま扱う
-                                first_number_zen = first_number.translate(str.maketrans('0123456789', '０１２３４５６７８９'))
-                                kanji_map = {
-                                    '1': '一', '2': '二', '3': '三', '4': '四', '5': '五',
-                                    '6': '六', '7': '七', '8': '八', '9': '九', '10': '十'
-                                }
-                                first_number_kanji = kanji_map.get(first_number)
-
-                                has_first_in_town = (
-                                    first_number in town_candidate or
-                                    first_number_zen in town_candidate or
-                                    (first_number_kanji is not None and first_number_kanji in town_candidate)
-                                )
-
-                                town = town_candidate
-                                if has_first_in_town:
-                                    block = first_number
-                                    number_part = f"{second_number}-{third_number}"
-                                else:
-                                    block = None
-                                    number_part = f"{first_number}-{second_number}-{third_number}"
-                            else:
-                                # 通常の番地パターンを検索
-                                number_match = re.search(r'(\d+(?:[-－]\d+)?)', remaining)
-                                if number_match:
-                                    number_part = number_match.group(1)
-                                    town = remaining[:number_match.start()].strip()
-                                else:
-                                    number_part = None
-                                    town = remaining
-                
-                return {
-                    'prefecture': prefecture,
-                    'city': city,
-                    'town': town if town else "",  # Noneの代わりに空文字列を返す
-                    'block': block,
-                    'number': number_part,
-                    'number_prefix': number_prefix,
-                    'number_suffix': number_suffix,
-                    'building_id': None
-                }
-            
-            return {
-                'prefecture': prefecture,
-                'city': remaining_address if prefecture else None,
-                'town': "",  # Noneの代わりに空文字列を返す
-                'block': None,
-                'number': None,
-                'number_prefix': None,
-                'number_suffix': None,
-                'building_id': None
-            }
-        
-        return {
-            'prefecture': None,
-            'city': None,
-            'town': "",
-            'block': None,
-            'number': None,
-            'number_prefix': None,
-            'number_suffix': None,
-            'building_id': None
-        }
-        
+        return parse_address(address)
     except Exception as e:
         logging.error(f"住所分割中にエラー: {str(e)}")
         return None
@@ -451,28 +400,15 @@ def find_best_address_match(input_address, candidates):
     Returns:
         tuple: (最も一致する候補, 類似度)
     """
-    best_candidate = None
-    best_similarity = -1
-    
-    for i, candidate in enumerate(candidates):
-        # キャンセルチェック（候補処理前）
-        check_cancellation()
-        
+    # キャンセルチェック（候補処理前）
+    check_cancellation()
+
+    valid_candidates = []
+    candidate_texts = []
+    for candidate in candidates:
         try:
-            candidate_text = candidate.text.strip().split('\n')[0]
-            _, similarity = is_address_match(input_address, candidate_text)
-            
-            logging.info(f"候補 '{candidate_text}' の類似度: {similarity}")
-            
-            if similarity > best_similarity:
-                best_similarity = similarity
-                best_candidate = candidate
-                
-            # 完全一致が見つかった場合は即座に返す
-            if similarity >= 1.0:
-                logging.info(f"完全一致の候補が見つかりました: {candidate_text}")
-                break
-                
+            candidate_texts.append(candidate.text.strip().split('\n')[0])
+            valid_candidates.append(candidate)
         except Exception as e:
             # Stale Element Referenceエラーの場合はキャンセルされた可能性が高い
             if "stale element reference" in str(e).lower():
@@ -481,9 +417,15 @@ def find_best_address_match(input_address, candidates):
             
             logging.warning(f"候補の処理中にエラー: {str(e)}")
             continue
-    
-    if best_candidate and best_similarity >= 0.5:  # 最低限の類似度しきい値
-        logging.info(f"最適な候補が見つかりました（類似度: {best_similarity}）: {best_candidate.text.strip()}")
+
+    # 完全一致を先に探し、残りは最高値を下限に打ち切りながら一括評価する
+    matcher = AddressMatcher(input_address, normalize_string, city_weighted=True)
+    best_index, best_similarity = matcher.best_match(candidate_texts, threshold=0.5)
+    logging.info(f"{len(candidate_texts)} 件の候補を評価しました（最高類似度: {best_similarity}）")
+
+    if best_index is not None:
+        best_candidate = valid_candidates[best_index]
+        logging.info(f"最適な候補が見つかりました（類似度: {best_similarity}）: {candidate_texts[best_index]}")
         return best_candidate, best_similarity
     
     return None, best_similarity
@@ -503,7 +445,7 @@ def handle_building_selection(driver, progress_callback=None, show_popup=True, w
         # 建物選択モーダルが表示されているか確認（短い待機時間で）
         if wait_seconds <= 0:
             modal = None
-            for candidate in driver.find_elements(By.ID, "buildingNameSelectModal"):
+            for candidate in probe_elements(driver, "#buildingNameSelectModal"):
                 try:
                     if candidate.is_displayed():
                         modal = candidate
@@ -514,7 +456,7 @@ def handle_building_selection(driver, progress_callback=None, show_popup=True, w
                 logging.info("建物選択モーダルは表示されていません - 処理を続行します")
                 return None
         else:
-            modal = WebDriverWait(driver, wait_seconds).until(
+            modal = CancellableWait(driver, wait_seconds).until(
                 EC.visibility_of_element_located((By.ID, "buildingNameSelectModal"))
             )
 
@@ -534,7 +476,7 @@ def handle_building_selection(driver, progress_callback=None, show_popup=True, w
                     f"[contains(normalize-space(.), '{text}')]"
                 )
                 try:
-                    element = WebDriverWait(driver, 1).until(
+                    element = CancellableWait(driver, 1).until(
                         EC.element_to_be_clickable((By.XPATH, xpath))
                     )
                     return element, text
@@ -565,7 +507,7 @@ def handle_building_selection(driver, progress_callback=None, show_popup=True, w
                 progress_callback(f"建物選択モーダル: 「{selected_label}」を選択")
 
             try:
-                WebDriverWait(driver, 5).until(
+                CancellableWait(driver, 5).until(
                     EC.invisibility_of_element_located((By.ID, "buildingNameSelectModal"))
                 )
             except TimeoutException:
@@ -636,7 +578,19 @@ def create_driver(headless=False):
         options.add_argument('--aggressive-cache-discard')
         options.add_argument('--disable-default-apps')
         
-        driver = webdriver.Chrome(options=options)
+        # 記録・再生（replay_harness）中の追加オプション
+        apply_harness_options(options)
+        apply_blocking_options(options)
+        detach_options(options)
+        
+        from services.driver_bootstrap import start_chrome
+        from services.warm_cache import warm_cache_profile
+        # 永続キャッシュプロファイルが有効な場合は空いているプロファイルで起動する
+        with warm_cache_profile(options, "west") as profile:
+            driver, _ = start_chrome(options)
+            profile.prepare(driver)
+        register_browser(driver, "west", headless)
+        apply_blocking_profile(driver, "west", allow={"images": _result_image_allowlist()})
         logging.info(f"Chromeドライバーを作成しました（ヘッドレスモード: {headless}）")
         
         return driver
@@ -662,6 +616,44 @@ def _load_browser_settings(path="settings.json"):
 _BROWSER_SETTINGS = _load_browser_settings()
 ENABLE_SCREENSHOTS = _BROWSER_SETTINGS.get("enable_screenshots", True)
 
+# バッチ実行などで settings.json の browser_settings を上書きする値
+_browser_settings_override = {}
+# 検索1件ごとの上書き（先行判定のヘッドレス実行など。実行中のスレッドにだけ適用）
+_thread_settings_override = threading.local()
+
+
+def set_browser_settings_override(overrides=None):
+    """
+    検索時に settings.json の browser_settings より優先する値を設定する
+
+    Args:
+        overrides (dict): 上書きする設定（Noneでクリア）
+    """
+    global _browser_settings_override
+    _browser_settings_override = dict(overrides or {})
+
+
+@contextmanager
+def use_browser_settings_override(overrides=None):
+    """
+    現在のスレッドで実行する検索にだけ browser_settings の上書きを適用する
+
+    Args:
+        overrides (dict): 上書きする設定（Noneの場合は何もしない）
+    """
+    previous = getattr(_thread_settings_override, "value", None)
+    if overrides:
+        _thread_settings_override.value = dict(previous or {}, **overrides)
+    try:
+        yield
+    finally:
+        _thread_settings_override.value = previous
+
+
+def get_browser_settings_override():
+    """上書き設定のコピーを返す（スレッドごとの上書きを優先）"""
+    return dict(_browser_settings_override, **(getattr(_thread_settings_override, "value", None) or {}))
+
 
 def take_screenshot_if_enabled(driver, save_path):
     """
@@ -679,7 +671,8 @@ def take_screenshot_if_enabled(driver, save_path):
         logging.info(f"スクリーンショット無効のためスキップ: {save_path}")
         return None
     try:
-        return _take_full_page_screenshot_impl(driver, save_path)
+        with trace_span("screenshot"):
+            return _take_full_page_screenshot_impl(driver, save_path)
     except Exception as e:
         logging.warning(f"スクリーンショット取得に失敗しました: {e}")
         return None
@@ -699,9 +692,10 @@ def _take_full_page_screenshot_impl(driver, save_path):
         save_path (str): スクリーンショットの保存パス
 
     Returns:
-        str: 保存されたスクリーンショットの絶対パス
+        str: スクリーンショットの保存先の絶対パス（圧縮・書き込みはバックグラウンドで行うため、
+            戻った時点ではまだ保存中の場合がある。拡張子は設定の保存形式に合わせて変わる）
     """
-    def _wait_for_visual_stability(max_wait_sec=2.5, interval_sec=0.2, stable_required=2):
+    def _wait_for_visual_stability(max_wait_sec=0.8, interval_sec=0.1, stable_required=1):
         deadline = time.time() + max_wait_sec
         stable_count = 0
         previous_metrics = None
@@ -737,15 +731,12 @@ def _take_full_page_screenshot_impl(driver, save_path):
                     break
 
             previous_metrics = metrics
-            time.sleep(interval_sec)
+            cancellable_sleep(interval_sec)
 
     # キャンセルチェック（スクリーンショット開始前）
     check_cancellation()
 
-    save_path = os.path.abspath(save_path)
-    save_dir = os.path.dirname(save_path)
-    if save_dir:
-        os.makedirs(save_dir, exist_ok=True)
+    writer = get_screenshot_writer()
 
     # 元のウィンドウサイズと位置、スクロール位置を保存
     original_size = None
@@ -804,11 +795,10 @@ def _take_full_page_screenshot_impl(driver, save_path):
                 }
             )
 
-            with open(save_path, "wb") as f:
-                f.write(base64.b64decode(screenshot_data["data"]))
-
-            if os.path.exists(save_path) and os.path.getsize(save_path) > 0:
-                return save_path
+            raw_png = base64.b64decode(screenshot_data["data"])
+            if raw_png:
+                # 圧縮とファイル書き込みは結果を返した後にバックグラウンドで行う
+                return writer.submit(raw_png, save_path)
         except Exception as cdp_error:
             logging.warning(f"CDPフルページ撮影に失敗したためフォールバックします: {cdp_error}")
 
@@ -827,12 +817,12 @@ def _take_full_page_screenshot_impl(driver, save_path):
         driver.set_window_size(fallback_width, fallback_height)
         driver.execute_script("window.scrollTo(0, 0);")
         _wait_for_visual_stability(max_wait_sec=1.5, interval_sec=0.15, stable_required=1)
-        driver.save_screenshot(save_path)
+        raw_png = driver.get_screenshot_as_png()
 
-        if not (os.path.exists(save_path) and os.path.getsize(save_path) > 0):
-            raise RuntimeError("フォールバック撮影で画像ファイルを保存できませんでした")
+        if not raw_png:
+            raise RuntimeError("フォールバック撮影で画像を取得できませんでした")
 
-        return save_path
+        return writer.submit(raw_png, save_path)
 
     finally:
         # スクリーンショット用の一時styleを除去
@@ -862,7 +852,8 @@ def take_full_page_screenshot(driver, save_path):
     """互換ラッパ: settings の enable_screenshots を見て実行/スキップする"""
     return take_screenshot_if_enabled(driver, save_path)
 
-def search_service_area(postal_code, address, progress_callback=None):
+def search_service_area(postal_code, address, progress_callback=None, force_refresh=False, engine=None,
+                        cancel_token=None, browser_overrides=None):
     """
     提供エリア検索を実行する関数
     
@@ -870,21 +861,89 @@ def search_service_area(postal_code, address, progress_callback=None):
         postal_code (str): 郵便番号
         address (str): 住所
         progress_callback (callable): 進捗状況を通知するコールバック関数
+        force_refresh (bool): Trueの場合はキャッシュを使わずに再検索する
+        engine (str): 西日本の検索エンジン（"selenium"/"http"）。Noneの場合は設定に従う
+        cancel_token (CancelToken): この検索のキャンセルトークン（services.cancellation）
+        browser_overrides (dict): この検索だけに適用する browser_settings の上書き（例：{"headless": True}）
         
     Returns:
         dict: 検索結果を含む辞書
     """
+    trace = start_trace()
+    trace.mark("prepare")
+    try:
+        with use_token(cancel_token), use_browser_settings_override(browser_overrides):
+            result = _search_service_area(postal_code, address, progress_callback, force_refresh, engine)
+    except CancellationError:
+        finish_trace("cancelled", ok=False)
+        raise
+    except BaseException:
+        finish_trace("exception", ok=False)
+        raise
+    finally:
+        if cancel_token is not None:
+            cancel_token.release_drivers()
+    finish_trace(result.get("status") if isinstance(result, dict) else None,
+                 cached=bool(isinstance(result, dict) and result.get("cached")))
+    return result
+
+
+def _search_service_area(postal_code, address, progress_callback=None, force_refresh=False, engine=None):
+    """search_service_area の本体（キャッシュ確認・整合性確認・東西の振り分け）"""
+    cache = get_area_search_cache()
+    if force_refresh:
+        logging.info("強制再検索: キャッシュを使用しません")
+        cache.record_bypass()
+    else:
+        cached_result = cache.get(postal_code, address)
+        if cached_result is not None:
+            set_trace_site("cache")
+            if progress_callback:
+                progress_callback("キャッシュから検索結果を取得しました")
+            return cached_result
+
+    # ブラウザを起動する前に郵便番号と住所の整合性を確認する
+    postal_check = check_postal_address(postal_code, address)
+    if postal_check["consistent"] is False:
+        logging.warning(f"郵便番号と住所が一致しません: {postal_check['message']}")
+        if postal_check["level"] == "prefecture":
+            return {
+                "status": "error",
+                "message": "郵便番号と住所の都道府県が一致しません",
+                "details": {
+                    "判定結果": "エラー",
+                    "提供エリア": "判定できません",
+                    "備考": f"{postal_check['message']}。郵便番号と住所を確認してください"
+                },
+                "show_popup": True
+            }
+    elif not postal_check["known"]:
+        logging.info("郵便番号が索引にないため、整合性の確認をスキップします")
+
+    # 都道府県が省略された住所は郵便番号から補完する
+    search_address = address
+    if parse_address(address).prefecture is None:
+        prefecture = infer_prefecture(postal_code)
+        if prefecture:
+            logging.info(f"郵便番号から都道府県を補完しました: {prefecture}")
+            search_address = f"{prefecture}{address}"
+
     # 東日本か西日本かを判定
-    if is_east_japan(address):
+    if is_east_japan(search_address, postal_code):
         logging.info("東日本の提供エリア検索を実行します")
+        set_trace_site("east")
         # 東日本の検索機能を動的にインポート
         from services.area_search_east import search_service_area as search_service_area_east
-        return search_service_area_east(postal_code, address, progress_callback)
+        result = search_service_area_east(postal_code, search_address, progress_callback)
     else:
         logging.info("西日本の提供エリア検索を実行します")
-        return search_service_area_west(postal_code, address, progress_callback)
+        set_trace_site("west")
+        result = search_service_area_west(postal_code, search_address, progress_callback, engine=engine)
 
-def search_service_area_west(postal_code, address, progress_callback=None):
+    cache.set(postal_code, address, result)
+    return result
+
+def search_service_area_west(postal_code, address, progress_callback=None, engine=None, cancel_token=None):
     """
     NTT西日本の提供エリア検索を実行する関数
     
@@ -892,10 +951,18 @@ def search_service_area_west(postal_code, address, progress_callback=None):
         postal_code (str): 郵便番号
         address (str): 住所
         progress_callback (callable): 進捗状況を通知するコールバック関数
+        engine (str): 検索エンジン（"selenium"/"http"）。Noneの場合は settings.json の west_search_engine に従う
+        cancel_token (CancelToken): この検索のキャンセルトークン（Noneの場合は呼び出し元のトークン）
         
     Returns:
         dict: 検索結果を含む辞書
     """
+    with use_token(cancel_token):
+        return _search_service_area_west(postal_code, address, progress_callback, engine)
+
+
+def _search_service_area_west(postal_code, address, progress_callback=None, engine=None):
+    """search_service_area_west の本体"""
     global global_driver
     
     # キャンセルフラグをリセット
@@ -981,6 +1048,7 @@ def search_service_area_west(postal_code, address, progress_callback=None):
             "page_load_timeout": 60,
             "script_timeout": 60
         }
+    browser_settings.update(get_browser_settings_override())
     
     # ヘッドレスモードの設定を取得
     headless_mode = browser_settings.get("headless", False)
@@ -988,33 +1056,66 @@ def search_service_area_west(postal_code, address, progress_callback=None):
     show_popup = browser_settings.get("show_popup", True)
     # ブラウザ自動終了設定を取得
     auto_close = browser_settings.get("auto_close", True)
+    # False の場合（先行判定など）、このブラウザは検索後に終了し、表示中の検索のブラウザには触れない
+    keep_browser = browser_settings.get("keep_browser", True)
     # タイムアウト設定を取得
     page_load_timeout = browser_settings.get("page_load_timeout", 60)
     script_timeout = browser_settings.get("script_timeout", 60)
     
     logging.info(f"ブラウザ設定 - ヘッドレス: {headless_mode}, ポップアップ表示: {show_popup}, 自動終了: {auto_close}")
 
+    # HTTPエンジンが選択されている場合はブラウザを起動せずに判定する
+    from services.area_search_http import (
+        UnexpectedResponseError,
+        resolve_west_engine,
+        search_service_area_west_http,
+    )
+    if resolve_west_engine(engine) == "http":
+        set_trace_site("west_http")
+        trace_mark("http_search")
+        try:
+            return search_service_area_west_http(
+                postal_code_clean, address_parts, progress_callback, show_popup
+            )
+        except UnexpectedResponseError as e:
+            logging.warning(f"HTTPエンジンで判定できなかったためブラウザで再実行します: {str(e)}")
+            set_trace_site("west")
+
     # 自動終了が有効な場合、次の提供判定開始時に前回ブラウザを閉じる
-    if auto_close and global_driver is not None:
+    if auto_close and keep_browser and global_driver is not None:
         logging.info("自動終了設定: 前回の提供判定ブラウザを終了します")
         close_global_driver()
     
     driver = None
+    waiter = None
     try:
         # ドライバー作成前にキャンセルチェック（最速対応）
         check_cancellation()
         
+        trace_mark("browser_start")
         if progress_callback:
             progress_callback("ブラウザを起動中...")
         
-        # ドライバーを作成してサイトを開く
-        driver = create_driver(headless=headless_mode)
+        # ドライバープールが有効な場合はサイト表示済みのドライバーを借りる
+        driver_pool = get_driver_pool("west", create_driver, headless_mode, page_load_timeout, script_timeout)
+        driver, page_prewarmed = driver_pool.acquire() if driver_pool else (None, False)
+        
+        # 再起動前から残っているブラウザがあれば使い、なければドライバーを作成してサイトを開く
+        if driver is None:
+            driver, page_prewarmed = claim_restored_driver("west", headless_mode)
+            if driver is None:
+                driver = create_driver(headless=headless_mode)
+            if driver_pool:
+                driver_pool.adopt(driver)
         
-        # ドライバー作成直後にキャンセルチェック
+        # キャンセル時にプロセスごと終了できるよう登録し、作成直後にキャンセルチェック
+        register_driver(driver)
         check_cancellation()
         
         # グローバル変数に保存
-        global_driver = driver
+        if keep_browser:
+            global_driver = driver
+        attach_replay_recorder(driver, "west")
         
         # タイムアウト設定適用前にキャンセルチェック
         check_cancellation()
@@ -1024,22 +1125,28 @@ def search_service_area_west(postal_code, address, progress_callback=None):
         driver.set_script_timeout(script_timeout)
         
         driver.implicitly_wait(0)  # 暗黙の待機を無効化
+        waiter = PageWaiter(driver, "west", check_cancellation)
         
         # サイトアクセス前にキャンセルチェック
         check_cancellation()
         
+        trace_mark("page_load")
         if progress_callback:
             progress_callback("NTT西日本サイトにアクセス中...")
         
-        # サイトにアクセス
-        driver.get("https://flets-w.com/cart/")
-        logging.info("NTT西日本のサイトにアクセスしています...")
+        # サイトにアクセス（プールから借りた場合は表示済み）
+        if page_prewarmed:
+            logging.info("NTT西日本のサイトは表示済みのため郵便番号入力から開始します")
+        else:
+            driver.get(get_site_url("west"))
+            logging.info("NTT西日本のサイトにアクセスしています...")
         
         # サイトアクセス直後にキャンセルチェック
         check_cancellation()
         
         # 2. 郵便番号を入力
         try:
+            trace_mark("postal_input")
             if progress_callback:
                 progress_callback("郵便番号入力フィールドを検索中...")
             
@@ -1047,7 +1154,7 @@ def search_service_area_west(postal_code, address, progress_callback=None):
             check_cancellation()
             
             # 郵便番号入力フィールドが操作可能になるまで待機
-            zip_field = WebDriverWait(driver, 10).until(
+            zip_field = CancellableWait(driver, 10).until(
                 lambda d: d.find_element(By.XPATH, "//*[@id='id_tak_tx_ybk_yb']") if d.execute_script("return document.readyState") == "complete" else None
             )
             
@@ -1074,7 +1181,7 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                     # キャンセル例外は再発生
                     raise
                 except:
-                    time.sleep(0.1)
+                    cancellable_sleep(0.1)
                     continue
             
         except Exception as e:
@@ -1092,7 +1199,7 @@ def search_service_area_west(postal_code, address, progress_callback=None):
             # 検索ボタン操作前にキャンセルチェック
             check_cancellation()
             
-            search_button = WebDriverWait(driver, 5).until(
+            search_button = CancellableWait(driver, 5).until(
                 EC.element_to_be_clickable((By.XPATH, "//*[@id='id_tak_bt_ybk_jks']"))
             )
             
@@ -1114,6 +1221,7 @@ def search_service_area_west(postal_code, address, progress_callback=None):
         
         # 住所候補が表示されるのを待つ（最大10秒）
         try:
+            trace_mark("candidate_selection")
             if progress_callback:
                 progress_callback("基本住所の候補を検索中...")
             
@@ -1121,7 +1229,7 @@ def search_service_area_west(postal_code, address, progress_callback=None):
             check_cancellation()
             
             # 住所選択モーダルが表示されるまで待機
-            WebDriverWait(driver, 10).until(
+            CancellableWait(driver, 10).until(
                 EC.visibility_of_element_located((By.ID, "addressSelectModal"))
             )
             logging.info("住所選択モーダルが表示されました")
@@ -1130,12 +1238,12 @@ def search_service_area_west(postal_code, address, progress_callback=None):
             check_cancellation()
             
             # モーダル内のリストが表示されるまで待機
-            WebDriverWait(driver, 5).until(
+            CancellableWait(driver, 5).until(
                 EC.presence_of_all_elements_located((By.CSS_SELECTOR, "#addressSelectModal ul li a"))
             )
             
             # 候補リストを取得（最適化された方法）
-            candidates = driver.find_elements(By.CSS_SELECTOR, "#addressSelectModal ul li a")
+            candidates = probe_elements(driver, "#addressSelectModal ul li a")
             logging.info(f"{len(candidates)} 件の候補が見つかりました")
             
             # 候補の内容をログ出力
@@ -1186,7 +1294,7 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                 
                 # 選択された住所でクリックを実行
                 try:
-                    WebDriverWait(driver, 3).until(EC.element_to_be_clickable(best_candidate))
+                    CancellableWait(driver, 3).until(EC.element_to_be_clickable(best_candidate))
                     
                     # キャンセルチェック
                     check_cancellation()
@@ -1207,7 +1315,7 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                 raise ValueError("適切な住所候補が見つかりませんでした")
             
             # 住所選択後の読み込みを待つ
-            WebDriverWait(driver, 10).until(
+            CancellableWait(driver, 10).until(
                 EC.invisibility_of_element_located((By.ID, "addressSelectModal"))
             )
             logging.info("住所選択モーダルが閉じられました")
@@ -1217,6 +1325,7 @@ def search_service_area_west(postal_code, address, progress_callback=None):
             
             # 5. 番地入力画面が表示された場合は、番地を入力
             try:
+                trace_mark("banchi_dialog")
                 if progress_callback:
                     progress_callback("番地を入力中...")
                 
@@ -1238,19 +1347,17 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                         "[id*='loading']",
                         "[class*='loading']",
                     ]
-                    for selector in loading_selectors:
-                        try:
-                            for elem in driver.find_elements(By.CSS_SELECTOR, selector):
-                                if elem.is_displayed():
-                                    return True
-                        except Exception:
-                            continue
+                    try:
+                        if any_visible(driver, loading_selectors):
+                            return True
+                    except Exception:
+                        pass
 
                     return False
 
                 def get_clickable_final_search_button_quick():
                     try:
-                        buttons = driver.find_elements(By.ID, "id_tak_bt_nx")
+                        buttons = probe_elements(driver, "#id_tak_bt_nx", visible_only=True)
                         for button in buttons:
                             try:
                                 if button.is_displayed() and button.is_enabled():
@@ -1283,10 +1390,10 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                             next_deadline = min(max_deadline, time.time() + 20)
                             if next_deadline > deadline:
                                 deadline = next_deadline
-                            time.sleep(0.4)
+                            waiter.wait_for_change(0.4, step="番地モーダル読み込み中", baseline=0.4, min_interval=0.2)
                             continue
 
-                        time.sleep(0.2)
+                        waiter.wait_for_change(0.2, step="番地モーダル/検索結果確認ボタンの待機", baseline=0.2)
 
                     raise TimeoutException("番地入力モーダル/検索結果確認ボタンの待機がタイムアウトしました")
 
@@ -1308,7 +1415,7 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                     if number_prefix:
                         logging.info(f"番地が未指定のため、接頭語「{number_prefix}」を優先して選択します")
                         try:
-                            all_buttons = driver.find_elements(By.XPATH, "//dialog[@id='DIALOG_ID01']//a")
+                            all_buttons = probe_elements(driver, "dialog[id='DIALOG_ID01'] a")
                             logging.info(f"全ての番地ボタン数: {len(all_buttons)}")
 
                             prefix_button = None
@@ -1331,7 +1438,7 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                                 raise ValueError("接頭語および番地なしボタンが見つかりませんでした")
 
                             driver.execute_script("arguments[0].scrollIntoView(true);", target_button)
-                            time.sleep(0.2)
+                            waiter.settle(0.2, step="番地ボタンのスクロール", baseline=0.2)
 
                             try:
                                 target_button.click()
@@ -1341,7 +1448,7 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                                 logging.info("JavaScriptで接頭語/番地なしを選択しました")
 
                             selected_banchi_text = number_prefix if prefix_button else "番地なし"
-                            time.sleep(0.5)
+                            waiter.wait_for_hidden("#DIALOG_ID01", 0.5, step="接頭語/番地なし選択後", baseline=0.5)
 
                         except Exception as e:
                             logging.error(f"接頭語選択に失敗したため番地なしへフォールバック: {str(e)}")
@@ -1351,13 +1458,13 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                         logging.info("番地が指定されていないため、「（番地なし）」を選択します")
                         try:
                             # 「（番地なし）」のリンクを探す
-                            no_address_link = WebDriverWait(driver, 5).until(
+                            no_address_link = CancellableWait(driver, 5).until(
                                 EC.element_to_be_clickable((By.XPATH, "//dialog[@id='DIALOG_ID01']//a[contains(text(), '（番地なし）')]"))
                             )
                             
                             # スクロールしてリンクを表示
                             driver.execute_script("arguments[0].scrollIntoView(true);", no_address_link)
-                            time.sleep(0.2)
+                            waiter.settle(0.2, step="番地なしボタンのスクロール", baseline=0.2)
                             
                             # クリックを試行（複数の方法）
                             try:
@@ -1374,12 +1481,12 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                                     logging.info("ActionChainsでクリックしました")
                             
                             # クリック後の待機
-                            time.sleep(0.5)
+                            waiter.wait_for_hidden("#DIALOG_ID01", 0.5, step="番地なし選択後", baseline=0.5)
                             selected_banchi_text = "番地なし"
                             
                         except Exception as e:
                             logging.error(f"「（番地なし）」の選択に失敗: {str(e)}")
-                            driver.save_screenshot("debug_no_address_error.png")
+                            save_viewport_screenshot(driver, "debug_no_address_error.png")
                             raise
                 else:
                     # 番地を入力
@@ -1413,7 +1520,7 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                     # 番地ボタンを探す
                     try:
                         # 全ての番地ボタンを取得
-                        all_buttons = driver.find_elements(By.XPATH, "//dialog[@id='DIALOG_ID01']//a")
+                        all_buttons = probe_elements(driver, "dialog[id='DIALOG_ID01'] a")
                         logging.info(f"全ての番地ボタン数: {len(all_buttons)}")
                         
                         # キャンセルチェック
@@ -1495,7 +1602,7 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                                 # キャンセルチェック（待機前）
                                 check_cancellation()
                                 
-                                time.sleep(1)
+                                waiter.settle(1, step="番地ボタンのスクロール", baseline=1)
                                 
                                 # キャンセルチェック（クリック前）
                                 check_cancellation()
@@ -1523,22 +1630,19 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                                 raise
                         else:
                             logging.error("適切なボタンが見つかりませんでした")
-                            driver.save_screenshot("debug_banchi_not_found.png")
+                            save_viewport_screenshot(driver, "debug_banchi_not_found.png")
                             raise ValueError("適切なボタンが見つかりませんでした")
                             
                     except Exception as e:
                         logging.error(f"番地選択処理中にエラー: {str(e)}")
-                        driver.save_screenshot("debug_banchi_error.png")
+                        save_viewport_screenshot(driver, "debug_banchi_error.png")
                         logging.info("エラー発生時のスクリーンショットを保存しました")
                         raise
                     
                 # 番地入力後の読み込みを待つ
-                try:
-                    WebDriverWait(driver, 10).until(
-                        EC.invisibility_of_element_located((By.ID, "DIALOG_ID01"))
-                    )
+                if waiter.wait_for_hidden("#DIALOG_ID01", 10, step="番地入力ダイアログを閉じる"):
                     logging.info("番地入力ダイアログが閉じられました")
-                except TimeoutException:
+                else:
                     logging.warning("番地入力ダイアログが閉じられるのを待機中にタイムアウト")
                     # ダイアログが閉じられない場合でも処理を続行
                 
@@ -1546,11 +1650,11 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                 logging.info("番地入力画面はスキップされました")
                 early_clicked = False
                 try:
-                    early_final_button = WebDriverWait(driver, 1).until(
+                    early_final_button = CancellableWait(driver, 1).until(
                         EC.element_to_be_clickable((By.ID, "id_tak_bt_nx"))
                     )
                     driver.execute_script("arguments[0].scrollIntoView(true);", early_final_button)
-                    time.sleep(0.1)
+                    waiter.settle(0.1, step="検索結果確認ボタンのスクロール", baseline=0.1)
                     early_final_button.click()
                     final_search_clicked_early = True
                     number_dialog_wait_timeout = 1
@@ -1568,12 +1672,13 @@ def search_service_area_west(postal_code, address, progress_callback=None):
 
             # 6. 号入力画面が表示された場合は、号を入力
             try:
+                trace_mark("gou_dialog")
                 if progress_callback:
                     progress_callback("号を入力中...")
 
                 def get_visible_number_dialog_ids():
                     ids = []
-                    dialogs = driver.find_elements(By.XPATH, "//dialog[starts-with(@id, 'DIALOG_ID0')]")
+                    dialogs = probe_elements(driver, "dialog[id^='DIALOG_ID0']", ("id",))
                     for dialog in dialogs:
                         try:
                             dialog_id = (dialog.get_attribute("id") or "").strip()
@@ -1587,7 +1692,7 @@ def search_service_area_west(postal_code, address, progress_callback=None):
 
                 def get_visible_dialog_ids_for_recovery():
                     ids = []
-                    dialogs = driver.find_elements(By.XPATH, "//dialog[starts-with(@id, 'DIALOG_ID0')]")
+                    dialogs = probe_elements(driver, "dialog[id^='DIALOG_ID0']", ("id",))
                     for dialog in dialogs:
                         try:
                             dialog_id = (dialog.get_attribute("id") or "").strip()
@@ -1601,7 +1706,7 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                     excluded = set(exclude_ids or [])
 
                     def _find_visible(_):
-                        dialogs = driver.find_elements(By.XPATH, "//dialog[starts-with(@id, 'DIALOG_ID0')]")
+                        dialogs = probe_elements(driver, "dialog[id^='DIALOG_ID0']", ("id",))
                         for dialog in dialogs:
                             try:
                                 dialog_id = (dialog.get_attribute("id") or "").strip()
@@ -1613,11 +1718,11 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                                 continue
                         return False
 
-                    return WebDriverWait(driver, timeout).until(_find_visible)
+                    return CancellableWait(driver, timeout).until(_find_visible)
 
                 def get_clickable_final_search_button(timeout=0.5):
                     try:
-                        return WebDriverWait(driver, timeout).until(
+                        return CancellableWait(driver, timeout).until(
                             EC.element_to_be_clickable((By.ID, "id_tak_bt_nx"))
                         )
                     except Exception:
@@ -1631,7 +1736,7 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                         if button is not None:
                             return ("final", button)
 
-                        dialogs = driver.find_elements(By.XPATH, "//dialog[starts-with(@id, 'DIALOG_ID0')]")
+                        dialogs = probe_elements(driver, "dialog[id^='DIALOG_ID0']", ("id",))
                         for dialog in dialogs:
                             try:
                                 dialog_id = (dialog.get_attribute("id") or "").strip()
@@ -1643,11 +1748,11 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                                 continue
                         return False
 
-                    return WebDriverWait(driver, timeout).until(_find_visible)
+                    return CancellableWait(driver, timeout).until(_find_visible)
 
                 def is_number_modal_loading_started():
                     try:
-                        dialogs = driver.find_elements(By.XPATH, "//dialog[starts-with(@id, 'DIALOG_ID0')]")
+                        dialogs = probe_elements(driver, "dialog[id^='DIALOG_ID0']", ("id",))
                         for dialog in dialogs:
                             try:
                                 dialog_id = (dialog.get_attribute("id") or "").strip()
@@ -1666,16 +1771,11 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                         "[class*='loading']",
                         "[aria-busy='true']",
                     ]
-                    for selector in loading_selectors:
-                        try:
-                            for elem in driver.find_elements(By.CSS_SELECTOR, selector):
-                                try:
-                                    if elem.is_displayed():
-                                        return True
-                                except Exception:
-                                    continue
-                        except Exception:
-                            continue
+                    try:
+                        if any_visible(driver, loading_selectors):
+                            return True
+                    except Exception:
+                        pass
 
                     return False
 
@@ -1752,7 +1852,7 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                         logging.info(f"{phase_name}の指定がないため、なし系ボタンを優先します")
 
                     # 全ての号ボタンを取得
-                    all_buttons = driver.find_elements(By.XPATH, f"//dialog[@id='{dialog_id}']//a")
+                    all_buttons = probe_elements(driver, f"dialog[id='{dialog_id}'] a")
                     logging.info(f"全ての号ボタン数({phase_name}, {dialog_id}): {len(all_buttons)}")
 
                     # キャンセルチェック
@@ -1842,7 +1942,7 @@ def search_service_area_west(postal_code, address, progress_callback=None):
 
                     if not target_button:
                         logging.error(f"適切なボタンが見つかりませんでした: {phase_name}")
-                        driver.save_screenshot("debug_gou_not_found.png")
+                        save_viewport_screenshot(driver, "debug_gou_not_found.png")
                         raise ValueError("適切なボタンが見つかりませんでした")
 
                     # クリック実行
@@ -1856,7 +1956,7 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                         # キャンセルチェック（待機前）
                         check_cancellation()
 
-                        time.sleep(1)
+                        waiter.settle(1, step=f"{phase_name}ボタンのスクロール", baseline=1)
 
                         # キャンセルチェック（クリック前）
                         check_cancellation()
@@ -1877,7 +1977,7 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                                 logging.info(f"ActionChainsでクリックしました（{phase_name}）")
 
                         check_cancellation()
-                        time.sleep(2)
+                        waiter.wait_for_hidden(f"#{dialog_id}", 2, step=f"{phase_name}選択後", baseline=2)
                     except Exception as e:
                         logging.error(f"ボタンのクリックに失敗: {str(e)}")
                         raise
@@ -1956,7 +2056,7 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                         
                 except Exception as e:
                     logging.error(f"号選択処理中にエラー: {str(e)}")
-                    driver.save_screenshot("debug_gou_error.png")
+                    save_viewport_screenshot(driver, "debug_gou_error.png")
                     logging.info("エラー発生時のスクリーンショットを保存しました")
                     raise
                 
@@ -1969,7 +2069,7 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                             return "final_ready"
                         return False
 
-                    wait_state = WebDriverWait(driver, 10).until(_dialogs_closed_or_final_ready)
+                    wait_state = CancellableWait(driver, 10).until(_dialogs_closed_or_final_ready)
                     if wait_state == "final_ready":
                         logging.info("号入力ダイアログの閉鎖待機中に検索結果確認ボタンが利用可能になったため先に進みます")
                     else:
@@ -1995,6 +2095,7 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                 return result
             # 7. 結果の判定
             try:
+                trace_mark("result_detection")
                 if progress_callback:
                     progress_callback("検索結果を確認中...")
                 
@@ -2015,10 +2116,8 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                             "not_provided",
                         ]
                         alt_keywords = ["提供可能", "提供不可", "未提供", "住所を特定できないため、担当者がお調べします"]
-                        for image in driver.find_elements(By.TAG_NAME, "img"):
+                        for image in probe_elements(driver, "img", ("src", "alt"), visible_only=True):
                             try:
-                                if not image.is_displayed():
-                                    continue
                                 src = (image.get_attribute("src") or "").lower()
                                 alt = (image.get_attribute("alt") or "")
                                 if any(keyword in src for keyword in result_keywords) or any(keyword in alt for keyword in alt_keywords):
@@ -2031,7 +2130,7 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                         check_cancellation()
                         driver.execute_script("arguments[0].scrollIntoView(true);", button)
                         check_cancellation()
-                        time.sleep(0.2)
+                        waiter.settle(0.2, step="検索結果確認ボタンのスクロール", baseline=0.2)
                         check_cancellation()
                         try:
                             button.click()
@@ -2048,7 +2147,7 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                                 return False
 
                     def recover_number_dialog(dialog_id, recovery_target, recovery_phase):
-                        all_buttons = driver.find_elements(By.XPATH, f"//dialog[@id='{dialog_id}']//a")
+                        all_buttons = probe_elements(driver, f"dialog[id='{dialog_id}'] a")
                         if not all_buttons:
                             raise TimeoutException(f"再開対象ダイアログ {dialog_id} に候補ボタンがありません")
 
@@ -2077,12 +2176,12 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                             raise TimeoutException(f"再開対象ダイアログ {dialog_id} で選択可能な候補がありません")
 
                         driver.execute_script("arguments[0].scrollIntoView(true);", target_button)
-                        time.sleep(0.2)
+                        waiter.settle(0.2, step=f"{recovery_phase}ボタンのスクロール", baseline=0.2)
                         try:
                             target_button.click()
                         except Exception:
                             driver.execute_script("arguments[0].click();", target_button)
-                        time.sleep(0.5)
+                        waiter.wait_for_hidden(f"#{dialog_id}", 0.5, step=f"{recovery_phase}選択後", baseline=0.5)
 
                     def is_ui_loading_for_recovery():
                         loading_selectors = [
@@ -2093,28 +2192,16 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                             "[class*='loading']",
                             "[aria-busy='true']",
                         ]
-                        for selector in loading_selectors:
-                            try:
-                                for elem in driver.find_elements(By.CSS_SELECTOR, selector):
-                                    try:
-                                        if elem.is_displayed():
-                                            return True
-                                    except Exception:
-                                        continue
-                            except Exception:
-                                continue
+                        try:
+                            if any_visible(driver, loading_selectors):
+                                return True
+                        except Exception:
+                            pass
 
                         try:
-                            dialogs = driver.find_elements(By.XPATH, "//dialog[starts-with(@id, 'DIALOG_ID0')]")
-                            for dialog in dialogs:
-                                try:
-                                    if not dialog.is_displayed():
-                                        continue
-                                    anchors = dialog.find_elements(By.TAG_NAME, "a")
-                                    if len(anchors) == 0:
-                                        return True
-                                except Exception:
-                                    continue
+                            for dialog in probe_elements(driver, "dialog[id^='DIALOG_ID0']", ("id",), visible_only=True):
+                                if not probe_elements(driver, "a", root=dialog):
+                                    return True
                         except Exception:
                             pass
 
@@ -2134,11 +2221,11 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                     if final_search_button is None:
                         try:
                             if prefetched_button_invalid:
-                                final_search_button = WebDriverWait(driver, 1).until(
+                                final_search_button = CancellableWait(driver, 1).until(
                                     EC.element_to_be_clickable((By.ID, "id_tak_bt_nx"))
                                 )
                             else:
-                                final_search_button = WebDriverWait(driver, 8).until(
+                                final_search_button = CancellableWait(driver, 8).until(
                                     EC.element_to_be_clickable((By.ID, "id_tak_bt_nx"))
                                 )
                         except TimeoutException:
@@ -2147,12 +2234,12 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                     else:
                         try:
                             if not final_search_button.is_displayed():
-                                final_search_button = WebDriverWait(driver, 1).until(
+                                final_search_button = CancellableWait(driver, 1).until(
                                     EC.element_to_be_clickable((By.ID, "id_tak_bt_nx"))
                                 )
                         except Exception:
                             try:
-                                final_search_button = WebDriverWait(driver, 1).until(
+                                final_search_button = CancellableWait(driver, 1).until(
                                     EC.element_to_be_clickable((By.ID, "id_tak_bt_nx"))
                                 )
                             except TimeoutException:
@@ -2181,7 +2268,7 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                             check_cancellation()
 
                             try:
-                                retry_button = WebDriverWait(driver, 0.6).until(
+                                retry_button = CancellableWait(driver, 0.6).until(
                                     EC.element_to_be_clickable((By.ID, "id_tak_bt_nx"))
                                 )
                                 if click_final_search_button(retry_button):
@@ -2231,10 +2318,10 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                                 if next_deadline > recovery_deadline:
                                     recovery_deadline = next_deadline
                                 logging.info("回復処理: 画面読み込み中のため待機を継続します")
-                                time.sleep(0.6)
+                                waiter.wait_for_change(0.6, step="回復処理: 読み込み待機", baseline=0.6, min_interval=0.3)
                                 continue
 
-                            time.sleep(0.3)
+                            waiter.wait_for_change(0.3, step="回復処理: 画面状態の待機", baseline=0.3, min_interval=0.15)
 
                         if not recovered:
                             raise TimeoutException("検索結果確認ボタンを検出できず、画面状態から処理を再開できませんでした")
@@ -2245,68 +2332,22 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                 check_cancellation()
                 
                 # クリック後の画面遷移待機（短縮、以降は画像ポーリングで待機）
-                time.sleep(0.2)
+                waiter.wait_for_change(0.2, step="検索結果画面への遷移", baseline=0.2)
                 
                 # キャンセルチェック（画像確認前）
                 check_cancellation()
                 
                 # 提供可否の画像を確認
                 try:
-                    # 提供可能、調査中、提供不可の画像パターンを定義
-                    image_patterns = {
-                        "available": {
-                            "src_contains": [
-                                "img_available_03.png",
-                                "available"
-                            ],
-                            "alt_contains": ["提供可能"],
-                            "status": "available",
-                            "message": "提供可能",
-                            "details": {
-                                "判定結果": "OK",
-                                "提供エリア": "提供可能エリアです",
-                                "備考": "フレッツ光のサービスがご利用いただけます"
-                            }
-                        },
-                        "investigation": {
-                            "src_contains": [
-                                "img_investigation_03",
-                                "investigation"
-                            ],
-                            "alt_contains": [],
-                            "status": "failure",
-                            "message": "要手動再検索（住所をご確認ください）",
-                            "details": {
-                                "判定結果": "要手動再検索",
-                                "提供エリア": "調査が必要なエリアです",
-                                "備考": "建物名や枝番の影響で自動判定できない場合があります。住所を確認して手動で再検索してください"
-                            }
-                        },
-                        "not_provided": {
-                            "src_contains": [
-                                "img_not_provided",
-                                "not_provided"
-                            ],
-                            "alt_contains": ["提供不可", "未提供"],
-                            "status": "unavailable",
-                            "message": "未提供",
-                            "details": {
-                                "判定結果": "NG",
-                                "提供エリア": "提供対象外エリアです",
-                                "備考": "申し訳ございませんが、このエリアではサービスを提供しておりません"
-                            }
-                        }
-                    }
+                    image_patterns = RESULT_IMAGE_PATTERNS
                     
                     found_image = None
                     found_pattern = None
 
                     def detect_pattern_from_visible_images():
                         visible_images = []
-                        for image in driver.find_elements(By.TAG_NAME, "img"):
+                        for image in probe_elements(driver, "img", ("src", "alt"), visible_only=True):
                             try:
-                                if not image.is_displayed():
-                                    continue
                                 src = (image.get_attribute("src") or "")
                                 alt = (image.get_attribute("alt") or "")
                                 visible_images.append({
@@ -2326,10 +2367,12 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                                     return pattern_name, pattern_info, img_data
                         return None, None, None
 
-                    # 検索結果画像は遷移直後に遅れて表示されるため、短周期で一括ポーリング
+                    # 検索結果画像は遷移直後に遅れて表示されるため、表示を監視して判定する
                     detection_timeout_sec = 10
                     detection_interval_sec = 0.25
                     deadline = time.time() + detection_timeout_sec
+                    result_image_selectors = build_result_image_selectors(image_patterns)
+                    result_image_visible = False
 
                     while time.time() < deadline and not found_pattern:
                         check_cancellation()
@@ -2341,7 +2384,14 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                                 f"{pattern_name}の画像が見つかりました: src='{matched_image['src']}' alt='{matched_image['alt']}'"
                             )
                             break
-                        time.sleep(detection_interval_sec)
+                        remaining = max(0.0, deadline - time.time())
+                        if result_image_visible:
+                            # 画像は表示済みだが判定できなかった場合は短周期で再確認する
+                            waiter.wait_for_change(min(detection_interval_sec, remaining), step="結果画像の再確認")
+                        else:
+                            result_image_visible = waiter.wait_for(
+                                result_image_selectors, timeout=remaining, step="結果画像の表示"
+                            ) is not None
                     
                     if found_image and found_pattern:
                         # キャンセルチェック（スクリーンショット前）
@@ -2351,7 +2401,7 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                         screenshot_path = build_timestamped_screenshot_name(
                             f"debug_{found_pattern['status']}_confirmation"
                         )
-                        take_full_page_screenshot(driver, screenshot_path)
+                        screenshot_path = take_full_page_screenshot(driver, screenshot_path) or screenshot_path
                         result_message = f"{found_pattern['message']}状態が確認されました"
                         logging.info(f"{result_message} - スクリーンショットを保存しました")
                         
@@ -2369,7 +2419,7 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                         
                         # 提供不可時のスクリーンショットを保存
                         screenshot_path = build_timestamped_screenshot_name("debug_unavailable_confirmation")
-                        take_full_page_screenshot(driver, screenshot_path)
+                        screenshot_path = take_full_page_screenshot(driver, screenshot_path) or screenshot_path
                         logging.info("判定失敗と判定されました（画像非表示） - スクリーンショットを保存しました")
                         result = {
                             "status": "failure",
@@ -2390,7 +2440,7 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                 except TimeoutException:
                     # タイムアウト時のスクリーンショットを保存
                     screenshot_path = build_timestamped_screenshot_name("debug_timeout_confirmation")
-                    take_full_page_screenshot(driver, screenshot_path)
+                    screenshot_path = take_full_page_screenshot(driver, screenshot_path) or screenshot_path
                     logging.info("提供可能画像が見つかりませんでした - スクリーンショットを保存しました")
                     if progress_callback:
                         progress_callback("タイムアウトが発生しました")
@@ -2408,7 +2458,7 @@ def search_service_area_west(postal_code, address, progress_callback=None):
                 except Exception as e:
                     # エラー時のスクリーンショットを保存
                     screenshot_path = build_timestamped_screenshot_name("debug_error_confirmation")
-                    take_full_page_screenshot(driver, screenshot_path)
+                    screenshot_path = take_full_page_screenshot(driver, screenshot_path) or screenshot_path
                     logging.error(f"提供判定の確認中にエラー: {str(e)}")
                     if progress_callback:
                         progress_callback("エラーが発生しました")
@@ -2427,7 +2477,7 @@ def search_service_area_west(postal_code, address, progress_callback=None):
             except Exception as e:
                 logging.error(f"結果の判定中にエラー: {str(e)}")
                 screenshot_path = build_timestamped_screenshot_name("debug_result_error")
-                take_full_page_screenshot(driver, screenshot_path)
+                screenshot_path = take_full_page_screenshot(driver, screenshot_path) or screenshot_path
                 if progress_callback:
                     progress_callback("エラーが発生しました")
                 return {
@@ -2445,7 +2495,7 @@ def search_service_area_west(postal_code, address, progress_callback=None):
         except TimeoutException as e:
             logging.error(f"住所候補の表示待ちでタイムアウトしました: {str(e)}")
             screenshot_path = "debug_address_timeout.png"
-            take_full_page_screenshot(driver, screenshot_path)
+            screenshot_path = take_full_page_screenshot(driver, screenshot_path) or screenshot_path
             if progress_callback:
                 progress_callback("タイムアウトが発生しました")
             return {
@@ -2466,7 +2516,7 @@ def search_service_area_west(postal_code, address, progress_callback=None):
         except Exception as e:
             logging.error(f"住所選択処理中にエラーが発生しました: {str(e)}")
             screenshot_path = "debug_address_error.png"
-            take_full_page_screenshot(driver, screenshot_path)
+            screenshot_path = take_full_page_screenshot(driver, screenshot_path) or screenshot_path
             if progress_callback:
                 progress_callback("エラーが発生しました")
             return {
@@ -2486,10 +2536,12 @@ def search_service_area_west(postal_code, address, progress_callback=None):
         # キャンセル例外は再発生させて上位で処理
         raise
     except Exception as e:
+        # キャンセルでブラウザを終了した後の通信エラーはキャンセルとして扱う
+        check_cancellation()
         logging.error(f"自動化に失敗しました: {str(e)}")
         screenshot_path = "debug_general_error.png"
         if driver:
-            take_full_page_screenshot(driver, screenshot_path)
+            screenshot_path = take_full_page_screenshot(driver, screenshot_path) or screenshot_path
         if progress_callback:
             progress_callback("エラーが発生しました")
         return {
@@ -2505,8 +2557,13 @@ def search_service_area_west(postal_code, address, progress_callback=None):
         }
     
     finally:
-        # どのような場合でもブラウザは閉じない
-        if driver:
+        if waiter:
+            waiter.log_summary()
+        log_blocking_stats(driver)
+        # 残さない設定の検索以外はブラウザを閉じない
+        if driver and not keep_browser:
+            close_driver(driver)
+        elif driver:
             logging.info("ブラウザウィンドウを維持します - 手動で閉じてください")            # driver.quit() を呼び出さない
             # グローバル変数にドライバーを保持
             global_driver = driver
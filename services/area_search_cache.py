@@ -0,0 +1,325 @@
+"""
+提供エリア検索結果のキャッシュ
+
+このモジュールは、提供エリア検索（西日本・東日本）の結果を
+area_search_cache.db の area_cache テーブルに保存し、
+同じ住所の再検索時にブラウザを起動せずに結果を返すための機能を提供します。
+
+主な機能：
+- 正規化した住所（normalize_address + split_address）によるキー生成
+- 判定結果ごと（提供可能/未提供/判定失敗）の有効期限
+- 強制再検索（キャッシュのバイパス）
+- ヒット/ミス件数の集計
+
+制限事項：
+- error / cancelled の結果は保存しません
+- 有効期限は settings.json の area_search_cache で上書きできます
+"""
+
+import os
+import json
+import time
+import logging
+import sqlite3
+import threading
+from typing import Dict, Optional
+
+DEFAULT_DB_PATH = "area_search_cache.db"
+
+# 判定結果ごとの既定の有効期限（秒）
+DEFAULT_TTL_SECONDS = {
+    "available": 7 * 24 * 60 * 60,
+    "unavailable": 24 * 60 * 60,
+    "failure": 10 * 60,
+}
+
+# 検索結果のstatusとTTL区分の対応
+STATUS_TTL_GROUP = {
+    "available": "available",
+    "unavailable": "unavailable",
+    "apartment": "unavailable",
+    "failure": "failure",
+}
+
+
+def _load_cache_settings(path="settings.json"):
+    """
+    settings.json から area_search_cache 設定を読み込む。読めなければ空辞書を返す。
+    """
+    try:
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                cfg = json.load(f)
+                return cfg.get("area_search_cache", {}) or {}
+    except Exception as e:
+        logging.warning(f"キャッシュ設定の読み込みに失敗しました: {e}")
+    return {}
+
+
+def build_cache_key(postal_code, address):
+    """
+    郵便番号と住所からキャッシュキーを生成する
+
+    Args:
+        postal_code (str): 郵便番号
+        address (str): 住所
+
+    Returns:
+        tuple: (郵便番号7桁, 正規化住所キー)。生成できない場合はNone
+    """
+    from services.area_search import normalize_address, split_address
+
+    try:
+        postal_code_clean = normalize_address(postal_code or "").replace("-", "")
+        normalized = normalize_address(address or "").replace(" ", "")
+        if not postal_code_clean or not normalized:
+            return None
+
+        parts = split_address(normalized)
+        if not parts:
+            return postal_code_clean, normalized
+
+        key_fields = [
+            parts.get("prefecture"),
+            parts.get("city"),
+            parts.get("town"),
+            parts.get("block"),
+            parts.get("number"),
+            parts.get("number_prefix"),
+            parts.get("number_suffix"),
+        ]
+        return postal_code_clean, "|".join(field or "" for field in key_fields)
+    except Exception as e:
+        logging.warning(f"キャッシュキーの生成に失敗しました: {e}")
+        return None
+
+
+def _is_screenshot_pending(path):
+    """スクリーンショットがバックグラウンドで保存中かどうか"""
+    from services.screenshot_pipeline import get_screenshot_writer
+
+    return get_screenshot_writer().is_pending(path)
+
+
+class AreaSearchCache:
+    """提供エリア検索結果の永続キャッシュ"""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, ttl_seconds: Optional[Dict[str, float]] = None):
+        """
+        キャッシュの初期化
+
+        Args:
+            db_path (str): データベースファイルのパス
+            ttl_seconds (dict): 区分（available/unavailable/failure）ごとの有効期限（秒）
+        """
+        self.db_path = db_path
+        self.ttl_seconds = dict(DEFAULT_TTL_SECONDS)
+        if ttl_seconds:
+            self.ttl_seconds.update(ttl_seconds)
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "stores": 0, "bypassed": 0}
+        self.setup_database()
+
+    def setup_database(self) -> None:
+        """データベースのセットアップ"""
+        try:
+            db_dir = os.path.dirname(self.db_path)
+            if db_dir:
+                os.makedirs(db_dir, exist_ok=True)
+
+            with sqlite3.connect(self.db_path, timeout=30) as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS area_cache (
+                        postal_code TEXT,
+                        address TEXT,
+                        result TEXT,
+                        timestamp DATETIME,
+                        PRIMARY KEY (postal_code, address)
+                    )
+                """)
+                conn.commit()
+        except Exception as e:
+            logging.error(f"キャッシュデータベースのセットアップ中にエラーが発生しました: {str(e)}")
+            self.enabled = False
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def get_ttl(self, status: str) -> Optional[float]:
+        """
+        判定結果のstatusに対応する有効期限を返す
+
+        Args:
+            status (str): 検索結果のstatus
+
+        Returns:
+            float: 有効期限（秒）。キャッシュ対象外の場合はNone
+        """
+        group = STATUS_TTL_GROUP.get(status)
+        if group is None:
+            return None
+        return self.ttl_seconds.get(group)
+
+    def get(self, postal_code: str, address: str) -> Optional[Dict]:
+        """
+        キャッシュから検索結果を取得します。
+
+        Args:
+            postal_code (str): 郵便番号
+            address (str): 住所
+
+        Returns:
+            Optional[Dict]: キャッシュされた検索結果、存在しない場合はNone
+        """
+        key = build_cache_key(postal_code, address) if self.enabled else None
+        if key is None:
+            return None
+
+        try:
+            with sqlite3.connect(self.db_path, timeout=30) as conn:
+                row = conn.execute(
+                    "SELECT result, timestamp FROM area_cache WHERE postal_code = ? AND address = ?",
+                    key
+                ).fetchone()
+        except Exception as e:
+            logging.warning(f"キャッシュの読み込みに失敗しました: {e}")
+            return None
+
+        if not row:
+            self._count("misses")
+            return None
+
+        try:
+            result = json.loads(row[0])
+            stored_at = float(row[1])
+        except Exception:
+            self._count("misses")
+            self.invalidate(postal_code, address)
+            return None
+
+        ttl = self.get_ttl(result.get("status"))
+        age = time.time() - stored_at
+        if ttl is None or age > ttl:
+            self._count("expired")
+            self._count("misses")
+            self.invalidate(postal_code, address)
+            return None
+
+        self._count("hits")
+        result["cached"] = True
+        result["cached_at"] = stored_at
+        screenshot = result.get("screenshot")
+        if screenshot and not os.path.exists(screenshot) and not _is_screenshot_pending(screenshot):
+            result.pop("screenshot", None)
+        logging.info(f"キャッシュヒット: {key[0]} {key[1]}（経過 {int(age)} 秒）")
+        return result
+
+    def set(self, postal_code: str, address: str, result: Dict) -> bool:
+        """
+        検索結果をキャッシュに保存します。
+
+        Args:
+            postal_code (str): 郵便番号
+            address (str): 住所
+            result (Dict): 検索結果
+
+        Returns:
+            bool: 保存した場合はTrue
+        """
+        if not self.enabled or not isinstance(result, dict):
+            return False
+        if self.get_ttl(result.get("status")) is None:
+            return False
+
+        key = build_cache_key(postal_code, address)
+        if key is None:
+            return False
+
+        stored = {k: v for k, v in result.items() if k not in ("cached", "cached_at")}
+        try:
+            payload = json.dumps(stored, ensure_ascii=False)
+            with sqlite3.connect(self.db_path, timeout=30) as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO area_cache (postal_code, address, result, timestamp) VALUES (?, ?, ?, ?)",
+                    (key[0], key[1], payload, time.time())
+                )
+                conn.commit()
+            self._count("stores")
+            return True
+        except Exception as e:
+            logging.warning(f"キャッシュの保存に失敗しました: {e}")
+            return False
+
+    def invalidate(self, postal_code: str, address: str) -> None:
+        """
+        指定した住所のキャッシュを削除します。
+
+        Args:
+            postal_code (str): 郵便番号
+            address (str): 住所
+        """
+        key = build_cache_key(postal_code, address)
+        if key is None:
+            return
+        try:
+            with sqlite3.connect(self.db_path, timeout=30) as conn:
+                conn.execute("DELETE FROM area_cache WHERE postal_code = ? AND address = ?", key)
+                conn.commit()
+        except Exception as e:
+            logging.warning(f"キャッシュの削除に失敗しました: {e}")
+
+    def clear(self) -> None:
+        """全てのキャッシュを削除します。"""
+        try:
+            with sqlite3.connect(self.db_path, timeout=30) as conn:
+                conn.execute("DELETE FROM area_cache")
+                conn.commit()
+        except Exception as e:
+            logging.warning(f"キャッシュの全削除に失敗しました: {e}")
+
+    def record_bypass(self) -> None:
+        """強制再検索によるバイパスを記録します。"""
+        self._count("bypassed")
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        ヒット/ミス件数を返します。
+
+        Returns:
+            Dict[str, float]: 集計値とヒット率
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+_cache_instance = None
+_cache_instance_lock = threading.Lock()
+
+
+def get_area_search_cache() -> AreaSearchCache:
+    """
+    アプリケーション共通のキャッシュインスタンスを返す
+
+    Returns:
+        AreaSearchCache: キャッシュインスタンス
+    """
+    global _cache_instance
+    with _cache_instance_lock:
+        if _cache_instance is None:
+            settings = _load_cache_settings()
+            ttl_seconds = {}
+            for group in DEFAULT_TTL_SECONDS:
+                value = settings.get(f"ttl_{group}_seconds")
+                if isinstance(value, (int, float)) and value >= 0:
+                    ttl_seconds[group] = value
+            _cache_instance = AreaSearchCache(
+                settings.get("db_path", DEFAULT_DB_PATH),
+                ttl_seconds
+            )
+            _cache_instance.enabled = _cache_instance.enabled and settings.get("enabled", True)
+        return _cache_instance
@@ -22,7 +22,6 @@ import re
 import os
 import json
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoSuchElementException, TimeoutException
 from selenium.webdriver.common.action_chains import ActionChains
@@ -33,25 +32,43 @@ from datetime import datetime
 
 from services.web_driver import create_driver, load_browser_settings
 from utils.string_utils import normalize_string, calculate_similarity
+from utils.address_matcher import AddressMatcher
 from utils.address_utils import normalize_address
-from services.area_search import take_full_page_screenshot, check_cancellation, CancellationError
+from utils.address_parser import parse_address
+from services.area_search import take_full_page_screenshot, get_browser_settings_override
+from services.cancellation import CancellableWait, CancellationError, current_token, register_driver, use_token
+from services.driver_pool import get_driver_pool, get_site_url, release_driver
+from services.page_wait import PageWaiter
+from services.dom_probe import probe_elements
+from services.screenshot_pipeline import save_viewport_screenshot
+from services.search_trace import trace_mark
+from services.replay_harness import apply_harness_options, attach_replay_recorder
+from services.request_blocking import apply_blocking_options, apply_blocking_profile, log_blocking_stats
+from services.browser_sessions import claim_restored_driver, detach_options, register_browser
 
 # グローバル変数でブラウザドライバーを保持
 global_driver = None
 
 
-def close_global_driver():
-    """提供判定のブラウザを終了する。"""
-    global global_driver
-    if global_driver is None:
+def close_driver(driver):
+    """提供判定のブラウザを終了する（ドライバープールから借りたものは返却する）。"""
+    if driver is None:
         return
     try:
-        global_driver.quit()
+        if release_driver(driver):
+            logging.info("提供判定のブラウザをドライバープールへ返却しました")
+            return
+        driver.quit()
         logging.info("提供判定のブラウザを終了しました")
     except Exception as e:
         logging.warning(f"ブラウザの終了中にエラー: {str(e)}")
-    finally:
-        global_driver = None
+
+
+def close_global_driver():
+    """提供判定のブラウザを終了する。"""
+    global global_driver
+    driver, global_driver = global_driver, None
+    close_driver(driver)
 
 # キャンセルフラグ
 _global_cancel_flag = False
@@ -81,7 +98,16 @@ def is_cancelled():
     return _global_cancel_flag
 
 def check_cancellation():
-    """キャンセル要求をチェックし、必要に応じて例外を発生"""
+    """キャンセル要求をチェックし、必要に応じて例外を発生
+
+    検索ごとのキャンセルトークンが結び付いている場合はトークンだけを確認する。
+    """
+    token = current_token()
+    if token is not None:
+        if token.is_cancelled:
+            logging.info("★★★ キャンセル要求を検出：検索を中断します ★★★")
+        token.raise_if_cancelled()
+        return
     global _global_cancel_flag
     if _global_cancel_flag:
         logging.info("★★★ キャンセル要求を検出：検索を中断します ★★★")
@@ -89,118 +115,36 @@ def check_cancellation():
 
 def split_address(address):
     """
-    住所を分割して各要素を抽出する
+    住所を分割して各要素を抽出する（市区町村辞書による分割）
 
     Args:
         address (str): 分割する住所
         
     Returns:
-        dict: 分割された住所の要素
+        ParsedAddress: 分割された住所の要素（辞書と同じキーで参照可能）
             - prefecture: 都道府県
             - city: 市区町村
             - town: 町名（大字・字を除く）
             - block: 丁目
             - number: 番地
-            - building_id: 建物ID
+            - building_id: 建物部分
     """
     try:
         # 住所を正規化
         address = normalize_address(address)
         logging.info(f"正規化後の住所: {address}")
         
-        # 都道府県を抽出
-        prefecture_match = re.match(r'^(.+?[都道府県])', address)
-        prefecture = prefecture_match.group(1) if prefecture_match else None
-        block = None
-        number_part = None
-        town = ""
+        result = parse_address(address)
         
-        if prefecture:
-            remaining_address = address[len(prefecture):].strip()
-            # 市区町村を抽出（郡がある場合も考慮）
-            city_match = re.match(r'^(.+?郡.+?[町村]|.+?[市区町村])', remaining_address)
-            city = city_match.group(1) if city_match else None
-            
-            if city:
-                # 残りの住所から基本住所と番地を分離
-                remaining = remaining_address[len(city):].strip()
-                
-                # 特殊な表記（大字、字、甲乙丙丁）を含む部分を抽出
-                special_location_match = re.search(r'(大字.+?字.*?|大字.*?|字.*?)([甲乙丙丁])?(\d+)', remaining)
-                
-                if special_location_match:
-                    # 番地のみを抽出（甲乙丙丁は除外）
-                    number_part = special_location_match.group(3)
-                    # 基本住所は市区町村までとする
-                    town = ""
-                else:
-                    # 丁目を含む場合は、丁目の後ろの番地を抽出
-                    chome_match = re.search(r'(\d+)丁目', remaining)
-                    if chome_match:
-                        # 丁目より後ろの部分から番地を探す
-                        after_chome = remaining[remaining.find('丁目') + 2:].strip()
-                        # ハイフンを含む番地のパターンを優先的に検索
-                        number_match = re.search(r'(\d+(?:[-－]\d+)?)', after_chome)
-                        if number_match:
-                            number_part = number_match.group(1)
-                            town = remaining[:remaining.find('丁目') - len(chome_match.group(1))].strip()
-                        else:
-                            number_part = None
-                            town = remaining[:remaining.find('丁目')].strip()
-                        block = chome_match.group(1)
-                    else:
-                        # ハイフンが2つある場合は、最初の数字を丁目として扱う
-                        double_hyphen_match = re.search(r'(\d+)-(\d+)-(\d+)', remaining)
-                        if double_hyphen_match:
-                            block = double_hyphen_match.group(1)
-                            number_part = f"{double_hyphen_match.group(2)}-{double_hyphen_match.group(3)}"
-                            town = remaining[:double_hyphen_match.start()].strip()
-                        else:
-                            # 通常の番地パターンを検索
-                            number_match = re.search(r'(\d+(?:[-－]\d+)?)', remaining)
-                            if number_match:
-                                number_part = number_match.group(1)
-                                town = remaining[:number_match.start()].strip()
-                            else:
-                                number_part = None
-                                town = remaining
-                
-                result = {
-                    'prefecture': prefecture,
-                    'city': city,
-                    'town': town if town else "",
-                    'block': block,
-                    'number': number_part,
-                    'building_id': None
-                }
-                
-                # 分割結果をログ出力
-                logging.info("住所分割結果:")
-                logging.info(f"  都道府県: {result['prefecture']}")
-                logging.info(f"  市区町村: {result['city']}")
-                logging.info(f"  町名: {result['town']}")
-                logging.info(f"  丁目: {result['block']}")
-                logging.info(f"  番地: {result['number']}")
-                
-                return result
-            
-            return {
-                'prefecture': prefecture,
-                'city': remaining_address if prefecture else None,
-                'town': "",
-                'block': None,
-                'number': None,
-                'building_id': None
-            }
+        # 分割結果をログ出力
+        logging.info("住所分割結果:")
+        logging.info(f"  都道府県: {result['prefecture']}")
+        logging.info(f"  市区町村: {result['city']}")
+        logging.info(f"  町名: {result['town']}")
+        logging.info(f"  丁目: {result['block']}")
+        logging.info(f"  番地: {result['number']}")
         
-        return {
-            'prefecture': None,
-            'city': None,
-            'town': "",
-            'block': None,
-            'number': None,
-            'building_id': None
-        }
+        return result
         
     except Exception as e:
         logging.error(f"住所の分割中にエラー: {str(e)}")
@@ -287,9 +231,6 @@ def find_best_address_match(input_address, candidates):
     Returns:
         tuple: (最も一致する候補, 類似度)
     """
-    best_candidate = None
-    best_similarity = -1
-    
     # 入力住所を分割
     input_parts = split_address(input_address)
     if not input_parts:
@@ -303,6 +244,8 @@ def find_best_address_match(input_address, candidates):
     
     logging.info(f"基本住所（比較用）: {base_input_address}")
     
+    valid_candidates = []
+    base_candidate_addresses = []
     for candidate in candidates:
         try:
             candidate_text = candidate.text.strip()
@@ -315,20 +258,20 @@ def find_best_address_match(input_address, candidates):
             if candidate_parts['block']:
                 base_candidate_address += f"{candidate_parts['block']}丁目"
             
-            # 基本住所での比較
-            _, similarity = is_address_match(base_input_address, base_candidate_address)
-            
             logging.info(f"候補 '{candidate_text}' の基本住所: {base_candidate_address}")
-            logging.info(f"基本住所での類似度: {similarity}")
-            
-            if similarity > best_similarity:
-                best_similarity = similarity
-                best_candidate = candidate
+            valid_candidates.append(candidate)
+            base_candidate_addresses.append(base_candidate_address)
         except Exception as e:
             logging.warning(f"候補の処理中にエラー: {str(e)}")
             continue
+
+    # 基本住所での比較（完全一致を先に探し、残りは一括評価）
+    matcher = AddressMatcher(base_input_address, normalize_string)
+    best_index, best_similarity = matcher.best_match(base_candidate_addresses, threshold=0.5)
+    logging.info(f"基本住所での最高類似度: {best_similarity}")
     
-    if best_candidate and best_similarity >= 0.5:  # 最低限の類似度しきい値
+    if best_index is not None:
+        best_candidate = valid_candidates[best_index]
         logging.info(f"最適な候補が見つかりました（類似度: {best_similarity}）: {best_candidate.text.strip()}")
         return best_candidate, best_similarity
     
@@ -371,7 +314,19 @@ def create_driver(headless=False):
         options.add_argument('--aggressive-cache-discard')
         options.add_argument('--disable-default-apps')
         
-        driver = webdriver.Chrome(options=options)
+        # 記録・再生（replay_harness）中の追加オプション
+        apply_harness_options(options)
+        apply_blocking_options(options)
+        detach_options(options)
+        
+        from services.driver_bootstrap import start_chrome
+        from services.warm_cache import warm_cache_profile
+        # 永続キャッシュプロファイルが有効な場合は空いているプロファイルで起動する
+        with warm_cache_profile(options, "east") as profile:
+            driver, _ = start_chrome(options)
+            profile.prepare(driver)
+        register_browser(driver, "east", headless)
+        apply_blocking_profile(driver, "east")
         logging.info(f"Chromeドライバーを作成しました（ヘッドレスモード: {headless}）")
         
         return driver
@@ -379,7 +334,7 @@ def create_driver(headless=False):
         logging.error(f"ドライバーの作成に失敗: {str(e)}")
         raise
     
-def search_service_area(postal_code, address, progress_callback=None):
+def search_service_area(postal_code, address, progress_callback=None, cancel_token=None):
     """
     NTT東日本の提供エリア検索を実行する関数
     
@@ -387,10 +342,23 @@ def search_service_area(postal_code, address, progress_callback=None):
         postal_code (str): 郵便番号
         address (str): 住所
         progress_callback (callable): 進捗状況を通知するコールバック関数
+        cancel_token (CancelToken): この検索のキャンセルトークン（Noneの場合は呼び出し元のトークン）
         
     Returns:
         dict: 検索結果を含む辞書
     """
+    with use_token(cancel_token):
+        return _search_service_area(postal_code, address, progress_callback)
+
+
+def _cancelled_by_token():
+    """結び付いたキャンセルトークンがキャンセル済みかどうか（ブラウザ終了後の通信エラーの判別用）"""
+    token = current_token()
+    return token is not None and token.is_cancelled
+
+
+def _search_service_area(postal_code, address, progress_callback=None):
+    """search_service_area の本体"""
     global global_driver
     
     # デバッグログ：入力値の確認
@@ -453,6 +421,7 @@ def search_service_area(postal_code, address, progress_callback=None):
             "page_load_timeout": 60,
             "script_timeout": 60
         }
+    browser_settings.update(get_browser_settings_override())
     
     # ヘッドレスモードの設定を取得
     headless_mode = browser_settings.get("headless", False)
@@ -460,6 +429,8 @@ def search_service_area(postal_code, address, progress_callback=None):
     show_popup = browser_settings.get("show_popup", True)
     # ブラウザ自動終了設定を取得
     auto_close = browser_settings.get("auto_close", True)
+    # False の場合（先行判定など）、このブラウザは検索後に終了し、表示中の検索のブラウザには触れない
+    keep_browser = browser_settings.get("keep_browser", True)
     # タイムアウト設定を取得
     page_load_timeout = browser_settings.get("page_load_timeout", 60)
     script_timeout = browser_settings.get("script_timeout", 60)
@@ -467,25 +438,39 @@ def search_service_area(postal_code, address, progress_callback=None):
     logging.info(f"ブラウザ設定 - ヘッドレス: {headless_mode}, ポップアップ表示: {show_popup}, 自動終了: {auto_close}")
 
     # 自動終了が有効な場合、次の提供判定開始時に前回ブラウザを閉じる
-    if auto_close and global_driver is not None:
+    if auto_close and keep_browser and global_driver is not None:
         logging.info("自動終了設定: 前回の提供判定ブラウザを終了します")
         close_global_driver()
     
     driver = None
     try:
         # ブラウザを起動
+        trace_mark("browser_start")
         if progress_callback:
             progress_callback("ブラウザを起動中...")
         
-        driver = create_driver(
-            headless=headless_mode
-        )
+        # ドライバープールが有効な場合はサイト表示済みのドライバーを借りる
+        driver_pool = get_driver_pool("east", create_driver, headless_mode, page_load_timeout, script_timeout)
+        driver, page_prewarmed = driver_pool.acquire() if driver_pool else (None, False)
+        
+        # 再起動前から残っているブラウザがあれば使う
+        if driver is None:
+            driver, page_prewarmed = claim_restored_driver("east", headless_mode)
+            if driver is None:
+                driver = create_driver(
+                    headless=headless_mode
+                )
+            if driver_pool:
+                driver_pool.adopt(driver)
         
-        # ブラウザ起動後のキャンセルチェック
+        # キャンセル時にプロセスごと終了できるよう登録し、ブラウザ起動後のキャンセルチェック
+        register_driver(driver)
         check_cancellation()
         
         # グローバル変数に保存
-        global_driver = driver
+        if keep_browser:
+            global_driver = driver
+        attach_replay_recorder(driver, "east")
          # タイムアウト設定を適用
         driver.set_page_load_timeout(page_load_timeout)
         driver.set_script_timeout(script_timeout)
@@ -496,14 +481,18 @@ def search_service_area(postal_code, address, progress_callback=None):
         driver.implicitly_wait(0)  # 暗黙の待機を無効化
         
         # サイトにアクセス
+        trace_mark("page_load")
         if progress_callback:
             progress_callback("サイトにアクセス中...")
         
         # サイトアクセス直前のキャンセルチェック
         check_cancellation()
         
-        driver.get("https://flets.com/app_new/cao/")
-        logging.info("サイトにアクセスしました")
+        if page_prewarmed:
+            logging.info("サイトは表示済みのため郵便番号入力から開始します")
+        else:
+            driver.get(get_site_url("east"))
+            logging.info("サイトにアクセスしました")
         
         # サイトアクセス完了後のキャンセルチェック
         check_cancellation()
@@ -516,7 +505,7 @@ def search_service_area(postal_code, address, progress_callback=None):
         # ページ表示待機前のキャンセルチェック
         check_cancellation()
         
-        WebDriverWait(driver, 10).until(
+        CancellableWait(driver, 10).until(
             EC.presence_of_element_located((By.ID, "id_address_search_zip1"))
         )
         logging.info("郵便番号入力ページが表示されました")
@@ -527,12 +516,13 @@ def search_service_area(postal_code, address, progress_callback=None):
 
         
         # 郵便番号入力フィールドを探す
+        trace_mark("postal_input")
         try:
             # キャンセルチェック
             check_cancellation()
             
             # 郵便番号前半3桁を入力
-            postal_code_first_input = WebDriverWait(driver, 5).until(
+            postal_code_first_input = CancellableWait(driver, 5).until(
                 EC.presence_of_element_located((By.ID, "id_address_search_zip1"))
             )
             postal_code_first_input.clear()
@@ -540,7 +530,7 @@ def search_service_area(postal_code, address, progress_callback=None):
             logging.info(f"郵便番号前半3桁を入力: {postal_code_first}")
             
             # 郵便番号後半4桁を入力
-            postal_code_second_input = WebDriverWait(driver, 5).until(
+            postal_code_second_input = CancellableWait(driver, 5).until(
                 EC.presence_of_element_located((By.ID, "id_address_search_zip2"))
             )
             postal_code_second_input.clear()
@@ -548,7 +538,7 @@ def search_service_area(postal_code, address, progress_callback=None):
             logging.info(f"郵便番号後半4桁を入力: {postal_code_second}")
             
             # 再検索ボタンをクリック
-            search_button = WebDriverWait(driver, 5).until(
+            search_button = CancellableWait(driver, 5).until(
                 EC.element_to_be_clickable((By.ID, "id_address_search_button"))
             )
             search_button.click()
@@ -573,6 +563,7 @@ def search_service_area(postal_code, address, progress_callback=None):
         
         # 住所候補が表示されるのを待つ
         try:
+            trace_mark("candidate_selection")
             if progress_callback:
                 progress_callback("住所候補を検索中...")
             
@@ -580,7 +571,7 @@ def search_service_area(postal_code, address, progress_callback=None):
             check_cancellation()
             
             # 住所候補リストが表示されるまで待機
-            WebDriverWait(driver, 10).until(
+            CancellableWait(driver, 10).until(
                 EC.presence_of_element_located((By.CLASS_NAME, "btn_list"))
             )
             logging.info("住所候補リストが表示されました")
@@ -588,7 +579,7 @@ def search_service_area(postal_code, address, progress_callback=None):
 
             
             # 候補リストを取得
-            candidates = driver.find_elements(By.CSS_SELECTOR, ".btn_list li.addressInfo")
+            candidates = probe_elements(driver, ".btn_list li.addressInfo")
             logging.info(f"{len(candidates)} 件の候補が見つかりました")
             
             # 候補の内容をログ出力
@@ -615,21 +606,24 @@ def search_service_area(postal_code, address, progress_callback=None):
                     driver.execute_script("arguments[0].click();", best_candidate)
                     logging.info("JavaScriptを使用して住所を選択しました")
                     
-                    # クリック後の待機
-                    time.sleep(2)
-                    
                     # 番地入力画面への遷移を待機
-                    WebDriverWait(driver, 15).until(
-                        EC.url_contains("/cao/InputAddressNum")
-                    )
+                    waiter = PageWaiter(driver, "east", check_cancellation)
+                    if not waiter.wait_until(
+                        lambda d: "/cao/InputAddressNum" in d.current_url,
+                        timeout=17,
+                        step="番地入力画面への遷移",
+                        baseline=2
+                    ):
+                        raise TimeoutException("番地入力画面への遷移がタイムアウトしました")
                     logging.info("番地入力画面への遷移を確認しました")
                     
                     # ページの読み込み完了を待機
-                    WebDriverWait(driver, 20).until(
+                    CancellableWait(driver, 20).until(
                         lambda d: d.execute_script('return document.readyState') == 'complete'
                     )
                     logging.info("番地入力ページの読み込みが完了しました")
                     
+                    trace_mark("banchi_dialog")
                     if progress_callback:
                         progress_callback("番地を入力中...")
                     
@@ -640,29 +634,36 @@ def search_service_area(postal_code, address, progress_callback=None):
                     
                 except Exception as e:
                     logging.error(f"住所選択処理に失敗: {str(e)}")
-                    driver.save_screenshot("debug_address_select_error.png")
+                    save_viewport_screenshot(driver, "debug_address_select_error.png")
                     raise
             else:
                 logging.error(f"適切な住所候補が見つかりませんでした。入力住所: {address}")
                 raise ValueError("適切な住所候補が見つかりませんでした")
             
         except Exception as e:
+            check_cancellation()
             logging.error(f"住所選択処理中にエラー: {str(e)}")
             return {"status": "error", "message": f"住所選択処理中にエラーが発生しました: {str(e)}"}
             
     except CancellationError as e:
         logging.info("★★★ 提供エリア検索がキャンセルされました ★★★")
         return {"status": "cancelled", "message": "検索がキャンセルされました"}
-    except TimeoutException as e:
-        logging.error(f"タイムアウトエラー: {str(e)}")
-        return {"status": "failure", "message": "処理がタイムアウトしました"}
     except Exception as e:
+        if _cancelled_by_token():
+            logging.info("★★★ 提供エリア検索がキャンセルされました ★★★")
+            return {"status": "cancelled", "message": "検索がキャンセルされました"}
+        if isinstance(e, TimeoutException):
+            logging.error(f"タイムアウトエラー: {str(e)}")
+            return {"status": "failure", "message": "処理がタイムアウトしました"}
         logging.error(f"検索処理中にエラー: {str(e)}")
         return {"status": "error", "message": f"検索処理中にエラーが発生しました: {str(e)}"}
         
     finally:
-        # ブラウザはUI側のタイミングで終了する
-        if driver:
+        log_blocking_stats(driver)
+        # ブラウザはUI側のタイミングで終了する（残さない設定の検索はここで終了する）
+        if driver and not keep_browser:
+            close_driver(driver)
+        elif driver:
             global_driver = driver
 
 def find_input_element(driver, attempt_count=0):
@@ -770,12 +771,13 @@ def handle_address_number_input(driver, address_parts, progress_callback=None):
                     logging.info(f"ポップアップ表示設定を読み込みました: {show_popup}")
         except Exception as e:
             logging.warning(f"ブラウザ設定の読み込みに失敗しました: {str(e)}")
+        show_popup = get_browser_settings_override().get("show_popup", show_popup)
 
         logging.info("=== 番地入力画面の処理開始 ===")
         debug_page_state(driver, "番地入力画面_初期状態")
 
         # ページ読み込み完了まで待機
-        WebDriverWait(driver, 10).until(
+        CancellableWait(driver, 10).until(
             EC.presence_of_element_located((By.ID, "id_form_main"))
         )
         debug_page_state(driver, "番地入力画面_読み込み完了後")
@@ -786,7 +788,7 @@ def handle_address_number_input(driver, address_parts, progress_callback=None):
         if not address_parts.get('number'):
             logging.info("番地が指定されていないため、「番地・号が無い」をチェック")
             try:
-                checkbox = WebDriverWait(driver, 5).until(
+                checkbox = CancellableWait(driver, 5).until(
                     EC.presence_of_element_located((By.ID, "id_banchi1to3Fixed"))
                 )
                 if not checkbox.is_selected():
@@ -805,7 +807,7 @@ def handle_address_number_input(driver, address_parts, progress_callback=None):
 
             try:
                 # 番地1の入力
-                number1_input = WebDriverWait(driver, 5).until(
+                number1_input = CancellableWait(driver, 5).until(
                     EC.presence_of_element_located((By.ID, "id_banchi1to3manualAddressNum1"))
                 )
                 # フォーカスを設定してからクリア
@@ -839,7 +841,7 @@ def handle_address_number_input(driver, address_parts, progress_callback=None):
 
         # 住居タイプの選択（デフォルトで戸建てを選択）
         try:
-            house_type = WebDriverWait(driver, 5).until(
+            house_type = CancellableWait(driver, 5).until(
                 EC.presence_of_element_located((By.ID, "id_buildType_1"))
             )
             if not house_type.is_selected():
@@ -849,18 +851,18 @@ def handle_address_number_input(driver, address_parts, progress_callback=None):
 
 
             # 次へボタンをクリック
-            next_button = WebDriverWait(driver, 5).until(
+            next_button = CancellableWait(driver, 5).until(
                 EC.element_to_be_clickable((By.ID, "id_nextButton"))
             )
             driver.execute_script("arguments[0].scrollIntoView(true);", next_button)
-            time.sleep(1)  # スクロール完了を待つ
+            PageWaiter(driver, "east", check_cancellation).settle(1, step="次へボタンのスクロール", baseline=1)
             driver.execute_script("arguments[0].click();", next_button)
             logging.info("次へボタンをクリックしました")
 
             # 建物選択画面が表示されたかチェック
             try:
                 # 建物選択画面のURLを確認
-                WebDriverWait(driver, 10).until(
+                CancellableWait(driver, 10).until(
                     lambda d: "SelectBuild1" in d.current_url
                 )
                 logging.info("建物選択画面が表示されました")
@@ -868,7 +870,7 @@ def handle_address_number_input(driver, address_parts, progress_callback=None):
                 # 建物選択画面が表示された時点で集合住宅と判定
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 screenshot_path = f"debug_apartment_confirmation_{timestamp}.png"
-                driver.save_screenshot(screenshot_path)
+                screenshot_path = save_viewport_screenshot(driver, screenshot_path)
                 return {
                     "status": "apartment",
                     "message": "集合住宅",
@@ -884,7 +886,7 @@ def handle_address_number_input(driver, address_parts, progress_callback=None):
             except TimeoutException:
                 # 建物選択画面が表示されない場合は通常の結果ページへの遷移を待機
                 logging.info("建物選択画面はスキップされました")
-                WebDriverWait(driver, 10).until(
+                CancellableWait(driver, 10).until(
                     EC.url_contains("ProvideResult")
                 )
                 logging.info("結果ページへ遷移しました")
@@ -895,8 +897,9 @@ def handle_address_number_input(driver, address_parts, progress_callback=None):
             raise
 
         # 結果ページへの遷移を待機
+        trace_mark("result_detection")
         try:
-            WebDriverWait(driver, 10).until(
+            CancellableWait(driver, 10).until(
                 EC.url_contains("ProvideResult")
             )
             logging.info("結果ページへ遷移しました")
@@ -907,7 +910,7 @@ def handle_address_number_input(driver, address_parts, progress_callback=None):
             # 結果テキストの取得を修正
             try:
                 # まず、ローディング表示が消えるのを待つ
-                WebDriverWait(driver, 10).until_not(
+                CancellableWait(driver, 10).until_not(
                     EC.presence_of_element_located((By.CLASS_NAME, "loading"))
                 )
                 
@@ -927,7 +930,7 @@ def handle_address_number_input(driver, address_parts, progress_callback=None):
 
                 for selector_type, selector in selectors:
                     try:
-                        element = WebDriverWait(driver, 3).until(
+                        element = CancellableWait(driver, 3).until(
                             EC.presence_of_element_located((selector_type, selector))
                         )
                         if element and element.is_displayed():
@@ -958,7 +961,7 @@ def handle_address_number_input(driver, address_parts, progress_callback=None):
                 if result_text:
                     if "提供エリアです" in result_text or "の提供エリアです" in result_text:
                         screenshot_path = f"debug_available_confirmation_{timestamp}.png"
-                        driver.save_screenshot(screenshot_path)
+                        screenshot_path = save_viewport_screenshot(driver, screenshot_path)
                         result = {
                             "status": "available",
                             "message": "提供可能",
@@ -973,7 +976,7 @@ def handle_address_number_input(driver, address_parts, progress_callback=None):
                         return result
                     elif "提供エリア外です" in result_text or "エリア外" in result_text:
                         screenshot_path = f"debug_not_provided_confirmation_{timestamp}.png"
-                        driver.save_screenshot(screenshot_path)
+                        screenshot_path = save_viewport_screenshot(driver, screenshot_path)
                         return {
                             "status": "unavailable",
                             "message": "未提供",
@@ -987,7 +990,7 @@ def handle_address_number_input(driver, address_parts, progress_callback=None):
                         }
                     else:
                         screenshot_path = f"debug_investigation_confirmation_{timestamp}.png"
-                        driver.save_screenshot(screenshot_path)
+                        screenshot_path = save_viewport_screenshot(driver, screenshot_path)
                         logging.warning(f"予期しない結果テキスト: {result_text}")
                         return {
                             "status": "failure",
@@ -1004,7 +1007,7 @@ def handle_address_number_input(driver, address_parts, progress_callback=None):
 
                     
                     screenshot_path = f"debug_error_confirmation_{timestamp}.png"
-                    driver.save_screenshot(screenshot_path)
+                    screenshot_path = save_viewport_screenshot(driver, screenshot_path)
                     logging.error("結果テキストが取得できませんでした")
                     return {
                         "status": "failure",
@@ -1020,7 +1023,7 @@ def handle_address_number_input(driver, address_parts, progress_callback=None):
 
             except Exception as e:
                 screenshot_path = f"debug_error_confirmation_{timestamp}.png"
-                driver.save_screenshot(screenshot_path)
+                screenshot_path = save_viewport_screenshot(driver, screenshot_path)
                 logging.error(f"結果テキストの取得中にエラー: {str(e)}")
                 return {
                     "status": "failure",
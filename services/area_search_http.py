@@ -0,0 +1,409 @@
+"""
+NTT西日本の提供エリア検索（HTTPエンジン）
+
+このモジュールは、ブラウザを起動せずに flets-w.com の申込カート画面の
+フォーム送信とリンク遷移をHTTPで直接行い、提供エリアを判定する機能を提供します。
+
+主な機能：
+- 郵便番号フォームの送信と住所候補の選択
+- 番地・号ダイアログのリンク遷移
+- 検索結果画像からの提供可否判定（Selenium版と同じ結果形式）
+- 接続プールを共有したセッション（Cookieは検索ごとに分離）
+
+制限事項：
+- 想定外の画面構成（JavaScript専用のリンク等）を検出した場合は
+  UnexpectedResponseError を送出し、呼び出し側でSelenium版へフォールバックします
+- スクリーンショットは取得しません
+"""
+
+import os
+import copy
+import json
+import time
+import logging
+from urllib.parse import urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup
+
+from services.area_search import (
+    RESULT_IMAGE_PATTERNS,
+    check_cancellation,
+    find_best_address_match,
+    normalize_string,
+)
+
+WEST_BASE_URL = "https://flets-w.com"
+WEST_CART_PATH = "/cart/"
+
+DEFAULT_TIMEOUT = (5, 15)
+MAX_FLOW_STEPS = 12
+
+BUILDING_PRIMARY_LABELS = ["建物を選択しない", "建物名を選択しない", "建物名を入力しない"]
+BUILDING_SECONDARY_LABELS = ["該当する建物名がない", "該当する建物がない", "建物名が見つからない"]
+
+# 接続プールは全検索で共有し、Cookieはセッションごとに分離する
+_shared_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=0)
+
+
+class UnexpectedResponseError(Exception):
+    """HTTPエンジンで処理できない応答を受け取った場合に発生する例外"""
+    pass
+
+
+def _load_engine_setting(path="settings.json"):
+    """
+    settings.json から西日本検索エンジンの既定値を読み込む（selenium/http）
+    """
+    try:
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                cfg = json.load(f)
+                return cfg.get("west_search_engine", "selenium") or "selenium"
+    except Exception as e:
+        logging.warning(f"検索エンジン設定の読み込みに失敗しました: {e}")
+    return "selenium"
+
+
+def resolve_west_engine(engine=None):
+    """
+    検索ごとの指定と設定から使用するエンジンを決定する
+
+    Args:
+        engine (str): 検索ごとの指定（selenium/http/None）
+
+    Returns:
+        str: "selenium" または "http"
+    """
+    selected = (engine or _load_engine_setting() or "selenium").lower()
+    return "http" if selected == "http" else "selenium"
+
+
+def _new_session():
+    session = requests.Session()
+    session.mount("https://", _shared_adapter)
+    session.mount("http://", _shared_adapter)
+    session.headers.update({
+        "User-Agent": (
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+            "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+        ),
+        "Accept-Language": "ja-JP,ja;q=0.9",
+    })
+    return session
+
+
+def _is_hidden(element):
+    """hidden属性や display:none が指定された要素（祖先含む）か"""
+    node = element
+    while node is not None and getattr(node, "name", None):
+        if node.has_attr("hidden"):
+            return True
+        style = (node.get("style") or "").replace(" ", "").lower()
+        if "display:none" in style or "visibility:hidden" in style:
+            return True
+        node = node.parent
+    return False
+
+
+def _to_zenkaku_digits(text):
+    return text.translate(str.maketrans("0123456789", "０１２３４５６７８９"))
+
+
+class _HttpCandidate:
+    """find_best_address_match に渡すための候補（WebElementの text 互換）"""
+
+    def __init__(self, anchor):
+        self.anchor = anchor
+        self.text = anchor.get_text("\n", strip=True)
+
+
+class WestHttpEngine:
+    """NTT西日本の提供エリア検索をHTTPで実行するエンジン"""
+
+    def __init__(self, base_url=None, timeout=DEFAULT_TIMEOUT, max_steps=MAX_FLOW_STEPS):
+        """
+        エンジンの初期化
+
+        Args:
+            base_url (str): サイトのベースURL（ローカルの代替サーバーを指定可能）
+            timeout (tuple): (接続, 読み込み) タイムアウト秒数
+            max_steps (int): 候補選択後に辿る画面数の上限
+        """
+        self.base_url = (base_url or WEST_BASE_URL).rstrip("/")
+        self.timeout = timeout
+        self.max_steps = max_steps
+        self.session = _new_session()
+        self.request_count = 0
+
+    def close(self):
+        """
+        セッションを閉じる
+
+        Session.close() はマウントされたアダプタの接続プールも破棄するため、
+        共有アダプタを外してから閉じ、接続プールを次の検索に残します。
+        """
+        for prefix, adapter in list(self.session.adapters.items()):
+            if adapter is _shared_adapter:
+                del self.session.adapters[prefix]
+        self.session.close()
+
+    def _request(self, method, url, data=None):
+        check_cancellation()
+        self.request_count += 1
+        if method == "POST":
+            response = self.session.post(url, data=data, timeout=self.timeout)
+        else:
+            response = self.session.get(url, params=data, timeout=self.timeout)
+        if response.status_code != 200:
+            raise UnexpectedResponseError(f"想定外のステータスコード: {response.status_code} ({url})")
+        if not response.encoding or response.encoding.lower() == "iso-8859-1":
+            response.encoding = response.apparent_encoding
+        return response.url, BeautifulSoup(response.text, "html.parser")
+
+    def _submit_form_containing(self, page_url, soup, element_id, overrides=None):
+        element = soup.find(id=element_id)
+        if element is None:
+            raise UnexpectedResponseError(f"要素 {element_id} が見つかりません")
+        form = element.find_parent("form")
+        if form is None:
+            raise UnexpectedResponseError(f"要素 {element_id} を含むフォームが見つかりません")
+
+        payload = {}
+        for field in form.find_all(["input", "select", "textarea"]):
+            name = field.get("name")
+            if not name:
+                continue
+            field_type = (field.get("type") or "").lower()
+            if field_type in ("submit", "button", "image", "reset"):
+                continue
+            if field_type in ("checkbox", "radio") and not field.has_attr("checked"):
+                continue
+            if field.name == "select":
+                option = field.find("option", selected=True) or field.find("option")
+                payload[name] = option.get("value", option.get_text(strip=True)) if option else ""
+            elif field.name == "textarea":
+                payload[name] = field.get_text()
+            else:
+                payload[name] = field.get("value", "")
+
+        if element.name in ("button", "input") and element.get("name"):
+            payload[element["name"]] = element.get("value", "")
+        payload.update(overrides or {})
+
+        action = urljoin(page_url, form.get("action") or page_url)
+        method = (form.get("method") or "GET").upper()
+        return self._request(method, action, payload)
+
+    def _follow_anchor(self, page_url, anchor):
+        href = (anchor.get("href") or "").strip()
+        if not href or href.startswith("#") or href.lower().startswith("javascript:"):
+            raise UnexpectedResponseError(f"遷移先URLを持たないリンクです: {anchor.get_text(strip=True)}")
+        return self._request("GET", urljoin(page_url, href))
+
+    @staticmethod
+    def _detect_result(soup):
+        for image in soup.find_all("img"):
+            if _is_hidden(image):
+                continue
+            src = (image.get("src") or "").lower()
+            alt = image.get("alt") or ""
+            for pattern_info in RESULT_IMAGE_PATTERNS.values():
+                src_hit = any(token.lower() in src for token in pattern_info["src_contains"])
+                alt_hit = any(token in alt for token in pattern_info["alt_contains"])
+                if src_hit or alt_hit:
+                    return pattern_info
+        return None
+
+    @staticmethod
+    def _open_dialogs(soup):
+        dialogs = []
+        for dialog in soup.find_all("dialog"):
+            dialog_id = dialog.get("id") or ""
+            if dialog_id.startswith("DIALOG_ID0") and dialog.has_attr("open") and not _is_hidden(dialog):
+                dialogs.append(dialog)
+        return dialogs
+
+    @staticmethod
+    def _choose_number_anchor(anchors, targets):
+        """
+        番地・号ダイアログのリンクを選ぶ（Selenium版の優先順位に準拠）
+
+        Args:
+            anchors (list): ダイアログ内のリンク
+            targets (list): 未入力の番号トークン（先頭から順に使用）
+
+        Returns:
+            tuple: (選択したリンク, 消費したトークン数)
+        """
+        texts = [(anchor, anchor.get_text(strip=True)) for anchor in anchors]
+        for index, target in enumerate(targets):
+            tokens = {target, _to_zenkaku_digits(target)}
+            for anchor, text in texts:
+                if text in tokens:
+                    return anchor, index + 1
+
+        def _first(labels):
+            for anchor, text in texts:
+                if text in labels:
+                    return anchor
+            return None
+
+        nashi_labels = ("（番地なし）", "番地なし", "（号なし）", "号なし", "")
+        if targets:
+            fallback = _first(("該当する住所がない",)) or _first(nashi_labels)
+            return fallback, 1
+        return _first(nashi_labels) or _first(("該当する住所がない",)), 0
+
+    def search(self, postal_code_clean, address_parts, progress_callback=None, show_popup=True):
+        """
+        提供エリア検索を実行する
+
+        Args:
+            postal_code_clean (str): ハイフンなし7桁の郵便番号
+            address_parts (dict): split_address の結果
+            progress_callback (callable): 進捗状況を通知するコールバック関数
+            show_popup (bool): ポップアップ表示設定
+
+        Returns:
+            dict: 検索結果（Selenium版と同じ形式）
+        """
+        started = time.time()
+        base_address = f"{address_parts['prefecture']}{address_parts['city']}{address_parts['town']}"
+        if address_parts.get('block'):
+            base_address += f"{address_parts['block']}丁目"
+
+        number_prefix = address_parts.get('number_prefix')
+        number_suffix = address_parts.get('number_suffix')
+        number_tokens = (address_parts.get('number') or "").split('-') if address_parts.get('number') else []
+        street_number = number_tokens[0] if number_tokens else None
+        building_number = (number_tokens[1] if len(number_tokens) > 1 else None) or number_suffix
+        targets = [token for token in (number_prefix, street_number, building_number) if token]
+
+        if progress_callback:
+            progress_callback("NTT西日本サイトにアクセス中...")
+        page_url, soup = self._request("GET", f"{self.base_url}{WEST_CART_PATH}")
+
+        postal_input = soup.find(id="id_tak_tx_ybk_yb")
+        if postal_input is None or not postal_input.get("name"):
+            raise UnexpectedResponseError("郵便番号入力フィールドが見つかりません")
+
+        if progress_callback:
+            progress_callback("郵便番号を入力中...")
+        page_url, soup = self._submit_form_containing(
+            page_url, soup, "id_tak_bt_ybk_jks", {postal_input["name"]: postal_code_clean}
+        )
+
+        if progress_callback:
+            progress_callback("基本住所の候補を検索中...")
+        modal = soup.find(id="addressSelectModal")
+        anchors = modal.select("ul li a") if modal else []
+        candidates = [_HttpCandidate(anchor) for anchor in anchors if anchor.get_text(strip=True)]
+        if not candidates:
+            raise UnexpectedResponseError("住所候補が見つかりません")
+
+        best_candidate = None
+        if number_prefix:
+            target_with_prefix = normalize_string(f"{base_address}{number_prefix}")
+            for candidate in candidates:
+                if normalize_string(candidate.text.split('\n')[0]) == target_with_prefix:
+                    best_candidate = candidate
+                    break
+        if best_candidate is None:
+            best_candidate, _ = find_best_address_match(base_address, candidates)
+        if best_candidate is None:
+            raise UnexpectedResponseError(f"適切な住所候補が見つかりませんでした: {base_address}")
+
+        logging.info(f"HTTPエンジン: 住所候補を選択しました: {best_candidate.text.split(chr(10))[0]}")
+        page_url, soup = self._follow_anchor(page_url, best_candidate.anchor)
+
+        for _ in range(self.max_steps):
+            check_cancellation()
+
+            pattern_info = self._detect_result(soup)
+            if pattern_info:
+                result = copy.deepcopy(pattern_info)
+                result["show_popup"] = show_popup
+                result["engine"] = "http"
+                logging.info(
+                    f"HTTPエンジン: {result['message']}（リクエスト数: {self.request_count}, "
+                    f"所要時間: {time.time() - started:.2f}秒）"
+                )
+                if progress_callback:
+                    progress_callback(f"{result['message']}が確認されました")
+                return result
+
+            building_modal = soup.find(id="buildingNameSelectModal")
+            if building_modal is not None and not _is_hidden(building_modal):
+                labels = BUILDING_PRIMARY_LABELS + BUILDING_SECONDARY_LABELS
+                building_anchor = None
+                for label in labels:
+                    building_anchor = next(
+                        (a for a in building_modal.find_all(["a", "button"]) if label in a.get_text(strip=True)),
+                        None
+                    )
+                    if building_anchor is not None:
+                        break
+                if building_anchor is None:
+                    return {
+                        "status": "apartment",
+                        "message": "集合住宅（アパート・マンション等）",
+                        "details": {
+                            "判定結果": "集合住宅",
+                            "提供エリア": "集合住宅（アパート・マンション等）",
+                            "備考": "該当住所は集合住宅（アパート・マンション等）です。"
+                        },
+                        "show_popup": show_popup,
+                        "engine": "http"
+                    }
+                page_url, soup = self._follow_anchor(page_url, building_anchor)
+                continue
+
+            dialogs = self._open_dialogs(soup)
+            if dialogs:
+                if progress_callback:
+                    progress_callback("番地を入力中..." if dialogs[0].get("id") == "DIALOG_ID01" else "号を入力中...")
+                anchor, consumed = self._choose_number_anchor(dialogs[0].find_all("a"), targets)
+                if anchor is None:
+                    raise UnexpectedResponseError(f"ダイアログ {dialogs[0].get('id')} に選択可能なリンクがありません")
+                targets = targets[consumed:]
+                page_url, soup = self._follow_anchor(page_url, anchor)
+                continue
+
+            if soup.find(id="id_tak_bt_nx") is not None:
+                if progress_callback:
+                    progress_callback("検索結果を確認中...")
+                page_url, soup = self._submit_form_containing(page_url, soup, "id_tak_bt_nx")
+                continue
+
+            raise UnexpectedResponseError(f"想定外の画面です: {page_url}")
+
+        raise UnexpectedResponseError("画面遷移の上限に達しました")
+
+
+def search_service_area_west_http(postal_code_clean, address_parts, progress_callback=None,
+                                  show_popup=True, base_url=None):
+    """
+    HTTPエンジンでNTT西日本の提供エリア検索を実行する
+
+    Args:
+        postal_code_clean (str): ハイフンなし7桁の郵便番号
+        address_parts (dict): split_address の結果
+        progress_callback (callable): 進捗状況を通知するコールバック関数
+        show_popup (bool): ポップアップ表示設定
+        base_url (str): サイトのベースURL
+
+    Returns:
+        dict: 検索結果
+
+    Raises:
+        UnexpectedResponseError: HTTPでは処理できない応答を受け取った場合
+    """
+    engine = WestHttpEngine(base_url=base_url)
+    try:
+        return engine.search(postal_code_clean, address_parts, progress_callback, show_popup)
+    except requests.RequestException as e:
+        raise UnexpectedResponseError(f"HTTP通信に失敗しました: {str(e)}") from e
+    finally:
+        engine.close()
@@ -4,195 +4,482 @@
 このモジュールは、地域情報の検索と管理を行うサービスを提供します。
 主な機能：
 - 都道府県と市区町村のデータ管理
-- 地域コードの検索
-- 地域情報の取得
-- 検索結果のキャッシュ
+- 地域コードによる電話番号データの検索（ページ単位の取得）
+- 都道府県・市区町村・電話番号データの一括取り込み
+- 検索結果のキャッシュ（LRU＋有効期限）
 
 制限事項：
-- キャッシュサイズは最大1000件
-- 検索結果は最大100件まで
+- キャッシュサイズは最大1000件（古い順に O(1) で削除）
+- 1回の検索結果は最大100件まで（続きはページ単位で取得）
 - データベース接続のタイムアウトは30秒
+- 接続はサービスごとに1つを使い回します（スレッド間はロックで直列化）
+
+使用例：
+    python -m services.area_search_service import-areas KEN_ALL.CSV
+    python -m services.area_search_service import-phones 電話番号.csv
 """
 
 import os
 import sys
-import json
+import csv
+import argparse
 import logging
 import sqlite3
-from typing import Dict, List, Optional, Tuple
-from datetime import datetime, timedelta
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS prefectures (
+        code TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        kana TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS cities (
+        code TEXT PRIMARY KEY,
+        prefecture_code TEXT NOT NULL,
+        name TEXT NOT NULL,
+        kana TEXT NOT NULL,
+        FOREIGN KEY (prefecture_code) REFERENCES prefectures(code)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS area_phone_numbers (
+        phone_number TEXT NOT NULL,
+        prefecture_code TEXT NOT NULL,
+        city_code TEXT NOT NULL,
+        carrier TEXT NOT NULL DEFAULT '',
+        note TEXT NOT NULL DEFAULT '',
+        PRIMARY KEY (city_code, phone_number),
+        FOREIGN KEY (city_code) REFERENCES cities(code)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_cities_prefecture_kana ON cities(prefecture_code, kana)",
+    "CREATE INDEX IF NOT EXISTS idx_prefectures_kana ON prefectures(kana)",
+)
+
+# 接続ごとにコンパイル済みの文をキャッシュさせるため、SQLは固定の文字列で発行する
+_SELECT_PREFECTURES = "SELECT code, name FROM prefectures ORDER BY kana"
+_SELECT_CITIES = "SELECT code, name FROM cities WHERE prefecture_code = ? ORDER BY kana"
+_SELECT_AREA = """
+    SELECT p.name, c.name
+    FROM prefectures p
+    JOIN cities c ON p.code = c.prefecture_code
+    WHERE p.code = ? AND c.code = ?
+"""
+_SELECT_PHONE_PAGE = """
+    SELECT phone_number, carrier, note
+    FROM area_phone_numbers
+    WHERE city_code = ? AND phone_number > ?
+    ORDER BY phone_number
+    LIMIT ?
+"""
+_COUNT_PHONES = "SELECT COUNT(*) FROM area_phone_numbers WHERE city_code = ?"
+_SELECT_CITY_CODES = "SELECT code, prefecture_code FROM cities"
+_UPSERT_PREFECTURE = "INSERT OR REPLACE INTO prefectures (code, name, kana) VALUES (?, ?, ?)"
+_UPSERT_CITY = "INSERT OR REPLACE INTO cities (code, prefecture_code, name, kana) VALUES (?, ?, ?, ?)"
+_UPSERT_PHONE = """
+    INSERT OR REPLACE INTO area_phone_numbers (phone_number, prefecture_code, city_code, carrier, note)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+PHONE_COLUMNS = {
+    "phone_number": ("phone_number", "電話番号"),
+    "city_code": ("city_code", "市区町村コード", "団体コード"),
+    "carrier": ("carrier", "事業者"),
+    "note": ("note", "備考"),
+}
+
+
+class LRUCache:
+    """有効期限付きのLRUキャッシュ（取得・追加・削除はいずれも O(1)）"""
+
+    def __init__(self, max_size: int = 1000, ttl_seconds: float = 3600,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        キャッシュの初期化
+
+        Args:
+            max_size (int): 最大件数
+            ttl_seconds (float): 有効期限（秒）
+            clock (callable): 現在時刻を返す関数（テスト用）
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._items: "OrderedDict[str, Tuple[float, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: str):
+        """キャッシュから取得する（期限切れ・未登録の場合はNone）"""
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if self._clock() >= expires_at:
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def put(self, key: str, value) -> None:
+        """キャッシュに追加する（上限を超えた場合は最も使われていないものを削除）"""
+        with self._lock:
+            self._items[key] = (self._clock() + self.ttl_seconds, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
 
 class AreaSearchService:
     """地域検索サービスクラス"""
-    
-    def __init__(self, db_path: str = "data/area.db"):
+
+    def __init__(self, db_path: str = "data/area.db", cache_size: int = 1000, cache_ttl_seconds: float = 3600):
         """
         サービスの初期化
-        
+
         Args:
             db_path (str): データベースファイルのパス
+            cache_size (int): キャッシュの最大件数
+            cache_ttl_seconds (float): キャッシュの有効期限（秒）
         """
         self.db_path = db_path
-        self.cache: Dict[str, Dict] = {}
-        self.cache_expiry = timedelta(hours=1)
+        self.cache = LRUCache(cache_size, cache_ttl_seconds)
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
         self.setup_database()
-        
+
+    def _connect(self) -> sqlite3.Connection:
+        """長寿命の接続を返す（初回のみ開く）"""
+        if self._conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False, cached_statements=64)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._conn = conn
+        return self._conn
+
     def setup_database(self) -> None:
         """データベースのセットアップ"""
         try:
-            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-            
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # 都道府県テーブルの作成
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS prefectures (
-                        code TEXT PRIMARY KEY,
-                        name TEXT NOT NULL,
-                        kana TEXT NOT NULL
-                    )
-                """)
-                
-                # 市区町村テーブルの作成
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS cities (
-                        code TEXT PRIMARY KEY,
-                        prefecture_code TEXT NOT NULL,
-                        name TEXT NOT NULL,
-                        kana TEXT NOT NULL,
-                        FOREIGN KEY (prefecture_code) REFERENCES prefectures(code)
-                    )
-                """)
-                
-                conn.commit()
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    for statement in _SCHEMA:
+                        conn.execute(statement)
         except Exception as e:
             logging.error(f"データベースのセットアップ中にエラーが発生しました: {str(e)}")
             raise
-            
+
+    def close(self) -> None:
+        """データベース接続を閉じる"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
     def get_prefectures(self) -> List[Dict[str, str]]:
         """
         都道府県一覧を取得します。
-        
+
         Returns:
             List[Dict[str, str]]: 都道府県のリスト
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT code, name FROM prefectures ORDER BY kana")
-                return [{"code": row[0], "name": row[1]} for row in cursor.fetchall()]
+            cached = self.cache.get("prefectures")
+            if cached is not None:
+                return cached
+            with self._lock:
+                rows = self._connect().execute(_SELECT_PREFECTURES).fetchall()
+            result = [{"code": row[0], "name": row[1]} for row in rows]
+            self.cache.put("prefectures", result)
+            return result
         except Exception as e:
             logging.error(f"都道府県一覧の取得中にエラーが発生しました: {str(e)}")
             return []
-            
+
     def get_cities(self, prefecture_code: str) -> List[Dict[str, str]]:
         """
         市区町村一覧を取得します。
-        
+
         Args:
             prefecture_code (str): 都道府県コード
-            
+
         Returns:
             List[Dict[str, str]]: 市区町村のリスト
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "SELECT code, name FROM cities WHERE prefecture_code = ? ORDER BY kana",
-                    (prefecture_code,)
-                )
-                return [{"code": row[0], "name": row[1]} for row in cursor.fetchall()]
+            cache_key = f"cities:{prefecture_code}"
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+            with self._lock:
+                rows = self._connect().execute(_SELECT_CITIES, (prefecture_code,)).fetchall()
+            result = [{"code": row[0], "name": row[1]} for row in rows]
+            self.cache.put(cache_key, result)
+            return result
         except Exception as e:
             logging.error(f"市区町村一覧の取得中にエラーが発生しました: {str(e)}")
             return []
-            
+
     def search_by_area(
         self,
         prefecture_code: str,
         city_code: str,
-        limit: int = 100
+        limit: int = 100,
+        after: str = ""
     ) -> List[Dict[str, str]]:
         """
-        地域コードで検索します。
-        
+        地域コードで電話番号データを検索します。
+
         Args:
             prefecture_code (str): 都道府県コード
             city_code (str): 市区町村コード
             limit (int): 取得件数の制限
-            
+            after (str): この電話番号より後ろから取得する（前ページの最後の電話番号）
+
         Returns:
-            List[Dict[str, str]]: 検索結果のリスト
+            List[Dict[str, str]]: 検索結果のリスト（電話番号順）
+                - phone_number: 電話番号
+                - area: 地域（都道府県＋市区町村）
+                - carrier: 事業者
+                - note: 備考
         """
         try:
-            cache_key = f"{prefecture_code}:{city_code}"
-            cached_result = self._get_from_cache(cache_key)
-            if cached_result:
+            cache_key = f"area:{prefecture_code}:{city_code}:{after}:{limit}"
+            cached_result = self.cache.get(cache_key)
+            if cached_result is not None:
                 return cached_result
-                
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # 地域情報の取得
-                cursor.execute("""
-                    SELECT p.name, c.name
-                    FROM prefectures p
-                    JOIN cities c ON p.code = c.prefecture_code
-                    WHERE p.code = ? AND c.code = ?
-                """, (prefecture_code, city_code))
-                
-                result = cursor.fetchone()
-                if not result:
+
+            with self._lock:
+                conn = self._connect()
+                area = conn.execute(_SELECT_AREA, (prefecture_code, city_code)).fetchone()
+                if not area:
                     return []
-                    
-                prefecture_name, city_name = result
-                
-                # TODO: 電話番号データの検索
-                # ここで電話番号データベースから該当する地域の電話番号を取得
-                
-                # キャッシュに保存
-                self._add_to_cache(cache_key, [])
-                return []
+                rows = conn.execute(_SELECT_PHONE_PAGE, (city_code, after or "", limit)).fetchall()
+
+            area_name = f"{area[0]}{area[1]}"
+            result = [
+                {"phone_number": row[0], "area": area_name, "carrier": row[1], "note": row[2]}
+                for row in rows
+            ]
+            self.cache.put(cache_key, result)
+            return result
         except Exception as e:
             logging.error(f"地域検索中にエラーが発生しました: {str(e)}")
             return []
-            
-    def _get_from_cache(self, key: str) -> Optional[List[Dict[str, str]]]:
+
+    def iter_area_pages(self, prefecture_code: str, city_code: str,
+                        page_size: int = 100) -> Iterator[List[Dict[str, str]]]:
+        """
+        地域の検索結果をページ単位で順に返します（電話番号をキーに続きから取得）。
+
+        Args:
+            prefecture_code (str): 都道府県コード
+            city_code (str): 市区町村コード
+            page_size (int): 1ページの件数
+
+        Yields:
+            List[Dict[str, str]]: 1ページ分の検索結果
+        """
+        after = ""
+        while True:
+            page = self.search_by_area(prefecture_code, city_code, limit=page_size, after=after)
+            if not page:
+                return
+            yield page
+            if len(page) < page_size:
+                return
+            after = page[-1]["phone_number"]
+
+    def count_by_area(self, city_code: str) -> int:
+        """
+        地域の電話番号データの件数を返します。
+
+        Args:
+            city_code (str): 市区町村コード
+
+        Returns:
+            int: 件数
         """
-        キャッシュからデータを取得します。
-        
+        try:
+            with self._lock:
+                return self._connect().execute(_COUNT_PHONES, (city_code,)).fetchone()[0]
+        except Exception as e:
+            logging.error(f"件数の取得中にエラーが発生しました: {str(e)}")
+            return 0
+
+    def _bulk_upsert(self, statement: str, rows: Iterable[Tuple], chunk_size: int) -> int:
+        """1つのトランザクションでまとめて書き込む"""
+        total = 0
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                chunk = []
+                for row in rows:
+                    chunk.append(row)
+                    if len(chunk) >= chunk_size:
+                        conn.executemany(statement, chunk)
+                        total += len(chunk)
+                        chunk = []
+                if chunk:
+                    conn.executemany(statement, chunk)
+                    total += len(chunk)
+        return total
+
+    def import_areas(self, prefectures: Iterable[Tuple[str, str, str]],
+                     cities: Iterable[Tuple[str, str, str, str]], chunk_size: int = 5000) -> Tuple[int, int]:
+        """
+        都道府県・市区町村を一括で取り込みます（既存のコードは上書き）。
+
         Args:
-            key (str): キャッシュキー
-            
+            prefectures (iterable): (都道府県コード, 名称, カナ) の並び
+            cities (iterable): (市区町村コード, 都道府県コード, 名称, カナ) の並び
+            chunk_size (int): まとめて書き込む件数
+
         Returns:
-            Optional[List[Dict[str, str]]]: キャッシュされたデータ、存在しない場合はNone
-        """
-        if key in self.cache:
-            cached_data = self.cache[key]
-            if datetime.now() - cached_data["timestamp"] < self.cache_expiry:
-                return cached_data["data"]
-            else:
-                del self.cache[key]
-        return None
-        
-    def _add_to_cache(self, key: str, data: List[Dict[str, str]]) -> None:
-        """
-        データをキャッシュに追加します。
-        
+            tuple: (都道府県の件数, 市区町村の件数)
+        """
+        prefecture_count = self._bulk_upsert(_UPSERT_PREFECTURE, prefectures, chunk_size)
+        city_count = self._bulk_upsert(_UPSERT_CITY, cities, chunk_size)
+        self.cache.clear()
+        logging.info(f"地域データを取り込みました: 都道府県 {prefecture_count}件、市区町村 {city_count}件")
+        return prefecture_count, city_count
+
+    def import_phone_numbers(self, rows: Iterable[Tuple[str, str, str, str]], chunk_size: int = 5000,
+                             skipped: Optional[List[Tuple[str, str, str, str]]] = None) -> int:
+        """
+        地域ごとの電話番号データを一括で取り込みます（既存の番号は上書き）。
+
+        市区町村コードが cities に登録されていない行は、取り込み全体を
+        失敗させずに読み飛ばします。
+
         Args:
-            key (str): キャッシュキー
-            data (List[Dict[str, str]]): キャッシュするデータ
-        """
-        if len(self.cache) >= 1000:
-            # 最も古いキャッシュを削除
-            oldest_key = min(
-                self.cache.keys(),
-                key=lambda k: self.cache[k]["timestamp"]
+            rows (iterable): (電話番号, 市区町村コード, 事業者, 備考) の並び
+            chunk_size (int): まとめて書き込む件数
+            skipped (list): 指定した場合、市区町村コードが未登録で読み飛ばした行を追加する
+
+        Returns:
+            int: 取り込んだ件数
+        """
+        with self._lock:
+            city_prefectures = dict(self._connect().execute(_SELECT_CITY_CODES).fetchall())
+        unknown: List[Tuple[str, str, str, str]] = []
+
+        def _records():
+            for row in rows:
+                phone_number, city_code, carrier, note = row
+                phone_number = "".join(ch for ch in unicodedata.normalize("NFKC", phone_number or "") if ch.isdigit())
+                if not phone_number or not city_code:
+                    continue
+                prefecture_code = city_prefectures.get(city_code)
+                if prefecture_code is None:
+                    unknown.append(row)
+                    continue
+                yield phone_number, prefecture_code, city_code, carrier or "", note or ""
+
+        total = self._bulk_upsert(_UPSERT_PHONE, _records(), chunk_size)
+        self.cache.clear()
+        if unknown:
+            codes = sorted({row[1] for row in unknown})
+            logging.warning(
+                f"未登録の市区町村コードの行を読み飛ばしました: {len(unknown)}件"
+                f"（{', '.join(codes[:10])}{' ほか' if len(codes) > 10 else ''}）"
             )
-            del self.cache[oldest_key]
-            
-        self.cache[key] = {
-            "data": data,
-            "timestamp": datetime.now()
-        } 
\ No newline at end of file
+            if skipped is not None:
+                skipped.extend(unknown)
+        logging.info(f"電話番号データを取り込みました: {total}件")
+        return total
+
+
+def read_ken_all_areas(path: str, encoding: str = "cp932") -> Tuple[List[Tuple], List[Tuple]]:
+    """
+    日本郵便の KEN_ALL.CSV から都道府県・市区町村を読み出す
+
+    Args:
+        path (str): KEN_ALL.CSV のパス
+        encoding (str): 文字コード（配布ファイルは Shift_JIS）
+
+    Returns:
+        tuple: (都道府県の並び, 市区町村の並び)。import_areas の引数の形式
+    """
+    prefectures: Dict[str, Tuple[str, str, str]] = {}
+    cities: Dict[str, Tuple[str, str, str, str]] = {}
+    with open(path, "r", encoding=encoding, newline="") as f:
+        for row in csv.reader(f):
+            if len(row) < 8 or len(row[0]) < 5:
+                continue
+            city_code, prefecture_code = row[0], row[0][:2]
+            prefectures.setdefault(prefecture_code, (prefecture_code, row[6], unicodedata.normalize("NFKC", row[3])))
+            cities.setdefault(city_code, (city_code, prefecture_code, row[7], unicodedata.normalize("NFKC", row[4])))
+    return list(prefectures.values()), list(cities.values())
+
+
+def read_phone_csv(path: str, encoding: str = "utf-8-sig") -> Iterator[Tuple[str, str, str, str]]:
+    """
+    電話番号データのCSV（見出し行あり）を読み出す
+
+    Args:
+        path (str): CSVのパス。電話番号・市区町村コードの列が必要（事業者・備考は任意）
+        encoding (str): 文字コード
+
+    Yields:
+        tuple: (電話番号, 市区町村コード, 事業者, 備考)
+    """
+    with open(path, "r", encoding=encoding, newline="") as f:
+        for record in csv.DictReader(f):
+            values = {}
+            for field, names in PHONE_COLUMNS.items():
+                values[field] = next((record[name].strip() for name in names if record.get(name)), "")
+            yield values["phone_number"], values["city_code"], values["carrier"], values["note"]
+
+
+def main(argv=None) -> int:
+    """コマンドラインから地域データ・電話番号データを取り込む"""
+    parser = argparse.ArgumentParser(description="地域検索データベースへの一括取り込み")
+    parser.add_argument("--db", default="data/area.db", help="データベースファイル")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    areas_parser = subparsers.add_parser("import-areas", help="KEN_ALL.CSV から都道府県・市区町村を取り込みます")
+    areas_parser.add_argument("ken_all", help="日本郵便の KEN_ALL.CSV")
+    phones_parser = subparsers.add_parser("import-phones", help="電話番号データのCSVを取り込みます")
+    phones_parser.add_argument("csv_path", help="電話番号・市区町村コード・事業者・備考の列を持つCSV")
+    args = parser.parse_args(argv)
+
+    service = AreaSearchService(args.db)
+    try:
+        started = time.perf_counter()
+        if args.command == "import-areas":
+            prefectures, cities = read_ken_all_areas(args.ken_all)
+            prefecture_count, city_count = service.import_areas(prefectures, cities)
+            print(f"都道府県 {prefecture_count}件、市区町村 {city_count}件を取り込みました"
+                  f"（{time.perf_counter() - started:.2f}秒）")
+        else:
+            skipped = []
+            total = service.import_phone_numbers(read_phone_csv(args.csv_path), skipped=skipped)
+            print(f"電話番号 {total}件を取り込みました（{time.perf_counter() - started:.2f}秒）")
+            for phone_number, city_code, _, _ in skipped:
+                print(f"読み飛ばし（未登録の市区町村コード {city_code}）: {phone_number}")
+    finally:
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
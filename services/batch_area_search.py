@@ -0,0 +1,343 @@
+"""
+提供エリアの一括判定（バッチモード）
+
+このモジュールは、キャンペーン前に渡される住所リスト（CSV/JSONL）を
+GUIを使わずに search_service_area で一括判定するための機能を提供します。
+
+主な機能：
+- CSV/JSONL（郵便番号・住所）の読み込み
+- 複数ワーカープロセスでの並列判定
+- サイト（西日本/東日本）ごとのレート制限
+- 判定結果のJSONLへの逐次書き込みと中断後の再開
+- 処理件数/分と1件あたりの所要時間の集計
+
+使用例：
+    python -m services.batch_area_search list.csv -o results.jsonl --workers 3 --rate west=20 --rate east=20
+
+制限事項：
+- 検索モジュールはブラウザをモジュール変数で保持するため、ワーカーはプロセス単位で分離します
+- 出力ファイルに記録済みの行は再開時にスキップします
+"""
+
+import os
+import csv
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, ALL_COMPLETED, FIRST_COMPLETED, wait
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional
+
+from utils.stats_utils import percentile
+
+POSTAL_CODE_COLUMNS = ("postal_code", "zipcode", "zip", "郵便番号", "〒")
+ADDRESS_COLUMNS = ("address", "住所")
+
+
+def _pick_column(row: Dict[str, str], candidates) -> str:
+    for name in candidates:
+        value = row.get(name)
+        if value:
+            return str(value).strip()
+    return ""
+
+
+def read_input_rows(input_path: str) -> Iterator[Dict]:
+    """
+    CSV/JSONLから判定対象の行を読み込む
+
+    Args:
+        input_path (str): 入力ファイルのパス（.jsonl/.json以外はCSVとして扱う）
+
+    Yields:
+        dict: {"row": 行番号, "postal_code": 郵便番号, "address": 住所}
+    """
+    is_jsonl = input_path.lower().endswith((".jsonl", ".json"))
+    with open(input_path, "r", encoding="utf-8-sig", newline="") as f:
+        if is_jsonl:
+            records = (json.loads(line) for line in f if line.strip())
+        else:
+            records = csv.DictReader(f)
+
+        for index, record in enumerate(records, start=1):
+            record = {str(k).strip(): v for k, v in record.items() if k is not None}
+            yield {
+                "row": index,
+                "postal_code": _pick_column(record, POSTAL_CODE_COLUMNS),
+                "address": _pick_column(record, ADDRESS_COLUMNS),
+            }
+
+
+def load_completed_rows(output_path: str) -> set:
+    """
+    出力済みJSONLから完了した行番号を読み込む（再開用）
+
+    Args:
+        output_path (str): 出力ファイルのパス
+
+    Returns:
+        set: 完了済みの行番号
+    """
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # 書き込み途中で中断した行は未完了として扱う
+                continue
+            if isinstance(record, dict) and "row" in record:
+                completed.add(record["row"])
+    return completed
+
+
+class SiteRateLimiter:
+    """サイトごとの最小実行間隔を守るレート制限"""
+
+    def __init__(self, rate_per_minute: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            rate_per_minute (dict): サイト（west/east）ごとの1分あたりの上限件数
+        """
+        self._intervals = {
+            site: 60.0 / rate
+            for site, rate in (rate_per_minute or {}).items()
+            if rate and rate > 0
+        }
+        self._next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, site: str) -> float:
+        """
+        次の実行枠を予約し、それまでの待機秒数を返す
+
+        Args:
+            site (str): サイト識別子
+
+        Returns:
+            float: 待機が必要な秒数
+        """
+        interval = self._intervals.get(site)
+        if not interval:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(site, now))
+            self._next_slot[site] = slot + interval
+            return slot - now
+
+
+def detect_site(address: str, postal_code: str = "") -> str:
+    """住所（都道府県が判定できない場合は郵便番号）から判定サイト（west/east）を返す"""
+    from services.area_search import is_east_japan
+    return "east" if is_east_japan(address or "", postal_code) else "west"
+
+
+def _run_single_search(row: Dict, force_refresh: bool = False, headless: bool = True) -> Dict:
+    """
+    ワーカープロセスで1件を判定する
+
+    Args:
+        row (dict): 判定対象の行
+        force_refresh (bool): キャッシュを使わずに再検索するか
+        headless (bool): ヘッドレスで実行するか
+
+    Returns:
+        dict: 出力用のレコード
+    """
+    from services import area_search, area_search_east
+
+    area_search.set_browser_settings_override({
+        "headless": headless,
+        "show_popup": False,
+        "auto_close": True,
+    })
+    started = time.monotonic()
+    try:
+        result = area_search.search_service_area(
+            row["postal_code"],
+            row["address"],
+            force_refresh=force_refresh
+        )
+    except Exception as e:
+        logging.error(f"一括判定中にエラー（{row['row']}行目）: {str(e)}")
+        result = {"status": "error", "message": f"検索処理中にエラーが発生: {str(e)}"}
+    finally:
+        # 1件ごとにブラウザを閉じる（ドライバープール有効時は返却）
+        area_search.close_global_driver()
+        area_search_east.close_global_driver()
+
+    return {
+        "row": row["row"],
+        "postal_code": row["postal_code"],
+        "address": row["address"],
+        "status": result.get("status") if isinstance(result, dict) else "error",
+        "result": result,
+        "cached": bool(isinstance(result, dict) and result.get("cached")),
+        "latency_sec": round(time.monotonic() - started, 3),
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def build_report(records: List[Dict], elapsed_sec: float, skipped: int = 0) -> Dict:
+    """
+    処理件数/分と所要時間を集計する
+
+    Args:
+        records (list): 今回処理したレコード
+        elapsed_sec (float): 全体の経過秒数
+        skipped (int): 再開によりスキップした件数
+
+    Returns:
+        dict: 集計結果
+    """
+    latencies = [r["latency_sec"] for r in records]
+    status_counts: Dict[str, int] = {}
+    for record in records:
+        status_counts[record["status"]] = status_counts.get(record["status"], 0) + 1
+    return {
+        "processed": len(records),
+        "skipped": skipped,
+        "elapsed_sec": round(elapsed_sec, 3),
+        "addresses_per_minute": round(len(records) / elapsed_sec * 60, 2) if elapsed_sec > 0 else 0.0,
+        "latency_p50_sec": percentile(latencies, 0.5),
+        "latency_p90_sec": percentile(latencies, 0.9),
+        "latency_max_sec": max(latencies) if latencies else 0.0,
+        "cached": sum(1 for r in records if r.get("cached")),
+        "status_counts": status_counts,
+    }
+
+
+def run_batch(
+    input_path: str,
+    output_path: str,
+    workers: int = 2,
+    rate_per_minute: Optional[Dict[str, float]] = None,
+    force_refresh: bool = False,
+    headless: bool = True,
+    search_func: Optional[Callable[..., Dict]] = None,
+    use_processes: bool = True,
+) -> Dict:
+    """
+    住所リストを一括判定し、結果をJSONLへ逐次書き込む
+
+    Args:
+        input_path (str): 入力ファイル（CSV/JSONL）
+        output_path (str): 出力JSONL（既存の場合は未完了行のみ追記）
+        workers (int): 並列ワーカー数
+        rate_per_minute (dict): サイトごとの1分あたりの上限件数
+        force_refresh (bool): キャッシュを使わずに再検索するか
+        headless (bool): ヘッドレスで実行するか
+        search_func (callable): 1件を判定する関数（テスト用に差し替え可能）
+        use_processes (bool): Falseの場合はスレッドで実行する
+
+    Returns:
+        dict: 集計結果（build_report の戻り値）
+    """
+    search_func = search_func or _run_single_search
+    completed = load_completed_rows(output_path)
+    limiter = SiteRateLimiter(rate_per_minute)
+    records: List[Dict] = []
+    skipped = 0
+
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    workers = max(1, int(workers))
+    started = time.monotonic()
+
+    with open(output_path, "a", encoding="utf-8") as out, executor_class(max_workers=workers) as executor:
+        pending = set()
+        # 中断で書きかけになった行の後ろに続けて書かないよう改行を補う
+        if out.tell() > 0:
+            with open(output_path, "rb") as existing:
+                existing.seek(-1, os.SEEK_END)
+                if existing.read(1) != b"\n":
+                    out.write("\n")
+
+        def _drain(return_when):
+            nonlocal pending
+            if not pending:
+                return
+            done, pending = wait(pending, return_when=return_when)
+            for future in done:
+                record = future.result()
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                os.fsync(out.fileno())
+                records.append(record)
+                logging.info(
+                    f"一括判定: {record['row']}行目 {record['status']} ({record['latency_sec']}秒)"
+                )
+
+        for row in read_input_rows(input_path):
+            if row["row"] in completed:
+                skipped += 1
+                continue
+            if not row["postal_code"] or not row["address"]:
+                logging.warning(f"一括判定: {row['row']}行目は郵便番号または住所が空のためスキップします")
+                continue
+
+            while len(pending) >= workers:
+                _drain(FIRST_COMPLETED)
+
+            delay = limiter.reserve(detect_site(row["address"], row["postal_code"]))
+            if delay > 0:
+                time.sleep(delay)
+            pending.add(executor.submit(search_func, row, force_refresh, headless))
+
+        _drain(ALL_COMPLETED)
+
+    report = build_report(records, time.monotonic() - started, skipped)
+    logging.info(f"一括判定が完了しました: {report}")
+    return report
+
+
+def _parse_rate(values: List[str]) -> Dict[str, float]:
+    rates = {}
+    for value in values or []:
+        site, _, rate = value.partition("=")
+        if site not in ("west", "east") or not rate:
+            raise argparse.ArgumentTypeError(f"--rate は west=件数 / east=件数 の形式で指定してください: {value}")
+        rates[site] = float(rate)
+    return rates
+
+
+def main(argv=None) -> int:
+    """コマンドラインから一括判定を実行する"""
+    parser = argparse.ArgumentParser(description="住所リストの提供エリアを一括判定します")
+    parser.add_argument("input", help="入力ファイル（CSV または JSONL。郵便番号・住所の列が必要）")
+    parser.add_argument("-o", "--output", required=True, help="結果を書き込むJSONLファイル（再開時は同じファイルを指定）")
+    parser.add_argument("-w", "--workers", type=int, default=2, help="並列ブラウザ数（既定: 2）")
+    parser.add_argument("--rate", action="append", default=[], help="サイトごとの1分あたり上限（例: west=20）")
+    parser.add_argument("--force-refresh", action="store_true", help="キャッシュを使わずに再検索する")
+    parser.add_argument("--show-browser", action="store_true", help="ブラウザを表示して実行する")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    report = run_batch(
+        args.input,
+        args.output,
+        workers=args.workers,
+        rate_per_minute=_parse_rate(args.rate),
+        force_refresh=args.force_refresh,
+        headless=not args.show_browser,
+    )
+
+    print("=== 一括判定結果 ===")
+    print(f"処理件数: {report['processed']}（スキップ: {report['skipped']}、キャッシュ: {report['cached']}）")
+    print(f"経過時間: {report['elapsed_sec']}秒")
+    print(f"処理速度: {report['addresses_per_minute']}件/分")
+    print(
+        f"1件あたり: p50={report['latency_p50_sec']}秒 / "
+        f"p90={report['latency_p90_sec']}秒 / 最大={report['latency_max_sec']}秒"
+    )
+    print(f"判定内訳: {report['status_counts']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
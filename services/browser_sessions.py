@@ -0,0 +1,436 @@
+"""
+アプリ再起動をまたいだ提供判定ブラウザの再利用
+
+このモジュールは、提供判定（西日本・東日本）で起動したChromeのデバッグ接続先
+（debuggerAddress）とプロセスIDを記録し、アプリの再起動後に生きているブラウザへ
+接続し直して次の検索に使い、応答しないブラウザは終了する機能を提供します。
+
+主な機能：
+- 起動したブラウザの記録（chromedriver が終了してもブラウザを残す detach 起動）
+- 再起動時の引き継ぎ（待機中のプール・表示中のブラウザを終了せずに手放す）
+- 起動時の接続し直し・ヘルスチェック・Cookieの消去と、応答しないブラウザの終了
+- 接続し直したブラウザの検索への受け渡し
+
+制限事項：
+- settings.json の session_reuse.enabled が true の場合のみ detach 起動・記録・接続し直しを行います（既定は無効）
+- 再起動時に手放すのは記録できたブラウザだけで、記録できなかったもの（PIDを特定できない等）は終了します
+- 別のアプリ（起動中の別プロセス）が記録したブラウザには触れません
+- 画面表示ありのブラウザは、前回の結果を表示したまま残し、検索に使う時点でCookieを消去します
+
+使用例：
+    detach_options(options)
+    driver = webdriver.Chrome(options=options)
+    register_browser(driver, "west", headless=True)
+    # 再起動後
+    restore_browsers_async()
+    driver, page_prewarmed = claim_restored_driver("west", headless=True)
+"""
+
+import os
+import json
+import time
+import socket
+import logging
+import threading
+import urllib.request
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_STATE_PATH = "browser_sessions.json"
+
+DEFAULT_SESSION_REUSE_SETTINGS = {
+    # detach 起動のブラウザはアプリが異常終了すると残るため、明示的に有効にした場合のみ使う
+    "enabled": False,
+    "state_path": DEFAULT_STATE_PATH,
+    "health_timeout": 3,
+    # 再起動前のアプリの終了を待つ時間（秒）
+    "previous_app_wait": 10,
+}
+
+_state_lock = threading.Lock()
+_restored_lock = threading.Lock()
+_restored: Dict[Tuple[str, bool], List[Tuple[object, bool]]] = {}
+_handed_off = False
+
+
+def _load_session_reuse_settings(path="settings.json"):
+    """
+    settings.json から session_reuse 設定を読み込み、既定値で補完して返す。
+    """
+    settings = dict(DEFAULT_SESSION_REUSE_SETTINGS)
+    try:
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                cfg = json.load(f)
+                settings.update(cfg.get("session_reuse", {}) or {})
+    except Exception as e:
+        logging.warning(f"ブラウザ再利用の設定の読み込みに失敗しました: {e}")
+    return settings
+
+
+def _is_process_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        import psutil
+
+        return psutil.pid_exists(pid) and psutil.Process(pid).status() != psutil.STATUS_ZOMBIE
+    except ImportError:
+        pass
+    except Exception:
+        return False
+    if os.name == "nt":
+        import ctypes
+
+        handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        exit_code = ctypes.c_ulong()
+        ctypes.windll.kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+        ctypes.windll.kernel32.CloseHandle(handle)
+        return exit_code.value == 259  # STILL_ACTIVE
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except (OSError, IndexError):
+        pass
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+
+
+def _read_state(path: str) -> Dict[str, Dict]:
+    try:
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f).get("browsers", {}) or {}
+    except Exception as e:
+        logging.warning(f"ブラウザの記録の読み込みに失敗しました: {e}")
+    return {}
+
+
+def _write_state(path: str, browsers: Dict[str, Dict]) -> None:
+    try:
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"browsers": browsers}, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
+    except Exception as e:
+        logging.warning(f"ブラウザの記録の保存に失敗しました: {e}")
+
+
+def detach_options(options) -> None:
+    """
+    chromedriver の終了後もブラウザを残すよう起動オプションを設定する（各 create_driver から呼ぶ）
+
+    Args:
+        options: ChromeOptions
+    """
+    if _load_session_reuse_settings().get("enabled", False):
+        options.add_experimental_option("detach", True)
+
+
+def _browser_pid(driver) -> Optional[int]:
+    from services.cancellation import find_child_process
+
+    pid = getattr(driver, "browser_pid", None)
+    if pid:
+        return pid
+    process = getattr(getattr(driver, "service", None), "process", None)
+    user_data_dir = (driver.capabilities.get("chrome") or {}).get("userDataDir")
+    if process is None or not user_data_dir:
+        return None
+    return find_child_process(process.pid, user_data_dir)
+
+
+def register_browser(driver, site: str, headless: bool) -> None:
+    """
+    起動したブラウザの接続先を記録する（終了済みのブラウザの記録はここで削除する）
+
+    Args:
+        driver: WebDriverインスタンス
+        site (str): サイト識別子（west/east）
+        headless (bool): ヘッドレスで起動したかどうか
+    """
+    settings = _load_session_reuse_settings()
+    if not settings.get("enabled", False) or driver is None:
+        return
+    try:
+        address = (driver.capabilities.get("goog:chromeOptions") or {}).get("debuggerAddress")
+        pid = _browser_pid(driver)
+    except Exception as e:
+        logging.debug(f"ブラウザの接続先を取得できませんでした: {e}")
+        return
+    if not address or not pid:
+        # 記録できないブラウザは再起動時に引き継がず終了する（handoff_browsers）
+        logging.info(f"ブラウザの接続先またはPIDを特定できないため、再起動後の再利用の対象外とします（{site}）")
+        return
+    driver.browser_pid = pid
+    driver.reuse_address = address
+
+    path = settings.get("state_path") or DEFAULT_STATE_PATH
+    with _state_lock:
+        browsers = {key: entry for key, entry in _read_state(path).items() if _is_process_alive(entry.get("pid"))}
+        browsers[address] = {
+            "site": site,
+            "headless": bool(headless),
+            "pid": pid,
+            "app_pid": os.getpid(),
+            "created_at": time.time(),
+        }
+        _write_state(path, browsers)
+
+
+def handoff_browsers() -> int:
+    """
+    再起動の直前に、待機中・表示中のブラウザを終了せずに手放す（次のアプリが接続し直す）
+
+    記録（browser_sessions.json）にないブラウザは次のアプリが見つけられず残り続けるため、
+    手放さずにここで終了します。
+
+    Returns:
+        int: 手放したブラウザの数
+    """
+    global _handed_off
+    settings = _load_session_reuse_settings()
+    if not settings.get("enabled", False):
+        return 0
+    from services.driver_pool import detach_idle_drivers
+
+    _handed_off = True
+    with _state_lock:
+        recorded = set(_read_state(settings.get("state_path") or DEFAULT_STATE_PATH))
+
+    def _hand_off(driver) -> bool:
+        if getattr(driver, "reuse_address", None) in recorded:
+            return True
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        return False
+
+    count = sum(1 for driver in detach_idle_drivers() if _hand_off(driver))
+    for module_name in ("services.area_search", "services.area_search_east"):
+        try:
+            module = __import__(module_name, fromlist=["global_driver"])
+        except ImportError:
+            continue
+        driver, module.global_driver = module.global_driver, None
+        if driver is not None and _hand_off(driver):
+            count += 1
+    with _restored_lock:
+        count += sum(len(drivers) for drivers in _restored.values())
+        _restored.clear()
+    logging.info(f"再起動後に再利用するため、{count}個のブラウザを残します")
+    return count
+
+
+def _is_debugger_responding(address: str, timeout: float) -> bool:
+    host, _, port = address.rpartition(":")
+    try:
+        with socket.create_connection((host or "127.0.0.1", int(port)), timeout=timeout):
+            pass
+        with urllib.request.urlopen(f"http://{address}/json/version", timeout=timeout) as response:
+            return response.status == 200
+    except Exception:
+        return False
+
+
+def _reap(pid: Optional[int], reason: str) -> None:
+    from services.cancellation import kill_process_tree
+
+    if not pid:
+        return
+    try:
+        kill_process_tree(pid)
+        logging.info(f"前回のブラウザを終了しました（PID: {pid}、{reason}）")
+    except Exception as e:
+        logging.warning(f"前回のブラウザの終了に失敗しました（PID: {pid}）: {e}")
+
+
+def _clear_cookies(driver) -> None:
+    driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+
+
+def _reattach(address: str, entry: Dict, timeout: float):
+    """ブラウザに接続し直してヘルスチェックし、ヘッドレスならトップページを開いておく"""
+    from selenium.webdriver.chrome.options import Options
+    from services.driver_bootstrap import start_chrome
+    from services.driver_pool import get_site_url
+    from services.request_blocking import apply_blocking_options, apply_blocking_profile
+
+    site = entry["site"]
+    options = Options()
+    options.debugger_address = address
+    apply_blocking_options(options)
+    driver, _ = start_chrome(options)
+    driver.browser_pid = entry["pid"]
+
+    # 接続し直したセッションの quit ではブラウザが残る場合があるため、プロセスごと終了する
+    original_quit = driver.quit
+
+    def _quit():
+        from services.cancellation import kill_process_tree
+
+        original_quit()
+        kill_process_tree(entry["pid"])
+
+    driver.quit = _quit
+    try:
+        driver.set_script_timeout(timeout)
+        handles = driver.window_handles
+        if not handles:
+            raise RuntimeError("ウィンドウがありません")
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        if driver.execute_script("return document.readyState") not in ("interactive", "complete"):
+            raise RuntimeError("ページが応答しません")
+
+        allow = None
+        if site == "west":
+            from services.area_search import _result_image_allowlist
+            allow = {"images": _result_image_allowlist()}
+        apply_blocking_profile(driver, site, allow=allow)
+
+        # 表示ありのブラウザは前回の結果を残し、検索に使う時点でCookieを消去する
+        prewarmed = False
+        if entry.get("headless"):
+            _clear_cookies(driver)
+            driver.execute_script("try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}")
+            driver.get(get_site_url(site))
+            prewarmed = True
+        return driver, prewarmed
+    except Exception:
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        raise
+
+
+def restore_browsers() -> int:
+    """
+    前回のアプリが残したブラウザに接続し直す（応答しないものは終了する）
+
+    Returns:
+        int: 接続し直したブラウザの数
+    """
+    settings = _load_session_reuse_settings()
+    if not settings.get("enabled", False):
+        return 0
+    path = settings.get("state_path") or DEFAULT_STATE_PATH
+    timeout = float(settings.get("health_timeout", 3))
+    with _state_lock:
+        browsers = _read_state(path)
+    if not browsers:
+        return 0
+
+    # 再起動前のアプリの終了を待つ（終了しない場合は起動中の別アプリのブラウザとみなす）
+    previous_apps = {entry.get("app_pid") for entry in browsers.values()} - {os.getpid()}
+    deadline = time.monotonic() + float(settings.get("previous_app_wait", 10))
+    while any(_is_process_alive(pid) for pid in previous_apps) and time.monotonic() < deadline:
+        time.sleep(0.2)
+
+    restored, kept = 0, {}
+    for address, entry in browsers.items():
+        pid = entry.get("pid")
+        if entry.get("app_pid") != os.getpid() and _is_process_alive(entry.get("app_pid")):
+            kept[address] = entry
+            continue
+        if not _is_process_alive(pid):
+            continue
+        if not _is_debugger_responding(address, timeout):
+            _reap(pid, "デバッグ接続に応答しません")
+            continue
+        try:
+            driver, prewarmed = _reattach(address, entry, timeout)
+        except Exception as e:
+            _reap(pid, f"ヘルスチェック失敗: {e}")
+            continue
+        driver.reuse_address = address
+        with _restored_lock:
+            _restored.setdefault((entry["site"], bool(entry.get("headless"))), []).append((driver, prewarmed))
+        kept[address] = dict(entry, app_pid=os.getpid())
+        restored += 1
+        logging.info(f"前回のブラウザに接続し直しました（{entry['site']}、{address}）")
+
+    with _state_lock:
+        current = _read_state(path)
+        current.update(kept)
+        for address in set(browsers) - set(kept):
+            current.pop(address, None)
+        _write_state(path, current)
+    return restored
+
+
+def restore_browsers_async() -> threading.Thread:
+    """restore_browsers をバックグラウンドで実行する（アプリ起動時に呼ぶ）"""
+
+    def _run():
+        try:
+            restore_browsers()
+        except Exception as e:
+            logging.warning(f"前回のブラウザの再利用に失敗しました: {e}")
+
+    thread = threading.Thread(target=_run, name="BrowserRestore", daemon=True)
+    thread.start()
+    return thread
+
+
+def claim_restored_driver(site: str, headless: bool) -> Tuple[Optional[object], bool]:
+    """
+    接続し直したブラウザを検索に使う
+
+    Args:
+        site (str): サイト識別子（west/east）
+        headless (bool): ヘッドレスモードかどうか（起動時の設定と一致するもののみ）
+
+    Returns:
+        tuple: (ドライバー, トップページ表示済みか)。ない場合は (None, False)
+    """
+    while True:
+        with _restored_lock:
+            drivers = _restored.get((site, bool(headless)))
+            if not drivers:
+                return None, False
+            driver, prewarmed = drivers.pop(0)
+        try:
+            if not prewarmed:
+                _clear_cookies(driver)
+            driver.window_handles
+        except Exception as e:
+            logging.info(f"接続し直したブラウザが応答しないため使用しません: {e}")
+            _reap(getattr(driver, "browser_pid", None), "応答なし")
+            continue
+        logging.info(f"前回のブラウザを検索に使用します（{site}）")
+        return driver, prewarmed
+
+
+def shutdown_browser_sessions() -> None:
+    """
+    アプリ終了時に提供判定のブラウザを終了する（再起動で引き継いだ場合は何もしない）
+
+    detach 起動のブラウザは chromedriver の終了では閉じないため、通常の終了ではここで閉じる。
+    """
+    if _handed_off or not _load_session_reuse_settings().get("enabled", False):
+        return
+    for module_name in ("services.area_search", "services.area_search_east"):
+        try:
+            module = __import__(module_name, fromlist=["close_global_driver"])
+            module.close_global_driver()
+        except Exception as e:
+            logging.warning(f"提供判定のブラウザの終了に失敗しました: {e}")
+    with _restored_lock:
+        drivers = [driver for entries in _restored.values() for driver, _ in entries]
+        _restored.clear()
+    for driver in drivers:
+        try:
+            driver.quit()
+        except Exception:
+            pass
@@ -0,0 +1,375 @@
+"""
+検索ごとのキャンセルトークン
+
+このモジュールは、提供判定・MapFan検索の1回ごとにキャンセル状態を持つトークンと、
+処理中のスレッドにトークンを結び付けて待機・ドライバー起動から参照する機能を提供します。
+
+主な機能：
+- トークンのキャンセル（待機中の処理を即座に起こし、登録したChromeのプロセスツリーを終了）
+- キャンセル可能な待機（cancellable_sleep / CancellableWait）
+- スレッドへのトークンの結び付け（use_token / current_token）
+- キャンセルから処理終了（待機状態）までの所要時間の記録
+
+制限事項：
+- トークンはスレッドごとに結び付けるため、別スレッドで動く処理には明示的に渡してください
+- プロセスの終了は Windows では taskkill /T、それ以外では psutil（なければ /proc）で子孫を探して行います
+- 共有 chromedriver のセッションでブラウザのPIDを特定するには psutil が必要です（requirements.txt）
+- 検索が終わった後のキャンセルでは、画面に残したブラウザは終了しません（release_drivers 後は登録が外れる）
+
+使用例：
+    token = CancelToken()
+    with use_token(token):
+        result = search_service_area(postal_code, address)
+    # 別スレッドから
+    token.cancel("画面から取り消し")
+"""
+
+import os
+import sys
+import time
+import signal
+import logging
+import threading
+import subprocess
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+
+class CancellationError(Exception):
+    """検索キャンセル時に発生する例外"""
+    pass
+
+
+def _descendant_pids(pid: int) -> List[int]:
+    """プロセスの子孫のPIDを返す（psutil がなければ /proc を参照）"""
+    try:
+        import psutil
+
+        return [child.pid for child in psutil.Process(pid).children(recursive=True)]
+    except ImportError:
+        pass
+    except Exception:
+        return []
+
+    children = {}
+    try:
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat", "r") as f:
+                    # comm に空白や括弧を含む場合があるため最後の ")" 以降を読む
+                    fields = f.read().rsplit(")", 1)[1].split()
+                children.setdefault(int(fields[1]), []).append(int(entry))
+            except (OSError, IndexError, ValueError):
+                continue
+    except OSError:
+        return []
+
+    found, pending = [], [pid]
+    while pending:
+        for child in children.get(pending.pop(), []):
+            found.append(child)
+            pending.append(child)
+    return found
+
+
+def kill_process_tree(pid: int) -> None:
+    """
+    プロセスとその子孫を強制終了する
+
+    Args:
+        pid (int): 終了するプロセス（chromedriver）のPID
+    """
+    if not pid:
+        return
+    if sys.platform == "win32":
+        subprocess.run(
+            ["taskkill", "/PID", str(pid), "/T", "/F"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        )
+        return
+    for target in [pid] + _descendant_pids(pid):
+        try:
+            os.kill(target, signal.SIGKILL)
+        except OSError:
+            pass
+
+
+def _process_cmdline(pid: int) -> str:
+    """プロセスのコマンドラインを返す（取得できない場合は空文字）"""
+    try:
+        import psutil
+
+        return " ".join(psutil.Process(pid).cmdline())
+    except ImportError:
+        pass
+    except Exception:
+        return ""
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return f.read().replace(b"\0", b" ").decode("utf-8", "replace")
+    except OSError:
+        return ""
+
+
+def find_child_process(parent_pid: int, marker: str) -> Optional[int]:
+    """
+    親プロセスの子孫のうち、コマンドラインに marker を含む最初のプロセスのPIDを返す
+
+    Args:
+        parent_pid (int): 親プロセス（chromedriver）のPID
+        marker (str): コマンドラインに含まれる文字列（ブラウザのユーザーデータディレクトリなど）
+
+    Returns:
+        int: 見つかったPID（見つからない場合はNone）
+    """
+    if not parent_pid or not marker:
+        return None
+    for pid in _descendant_pids(parent_pid):
+        if marker in _process_cmdline(pid):
+            return pid
+    return None
+
+
+def _driver_pid(driver) -> Optional[int]:
+    """
+    キャンセル時に終了するプロセスのPIDを返す
+
+    共有の chromedriver に接続したセッションはブラウザのPID、それ以外は起動した chromedriver のPID
+    （接続し直したドライバーなどはNone）。共有の chromedriver は他の検索のブラウザも動かしているため
+    終了対象にしない（ブラウザのPIDを特定できないセッションは driver_bootstrap が専用のサービスで起動する）
+    """
+    browser_pid = getattr(driver, "browser_pid", None)
+    if browser_pid:
+        return browser_pid
+    try:
+        return driver.service.process.pid
+    except AttributeError:
+        return None
+
+
+class CancelToken:
+    """1回の検索のキャンセル状態"""
+
+    def __init__(self, event: Optional[threading.Event] = None):
+        """
+        トークンの初期化
+
+        Args:
+            event (threading.Event): 既存のキャンセル用イベント（外部からの set もキャンセルとして扱う）
+        """
+        self._event = event or threading.Event()
+        self._lock = threading.Lock()
+        self._drivers: list = []
+        self._callbacks: List[Callable[[], None]] = []
+        self.reason: Optional[str] = None
+        self.cancelled_at: Optional[float] = None
+        self.idle_latency_ms: Optional[float] = None
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "キャンセル要求") -> None:
+        """
+        キャンセルする。待機中の処理は即座に戻り、登録したドライバーはバックグラウンドで終了する
+
+        Args:
+            reason (str): ログ表示用の理由
+        """
+        with self._lock:
+            if self.cancelled_at is not None:
+                return
+            self.cancelled_at = time.perf_counter()
+            self.reason = reason
+            drivers, self._drivers = self._drivers, []
+            callbacks = list(self._callbacks)
+        self._event.set()
+        logging.info(f"★★★ 検索をキャンセルしました: {reason} ★★★")
+
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logging.warning(f"キャンセル時の処理でエラー: {e}")
+        if drivers:
+            threading.Thread(target=self._kill_drivers, args=(drivers,), daemon=True).start()
+
+    @staticmethod
+    def _kill_drivers(drivers) -> None:
+        for driver in drivers:
+            pid = _driver_pid(driver)
+            if pid is None:
+                continue
+            try:
+                kill_process_tree(pid)
+                logging.info(f"キャンセルによりブラウザのプロセスを終了しました（PID: {pid}）")
+            except Exception as e:
+                logging.warning(f"ブラウザのプロセス終了に失敗しました（PID: {pid}）: {e}")
+
+    def raise_if_cancelled(self) -> None:
+        """キャンセルされていれば CancellationError を送出する"""
+        if self._event.is_set():
+            raise CancellationError("検索がキャンセルされました")
+
+    def wait(self, seconds: float) -> None:
+        """
+        キャンセルで中断できる待機
+
+        Raises:
+            CancellationError: 待機中（または待機前）にキャンセルされた場合
+        """
+        if self._event.wait(max(0.0, seconds)):
+            raise CancellationError("検索がキャンセルされました")
+
+    def register_driver(self, driver) -> None:
+        """
+        キャンセル時に終了するドライバーを登録する。キャンセル済みの場合はその場で終了する
+
+        Args:
+            driver: WebDriverインスタンス
+        """
+        if driver is None:
+            return
+        with self._lock:
+            cancelled = self.cancelled_at is not None
+            if not cancelled and all(registered is not driver for registered in self._drivers):
+                self._drivers.append(driver)
+        if cancelled:
+            self._kill_drivers([driver])
+
+    def release_drivers(self) -> None:
+        """検索が終わったドライバーの登録を外す（画面に残したブラウザを後のキャンセルで終了しない）"""
+        with self._lock:
+            self._drivers = []
+
+    def add_callback(self, callback: Callable[[], None]) -> None:
+        """キャンセル時に呼ぶ関数を登録する（キャンセル済みの場合はその場で呼ぶ）"""
+        with self._lock:
+            if self.cancelled_at is None:
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def mark_idle(self) -> Optional[float]:
+        """
+        キャンセル後に処理が終わった時点を記録する
+
+        Returns:
+            float: キャンセルから処理終了までのミリ秒（キャンセルされていない場合はNone）
+        """
+        if self.cancelled_at is None:
+            return None
+        if self.idle_latency_ms is None:
+            self.idle_latency_ms = round((time.perf_counter() - self.cancelled_at) * 1000, 1)
+            logging.info(f"キャンセルから処理終了まで {self.idle_latency_ms:.0f}ms")
+        return self.idle_latency_ms
+
+
+# --- 処理中のトークン（スレッドごと） ---
+_local = threading.local()
+
+
+@contextmanager
+def use_token(token: Optional[CancelToken]):
+    """
+    囲んだ処理の間、現在のスレッドにトークンを結び付ける（Noneの場合は外側のトークンを引き継ぐ）
+
+    Yields:
+        CancelToken: 結び付けたトークン（ない場合はNone）
+    """
+    if token is None:
+        yield current_token()
+        return
+    previous = getattr(_local, "token", None)
+    _local.token = token
+    try:
+        yield token
+    finally:
+        _local.token = previous
+
+
+def current_token() -> Optional[CancelToken]:
+    """現在のスレッドに結び付いたトークンを返す"""
+    return getattr(_local, "token", None)
+
+
+def register_driver(driver) -> None:
+    """現在のトークンにドライバーを登録する（トークンがない場合は何もしない）"""
+    token = current_token()
+    if token is not None:
+        token.register_driver(driver)
+
+
+def cancellable_sleep(seconds: float) -> None:
+    """現在のトークンのキャンセルで中断できる time.sleep"""
+    token = current_token()
+    if token is None:
+        time.sleep(seconds)
+    else:
+        token.wait(seconds)
+
+
+class CancellableWait(WebDriverWait):
+    """ポーリングの待機をトークンのキャンセルで中断できる WebDriverWait"""
+
+    def __init__(self, driver, timeout: float, poll_frequency: float = 0.5, ignored_exceptions=None,
+                 token: Optional[CancelToken] = None):
+        super().__init__(driver, timeout, poll_frequency, ignored_exceptions)
+        self._token = token or current_token()
+
+    def _sleep(self) -> None:
+        if self._token is None:
+            time.sleep(self._poll)
+        else:
+            self._token.wait(self._poll)
+
+    def _call(self, method):
+        if self._token is not None:
+            self._token.raise_if_cancelled()
+        try:
+            return method(self._driver)
+        except self._ignored_exceptions:
+            raise
+        except Exception as e:
+            # キャンセルでブラウザを終了した後の通信エラーはキャンセルとして扱う
+            if self._token is not None and self._token.is_cancelled:
+                raise CancellationError("検索がキャンセルされました") from e
+            raise
+
+    def until(self, method, message: str = ""):
+        screen = None
+        stacktrace = None
+        end_time = time.monotonic() + self._timeout
+        while True:
+            try:
+                value = self._call(method)
+                if value:
+                    return value
+            except self._ignored_exceptions as exc:
+                screen = getattr(exc, "screen", None)
+                stacktrace = getattr(exc, "stacktrace", None)
+            if time.monotonic() > end_time:
+                break
+            self._sleep()
+        raise TimeoutException(message, screen, stacktrace)
+
+    def until_not(self, method, message: str = ""):
+        end_time = time.monotonic() + self._timeout
+        while True:
+            try:
+                value = self._call(method)
+                if not value:
+                    return value
+            except self._ignored_exceptions:
+                return True
+            if time.monotonic() > end_time:
+                break
+            self._sleep()
+        raise TimeoutException(message)
@@ -0,0 +1,418 @@
+"""
+CTI画面へのアクセス方法（バックエンド）
+
+このモジュールは、CTI状態監視（CTIStatusMonitor）がCTIメインウィンドウを探し、
+状態表示やボタンのテキストを読み、状態変化やボタンの押下を知るための方法を
+差し替えられるようにする機能を提供します。
+
+主な機能：
+- WinEventフック（SetWinEventHook）による状態変化・ボタン押下のイベント通知（winevent）
+- 従来どおりマウスの状態を定期的に調べる方法（polling）
+- テスト・ベンチマーク用のメモリ上のCTI画面（fake）
+
+制限事項：
+- winevent / polling は Windows（pywin32）でのみ使用できます
+- winevent のフックはCTIのプロセスに限定して登録し、登録できない場合は polling に切り替えます
+  （切り替えはその監視の間だけで、次の監視では改めてフックの登録を試します）
+- ボタンの押下はマウスキャプチャの開始（EVENT_SYSTEM_CAPTURESTART）で検出します
+  （フォーカスの移動はキーボード操作でも起きるため使いません）
+
+使用例：
+    backend = create_cti_backend("winevent")
+    window = backend.find_window("CTIメイン")
+    backend.watch(window, lambda kind, handle: ...)
+"""
+
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# 通知の種類
+EVENT_TEXT_CHANGED = "text"  # コントロールのテキストが変わった
+EVENT_BUTTON_PRESSED = "press"  # ボタンが押された
+EVENT_WINDOW_DESTROYED = "destroy"  # 監視中のウィンドウが閉じられた
+
+# polling でマウスの状態を調べる間隔（秒）
+MOUSE_POLL_INTERVAL = 0.05
+
+Notify = Callable[[str, Optional[int]], None]
+
+
+class CTIBackendError(Exception):
+    """ウィンドウが閉じられたなど、コントロールを読めない場合のエラー"""
+
+
+class CTIBackend:
+    """CTI画面へのアクセス方法の基底クラス"""
+
+    name = "base"
+    # True の場合、状態の変化は watch の通知で届く（定期的に読み直す必要がない）
+    event_driven = False
+
+    def find_window(self, title_part: str) -> Optional[int]:
+        """タイトルに title_part を含む表示中のウィンドウのハンドルを返す"""
+        raise NotImplementedError
+
+    def is_window(self, handle: Optional[int]) -> bool:
+        """ハンドルが有効か返す"""
+        raise NotImplementedError
+
+    def list_controls(self, window: int) -> List[Tuple[int, str]]:
+        """ウィンドウ内の表示中のコントロールの (ハンドル, テキスト) を返す"""
+        raise NotImplementedError
+
+    def get_text(self, handle: int) -> str:
+        """
+        コントロールのテキストを返す
+
+        Raises:
+            CTIBackendError: コントロールが無効になっている場合
+        """
+        raise NotImplementedError
+
+    def watch(self, window: int, notify: Notify) -> None:
+        """
+        ウィンドウの監視を始める（監視中のウィンドウがあれば切り替える）
+
+        Args:
+            window (int): CTIメインウィンドウのハンドル
+            notify (callable): (通知の種類, ハンドル) を受け取る関数。監視用のスレッドから呼ばれる
+        """
+
+    def unwatch(self) -> None:
+        """監視をやめる"""
+
+
+class Win32PollingBackend(CTIBackend):
+    """pywin32 でウィンドウを読み、マウスの状態を定期的に調べてボタンの押下を通知する"""
+
+    name = "polling"
+    event_driven = False
+
+    def __init__(self):
+        import win32gui
+
+        self._win32gui = win32gui
+        self._watch_stop: Optional[threading.Event] = None
+        self._watch_thread: Optional[threading.Thread] = None
+
+    def find_window(self, title_part: str) -> Optional[int]:
+        win32gui = self._win32gui
+        found = []
+
+        def callback(hwnd, _):
+            try:
+                if win32gui.IsWindowVisible(hwnd) and title_part in win32gui.GetWindowText(hwnd):
+                    found.append(hwnd)
+                    return False
+            except Exception:
+                pass
+            return True
+
+        try:
+            win32gui.EnumWindows(callback, None)
+        except Exception:
+            # callback が False を返して列挙を打ち切った場合もエラーになる
+            pass
+        return found[0] if found else None
+
+    def is_window(self, handle: Optional[int]) -> bool:
+        return bool(handle) and bool(self._win32gui.IsWindow(handle))
+
+    def list_controls(self, window: int) -> List[Tuple[int, str]]:
+        win32gui = self._win32gui
+        controls = []
+
+        def callback(hwnd, _):
+            try:
+                if win32gui.IsWindowVisible(hwnd):
+                    controls.append((hwnd, win32gui.GetWindowText(hwnd)))
+            except Exception:
+                pass
+            return True
+
+        win32gui.EnumChildWindows(window, callback, None)
+        return controls
+
+    def get_text(self, handle: int) -> str:
+        try:
+            return self._win32gui.GetWindowText(handle)
+        except self._win32gui.error as e:
+            raise CTIBackendError(str(e)) from e
+
+    def watch(self, window: int, notify: Notify) -> None:
+        self.unwatch()
+        stop = self._watch_stop = threading.Event()
+        self._watch_thread = threading.Thread(
+            target=self._poll_mouse, args=(stop, notify), name="CTIMousePoll", daemon=True
+        )
+        self._watch_thread.start()
+
+    def unwatch(self) -> None:
+        if self._watch_stop is not None:
+            self._watch_stop.set()
+        if self._watch_thread is not None and self._watch_thread is not threading.current_thread():
+            self._watch_thread.join(timeout=1.0)
+        self._watch_stop = self._watch_thread = None
+
+    def _poll_mouse(self, stop: threading.Event, notify: Notify) -> None:
+        import win32api
+        import win32con
+
+        was_down = False
+        while not stop.wait(MOUSE_POLL_INTERVAL):
+            try:
+                is_down = bool(win32api.GetAsyncKeyState(win32con.VK_LBUTTON) & 0x8000)
+                if is_down and not was_down:
+                    notify(EVENT_BUTTON_PRESSED, self._win32gui.WindowFromPoint(win32api.GetCursorPos()))
+                was_down = is_down
+            except Exception as e:
+                logging.debug(f"マウス状態の取得中にエラー: {str(e)}")
+
+
+class WinEventHookBackend(Win32PollingBackend):
+    """SetWinEventHook でCTIのプロセスのイベントを受け取り、変化があったときだけ通知する"""
+
+    name = "winevent"
+    event_driven = True
+
+    EVENT_SYSTEM_CAPTURESTART = 0x0008
+    EVENT_OBJECT_DESTROY = 0x8001
+    EVENT_OBJECT_NAMECHANGE = 0x800C
+    WINEVENT_OUTOFCONTEXT = 0x0000
+    WINEVENT_SKIPOWNPROCESS = 0x0002
+    OBJID_WINDOW = 0
+    WM_QUIT = 0x0012
+    PM_NOREMOVE = 0x0000
+
+    def __init__(self):
+        super().__init__()
+        import ctypes
+        from ctypes import wintypes
+
+        self._ctypes = ctypes
+        self._wintypes = wintypes
+        self._user32 = ctypes.WinDLL("user32", use_last_error=True)
+        self._kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        self._proc_type = ctypes.WINFUNCTYPE(
+            None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+            wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD,
+        )
+        self._user32.SetWinEventHook.restype = wintypes.HANDLE
+        self._user32.SetWinEventHook.argtypes = [
+            wintypes.DWORD, wintypes.DWORD, wintypes.HMODULE, self._proc_type,
+            wintypes.DWORD, wintypes.DWORD, wintypes.DWORD,
+        ]
+        self._user32.UnhookWinEvent.argtypes = [wintypes.HANDLE]
+        self._user32.GetWindowThreadProcessId.argtypes = [wintypes.HWND, ctypes.POINTER(wintypes.DWORD)]
+        self._user32.PostThreadMessageW.argtypes = [wintypes.DWORD, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM]
+        self._hook_thread: Optional[threading.Thread] = None
+        # 監視ごとの状態（ok: フック登録の成否、thread_id: フックのスレッド、stop: 停止の要求）
+        self._hook_state: Optional[Dict] = None
+
+    def watch(self, window: int, notify: Notify) -> None:
+        self.unwatch()
+        # フックを使えるかは監視ごとに判定する（前回の監視で切り替えた定期確認を引き継がない）
+        self.event_driven = True
+        pid = self._wintypes.DWORD()
+        self._user32.GetWindowThreadProcessId(window, self._ctypes.byref(pid))
+
+        ready = threading.Event()
+        state = self._hook_state = {"ok": False, "thread_id": 0, "stop": threading.Event()}
+        self._hook_thread = threading.Thread(
+            target=self._run_hooks, args=(window, pid.value, notify, ready, state),
+            name="CTIWinEventHook", daemon=True,
+        )
+        self._hook_thread.start()
+        if ready.wait(2.0) and state["ok"]:
+            logging.info(f"CTIのWinEventフックを登録しました（PID: {pid.value}）")
+            return
+
+        if ready.is_set():
+            logging.warning("CTIのWinEventフックを登録できないため、定期的な確認に切り替えます")
+        else:
+            # 遅れて登録されたフックも停止の要求を見て解除し、スレッドは終了する
+            logging.warning("CTIのWinEventフックの登録が時間内に終わらないため、定期的な確認に切り替えます")
+        self.unwatch()
+        self.event_driven = False
+        super().watch(window, notify)
+
+    def unwatch(self) -> None:
+        super().unwatch()
+        thread, self._hook_thread = self._hook_thread, None
+        state, self._hook_state = self._hook_state, None
+        if thread is None:
+            return
+        # 停止を先に要求し、メッセージループに入った後のスレッドには WM_QUIT で知らせる
+        state["stop"].set()
+        if state["thread_id"]:
+            self._user32.PostThreadMessageW(state["thread_id"], self.WM_QUIT, 0, 0)
+        if thread is not threading.current_thread():
+            thread.join(timeout=1.0)
+            if thread.is_alive():
+                logging.warning("CTIのWinEventフックのスレッドが終了していません（停止の要求は送信済みです）")
+
+    def _run_hooks(self, window: int, pid: int, notify: Notify, ready: threading.Event, state: Dict) -> None:
+        """フックを登録してメッセージループを回す（フックの通知はこのスレッドに届く）"""
+        user32 = self._user32
+
+        def callback(hook, event, hwnd, id_object, id_child, event_thread, event_time):
+            try:
+                if not hwnd:
+                    return
+                if event == self.EVENT_SYSTEM_CAPTURESTART:
+                    notify(EVENT_BUTTON_PRESSED, hwnd)
+                elif id_object != self.OBJID_WINDOW:
+                    return
+                elif event == self.EVENT_OBJECT_NAMECHANGE:
+                    notify(EVENT_TEXT_CHANGED, hwnd)
+                elif event == self.EVENT_OBJECT_DESTROY and hwnd == window:
+                    notify(EVENT_WINDOW_DESTROYED, hwnd)
+            except Exception as e:
+                logging.debug(f"WinEventの処理中にエラー: {str(e)}")
+
+        proc = self._proc_type(callback)
+        flags = self.WINEVENT_OUTOFCONTEXT | self.WINEVENT_SKIPOWNPROCESS
+        hooks = [
+            user32.SetWinEventHook(event, event, None, proc, pid, 0, flags)
+            for event in (self.EVENT_OBJECT_NAMECHANGE, self.EVENT_SYSTEM_CAPTURESTART, self.EVENT_OBJECT_DESTROY)
+        ]
+        try:
+            msg = self._wintypes.MSG()
+            # WM_QUIT を受け取れるよう、スレッドIDを公開する前にメッセージキューを作っておく
+            user32.PeekMessageW(self._ctypes.byref(msg), None, 0, 0, self.PM_NOREMOVE)
+            state["thread_id"] = self._kernel32.GetCurrentThreadId()
+            state["ok"] = all(hooks)
+            ready.set()
+            # 登録が遅れて watch が待つのをやめた場合は、メッセージループに入らずに解除する
+            if not state["ok"] or state["stop"].is_set():
+                return
+            while user32.GetMessageW(self._ctypes.byref(msg), None, 0, 0) > 0:
+                user32.TranslateMessage(self._ctypes.byref(msg))
+                user32.DispatchMessageW(self._ctypes.byref(msg))
+        finally:
+            for hook in hooks:
+                if hook:
+                    user32.UnhookWinEvent(hook)
+            ready.set()
+
+
+class FakeCTIBackend(CTIBackend):
+    """メモリ上のCTI画面（テスト・ベンチマーク用）"""
+
+    name = "fake"
+
+    def __init__(self, status_text: str = "待ち受け中",
+                 buttons: Sequence[str] = ("次", "留守", "担当者不在", "NG"),
+                 title: str = "CTIメイン", event_driven: bool = True):
+        """
+        Args:
+            status_text (str): 状態表示の最初のテキスト
+            buttons (list): ボタンのテキスト
+            title (str): メインウィンドウのタイトル
+            event_driven (bool): False の場合は変化を通知しない（定期的な確認の再現）
+        """
+        self.event_driven = event_driven
+        self._lock = threading.Lock()
+        self._texts: Dict[int, str] = {}
+        self._next_handle = 100
+        self._notify: Optional[Notify] = None
+        self._title = title
+        self._initial_status = status_text
+        self._button_names = tuple(buttons)
+        self.watched_window: Optional[int] = None
+        self.text_reads = 0
+        self.open_window()
+
+    def _new_handle(self, text: str) -> int:
+        self._next_handle += 1
+        self._texts[self._next_handle] = text
+        return self._next_handle
+
+    def _emit(self, kind: str, handle: Optional[int]) -> None:
+        notify = self._notify
+        if notify is not None and self.event_driven:
+            notify(kind, handle)
+
+    def open_window(self) -> int:
+        """ウィンドウを（新しいハンドルで）開く"""
+        with self._lock:
+            self.window = self._new_handle(self._title)
+            self.status_handle = self._new_handle(self._initial_status)
+            self.button_handles = {name: self._new_handle(name) for name in self._button_names}
+            self._children = [self.status_handle, *self.button_handles.values()]
+        return self.window
+
+    def close_window(self) -> None:
+        """ウィンドウを閉じる"""
+        with self._lock:
+            window = self.window
+            for handle in [window, *self._children]:
+                self._texts.pop(handle, None)
+            self._children = []
+        self._emit(EVENT_WINDOW_DESTROYED, window)
+
+    def set_status_text(self, text: str) -> None:
+        """状態表示のテキストを変える"""
+        with self._lock:
+            if self.status_handle in self._texts:
+                self._texts[self.status_handle] = text
+        self._emit(EVENT_TEXT_CHANGED, self.status_handle)
+
+    def press_button(self, name: str) -> None:
+        """ボタンを押す"""
+        self._emit(EVENT_BUTTON_PRESSED, self.button_handles[name])
+
+    def find_window(self, title_part: str) -> Optional[int]:
+        with self._lock:
+            text = self._texts.get(self.window)
+        return self.window if text is not None and title_part in text else None
+
+    def is_window(self, handle: Optional[int]) -> bool:
+        with self._lock:
+            return handle in self._texts
+
+    def list_controls(self, window: int) -> List[Tuple[int, str]]:
+        with self._lock:
+            if window != self.window:
+                return []
+            return [(handle, self._texts[handle]) for handle in self._children if handle in self._texts]
+
+    def get_text(self, handle: int) -> str:
+        with self._lock:
+            self.text_reads += 1
+            if handle not in self._texts:
+                raise CTIBackendError(f"無効なハンドルです: {handle}")
+            return self._texts[handle]
+
+    def watch(self, window: int, notify: Notify) -> None:
+        self.watched_window = window
+        self._notify = notify
+
+    def unwatch(self) -> None:
+        self.watched_window = None
+        self._notify = None
+
+
+_BACKENDS = {
+    "winevent": WinEventHookBackend,
+    "polling": Win32PollingBackend,
+    "fake": FakeCTIBackend,
+}
+
+
+def create_cti_backend(name: str = "winevent") -> CTIBackend:
+    """
+    名前からバックエンドを作成する
+
+    Args:
+        name (str): winevent / polling / fake
+
+    Returns:
+        CTIBackend: バックエンド
+    """
+    backend_class = _BACKENDS.get(name)
+    if backend_class is None:
+        logging.warning(f"不明なCTI監視方式のため winevent を使用します: {name}")
+        backend_class = WinEventHookBackend
+    return backend_class()
@@ -12,18 +12,22 @@ CtiOutboundSysの状態変化（「発信中」→「通話中」）を監視し
 - 通話終了時（通話中→待ち受け中）のイベント通知
 - 「次」「留守」「担当者不在」「NG」ボタンクリックの検出と提供判定のキャンセル
 - エラーハンドリングとログ出力
+- 監視方法のベンチマーク（python -m services.cti_status_monitor bench）
 
 制限事項：
-- 常時監視のためCPU負荷を考慮
 - 重複実行防止機能付き
-- 監視間隔は0.2秒
+- 既定ではWinEventフックで状態変化・ボタン押下の通知を待ち、変化がない間はほとんど動きません
+  （通知の取りこぼしに備え、cti_event_fallback_interval 秒ごとに状態を読み直します）
+- settings.json の cti_monitor_backend を "polling" にすると従来どおり
+  cti_monitor_interval 秒ごとに状態を確認します
+- CTIの画面へのアクセス方法は services.cti_backends で差し替えられます
 """
 
-import win32gui
-import win32con
-import win32api
+import sys
+import queue
 import logging
 import time
+import argparse
 import threading
 from typing import Optional, Callable, Dict, Any
 from dataclasses import dataclass
@@ -32,6 +36,25 @@ import json
 import os
 import traceback
 
+from services.cti_backends import (
+    CTIBackend,
+    CTIBackendError,
+    EVENT_BUTTON_PRESSED,
+    EVENT_WINDOW_DESTROYED,
+    create_cti_backend,
+)
+from utils.stats_utils import percentile
+
+CTI_WINDOW_TITLE = "CTIメイン"
+
+# アクションボタンのテキスト → ハンドルを保持する属性
+ACTION_BUTTONS = {
+    "次": "next_button_handle",
+    "留守": "rusu_button_handle",
+    "担当者不在": "tantou_fuzai_button_handle",
+    "NG": "ng_button_handle",
+}
+
 class CTIStatus(Enum):
     """CTI状態の列挙型"""
     WAITING = "待ち受け中"
@@ -52,7 +75,8 @@ class CTIStatusMonitor:
     def __init__(self, on_dialing_to_talking_callback: Optional[Callable] = None,
                  on_call_ended_callback: Optional[Callable] = None,
                  on_talking_started_callback: Optional[Callable] = None,
-                 on_cancel_processing_callback: Optional[Callable] = None):
+                 on_cancel_processing_callback: Optional[Callable] = None,
+                 backend: Optional[CTIBackend] = None):
         """
         初期化
         
@@ -61,6 +85,7 @@ class CTIStatusMonitor:
             on_call_ended_callback: 通話終了時（通話中→待ち受け中）のコールバック関数
             on_talking_started_callback: 通話中状態開始時のコールバック関数
             on_cancel_processing_callback: アクションボタンクリック時の処理キャンセルコールバック関数
+            backend: CTI画面へのアクセス方法（省略時は設定の cti_monitor_backend に従う）
         """
         self.on_dialing_to_talking_callback = on_dialing_to_talking_callback
         self.on_call_ended_callback = on_call_ended_callback
@@ -83,6 +108,11 @@ class CTIStatusMonitor:
         self.is_monitoring = False
         self.monitor_thread = None
         self.monitor_interval = 0.2  # 監視間隔（秒）
+        self.backend_name = "winevent"  # CTI画面へのアクセス方法
+        self.event_fallback_interval = 2.0  # イベント通知時に状態を読み直す間隔（秒）
+        self._events: "queue.Queue" = queue.Queue()  # バックエンドからの通知
+        self._watched_window = None  # 通知を受けているウィンドウ
+        self.loop_wakeups = 0  # 監視ループが動いた回数
         
         # 重複実行防止用
         self.is_processing = False
@@ -113,6 +143,7 @@ class CTIStatusMonitor:
         
         # 設定の読み込み
         self.load_settings()
+        self.backend = backend if backend is not None else create_cti_backend(self.backend_name)
         
         logging.info("CTI状態監視サービスを初期化しました")
         
@@ -125,6 +156,8 @@ class CTIStatusMonitor:
                     self.enable_auto_processing = settings.get('enable_auto_cti_processing', True)
                     self.monitor_interval = settings.get('cti_monitor_interval', 0.5)
                     self.call_duration_threshold = settings.get('call_duration_threshold', 0)
+                    self.backend_name = settings.get('cti_monitor_backend', 'winevent')
+                    self.event_fallback_interval = float(settings.get('cti_event_fallback_interval', 2.0))
             else:
                 self.enable_auto_processing = True
                 self.monitor_interval = 0.5
@@ -141,37 +174,13 @@ class CTIStatusMonitor:
         
     def find_cti_window(self) -> bool:
         """CTIメインウィンドウを検索"""
-        def callback(hwnd, extra):
-            if win32gui.IsWindowVisible(hwnd):
-                try:
-                    title = win32gui.GetWindowText(hwnd)
-                    if "CTIメイン" in title:
-                        self.window_handle = hwnd
-                        
-                        # ウィンドウの詳細情報をログ出力
-                        class_name = win32gui.GetClassName(hwnd)
-                        is_visible = win32gui.IsWindowVisible(hwnd)
-                        is_enabled = win32gui.IsWindowEnabled(hwnd)
-                        
-                        logging.info(f"CTIメインウィンドウを検出: handle={hwnd}")
-                        logging.info(f"CTIメインウィンドウの詳細:")
-                        logging.info(f"- テキスト: {title}")
-                        logging.info(f"- クラス名: {class_name}")
-                        logging.info(f"- 可視状態: {is_visible}")
-                        logging.info(f"- 有効状態: {is_enabled}")
-                        
-                        return False
-                except Exception:
-                    pass
-            return True
-            
         try:
             # 既存のハンドルをクリア
-            self.window_handle = None
-            win32gui.EnumWindows(callback, None)
+            self.window_handle = self.backend.find_window(CTI_WINDOW_TITLE)
             
             if self.window_handle:
-                logging.info(f"CTIメインウィンドウの検出に成功しました")
+                logging.info(f"CTIメインウィンドウを検出: handle={self.window_handle}")
+                logging.info(f"- 監視方法: {self.backend.name}")
                 return True
             else:
                 logging.debug("CTIメインウィンドウが見つかりませんでした")
@@ -179,6 +188,7 @@ class CTIStatusMonitor:
                 
         except Exception as e:
             logging.error(f"CTIウィンドウの検索中にエラー: {str(e)}")
+            self.window_handle = None
             return False
             
     def find_status_text_control(self) -> bool:
@@ -186,38 +196,18 @@ class CTIStatusMonitor:
         if not self.window_handle:
             return False
             
-        status_controls = []
-        
-        def enum_callback(hwnd, _):
-            try:
-                if not win32gui.IsWindowVisible(hwnd):
-                    return True
-                    
-                # コントロールのテキストを取得
-                text = win32gui.GetWindowText(hwnd)
-                if text and any(status in text for status in ["待ち受け中", "発信中", "通話中"]):
-                    class_name = win32gui.GetClassName(hwnd)
-                    rect = win32gui.GetWindowRect(hwnd)
-                    status_controls.append({
-                        'handle': hwnd,
-                        'text': text,
-                        'class': class_name,
-                        'rect': rect
-                    })
-                    logging.debug(f"状態コントロールを検出: text='{text}', class='{class_name}', handle={hwnd}")
-                    
-            except Exception:
-                pass
-            return True
-            
         try:
-            win32gui.EnumChildWindows(self.window_handle, enum_callback, None)
+            status_controls = [
+                (handle, text) for handle, text in self.backend.list_controls(self.window_handle)
+                if text and any(status in text for status in ["待ち受け中", "発信中", "通話中"])
+            ]
+            for handle, text in status_controls:
+                logging.debug(f"状態コントロールを検出: text='{text}', handle={handle}")
             
             if status_controls:
                 # 最初に見つかったコントロールを使用
-                selected_control = status_controls[0]
-                self.status_text_handle = selected_control['handle']
-                logging.info(f"状態表示コントロールを選択: text='{selected_control['text']}', handle={self.status_text_handle}")
+                self.status_text_handle, text = status_controls[0]
+                logging.info(f"状態表示コントロールを選択: text='{text}', handle={self.status_text_handle}")
                 return True
             else:
                 logging.warning("状態表示コントロールが見つかりませんでした")
@@ -233,7 +223,7 @@ class CTIStatusMonitor:
             return CTIStatus.UNKNOWN
             
         try:
-            text = win32gui.GetWindowText(self.status_text_handle)
+            text = self.backend.get_text(self.status_text_handle)
             
             if "通話中" in text:
                 return CTIStatus.TALKING
@@ -255,73 +245,119 @@ class CTIStatusMonitor:
             self.monitor_thread = threading.Thread(target=self._monitor_loop, name="CTIMonitorThread")
             self.monitor_thread.daemon = True  # デーモンスレッドとして設定
             self.monitor_thread.start()
-            logging.info("CTI状態監視を開始しました")
+            logging.info(f"CTI状態監視を開始しました（監視方法: {self.backend.name}）")
 
     def stop_monitoring(self):
         """監視を停止"""
         if self.is_monitoring:
             self.is_monitoring = False
+            # 通知待ちの監視ループを起こす
+            self._events.put((None, None))
             if self.monitor_thread:
                 self.monitor_thread.join(timeout=1.0)  # 1秒待機
             logging.info("CTI状態監視を停止しました")
+
+    def _on_backend_event(self, kind: str, handle: Optional[int]):
+        """バックエンドからの通知を監視ループに渡す（フック・監視用のスレッドから呼ばれる）"""
+        self._events.put((kind, handle))
         
     def _monitor_loop(self):
-        """監視ループ"""
-        while self.is_monitoring:
+        """監視ループ（通知が届くか、確認間隔が過ぎるまで待機する）"""
+        try:
+            while self.is_monitoring:
+                self.loop_wakeups += 1
+                try:
+                    self._refresh_handles()
+                    self._check_status_change()
+                except Exception as e:
+                    logging.error(f"CTI状態監視ループでエラーが発生: {str(e)}")
+                    
+                self._wait_for_events(self._next_wait_interval())
+        finally:
+            self._unwatch_window()
+            
+    def _next_wait_interval(self) -> float:
+        """次に状態を読み直すまでの待機時間（秒）"""
+        if not self.backend.event_driven:
+            return self.monitor_interval
+        # ウィンドウが見つかるまでは再検出間隔ごとに探す
+        return self.event_fallback_interval if self._watched_window else self.window_redetect_interval
+        
+    def _wait_for_events(self, timeout: float):
+        """
+        通知を待ち、届いた通知をまとめて処理する
+        
+        テキスト変更の通知は、戻った後の _check_status_change でまとめて読み直す。
+        """
+        try:
+            events = [self._events.get(timeout=max(0.0, timeout))]
+        except queue.Empty:
+            return
+        while True:
             try:
-                current_time = time.time()
+                events.append(self._events.get_nowait())
+            except queue.Empty:
+                break
                 
-                # 一定間隔でウィンドウとコントロールを再検出
-                if current_time - self.last_window_redetect_time > self.window_redetect_interval:
-                    if not self.window_handle or not win32gui.IsWindow(self.window_handle):
-                        self.find_cti_window()
-                        
-                    if self.window_handle and not self.status_text_handle:
-                        self.find_status_text_control()
-                        
-                    if self.window_handle:
-                        self.find_action_buttons()
-                        
-                    self.last_window_redetect_time = current_time
+        for kind, handle in events:
+            if kind == EVENT_BUTTON_PRESSED:
+                self._handle_button_press(handle)
+            elif kind == EVENT_WINDOW_DESTROYED:
+                logging.info("CTIメインウィンドウが閉じられました")
+                self.window_handle = None
+                self.status_text_handle = None
+                self.buttons_detected = False
+                self.last_window_redetect_time = 0
+                self._unwatch_window()
                 
-                # 状態チェック間隔を制御
-                if current_time - self.last_detection_time >= self.monitor_interval:
-                    self._check_status_change()
-                    self._check_action_button_click()  # アクションボタンクリックをチェック
-                    self.last_detection_time = current_time
-                    
-            except Exception as e:
-                logging.error(f"CTI状態監視ループでエラーが発生: {str(e)}")
+    def _refresh_handles(self):
+        """無効になったウィンドウ・コントロールを再検出し、ウィンドウの通知を受け取る"""
+        current_time = time.time()
+        if current_time - self.last_window_redetect_time < self.window_redetect_interval:
+            return
+        self.last_window_redetect_time = current_time
+        
+        if not self.window_handle or not self.backend.is_window(self.window_handle):
+            self.status_text_handle = None
+            self.buttons_detected = False
+            self._unwatch_window()
+            if not self.find_cti_window():
+                return
                 
-            # CPU負荷軽減のため短いスリープ
-            time.sleep(0.05)
+        if not self.status_text_handle or not self.backend.is_window(self.status_text_handle):
+            self.status_text_handle = None
+            self.find_status_text_control()
+            
+        if not self.buttons_detected:
+            self.find_action_buttons()
+            
+        if self.window_handle != self._watched_window:
+            self._unwatch_window()
+            self.backend.watch(self.window_handle, self._on_backend_event)
+            self._watched_window = self.window_handle
+            
+    def _unwatch_window(self):
+        """ウィンドウの通知の受け取りをやめる"""
+        if self._watched_window:
+            try:
+                self.backend.unwatch()
+            except Exception as e:
+                logging.debug(f"CTIウィンドウの監視の停止中にエラー: {str(e)}")
+            self._watched_window = None
             
     def _check_status_change(self):
         """
         CTI状態の変化をチェック
         """
         try:
-            # ウィンドウハンドルの確認と再検出
-            if not self.window_handle or not win32gui.IsWindow(self.window_handle):
-                # ウィンドウが無効になった場合、再検出を試行
-                if self.find_cti_window():
-                    logging.info("CTIウィンドウを再検出しました")
-                else:
-                    # デバッグレベルでログ出力（頻繁な出力を避ける）
-                    logging.debug("CTIウィンドウが見つかりません")
-                    return
-                    
-            # 状態表示コントロールの確認と再検出
-            if not self.status_text_handle:
-                if self.find_status_text_control():
-                    logging.info("CTI状態表示コントロールを再検出しました")
-                else:
-                    logging.debug("CTI状態表示コントロールが見つかりません")
-                    return
+            # 状態表示コントロールが見つかるまでは何もしない（再検出は _refresh_handles で行う）
+            if not self.window_handle or not self.status_text_handle:
+                logging.debug("CTI状態表示コントロールが見つかりません")
+                return
                     
             # 状態テキストを取得して状態判定
             try:
-                status_text = win32gui.GetWindowText(self.status_text_handle).strip()
+                status_text = self.backend.get_text(self.status_text_handle).strip()
                 
                 if not status_text:
                     return
@@ -339,10 +375,11 @@ class CTIStatusMonitor:
                 # 状態変化を検出
                 self._detect_status_change(new_status)
                     
-            except win32gui.error as e:
-                # Win32 APIエラーの場合、コントロールハンドルをクリア
-                logging.debug(f"状態テキスト取得でWin32エラー: {str(e)}")
+            except CTIBackendError as e:
+                # コントロールが無効になった場合、ハンドルをクリアしてすぐに再検出する
+                logging.debug(f"状態テキスト取得でエラー: {str(e)}")
                 self.status_text_handle = None
+                self.last_window_redetect_time = 0
             except Exception as e:
                 logging.debug(f"状態テキスト取得中にエラー: {str(e)}")
                 
@@ -657,91 +694,51 @@ class CTIStatusMonitor:
                 self.is_processing = False
                 logging.info("提供判定の実行状態をリセットしました")
 
-    def _check_action_button_click(self):
+    def _handle_button_press(self, handle: Optional[int]):
         """
-        アクションボタン（「次」「留守」「担当者不在」「NG」）のクリックをチェック
+        押されたコントロールがアクションボタン（「次」「留守」「担当者不在」「NG」）なら処理をキャンセル
+        
+        Args:
+            handle: 押されたコントロールのハンドル
         """
         try:
-            # ボタンの再検出が必要な場合
-            if not any([
-                self.next_button_handle,
-                self.rusu_button_handle,
-                self.tantou_fuzai_button_handle,
-                self.ng_button_handle
-            ]):
-                if not self.find_action_buttons():
+            if not handle:
+                return
+                
+            # 検出済みのボタンと照合し、ボタンが作り直されている場合はテキストで判定する
+            clicked_button = next(
+                (name for name, attr in ACTION_BUTTONS.items() if getattr(self, attr) == handle), None
+            )
+            if clicked_button is None:
+                try:
+                    text = self.backend.get_text(handle).strip()
+                except CTIBackendError:
+                    return
+                if text not in ACTION_BUTTONS:
                     return
+                clicked_button = text
+                setattr(self, ACTION_BUTTONS[text], handle)
+                
+            current_time = time.time()
+            # 連続クリックを防ぐ
+            if current_time - self.last_button_click_time < self.button_click_interval:
+                return
+                
+            # 提供判定の実行状態を確認
+            is_processing = False
+            with self.processing_lock:
+                is_processing = self.is_processing or (self.processing_thread and self.processing_thread.is_alive())
             
-            # マウスクリックをチェック（より精密な検出）
-            # 左クリックの状態を確認（押下中と離した瞬間の両方をチェック）
-            left_button_state = win32api.GetAsyncKeyState(win32con.VK_LBUTTON)
+            logging.info(f"★★★ 「{clicked_button}」ボタンがクリックされました ★★★")
+            logging.info(f"- クリック時刻: {time.strftime('%Y-%m-%d %H:%M:%S')}")
+            logging.info(f"- ボタン: handle={handle}")
+            logging.info(f"- 現在のCTI状態: {self.current_status.value}")
+            logging.info(f"- 提供判定状態: {'実行中' if is_processing else '未実行'}")
             
-            # ボタンが押されている状態（0x8000）または押されて離された状態（0x0001）をチェック
-            if (left_button_state & 0x8000) or (left_button_state & 0x0001):
-                current_time = time.time()
-                # 連続クリックを防ぐ（間隔を短縮してより敏感に検出）
-                if current_time - self.last_button_click_time >= 0.2:  # 0.5秒から0.2秒に短縮
-                    # マウス座標を取得
-                    x, y = win32api.GetCursorPos()
-                    
-                    # 各ボタンの位置をチェック
-                    clicked_button = None
-                    button_rect = None
-                    
-                    # ボタンハンドルの有効性を確認してからチェック
-                    if self.next_button_handle and win32gui.IsWindow(self.next_button_handle):
-                        try:
-                            rect = win32gui.GetWindowRect(self.next_button_handle)
-                            if (rect[0] <= x <= rect[2] and rect[1] <= y <= rect[3]):
-                                clicked_button = "次"
-                                button_rect = rect
-                        except Exception:
-                            self.next_button_handle = None
-                            
-                    if self.rusu_button_handle and win32gui.IsWindow(self.rusu_button_handle):
-                        try:
-                            rect = win32gui.GetWindowRect(self.rusu_button_handle)
-                            if (rect[0] <= x <= rect[2] and rect[1] <= y <= rect[3]):
-                                clicked_button = "留守"
-                                button_rect = rect
-                        except Exception:
-                            self.rusu_button_handle = None
-                            
-                    if self.tantou_fuzai_button_handle and win32gui.IsWindow(self.tantou_fuzai_button_handle):
-                        try:
-                            rect = win32gui.GetWindowRect(self.tantou_fuzai_button_handle)
-                            if (rect[0] <= x <= rect[2] and rect[1] <= y <= rect[3]):
-                                clicked_button = "担当者不在"
-                                button_rect = rect
-                        except Exception:
-                            self.tantou_fuzai_button_handle = None
-                            
-                    if self.ng_button_handle and win32gui.IsWindow(self.ng_button_handle):
-                        try:
-                            rect = win32gui.GetWindowRect(self.ng_button_handle)
-                            if (rect[0] <= x <= rect[2] and rect[1] <= y <= rect[3]):
-                                clicked_button = "NG"
-                                button_rect = rect
-                        except Exception:
-                            self.ng_button_handle = None
-                    
-                    if clicked_button:
-                        # 提供判定の実行状態を確認
-                        is_processing = False
-                        with self.processing_lock:
-                            is_processing = self.is_processing or (self.processing_thread and self.processing_thread.is_alive())
-                        
-                        logging.info(f"★★★ 「{clicked_button}」ボタンがクリックされました ★★★")
-                        logging.info(f"- クリック時刻: {time.strftime('%Y-%m-%d %H:%M:%S')}")
-                        logging.info(f"- マウス座標: x={x}, y={y}")
-                        logging.info(f"- ボタン位置: left={button_rect[0]}, top={button_rect[1]}, right={button_rect[2]}, bottom={button_rect[3]}")
-                        logging.info(f"- 現在のCTI状態: {self.current_status.value}")
-                        logging.info(f"- 提供判定状態: {'実行中' if is_processing else '未実行'}")
-                        
-                        self.last_button_click_time = current_time
-                        
-                        # 提供判定をキャンセル
-                        self._cancel_processing(clicked_button)
+            self.last_button_click_time = current_time
+            
+            # 提供判定をキャンセル
+            self._cancel_processing(clicked_button)
                         
         except Exception as e:
             logging.error(f"アクションボタンクリックの検出中にエラー: {str(e)}")
@@ -823,51 +820,20 @@ class CTIStatusMonitor:
             bool: いずれかのボタンが見つかった場合True
         """
         try:
-            def callback(hwnd, extra):
-                if win32gui.IsWindowVisible(hwnd):
-                    try:
-                        text = win32gui.GetWindowText(hwnd)
-                        if text == "次":
-                            self.next_button_handle = hwnd
-                            rect = win32gui.GetWindowRect(hwnd)
-                            if not self.buttons_detected:
-                                logging.info(f"「次」ボタンを検出: handle={hwnd}, rect={rect}")
-                        elif text == "留守":
-                            self.rusu_button_handle = hwnd
-                            rect = win32gui.GetWindowRect(hwnd)
-                            if not self.buttons_detected:
-                                logging.info(f"「留守」ボタンを検出: handle={hwnd}, rect={rect}")
-                        elif text == "担当者不在":
-                            self.tantou_fuzai_button_handle = hwnd
-                            rect = win32gui.GetWindowRect(hwnd)
-                            if not self.buttons_detected:
-                                logging.info(f"「担当者不在」ボタンを検出: handle={hwnd}, rect={rect}")
-                        elif text == "NG":
-                            self.ng_button_handle = hwnd
-                            rect = win32gui.GetWindowRect(hwnd)
-                            if not self.buttons_detected:
-                                logging.info(f"「NG」ボタンを検出: handle={hwnd}, rect={rect}")
-                    except Exception:
-                        pass
-                return True
-            
             # 既存のハンドルをクリア
-            self.next_button_handle = None
-            self.rusu_button_handle = None
-            self.tantou_fuzai_button_handle = None
-            self.ng_button_handle = None
+            for attr in ACTION_BUTTONS.values():
+                setattr(self, attr, None)
             
             # CTIメインウィンドウ内の子ウィンドウを列挙
             if self.window_handle:
-                win32gui.EnumChildWindows(self.window_handle, callback, None)
+                for handle, text in self.backend.list_controls(self.window_handle):
+                    if text in ACTION_BUTTONS:
+                        setattr(self, ACTION_BUTTONS[text], handle)
+                        if not self.buttons_detected:
+                            logging.info(f"「{text}」ボタンを検出: handle={handle}")
             
             # いずれかのボタンが見つかったかチェック
-            found = any([
-                self.next_button_handle,
-                self.rusu_button_handle,
-                self.tantou_fuzai_button_handle,
-                self.ng_button_handle
-            ])
+            found = any(getattr(self, attr) for attr in ACTION_BUTTONS.values())
             
             if found and not self.buttons_detected:
                 logging.info("アクションボタンの検出に成功しました")
@@ -925,4 +891,107 @@ class CTIStatusMonitor:
                 
         except Exception as e:
             logging.error(f"CTI状態監視中にエラーが発生: {str(e)}")
-            logging.error(traceback.format_exc()) 
\ No newline at end of file
+            logging.error(traceback.format_exc()) 
+
+def _wait_until(condition: Callable[[], bool], timeout: float = 5.0) -> bool:
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            return False
+        time.sleep(0.001)
+    return True
+
+
+def run_benchmark(event_driven: bool, iterations: int = 50, idle_seconds: float = 3.0,
+                  poll_interval: float = 0.05) -> Dict[str, Any]:
+    """
+    メモリ上のCTI画面で、発信中→通話中の検出までの時間と待機中の動作回数を計測する
+
+    Args:
+        event_driven (bool): 通知で検出するか（Falseなら poll_interval ごとに確認する）
+        iterations (int): 発信中→通話中→待ち受け中を繰り返す回数
+        idle_seconds (float): 状態が変わらない間の動作回数を計測する時間（秒）
+        poll_interval (float): 定期的に確認する場合の間隔（秒）
+
+    Returns:
+        dict: 検出までの時間（ミリ秒）の中央値・95%・最大と、待機中の1秒あたりの動作回数・読み取り回数
+    """
+    from services.cti_backends import FakeCTIBackend
+
+    backend = FakeCTIBackend(event_driven=event_driven)
+    detected = threading.Event()
+    monitor = CTIStatusMonitor(on_dialing_to_talking_callback=detected.set, backend=backend)
+    monitor.enable_auto_processing = True
+    monitor.call_duration_threshold = 0
+    monitor.monitor_interval = poll_interval
+    latencies = []
+    monitor.start_monitoring()
+    try:
+        _wait_until(lambda: monitor.current_status == CTIStatus.WAITING)
+        for _ in range(iterations):
+            backend.set_status_text("発信中")
+            _wait_until(lambda: monitor.current_status == CTIStatus.DIALING)
+            detected.clear()
+            started = time.perf_counter()
+            backend.set_status_text("通話中")
+            if detected.wait(5.0):
+                latencies.append((time.perf_counter() - started) * 1000)
+            backend.set_status_text("待ち受け中")
+            _wait_until(lambda: monitor.current_status == CTIStatus.WAITING)
+            monitor.is_processing = False
+            monitor.talking_start_time = 0
+
+        wakeups, reads = monitor.loop_wakeups, backend.text_reads
+        time.sleep(idle_seconds)
+        idle_wakeups, idle_reads = monitor.loop_wakeups - wakeups, backend.text_reads - reads
+    finally:
+        monitor.stop_monitoring()
+
+    latencies.sort()
+
+    def _percentile(ratio):
+        if not latencies:
+            return None
+        return round(percentile(latencies, ratio), 2)
+
+    return {
+        "mode": "event" if event_driven else "polling",
+        "iterations": iterations,
+        "detected": len(latencies),
+        "latency_p50_ms": _percentile(0.5),
+        "latency_p95_ms": _percentile(0.95),
+        "latency_max_ms": round(latencies[-1], 2) if latencies else None,
+        "idle_wakeups_per_sec": round(idle_wakeups / idle_seconds, 2),
+        "idle_text_reads_per_sec": round(idle_reads / idle_seconds, 2),
+    }
+
+
+def main(argv=None) -> int:
+    """コマンドラインから監視方法のベンチマークを実行する"""
+    parser = argparse.ArgumentParser(description="CTI状態監視のベンチマーク")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    bench_parser = subparsers.add_parser("bench", help="通知による検出と定期的な確認を比較します（CTIは不要）")
+    bench_parser.add_argument("--iterations", type=int, default=50, help="状態変化を繰り返す回数")
+    bench_parser.add_argument("--idle-seconds", type=float, default=3.0, help="待機中の動作回数を計測する時間（秒）")
+    bench_parser.add_argument("--poll-interval", type=float, default=0.05, help="定期的に確認する場合の間隔（秒）")
+    bench_parser.add_argument("--json", action="store_true", help="JSONで出力する")
+    args = parser.parse_args(argv)
+
+    results = [
+        run_benchmark(event_driven, args.iterations, args.idle_seconds, args.poll_interval)
+        for event_driven in (True, False)
+    ]
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return 0
+    for result in results:
+        print(
+            f"[{result['mode']}] 検出 {result['detected']}/{result['iterations']}回 "
+            f"中央値={result['latency_p50_ms']}ms 95%={result['latency_p95_ms']}ms 最大={result['latency_max_ms']}ms "
+            f"待機中の動作={result['idle_wakeups_per_sec']}回/秒 読み取り={result['idle_text_reads_per_sec']}回/秒"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""
+提供判定画面の一括DOM取得
+
+このモジュールは、要素ごとに is_displayed / get_attribute / text を
+呼び出す代わりに、1回の execute_script で一致する全要素の
+表示状態・テキスト・属性をまとめて取得する機能を提供します。
+
+主な機能：
+- CSSセレクタに一致する要素のメタデータ一括取得
+- 取得済みの値を返す WebElement 互換オブジェクト（クリック等はそのまま可能）
+- 表示中の要素の有無の一括判定（セレクタごとに判定し、不正なセレクタは無視）
+
+制限事項：
+- 取得した値は取得時点のものです（再取得するには再度プローブします）
+- 表示判定は display/visibility/opacity/dialog の open 属性と描画矩形で行います
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+from selenium.webdriver.remote.webelement import WebElement
+
+_IS_VISIBLE_FUNCTION = """
+function isVisible(el) {
+    for (var node = el; node && node.nodeType === 1; node = node.parentElement) {
+        if (node.tagName === 'DIALOG' && !node.open) return false;
+        var style = window.getComputedStyle(node);
+        if (style.display === 'none') return false;
+        if (node === el && (style.visibility === 'hidden' || style.opacity === '0')) return false;
+    }
+    return el.getClientRects().length > 0;
+}
+"""
+
+_PROBE_SCRIPT = """
+var selector = arguments[0], attributes = arguments[1], visibleOnly = arguments[2];
+var root = arguments[3] || document;
+""" + _IS_VISIBLE_FUNCTION + """
+var results = [];
+var elements = root.querySelectorAll(selector);
+for (var i = 0; i < elements.length; i++) {
+    var el = elements[i];
+    var visible = isVisible(el);
+    if (visibleOnly && !visible) continue;
+    var attrs = {};
+    for (var j = 0; j < attributes.length; j++) {
+        var value = el.getAttribute(attributes[j]);
+        if (attributes[j] === 'src' && el.src) value = el.src;
+        attrs[attributes[j]] = value;
+    }
+    results.push({
+        element: el,
+        visible: visible,
+        text: visible ? (el.innerText || '').trim() : '',
+        attrs: attrs
+    });
+}
+return results;
+"""
+
+# セレクタごとに問い合わせ、不正なセレクタは無視して残りのセレクタで判定する
+_ANY_VISIBLE_SCRIPT = """
+var selectors = arguments[0];
+""" + _IS_VISIBLE_FUNCTION + """
+for (var i = 0; i < selectors.length; i++) {
+    var elements;
+    try { elements = document.querySelectorAll(selectors[i]); } catch (e) { continue; }
+    for (var j = 0; j < elements.length; j++) {
+        if (isVisible(elements[j])) return true;
+    }
+}
+return false;
+"""
+
+
+class ProbedElement(WebElement):
+    """一括取得した値を返す WebElement"""
+
+    def __init__(self, element: WebElement, text: str, visible: bool, attrs: Dict[str, Optional[str]]):
+        super().__init__(element.parent, element.id)
+        self._probed_text = text or ""
+        self._probed_visible = bool(visible)
+        self._probed_attrs = attrs or {}
+
+    @property
+    def text(self) -> str:
+        return self._probed_text
+
+    def is_displayed(self) -> bool:
+        return self._probed_visible
+
+    def get_attribute(self, name):
+        if name in self._probed_attrs:
+            return self._probed_attrs[name]
+        return super().get_attribute(name)
+
+
+def probe_elements(driver, selector: str, attributes: Sequence[str] = (),
+                   visible_only: bool = False, root: Optional[WebElement] = None) -> List[ProbedElement]:
+    """
+    セレクタに一致する要素の表示状態・テキスト・属性を1回の通信で取得する
+
+    Args:
+        driver: WebDriverインスタンス
+        selector (str): CSSセレクタ
+        attributes (list): 取得する属性名
+        visible_only (bool): 表示中の要素のみ返すか
+        root (WebElement): 検索の起点とする要素（省略時はdocument）
+
+    Returns:
+        list: ProbedElement のリスト（文書順）
+    """
+    entries = driver.execute_script(_PROBE_SCRIPT, selector, list(attributes), bool(visible_only), root) or []
+    probed = []
+    for entry in entries:
+        element = entry.get("element")
+        if not isinstance(element, WebElement):
+            continue
+        probed.append(ProbedElement(element, entry.get("text"), entry.get("visible"), entry.get("attrs")))
+    return probed
+
+
+def any_visible(driver, selectors: Sequence[str]) -> bool:
+    """
+    いずれかのセレクタに一致する表示中の要素があるかを1回の通信で判定する
+
+    セレクタはページ内で1つずつ問い合わせるため、不正なセレクタが含まれていても
+    残りのセレクタで判定します。
+
+    Args:
+        driver: WebDriverインスタンス
+        selectors (list): CSSセレクタ
+
+    Returns:
+        bool: 表示中の要素がある場合はTrue
+    """
+    return bool(driver.execute_script(_ANY_VISIBLE_SCRIPT, list(selectors)))
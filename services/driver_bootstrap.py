@@ -0,0 +1,506 @@
+"""
+Chrome・ChromeDriverの起動準備のキャッシュと共有 chromedriver
+
+このモジュールは、ブラウザ起動のたびに行っていた Chrome・ChromeDriver の
+バージョン確認（サブプロセス起動）と Selenium Manager によるドライバー解決の結果を
+ファイルの更新日時・サイズをキーにディスクへ保存し、chromedriver のサービスを
+アプリ起動中に1つだけ立ち上げて、各ブラウザのセッションをそこへ接続する機能を提供します。
+
+主な機能：
+- バイナリのバージョン・ドライバーの解決結果のキャッシュ（ファイルが更新されたら取り直す）
+- Chrome本体の場所の探索結果の保持（アプリ起動中は1回だけ探す）
+- 共有 chromedriver サービスの起動・停止（プロセスが落ちていれば起動し直す）
+- 共有サービスに接続したセッション（quit ではブラウザだけを終了）
+- 起動時間（ドライバー解決・サービス起動・セッション作成）の記録と集計
+- キャッシュ・共有サービスを使わない従来の起動との比較（bench）
+
+制限事項：
+- settings.json の driver_bootstrap.enabled / shared_service が false の場合は従来どおり毎回解決・起動します
+- 共有サービスのセッションは、キャンセル時に chromedriver ではなくブラウザのプロセスツリーを終了します
+  （ブラウザのPIDの特定には psutil を使います。特定できなかった場合は、他の検索のブラウザを巻き込まないよう
+  そのセッションを専用の chromedriver で起動し直し、以降の起動も専用のサービスで行います）
+- キャッシュの一致判定は更新日時とサイズのみで、ファイルの内容は確認しません
+
+使用例：
+    driver, source = start_chrome(options)
+    python -m services.driver_bootstrap bench --iterations 5
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chromium.remote_connection import ChromiumRemoteConnection
+from selenium.webdriver.remote.webdriver import WebDriver as RemoteWebDriver
+
+DEFAULT_CACHE_PATH = "driver_bootstrap.json"
+
+DEFAULT_BOOTSTRAP_SETTINGS = {
+    "enabled": True,
+    "shared_service": True,
+    "cache_path": DEFAULT_CACHE_PATH,
+}
+
+
+def _load_bootstrap_settings(path="settings.json"):
+    """
+    settings.json から driver_bootstrap 設定を読み込み、既定値で補完して返す。
+    """
+    settings = dict(DEFAULT_BOOTSTRAP_SETTINGS)
+    try:
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                cfg = json.load(f)
+                settings.update(cfg.get("driver_bootstrap", {}) or {})
+    except Exception as e:
+        logging.warning(f"ドライバー起動準備の設定の読み込みに失敗しました: {e}")
+    return settings
+
+
+def _file_signature(path: str) -> Optional[List[int]]:
+    """ファイルの更新日時（ナノ秒）とサイズを返す（存在しない場合はNone）"""
+    if not path:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+class SharedServiceChrome(webdriver.Chrome):
+    """共有の chromedriver サービスに接続した Chrome のセッション"""
+
+    def __init__(self, service: Service, options):
+        """
+        セッションの作成（サービスは起動済みのものを使い、ここでは起動しない）
+
+        Args:
+            service (Service): 起動済みの共有サービス
+            options (Options): Chromeオプション
+        """
+        # キャンセル時に共有の chromedriver ごと終了しないよう service は持たない
+        self.service = None
+        self.shared_service = service
+        self.browser_pid: Optional[int] = None
+        executor = ChromiumRemoteConnection(
+            remote_server_addr=service.service_url,
+            vendor_prefix="goog",
+            browser_name="chrome",
+            keep_alive=True,
+            ignore_proxy=options._ignore_local_proxy,
+        )
+        RemoteWebDriver.__init__(self, command_executor=executor, options=options)
+        self._is_remote = False
+
+    def quit(self) -> None:
+        """ブラウザを終了する（共有サービスは止めない）"""
+        try:
+            RemoteWebDriver.quit(self)
+        except Exception:
+            pass
+
+
+class ChromeBootstrap:
+    """ドライバー解決結果のキャッシュと共有 chromedriver サービス"""
+
+    def __init__(self, cache_path: Optional[str] = DEFAULT_CACHE_PATH, shared_service: bool = True):
+        """
+        起動準備の初期化
+
+        Args:
+            cache_path (str): キャッシュファイルのパス（Noneの場合はキャッシュしない）
+            shared_service (bool): chromedriver のサービスを共有するかどうか
+        """
+        self.cache_path = cache_path
+        self.shared_service = shared_service
+        self._lock = threading.Lock()
+        self._service_lock = threading.Lock()
+        self._entries: Optional[Dict] = None
+        self._service: Optional[Service] = None
+        self._service_path: Optional[str] = None
+        self._chrome_binary: Optional[str] = None
+        # ブラウザのPIDを特定できなかった場合、以降は共有サービスを使わない
+        self._browser_pid_unavailable = False
+        self._records = deque(maxlen=100)
+
+    # --- キャッシュ ---
+    def _load_entries(self) -> Dict:
+        if self._entries is None:
+            self._entries = {"versions": {}, "drivers": {}}
+            if self.cache_path and os.path.exists(self.cache_path):
+                try:
+                    with open(self.cache_path, "r", encoding="utf-8") as f:
+                        stored = json.load(f)
+                    for section in self._entries:
+                        self._entries[section].update(stored.get(section, {}) or {})
+                except Exception as e:
+                    logging.warning(f"ドライバー起動準備のキャッシュの読み込みに失敗しました: {e}")
+        return self._entries
+
+    def _save_entries(self) -> None:
+        if not self.cache_path:
+            return
+        try:
+            cache_dir = os.path.dirname(self.cache_path)
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+            temp_path = f"{self.cache_path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.cache_path)
+        except Exception as e:
+            logging.warning(f"ドライバー起動準備のキャッシュの保存に失敗しました: {e}")
+
+    def get_version(self, executable_path: str) -> str:
+        """
+        バイナリの --version の出力を返す（更新日時・サイズが変わっていなければキャッシュを使う）
+
+        Args:
+            executable_path (str): chrome / chromedriver のパス
+
+        Returns:
+            str: バージョン文字列（取得できない場合は空文字）
+        """
+        from services.web_driver import _get_binary_version_output
+
+        signature = _file_signature(executable_path)
+        if signature is None:
+            return ""
+        with self._lock:
+            entry = self._load_entries()["versions"].get(executable_path)
+            if entry and entry.get("signature") == signature:
+                return entry.get("version", "")
+
+        version = _get_binary_version_output(executable_path)
+        if version:
+            with self._lock:
+                self._load_entries()["versions"][executable_path] = {"signature": signature, "version": version}
+                self._save_entries()
+        return version
+
+    def find_chrome_binary(self) -> str:
+        """
+        Chrome本体のパスを返す（見つかった場所はアプリ起動中保持し、起動のたびには探さない）
+
+        Returns:
+            str: chrome のパス（見つからない場合は空文字）
+        """
+        from services.web_driver import _find_chrome_binary
+
+        if self._chrome_binary is None:
+            chrome_binary = _find_chrome_binary()
+            if not chrome_binary:
+                return ""
+            self._chrome_binary = chrome_binary
+        return self._chrome_binary
+
+    def _resolve_with_selenium_manager(self, options) -> str:
+        from selenium.webdriver.common.selenium_manager import SeleniumManager
+
+        key = "|".join([
+            options.capabilities.get("browserName", "chrome"),
+            str(getattr(options, "binary_location", "") or ""),
+            str(options.browser_version or ""),
+        ])
+        with self._lock:
+            entry = self._load_entries()["drivers"].get(key)
+        if entry:
+            browser_path = entry.get("browser_path") or ""
+            if (
+                _file_signature(entry.get("driver_path")) == entry.get("driver_signature")
+                and _file_signature(browser_path) == entry.get("browser_signature")
+            ):
+                # Selenium Manager と同じく、解決したブラウザを指定してバージョン指定は外す
+                if browser_path:
+                    options.binary_location = browser_path
+                    options.browser_version = None
+                return entry["driver_path"]
+            logging.info("Chrome・ChromeDriverが更新されたため、ドライバーを解決し直します")
+
+        driver_path = SeleniumManager().driver_location(options)
+        browser_path = getattr(options, "binary_location", "") or ""
+        with self._lock:
+            self._load_entries()["drivers"][key] = {
+                "driver_path": driver_path,
+                "driver_signature": _file_signature(driver_path),
+                "browser_path": browser_path,
+                "browser_signature": _file_signature(browser_path),
+            }
+            self._save_entries()
+        return driver_path
+
+    def resolve_driver(self, options) -> Tuple[str, str]:
+        """
+        使用する chromedriver のパスを決める（同梱ドライバ（バージョン一致時のみ）→ Selenium Manager）
+
+        Args:
+            options (Options): Chromeオプション（Selenium Manager が解決したブラウザのパスを設定する）
+
+        Returns:
+            tuple: (chromedriver のパス, 取得元 bundled / selenium-manager)
+        """
+        from services.web_driver import (
+            _extract_major_version,
+            _find_bundled_chromedriver,
+            _use_bundled_driver_by_default,
+        )
+
+        bundled_driver = _find_bundled_chromedriver()
+        if bundled_driver and _use_bundled_driver_by_default():
+            chrome_major = _extract_major_version(self.get_version(self.find_chrome_binary()))
+            driver_major = _extract_major_version(self.get_version(bundled_driver))
+            if chrome_major and driver_major and chrome_major == driver_major:
+                return bundled_driver, "bundled"
+            logging.info(f"同梱ChromeDriverをスキップ: browser={chrome_major}, driver={driver_major}")
+        return self._resolve_with_selenium_manager(options), "selenium-manager"
+
+    # --- 共有サービス ---
+    def _get_service(self, driver_path: str) -> Service:
+        with self._service_lock:
+            service = self._service
+            running = service is not None and service.process is not None and service.process.poll() is None
+            if running and self._service_path == driver_path:
+                return service
+            if service is not None:
+                logging.info("共有ChromeDriverサービスを起動し直します")
+                self._stop_service(service)
+            service = Service(executable_path=driver_path)
+            service.start()
+            self._service, self._service_path = service, driver_path
+            logging.info(f"共有ChromeDriverサービスを起動しました: {service.service_url}（PID: {service.process.pid}）")
+            return service
+
+    @staticmethod
+    def _stop_service(service: Service) -> None:
+        try:
+            service.stop()
+        except Exception as e:
+            logging.warning(f"ChromeDriverサービスの停止に失敗しました: {e}")
+
+    @staticmethod
+    def _start_dedicated(driver_path: str, options):
+        """専用の chromedriver サービスで Chrome を起動する（キャンセル時はそのサービスごと終了する）"""
+        return webdriver.Chrome(service=Service(executable_path=driver_path), options=options)
+
+    def _attach(self, driver_path: str, options):
+        from services.cancellation import find_child_process
+
+        service = self._get_service(driver_path)
+        try:
+            driver = SharedServiceChrome(service, options)
+        except Exception:
+            # サービスが落ちていた場合だけ起動し直して1回やり直す
+            if service.process is None or service.process.poll() is None:
+                raise
+            driver = SharedServiceChrome(self._get_service(driver_path), options)
+
+        user_data_dir = (driver.capabilities.get("chrome") or {}).get("userDataDir")
+        if user_data_dir:
+            driver.browser_pid = find_child_process(driver.shared_service.process.pid, user_data_dir)
+        if driver.browser_pid is None:
+            # 共有サービスごと終了すると他の検索のブラウザも終了するため、専用のサービスで起動し直す
+            logging.warning(
+                "ブラウザのPIDを特定できませんでした（psutil が必要です）。"
+                "キャンセルできるよう専用のChromeDriverで起動し直し、以降も共有サービスを使いません"
+            )
+            self._browser_pid_unavailable = True
+            driver.quit()
+            return self._start_dedicated(driver_path, options)
+        return driver
+
+    def start_chrome(self, options) -> Tuple[object, str]:
+        """
+        Chrome を起動する（共有サービスが有効な場合はそのサービスにセッションを作る）
+
+        Args:
+            options (Options): Chromeオプション
+
+        Returns:
+            tuple: (WebDriver, ドライバーの取得元)
+        """
+        started = time.perf_counter()
+        driver_path, source = self.resolve_driver(options)
+        resolved = time.perf_counter()
+        if self.shared_service and not self._browser_pid_unavailable:
+            driver = self._attach(driver_path, options)
+        else:
+            driver = self._start_dedicated(driver_path, options)
+        finished = time.perf_counter()
+
+        record = {
+            "mode": "shared" if isinstance(driver, SharedServiceChrome) else "dedicated",
+            "resolve_ms": round((resolved - started) * 1000, 1),
+            "session_ms": round((finished - resolved) * 1000, 1),
+            "total_ms": round((finished - started) * 1000, 1),
+        }
+        with self._lock:
+            self._records.append(record)
+        logging.info(
+            f"Chrome起動時間: {record['total_ms']:.0f}ms"
+            f"（ドライバー解決 {record['resolve_ms']:.0f}ms / サービス・セッション {record['session_ms']:.0f}ms、"
+            f"{record['mode']}）"
+        )
+        return driver, source
+
+    def get_startup_stats(self) -> Dict:
+        """
+        記録した起動時間を集計する
+
+        Returns:
+            dict: count・total_p50_ms・total_max_ms・resolve_p50_ms・session_p50_ms
+        """
+        from utils.stats_utils import percentile
+
+        with self._lock:
+            records = list(self._records)
+        return {
+            "count": len(records),
+            "total_p50_ms": round(percentile([r["total_ms"] for r in records], 0.5), 1),
+            "total_max_ms": max((r["total_ms"] for r in records), default=0.0),
+            "resolve_p50_ms": round(percentile([r["resolve_ms"] for r in records], 0.5), 1),
+            "session_p50_ms": round(percentile([r["session_ms"] for r in records], 0.5), 1),
+        }
+
+    def shutdown(self) -> None:
+        """共有サービスを停止する"""
+        with self._service_lock:
+            service, self._service, self._service_path = self._service, None, None
+        if service is not None:
+            self._stop_service(service)
+            logging.info("共有ChromeDriverサービスを停止しました")
+
+
+_bootstrap: Optional[ChromeBootstrap] = None
+_bootstrap_lock = threading.Lock()
+
+
+def get_chrome_bootstrap() -> Optional[ChromeBootstrap]:
+    """
+    アプリケーション共通の起動準備を返す（無効な場合はNone）
+
+    Returns:
+        ChromeBootstrap: 起動準備
+    """
+    global _bootstrap
+    with _bootstrap_lock:
+        if _bootstrap is None:
+            settings = _load_bootstrap_settings()
+            if not settings.get("enabled", True):
+                return None
+            _bootstrap = ChromeBootstrap(
+                cache_path=settings.get("cache_path") or DEFAULT_CACHE_PATH,
+                shared_service=bool(settings.get("shared_service", True)),
+            )
+        return _bootstrap
+
+
+def start_chrome(options) -> Tuple[object, str]:
+    """
+    各 create_driver から Chrome を起動する（起動準備が無効な場合は従来どおり webdriver.Chrome）
+
+    Args:
+        options (Options): Chromeオプション
+
+    Returns:
+        tuple: (WebDriver, ドライバーの取得元)
+    """
+    bootstrap = get_chrome_bootstrap()
+    if bootstrap is None:
+        return webdriver.Chrome(options=options), "selenium-manager"
+    return bootstrap.start_chrome(options)
+
+
+def shutdown_chrome_bootstrap() -> None:
+    """アプリ終了時に共有サービスを停止する"""
+    with _bootstrap_lock:
+        bootstrap = _bootstrap
+    if bootstrap is not None:
+        bootstrap.shutdown()
+
+
+def _bench_options(headless: bool = True):
+    from selenium.webdriver.chrome.options import Options
+
+    options = Options()
+    if headless:
+        options.add_argument('--headless=new')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-gpu')
+    return options
+
+
+def run_startup_benchmark(iterations: int = 3, headless: bool = True) -> Dict:
+    """
+    従来の起動（毎回ドライバー解決とサービス起動）と、キャッシュ・共有サービスを使う起動の時間を比べる
+
+    Args:
+        iterations (int): それぞれの起動回数
+        headless (bool): ヘッドレスで起動するかどうか
+
+    Returns:
+        dict: before（従来）・after_cold（キャッシュなしの初回）・after_warm（2回目以降）のミリ秒
+    """
+    import tempfile
+    from utils.stats_utils import percentile
+
+    before = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        driver = webdriver.Chrome(options=_bench_options(headless))
+        before.append((time.perf_counter() - started) * 1000)
+        driver.quit()
+
+    after = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        bootstrap = ChromeBootstrap(cache_path=os.path.join(temp_dir, DEFAULT_CACHE_PATH))
+        try:
+            for _ in range(iterations + 1):
+                driver, _source = bootstrap.start_chrome(_bench_options(headless))
+                driver.quit()
+            after = [record["total_ms"] for record in bootstrap._records]
+        finally:
+            bootstrap.shutdown()
+
+    return {
+        "iterations": iterations,
+        "before_p50_ms": round(percentile(before, 0.5), 1),
+        "before_max_ms": round(max(before, default=0.0), 1),
+        "after_cold_ms": round(after[0], 1) if after else 0.0,
+        "after_warm_p50_ms": round(percentile(after[1:], 0.5), 1),
+        "after_warm_max_ms": round(max(after[1:], default=0.0), 1),
+    }
+
+
+def main(argv=None) -> int:
+    """コマンドラインから起動時間を計測する"""
+    parser = argparse.ArgumentParser(description="Chrome起動準備のキャッシュと共有ChromeDriverサービスの計測")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    bench_parser = subparsers.add_parser("bench", help="従来の起動と共有サービスでの起動の時間を比べます")
+    bench_parser.add_argument("--iterations", type=int, default=3)
+    bench_parser.add_argument("--show-browser", action="store_true", help="ブラウザを表示して実行する")
+    bench_parser.add_argument("--json", action="store_true", help="JSONで出力する")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    report = run_startup_benchmark(args.iterations, headless=not args.show_browser)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return 0
+    print(f"従来の起動: p50={report['before_p50_ms']}ms / 最大={report['before_max_ms']}ms")
+    print(f"共有サービス（初回・キャッシュなし）: {report['after_cold_ms']}ms")
+    print(f"共有サービス（2回目以降）: p50={report['after_warm_p50_ms']}ms / 最大={report['after_warm_max_ms']}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
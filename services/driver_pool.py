@@ -0,0 +1,421 @@
+"""
+提供判定用ブラウザのウォームプール
+
+このモジュールは、NTT西日本・東日本の提供判定サイトのトップページを
+あらかじめ開いた状態のChromeドライバーを保持し、
+検索開始時に貸し出すための機能を提供します。
+
+主な機能：
+- サイトごとの事前起動済みドライバーの保持
+- 返却時のリセット（Cookie・フォーム状態の消去とトップページへの再遷移）
+- 使用回数上限・ヘルスチェック失敗時の作り直し
+- バックグラウンドでの補充
+
+制限事項：
+- settings.json の driver_pool.enabled が true の場合のみ有効です
+- 貸し出せるドライバーがない場合は呼び出し側で通常起動します
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+SITE_LANDING_URLS = {
+    "west": "https://flets-w.com/cart/",
+    "east": "https://flets.com/app_new/cao/",
+}
+
+# 検証用のローカルサーバーなどへ向けるための上書き（サイト識別子 → URL）
+_site_url_overrides: Dict[str, str] = {}
+
+
+def set_site_url_override(site: str, url: Optional[str] = None) -> None:
+    """
+    提供判定サイトの開始URLを上書きする
+
+    Args:
+        site (str): サイト識別子（west/east）
+        url (str): 開始URL（Noneで上書きを解除）
+    """
+    if url:
+        _site_url_overrides[site] = url
+    else:
+        _site_url_overrides.pop(site, None)
+
+
+def get_site_url(site: str) -> str:
+    """
+    提供判定サイトの開始URLを返す
+
+    set_site_url_override の値、環境変数 TELEPHONETOOL_WEST_URL / TELEPHONETOOL_EAST_URL、
+    SITE_LANDING_URLS の順に参照します。
+    """
+    return (
+        _site_url_overrides.get(site)
+        or os.environ.get(f"TELEPHONETOOL_{site.upper()}_URL")
+        or SITE_LANDING_URLS[site]
+    )
+
+
+DEFAULT_POOL_SETTINGS = {
+    "enabled": False,
+    "size_per_site": 1,
+    "max_uses": 20,
+    "max_age_seconds": 30 * 60,
+}
+
+
+def _load_pool_settings(path="settings.json"):
+    """
+    settings.json から driver_pool 設定を読み込み、既定値で補完して返す。
+    """
+    settings = dict(DEFAULT_POOL_SETTINGS)
+    try:
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                cfg = json.load(f)
+                settings.update(cfg.get("driver_pool", {}) or {})
+    except Exception as e:
+        logging.warning(f"ドライバープール設定の読み込みに失敗しました: {e}")
+    return settings
+
+
+class _PooledDriver:
+    """プール内のドライバーと使用状況"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+        self.created_at = time.time()
+
+
+class DriverPool:
+    """サイトごとのドライバープール"""
+
+    def __init__(
+        self,
+        site: str,
+        driver_factory: Callable,
+        headless: bool = False,
+        size: int = 1,
+        max_uses: int = 20,
+        max_age_seconds: float = 30 * 60,
+        page_load_timeout: int = 60,
+        script_timeout: int = 60,
+    ):
+        """
+        プールの初期化
+
+        Args:
+            site (str): サイト識別子（west/east）
+            driver_factory (callable): headless を受け取りドライバーを返す関数
+            headless (bool): ヘッドレスモードで起動するかどうか
+            size (int): 待機させておくドライバー数
+            max_uses (int): 1台あたりの最大使用回数
+            max_age_seconds (float): 1台あたりの最大保持時間（秒）
+            page_load_timeout (int): ページ読み込みタイムアウト（秒）
+            script_timeout (int): スクリプトタイムアウト（秒）
+        """
+        self.site = site
+        self.landing_url = get_site_url(site)
+        self.driver_factory = driver_factory
+        self.headless = headless
+        self.size = max(0, int(size))
+        self.max_uses = max(1, int(max_uses))
+        self.max_age_seconds = max_age_seconds
+        self.page_load_timeout = page_load_timeout
+        self.script_timeout = script_timeout
+
+        self._lock = threading.Lock()
+        self._idle: List[_PooledDriver] = []
+        self._in_use: Dict[int, _PooledDriver] = {}
+        self._warming = 0
+        self._closed = False
+        self._stats = {"acquired": 0, "misses": 0, "recycled": 0, "created": 0}
+
+    def _launch(self) -> Optional[_PooledDriver]:
+        """ドライバーを起動してトップページで待機させる"""
+        driver = None
+        try:
+            driver = self.driver_factory(headless=self.headless)
+            driver.set_page_load_timeout(self.page_load_timeout)
+            driver.set_script_timeout(self.script_timeout)
+            driver.implicitly_wait(0)
+            driver.get(self.landing_url)
+            with self._lock:
+                self._stats["created"] += 1
+            logging.info(f"ドライバープール({self.site}): 待機用ドライバーを起動しました")
+            return _PooledDriver(driver)
+        except Exception as e:
+            logging.warning(f"ドライバープール({self.site}): 待機用ドライバーの起動に失敗: {str(e)}")
+            self._quit(driver)
+            return None
+
+    @staticmethod
+    def _quit(driver) -> None:
+        if driver is None:
+            return
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _is_healthy(self, entry: _PooledDriver) -> bool:
+        """ドライバーが応答し、トップページを表示しているか確認する"""
+        if entry.uses >= self.max_uses:
+            return False
+        if time.time() - entry.created_at > self.max_age_seconds:
+            return False
+        try:
+            state = entry.driver.execute_script("return document.readyState")
+            if state not in ("interactive", "complete"):
+                return False
+            return bool(entry.driver.window_handles)
+        except Exception:
+            return False
+
+    def _reset(self, entry: _PooledDriver) -> bool:
+        """Cookie・ストレージ・フォーム状態を消去してトップページへ戻す"""
+        driver = entry.driver
+        try:
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            driver.delete_all_cookies()
+            driver.execute_script(
+                "try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}"
+            )
+            driver.get(self.landing_url)
+            driver.execute_script(
+                "Array.from(document.forms || []).forEach(function (f) { try { f.reset(); } catch (e) {} });"
+            )
+            return True
+        except Exception as e:
+            logging.warning(f"ドライバープール({self.site}): ドライバーのリセットに失敗: {str(e)}")
+            return False
+
+    def acquire(self) -> Tuple[Optional[object], bool]:
+        """
+        トップページ表示済みのドライバーを貸し出す
+
+        Returns:
+            tuple: (ドライバー, 事前読み込み済みか)。貸し出せない場合は (None, False)
+        """
+        while True:
+            with self._lock:
+                if self._closed or not self._idle:
+                    self._stats["misses"] += 1
+                    entry = None
+                else:
+                    entry = self._idle.pop(0)
+            if entry is None:
+                self.prewarm_async()
+                return None, False
+
+            if not self._is_healthy(entry):
+                logging.info(f"ドライバープール({self.site}): 使用上限またはヘルスチェック失敗のため作り直します")
+                with self._lock:
+                    self._stats["recycled"] += 1
+                self._quit(entry.driver)
+                continue
+
+            entry.uses += 1
+            with self._lock:
+                self._in_use[id(entry.driver)] = entry
+                self._stats["acquired"] += 1
+            self.prewarm_async()
+            logging.info(f"ドライバープール({self.site}): 待機中のドライバーを貸し出しました（使用回数: {entry.uses}）")
+            return entry.driver, True
+
+    def release(self, driver) -> None:
+        """
+        使用済みのドライバーを返却する。リセットはバックグラウンドで行い、
+        リセットできない場合や空きがない場合は終了する。
+
+        Args:
+            driver: 返却するドライバー
+        """
+        if driver is None:
+            return
+        with self._lock:
+            entry = self._in_use.pop(id(driver), None)
+            has_room = not self._closed and len(self._idle) + self._warming < self.size
+            if has_room:
+                self._warming += 1
+        if entry is None:
+            entry = _PooledDriver(driver)
+            entry.uses = 1
+
+        def _recycle():
+            reusable = has_room and entry.uses < self.max_uses and self._reset(entry)
+            with self._lock:
+                if has_room:
+                    self._warming -= 1
+                if reusable and not self._closed:
+                    self._idle.append(entry)
+                    logging.info(f"ドライバープール({self.site}): ドライバーをリセットして待機状態に戻しました")
+                    return
+                self._stats["recycled"] += 1
+            self._quit(driver)
+            self.prewarm_async()
+
+        threading.Thread(target=_recycle, daemon=True).start()
+
+    def prewarm_async(self) -> None:
+        """不足分のドライバーをバックグラウンドで起動する"""
+        with self._lock:
+            shortage = self.size - len(self._idle) - self._warming
+            if self._closed or shortage <= 0:
+                return
+            self._warming += shortage
+
+        def _worker(count):
+            for _ in range(count):
+                entry = None
+                try:
+                    entry = self._launch()
+                finally:
+                    with self._lock:
+                        self._warming -= 1
+                        if entry is not None and not self._closed:
+                            self._idle.append(entry)
+                            entry = None
+                    if entry is not None:
+                        self._quit(entry.driver)
+
+        threading.Thread(target=_worker, args=(shortage,), daemon=True).start()
+
+    def adopt(self, driver) -> None:
+        """
+        呼び出し側で通常起動したドライバーを貸し出し中として登録する。
+        返却時に空きがあればリセットして待機状態に加える。
+
+        Args:
+            driver: 登録するドライバー
+        """
+        if driver is None:
+            return
+        entry = _PooledDriver(driver)
+        entry.uses = 1
+        with self._lock:
+            self._in_use[id(driver)] = entry
+
+    def owns(self, driver) -> bool:
+        """このプールが貸し出し中のドライバーか"""
+        with self._lock:
+            return id(driver) in self._in_use
+
+    def get_stats(self) -> Dict[str, int]:
+        """貸し出し・作り直しの件数を返す"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["idle"] = len(self._idle)
+            stats["in_use"] = len(self._in_use)
+        return stats
+
+    def detach_idle(self) -> List[object]:
+        """待機中のドライバーを終了せずにプールから外し、以降の補充を止める"""
+        with self._lock:
+            self._closed = True
+            idle = self._idle
+            self._idle = []
+        return [entry.driver for entry in idle]
+
+    def shutdown(self) -> None:
+        """待機中のドライバーを全て終了する"""
+        with self._lock:
+            self._closed = True
+            idle = self._idle
+            self._idle = []
+        for entry in idle:
+            self._quit(entry.driver)
+
+
+_pools: Dict[Tuple[str, bool], DriverPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_driver_pool(site: str, driver_factory: Callable, headless: bool = False,
+                    page_load_timeout: int = 60, script_timeout: int = 60) -> Optional[DriverPool]:
+    """
+    サイトとヘッドレス設定に対応するプールを返す
+
+    Args:
+        site (str): サイト識別子（west/east）
+        driver_factory (callable): ドライバー作成関数
+        headless (bool): ヘッドレスモードかどうか
+        page_load_timeout (int): ページ読み込みタイムアウト（秒）
+        script_timeout (int): スクリプトタイムアウト（秒）
+
+    Returns:
+        DriverPool: プール。設定で無効な場合はNone
+    """
+    settings = _load_pool_settings()
+    if not settings.get("enabled"):
+        return None
+
+    key = (site, bool(headless))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = DriverPool(
+                site,
+                driver_factory,
+                headless=headless,
+                size=settings.get("size_per_site", 1),
+                max_uses=settings.get("max_uses", 20),
+                max_age_seconds=settings.get("max_age_seconds", 30 * 60),
+                page_load_timeout=page_load_timeout,
+                script_timeout=script_timeout,
+            )
+            _pools[key] = pool
+        return pool
+
+
+def release_driver(driver) -> bool:
+    """
+    ドライバーを貸し出し元のプールへ返却する
+
+    Args:
+        driver: 返却するドライバー
+
+    Returns:
+        bool: プールへ返却した場合はTrue（呼び出し側で終了不要）
+    """
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        if pool.owns(driver):
+            pool.release(driver)
+            return True
+    return False
+
+
+def shutdown_driver_pools() -> None:
+    """全てのプールを終了する（アプリケーション終了時に呼び出す）"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown()
+
+
+def detach_idle_drivers() -> List[object]:
+    """
+    全てのプールから待機中のドライバーを終了せずに外す（アプリ再起動で引き継ぐ場合に呼び出す）
+
+    Returns:
+        list: 外したドライバー
+    """
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    drivers = []
+    for pool in pools:
+        drivers.extend(pool.detach_idle())
+    return drivers
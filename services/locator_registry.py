@@ -0,0 +1,352 @@
+"""
+要素の探し方（ロケータ）の実績の記録と順序の入れ替え
+
+このモジュールは、複数のロケータを順に試して要素を探す処理について、サイト・用途ごとに
+どのロケータで見つかったか（成功回数・失敗回数・見つかるまでの時間）を locator_stats.json に
+記録し、次回は最後に成功したロケータから試すための機能を提供します。
+
+主な機能：
+- サイト・用途ごとのロケータの成功・失敗回数と所要時間の記録（ファイルに保存）
+- 最後に成功したロケータを先頭にした試行順序
+- 全ロケータを1回の execute_script でまとめて調べる探索（見つかった中で順位の高いものを採用）
+- 保守用の実績の表示（python -m services.locator_registry stats）
+
+制限事項：
+- settings.json の locator_registry.enabled が false の場合は記録せず、従来どおり順に試します
+- まとめて調べられるのは xpath / css selector / id / name / class name / tag name のロケータです
+  （それ以外を含む場合は順に試します）
+- 先頭のロケータ以外で見つかった場合は、先頭のロケータが現れるのを少しだけ待ってから採用します
+
+使用例：
+    element = find_first_clickable(driver, "mapfan", "detail_button", LOCATORS, timeout_per_locator=2)
+    python -m services.locator_registry stats --site mapfan
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_STATS_PATH = "locator_stats.json"
+
+DEFAULT_LOCATOR_REGISTRY_SETTINGS = {
+    "enabled": True,
+    "path": DEFAULT_STATS_PATH,
+    # 全ロケータを1回のスクリプトでまとめて調べる
+    "race": True,
+}
+
+# Selenium の By の値 → querySelectorAll 用のCSSへの変換
+_CSS_CONVERTERS = {
+    "css selector": lambda value: value,
+    "id": lambda value: f'[id="{value}"]',
+    "name": lambda value: f'[name="{value}"]',
+    "class name": lambda value: f".{value}",
+    "tag name": lambda value: value,
+}
+
+_RACE_SCRIPT = """
+var locators = arguments[0];
+
+function isClickable(el) {
+    if (el.disabled) return false;
+    for (var node = el; node && node.nodeType === 1; node = node.parentElement) {
+        if (node.tagName === 'DIALOG' && !node.open) return false;
+        var style = window.getComputedStyle(node);
+        if (style.display === 'none') return false;
+        if (node === el && (style.visibility === 'hidden' || style.opacity === '0')) return false;
+    }
+    return el.getClientRects().length > 0;
+}
+
+function candidates(kind, value) {
+    if (kind === 'xpath') {
+        var found = [];
+        var snapshot = document.evaluate(value, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        for (var i = 0; i < snapshot.snapshotLength; i++) found.push(snapshot.snapshotItem(i));
+        return found;
+    }
+    return Array.prototype.slice.call(document.querySelectorAll(value));
+}
+
+var matches = [];
+for (var i = 0; i < locators.length; i++) {
+    try {
+        var elements = candidates(locators[i][0], locators[i][1]);
+        for (var j = 0; j < elements.length; j++) {
+            if (elements[j].nodeType === 1 && isClickable(elements[j])) {
+                matches.push([i, elements[j]]);
+                break;
+            }
+        }
+    } catch (e) {}
+}
+return matches;
+"""
+
+
+def _load_locator_registry_settings(path="settings.json"):
+    """
+    settings.json から locator_registry 設定を読み込み、既定値で補完して返す。
+    """
+    settings = dict(DEFAULT_LOCATOR_REGISTRY_SETTINGS)
+    try:
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                cfg = json.load(f)
+                settings.update(cfg.get("locator_registry", {}) or {})
+    except Exception as e:
+        logging.warning(f"ロケータ実績の設定の読み込みに失敗しました: {e}")
+    return settings
+
+
+def locator_key(locator: Tuple[str, str]) -> str:
+    """ロケータを保存用の文字列にする（例: "xpath=//button"）"""
+    by, selector = locator
+    return f"{by}={selector}"
+
+
+class LocatorRegistry:
+    """サイト・用途ごとのロケータの実績"""
+
+    def __init__(self, path: str = DEFAULT_STATS_PATH):
+        """
+        実績の初期化
+
+        Args:
+            path (str): 保存先のJSONファイルのパス
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._groups: Dict[str, Dict[str, Dict]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Dict]]:
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    return json.load(f).get("groups", {}) or {}
+        except Exception as e:
+            logging.warning(f"ロケータ実績の読み込みに失敗しました: {e}")
+        return {}
+
+    def _save(self) -> None:
+        """保存（呼び出し側で _lock を取得済みであること）"""
+        try:
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"groups": self._groups}, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            logging.warning(f"ロケータ実績の保存に失敗しました: {e}")
+
+    def order(self, site: str, group: str, locators: Sequence[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """
+        試す順序を返す（最後に成功した時刻が新しい順、成功したことがないものは元の順）
+
+        Args:
+            site (str): サイト識別子
+            group (str): 用途（detail_button など）
+            locators (list): 元の順序のロケータ
+
+        Returns:
+            list: 並べ替えたロケータ
+        """
+        with self._lock:
+            stats = dict(self._groups.get(f"{site}:{group}", {}))
+        indexed = list(enumerate(locators))
+        indexed.sort(key=lambda item: (-stats.get(locator_key(item[1]), {}).get("last_success", 0), item[0]))
+        return [locator for _, locator in indexed]
+
+    def record(self, site: str, group: str, locator: Tuple[str, str], success: bool,
+               elapsed_ms: Optional[float] = None) -> None:
+        """
+        ロケータの結果を記録する（成功時にファイルへ保存する）
+
+        Args:
+            site (str): サイト識別子
+            group (str): 用途
+            locator (tuple): ロケータ
+            success (bool): 見つかったかどうか
+            elapsed_ms (float): 探し始めてから見つかるまでのミリ秒
+        """
+        with self._lock:
+            entry = self._groups.setdefault(f"{site}:{group}", {}).setdefault(
+                locator_key(locator), {"successes": 0, "failures": 0, "total_ms": 0.0, "last_success": 0}
+            )
+            if not success:
+                entry["failures"] += 1
+                return
+            entry["successes"] += 1
+            entry["total_ms"] = round(entry["total_ms"] + (elapsed_ms or 0.0), 1)
+            entry["last_success"] = time.time()
+            self._save()
+
+    def get_stats(self, site: Optional[str] = None) -> List[Dict]:
+        """
+        保守用の実績を返す
+
+        Args:
+            site (str): サイト識別子（省略時は全サイト）
+
+        Returns:
+            list: 用途・ロケータごとの成功・失敗回数と平均所要時間
+        """
+        rows = []
+        with self._lock:
+            groups = {name: dict(entries) for name, entries in self._groups.items()}
+        for name, entries in sorted(groups.items()):
+            group_site, _, group = name.partition(":")
+            if site and group_site != site:
+                continue
+            for key, entry in sorted(entries.items(), key=lambda item: -item[1].get("last_success", 0)):
+                successes = entry.get("successes", 0)
+                rows.append({
+                    "site": group_site,
+                    "group": group,
+                    "locator": key,
+                    "successes": successes,
+                    "failures": entry.get("failures", 0),
+                    "avg_ms": round(entry.get("total_ms", 0.0) / successes, 1) if successes else None,
+                    "last_success": entry.get("last_success") or None,
+                })
+        return rows
+
+
+def _race_probes(locators: Sequence[Tuple[str, str]]) -> Optional[List[List[str]]]:
+    """ロケータをまとめて調べるスクリプトの引数に変換する（変換できないロケータがある場合はNone）"""
+    probes = []
+    for by, selector in locators:
+        if by == "xpath":
+            probes.append(["xpath", selector])
+        elif by in _CSS_CONVERTERS:
+            probes.append(["css", _CSS_CONVERTERS[by](selector)])
+        else:
+            return None
+    return probes
+
+
+def _race(driver, probes: List[List[str]]) -> List[Tuple[int, object]]:
+    """全ロケータを1回のスクリプトで調べ、見つかったロケータの番号と要素を返す"""
+    return [(int(index), element) for index, element in (driver.execute_script(_RACE_SCRIPT, probes) or [])]
+
+
+def find_first_clickable(driver, site: str, group: str, locators: Sequence[Tuple[str, str]],
+                         timeout_per_locator: float = 3, registry: Optional["LocatorRegistry"] = None,
+                         race: Optional[bool] = None):
+    """
+    実績の順にロケータを試し、クリックできる要素を返す
+
+    Args:
+        driver: WebDriverインスタンス
+        site (str): サイト識別子
+        group (str): 用途
+        locators (list): 元の順序のロケータ
+        timeout_per_locator (float): ロケータ1つあたりの待ち時間（秒）。
+            まとめて調べる場合は全体で len(locators) 倍まで待ち、先頭以外のロケータは
+            この時間が過ぎてから採用する
+        registry (LocatorRegistry): 実績（省略時は共通のもの）
+        race (bool): まとめて調べるかどうか（省略時は設定に従う）
+
+    Returns:
+        WebElement: 見つかった要素。見つからない場合はNone
+    """
+    from selenium.common.exceptions import JavascriptException, TimeoutException
+    from selenium.webdriver.support import expected_conditions as EC
+    from services.cancellation import CancellableWait
+
+    if registry is None:
+        registry = get_locator_registry()
+    if race is None:
+        race = bool(_load_locator_registry_settings().get("race", True))
+    ordered = registry.order(site, group, locators)
+    started = time.perf_counter()
+
+    # まとめて調べるか順に試すかは、待機を始める前にロケータの種類で決める
+    probes = _race_probes(ordered) if race else None
+    if race and probes is None:
+        logging.debug(f"まとめて調べられないロケータがあるため順に試します: {site}:{group}")
+
+    if probes is not None:
+        def _probe(d):
+            matches = _race(d, probes)
+            if not matches:
+                return False
+            index, element = min(matches, key=lambda match: match[0])
+            # 先頭のロケータが現れるのを少し待ってから、他のロケータで見つかったものを採用する
+            if index > 0 and time.perf_counter() - started < timeout_per_locator:
+                return False
+            return index, element
+
+        try:
+            index, element = CancellableWait(driver, timeout_per_locator * len(ordered), poll_frequency=0.2).until(_probe)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            for missed in ordered[:index]:
+                registry.record(site, group, missed, False)
+            registry.record(site, group, ordered[index], True, elapsed_ms)
+            return element
+        except TimeoutException:
+            for missed in ordered:
+                registry.record(site, group, missed, False)
+            return None
+        except JavascriptException as e:
+            # スクリプトの失敗は隠さずに記録し、従来どおり順に試す
+            logging.warning(f"ロケータをまとめて調べるスクリプトが失敗したため順に試します: {e}")
+
+    for locator in ordered:
+        try:
+            element = CancellableWait(driver, timeout_per_locator).until(EC.element_to_be_clickable(locator))
+        except TimeoutException:
+            registry.record(site, group, locator, False)
+            continue
+        registry.record(site, group, locator, True, (time.perf_counter() - started) * 1000)
+        return element
+    return None
+
+
+_registry_instance = None
+_registry_instance_lock = threading.Lock()
+
+
+def get_locator_registry() -> LocatorRegistry:
+    """
+    アプリケーション共通の実績を返す
+
+    Returns:
+        LocatorRegistry: 実績
+    """
+    global _registry_instance
+    with _registry_instance_lock:
+        if _registry_instance is None:
+            settings = _load_locator_registry_settings()
+            _registry_instance = LocatorRegistry(settings.get("path") or DEFAULT_STATS_PATH)
+        return _registry_instance
+
+
+def main(argv=None) -> int:
+    """コマンドラインからロケータの実績を表示する"""
+    parser = argparse.ArgumentParser(description="ロケータの実績の表示")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    stats_parser = subparsers.add_parser("stats", help="サイト・用途ごとのロケータの成功・失敗回数を表示します")
+    stats_parser.add_argument("--site", help="サイト識別子（mapfan など）")
+    stats_parser.add_argument("--json", action="store_true", help="JSONで出力する")
+    args = parser.parse_args(argv)
+
+    rows = get_locator_registry().get_stats(args.site)
+    if args.json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
+        return 0
+    if not rows:
+        print("記録がありません")
+        return 0
+    for row in rows:
+        avg = f"{row['avg_ms']}ms" if row["avg_ms"] is not None else "-"
+        print(f"[{row['site']}:{row['group']}] 成功={row['successes']} 失敗={row['failures']} 平均={avg} {row['locator']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
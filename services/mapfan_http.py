@@ -0,0 +1,181 @@
+"""
+MapFanスポットURLのHTTP解決
+
+このモジュールは、MapFanの住所検索ページ（words ページ）を少しずつ読み込みながら
+スポット詳細へのリンク（/map/spots/A,...）を探し、見つかった時点で読み込みを打ち切る
+機能を提供します。
+
+主な機能：
+- 接続プールを共有したセッション（同じホストへの接続を再利用）
+- 本文の分割読み込みと、分割位置をまたいだリンクの検索
+- 読み込んだバイト数・リンクが見つかるまでの時間の記録
+- MapFanの検索結果ページかどうかの判定（ブロックページ・別ページではリンクなしを確定しない）
+
+制限事項：
+- リンクが見つかった後の残りが小さい場合だけ読み切って接続を再利用し、
+  大きい場合は接続を閉じます（次回は新しい接続になります）
+- 読み込むのは先頭の MAX_SCAN_BYTES までです
+- 検索結果ページの判定は先頭 PAGE_HEAD_CHARS 文字の目印によるもので、完全ではありません
+
+使用例：
+    result = resolve_spot_url("https://mapfan.com/map/words/.../spots?s=std,pc,ja")
+    result["url"], result["results_page"], result["bytes_read"], result["time_to_match_ms"]
+"""
+
+import re
+import time
+import codecs
+import logging
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+SPOT_LINK_PREFIX = "/map/spots/A,"
+SPOT_LINK_PATTERN = re.compile(r"/map/spots/A,[^\"'\s<>]+")
+
+CHUNK_SIZE = 8 * 1024
+# リンクが見つかった後、残りがこれ以下なら読み切って接続を再利用する
+DRAIN_LIMIT_BYTES = 64 * 1024
+MAX_SCAN_BYTES = 4 * 1024 * 1024
+# 検索結果ページかどうかを判定するために保持する先頭の文字数
+PAGE_HEAD_CHARS = 16 * 1024
+# MapFanのページであることを示す目印（小文字で比較）
+RESULTS_PAGE_MARKERS = ("mapfan",)
+# CloudFront などのブロック・エラーページの目印（小文字で比較）
+BLOCK_PAGE_MARKERS = (
+    "request could not be satisfied",
+    "generated by cloudfront",
+    "access denied",
+)
+DEFAULT_TIMEOUT = (5, 8)
+
+# 接続を再利用するため、セッションは全解決で共有する（MapFanはCookieを使わない）
+_session = None
+_session_lock = threading.Lock()
+
+
+class SpotLinkScanner:
+    """分割して届く本文からスポット詳細へのリンクを探す"""
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        self._buffer = ""
+        self._head = ""
+
+    def feed(self, chunk: bytes) -> Optional[str]:
+        """
+        本文の続きを渡す
+
+        Args:
+            chunk (bytes): 受信した本文の一部
+
+        Returns:
+            str: リンクのパス。まだ見つからない（途中で切れている）場合はNone
+        """
+        text = self._decoder.decode(chunk)
+        if len(self._head) < PAGE_HEAD_CHARS:
+            self._head += text[:PAGE_HEAD_CHARS - len(self._head)]
+        self._buffer += text
+        match = SPOT_LINK_PATTERN.search(self._buffer)
+        if match is None:
+            # 分割位置をまたぐリンクの先頭だけ残す
+            self._buffer = self._buffer[-len(SPOT_LINK_PREFIX):]
+            return None
+        if match.end() == len(self._buffer):
+            # リンクの終わりがまだ届いていない
+            self._buffer = self._buffer[match.start():]
+            return None
+        return match.group(0)
+
+    def finish(self) -> Optional[str]:
+        """本文の終わりで、末尾まで続いていたリンクを返す"""
+        self._buffer += self._decoder.decode(b"", final=True)
+        match = SPOT_LINK_PATTERN.search(self._buffer)
+        return match.group(0) if match else None
+
+    def is_results_page(self) -> bool:
+        """読み込んだ先頭がMapFanの検索結果ページで、ブロック・エラーページでないか"""
+        head = self._head.lower()
+        if any(marker in head for marker in BLOCK_PAGE_MARKERS):
+            return False
+        return any(marker in head for marker in RESULTS_PAGE_MARKERS)
+
+
+def _get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=4, max_retries=0))
+            _session.mount("http://", HTTPAdapter(pool_connections=2, pool_maxsize=4, max_retries=0))
+            _session.headers.update({
+                "User-Agent": (
+                    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+                    "AppleWebKit/537.36 (KHTML, like Gecko) "
+                    "Chrome/145.0.0.0 Safari/537.36"
+                ),
+            })
+        return _session
+
+
+def resolve_spot_url(words_url: str, base_url: str = "https://mapfan.com", timeout=DEFAULT_TIMEOUT) -> Dict:
+    """
+    words ページを読み込みながらスポット詳細URLを探す（見つかった時点で打ち切る）
+
+    Args:
+        words_url (str): MapFanの住所検索ページのURL
+        base_url (str): リンクのパスに付けるURL
+        timeout: requests のタイムアウト（接続, 読み込み）
+
+    Returns:
+        dict: url（見つからない場合はNone）、results_page（MapFanの検索結果ページと判定できたか）、
+              bytes_read（展開後）、wire_bytes（受信量）、time_to_match_ms、elapsed_ms
+
+    Raises:
+        requests.RequestException: 通信エラーの場合
+    """
+    started = time.perf_counter()
+    scanner = SpotLinkScanner()
+    bytes_read = 0
+    path = None
+    time_to_match_ms = None
+
+    with _get_session().get(words_url, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        chunks = response.iter_content(CHUNK_SIZE)
+        for chunk in chunks:
+            bytes_read += len(chunk)
+            path = scanner.feed(chunk)
+            if path or bytes_read >= MAX_SCAN_BYTES:
+                break
+        else:
+            path = scanner.finish()
+        if path:
+            time_to_match_ms = (time.perf_counter() - started) * 1000
+
+        # 残りが小さければ読み切って接続をプールに戻す（大きければ閉じる）
+        wire_bytes = response.raw.tell()
+        remaining = int(response.headers.get("Content-Length") or 0) - wire_bytes
+        if path and 0 < remaining <= DRAIN_LIMIT_BYTES:
+            for _ in chunks:
+                pass
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    is_html = "html" in (response.headers.get("Content-Type") or "html").lower()
+    result = {
+        "url": f"{base_url}{path}" if path else None,
+        "results_page": bool(path) or (is_html and scanner.is_results_page()),
+        "bytes_read": bytes_read,
+        "wire_bytes": wire_bytes,
+        "time_to_match_ms": round(time_to_match_ms, 1) if time_to_match_ms is not None else None,
+        "elapsed_ms": round(elapsed_ms, 1),
+    }
+    if path:
+        logging.info(f"MapFanスポットURLを解決しました: {bytes_read}バイト読み込み、{result['time_to_match_ms']}ms")
+    elif result["results_page"]:
+        logging.info(f"MapFanスポットURLが見つかりませんでした: {bytes_read}バイト読み込み、{result['elapsed_ms']}ms")
+    else:
+        logging.warning(f"MapFanの検索結果ページと判定できませんでした: {bytes_read}バイト読み込み、url={response.url}")
+    return result
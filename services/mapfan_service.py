@@ -6,16 +6,14 @@ MapFan検索サービス
 """
 
 import logging
-import re
 import time
 import threading
-import urllib.request
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 from urllib.parse import quote
 
-from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
@@ -23,7 +21,14 @@ from selenium.webdriver.remote.webdriver import WebDriver
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
+from services.cancellation import CancellableWait, CancellationError, CancelToken, cancellable_sleep, use_token
 from services.web_driver import create_driver, load_browser_settings
+from services.request_blocking import log_blocking_stats
+from services.locator_registry import _load_locator_registry_settings, find_first_clickable
+from services.mapfan_http import resolve_spot_url
+from services.mapfan_session import get_mapfan_session
+from services.mapfan_url_cache import _load_mapfan_url_cache_settings, get_mapfan_url_cache
+from services.speculative_search import is_address_ready
 
 
 class MapfanService:
@@ -93,23 +98,18 @@ class MapfanService:
         self.timeout = timeout
         self.debug = debug
         self.detailed_logging = detailed_logging
-        self._cancel_event: Optional[threading.Event] = None
-        self._active_driver = None
+        self._cancel_token: Optional[CancelToken] = None
 
     def request_cancel(self) -> None:
+        """実行中の検索をキャンセルする（待機を中断し、ブラウザのプロセスを終了する）"""
         try:
-            if self._cancel_event is not None:
-                self._cancel_event.set()
-            if self._active_driver is not None:
-                try:
-                    self._active_driver.quit()
-                except Exception:
-                    pass
+            if self._cancel_token is not None:
+                self._cancel_token.cancel("MapFan処理の取り消し")
         except Exception:
             pass
 
     def _is_cancelled(self) -> bool:
-        return bool(self._cancel_event is not None and self._cancel_event.is_set())
+        return bool(self._cancel_token is not None and self._cancel_token.is_cancelled)
 
     def _check_cancel(self) -> None:
         if self._is_cancelled():
@@ -123,39 +123,46 @@ class MapfanService:
         encoded_address = quote(normalized_address, safe="")
         return f"https://mapfan.com/map/words/{encoded_address}/spots?s=std,pc,ja"
 
+    def _fetch_spot_url(self, words_url: str) -> Dict:
+        """words ページからスポット詳細URLを探す（resolve_spot_url の結果、通信エラーは例外）"""
+        return resolve_spot_url(words_url)
+
     def _resolve_spot_url_without_selenium(self, address: str) -> Optional[str]:
         words_url = self._build_direct_spot_url(address)
         if not words_url:
             return None
 
         try:
-            request = urllib.request.Request(
-                words_url,
-                headers={
-                    "User-Agent": (
-                        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                        "AppleWebKit/537.36 (KHTML, like Gecko) "
-                        "Chrome/145.0.0.0 Safari/537.36"
-                    )
-                },
-            )
-            with urllib.request.urlopen(request, timeout=8) as response:
-                html = response.read().decode("utf-8", errors="ignore")
-
-            match = re.search(r"/map/spots/A,[^\"'\s<>]+", html)
-            if match:
-                return f"https://mapfan.com{match.group(0)}"
+            resolved = self._fetch_spot_url(words_url)
         except Exception as e:
             logging.debug(f"MapFan直接URLの詳細解決に失敗（words URLを使用）: {str(e)}")
+            return words_url
 
-        return words_url
+        spot_url = resolved.get("url")
+        if spot_url or resolved.get("results_page"):
+            # スポットが見つからなかった住所も保存し、次回は問い合わせずに words URL を返す
+            get_mapfan_url_cache().set(address, spot_url, "http")
+        else:
+            # ブロックページなど検索結果と判定できないページでは、スポットなしを確定しない
+            logging.debug("MapFanの検索結果ページではないため、スポットなしとして保存しません")
+        return spot_url or words_url
+
+    def _get_cached_detail_url(self, address: str, use_direct_url: bool) -> Optional[str]:
+        """キャッシュ済みの詳細URLを返す（スポットが見つからなかった住所は words URL）"""
+        hit, url = get_mapfan_url_cache().get(address)
+        if not hit:
+            return None
+        if url:
+            return url
+        return self._build_direct_spot_url(address) if use_direct_url else None
 
     def get_detail_url_from_address(
         self,
         address: str,
         auto_close: Optional[bool] = None,
         force_headless: Optional[bool] = None,
-        cancel_event: Optional[threading.Event] = None
+        cancel_event: Optional[threading.Event] = None,
+        cancel_token: Optional[CancelToken] = None
     ) -> Optional[str]:
         """
         住所検索から詳細画面へ遷移し、遷移先URLを取得します。
@@ -163,6 +170,8 @@ class MapfanService:
         Args:
             address (str): 検索に使う住所文字列
             auto_close (Optional[bool]): 処理後にブラウザを閉じるかどうか
+            cancel_event (Optional[threading.Event]): 互換用のキャンセルイベント（set でキャンセル）
+            cancel_token (Optional[CancelToken]): この検索のキャンセルトークン
 
         Returns:
             Optional[str]: 遷移先URL。取得できない場合はNone
@@ -174,6 +183,14 @@ class MapfanService:
 
         settings = load_browser_settings()
         use_direct_url = bool(settings.get("mapfan_direct_url", True))
+        if use_direct_url:
+            # 同じ住所の先読みが実行中なら、重複して問い合わせずに結果を待つ
+            get_mapfan_url_cache().wait_for_prefetch(normalized_address, timeout=10)
+        cached_url = self._get_cached_detail_url(normalized_address, use_direct_url)
+        if cached_url:
+            logging.info("MapFan詳細URLをキャッシュから取得しました")
+            return cached_url
+
         if use_direct_url:
             direct_url = self._resolve_spot_url_without_selenium(normalized_address)
             if direct_url:
@@ -189,83 +206,198 @@ class MapfanService:
         if auto_close is None:
             auto_close = settings.get("auto_close", False)
 
-        self._cancel_event = cancel_event
-        driver = None
-        try:
-            self._check_cancel()
-            driver = create_driver(headless=headless, page_load_strategy="eager")
-            self._active_driver = driver
-            driver.implicitly_wait(0)
-            wait = WebDriverWait(driver, self.timeout)
-
-            navigation_urls = [self.base_url]
-            if headless and self.base_url != "https://mapfan.com/":
-                navigation_urls.append("https://mapfan.com/")
+        # 常駐セッションが有効なら、地図画面を開いたままのブラウザで住所の入力からやり直す
+        session = get_mapfan_session()
+        session_driver, use_session = (
+            session.checkout(headless, self._is_session_healthy) if session is not None else (None, False)
+        )
+        session_healthy = False
+
+        # キャンセル時に待機を中断し、create_driver で起動したブラウザをプロセスごと終了する
+        token = cancel_token or CancelToken(cancel_event)
+        self._cancel_token = token
+        with use_token(token):
+            driver = session_driver
+            warm = driver is not None
+            try:
+                self._check_cancel()
+                if warm:
+                    token.register_driver(driver)
+                    logging.info("常駐のMapFanセッションで検索します")
+                else:
+                    driver = create_driver(headless=headless, page_load_strategy="eager", blocking_site="mapfan")
+                    driver.implicitly_wait(0)
+                wait = CancellableWait(driver, self.timeout)
+
+                if not warm and not self._open_map_page(driver, headless):
+                    return None
 
-            page_title = ""
-            for index, target_url in enumerate(navigation_urls, start=1):
                 self._check_cancel()
-                driver.get(target_url)
-                WebDriverWait(driver, 12).until(
-                    lambda d: d.execute_script("return document.readyState") in ("interactive", "complete")
+                # 常駐ブラウザに前回の検索結果が残っていても、それを新しい結果として読まない
+                previous_result = self._find_left_panel_info_button(driver) if warm else None
+                try:
+                    self._input_address_and_search(driver, wait, normalized_address, previous_result=previous_result)
+                except TimeoutException:
+                    if not warm or self._is_cancelled():
+                        raise
+                    logging.warning("常駐セッションでの検索に失敗したため、地図画面を開き直して再試行します")
+                    if not self._open_map_page(driver, headless):
+                        return None
+                    previous_result = None
+                    self._input_address_and_search(driver, wait, normalized_address)
+                previous_url = driver.current_url
+
+                detail_clicked = self._click_left_panel_info_button(
+                    driver, normalized_address, exclude=previous_result
                 )
+                if not detail_clicked:
+                    detail_button = self._find_first_clickable(
+                        driver, self.DETAIL_BUTTON_LOCATORS, wait, timeout_per_locator=2, group="detail_button"
+                    )
+                    if detail_button is None:
+                        logging.error("MapFanの詳細ボタン（iマーク）を見つけられませんでした")
+                        return None
+                    self._safe_click(driver, detail_button)
+                    logging.info("汎用ロケータで詳細ボタンをクリックしました")
+                else:
+                    logging.info("左パネルのiボタンをクリックしました")
+
+                wait.until(lambda d: d.current_url != previous_url)
+                detail_url = driver.current_url
+                logging.info(f"MapFan詳細URL取得成功: {detail_url}")
+                if not warm or self._detail_page_matches_address(driver, normalized_address):
+                    get_mapfan_url_cache().set(normalized_address, detail_url, "selenium")
+                else:
+                    # 前回の結果を開いた可能性があるため、別の住所のURLを長期間保存しない
+                    logging.warning("常駐セッションの詳細画面が検索した住所と一致しないため、URLを保存しません")
+                session_healthy = True
+                return detail_url
+
+            except CancellationError:
+                logging.info("MapFan処理をキャンセルしました")
+                return None
+            except TimeoutException:
+                if self._is_cancelled():
+                    logging.info("MapFan処理をキャンセルしました")
+                    return None
+                logging.error("MapFan操作中にタイムアウトが発生しました")
+                if driver is not None:
+                    self._log_block_page_diagnostics(driver, phase="timeout")
+                return None
+            except Exception as e:
+                if self._is_cancelled():
+                    logging.info("MapFan処理をキャンセルしました")
+                    return None
+                logging.error(f"MapFan詳細URL取得中にエラーが発生しました: {str(e)}")
+                if driver is not None:
+                    self._log_block_page_diagnostics(driver, phase="exception")
+                return None
+            finally:
+                token.release_drivers()
+                log_blocking_stats(driver)
+                if use_session:
+                    # この住所だけの失敗なら、画面が使える限りブラウザを残す
+                    if not session_healthy and driver is not None and not token.is_cancelled:
+                        session_healthy = self._is_session_healthy(driver)
+                    if session_healthy and not token.is_cancelled:
+                        # 詳細画面・検索結果を残したまま預けず、地図画面に戻してから次の検索に使う
+                        session_healthy = self._reset_session_page(driver)
+                    session.checkin(headless, driver, healthy=session_healthy and not token.is_cancelled)
+                elif driver is not None and auto_close and not token.is_cancelled:
+                    try:
+                        driver.quit()
+                    except Exception as e:
+                        logging.warning(f"MapFan用WebDriver終了時にエラーが発生しました: {str(e)}")
 
-                page_title = (driver.title or "").strip()
-                logging.info(f"MapFanを表示しました: title={page_title}, url={target_url}")
+    def _open_map_page(self, driver: WebDriver, headless: bool) -> bool:
+        """地図画面を開く（ブロックページの場合は別URLで再試行し、開けなければFalse）"""
+        navigation_urls = [self.base_url]
+        if headless and self.base_url != "https://mapfan.com/":
+            navigation_urls.append("https://mapfan.com/")
 
-                if not self._is_mapfan_block_page(driver, page_title):
-                    break
+        for index, target_url in enumerate(navigation_urls, start=1):
+            self._check_cancel()
+            driver.get(target_url)
+            CancellableWait(driver, 12).until(
+                lambda d: d.execute_script("return document.readyState") in ("interactive", "complete")
+            )
 
-                self._log_block_page_diagnostics(driver, phase=f"initial-load-{index}")
-                if index < len(navigation_urls):
-                    logging.warning("MapFanブロックページを検出。ヘッドレスのまま別URLで再試行します")
-                    continue
+            page_title = (driver.title or "").strip()
+            logging.info(f"MapFanを表示しました: title={page_title}, url={target_url}")
 
-                logging.error("MapFanのブロック/エラーページを検出しました（ヘッドレス実行のまま終了）")
-                return None
+            if not self._is_mapfan_block_page(driver, page_title):
+                return True
 
-            self._check_cancel()
-            self._input_address_and_search(driver, wait, normalized_address)
-            previous_url = driver.current_url
-
-            detail_clicked = self._click_left_panel_info_button(driver, normalized_address)
-            if not detail_clicked:
-                detail_button = self._find_first_clickable(driver, self.DETAIL_BUTTON_LOCATORS, wait, timeout_per_locator=2)
-                if detail_button is None:
-                    logging.error("MapFanの詳細ボタン（iマーク）を見つけられませんでした")
-                    return None
-                self._safe_click(driver, detail_button)
-                logging.info("汎用ロケータで詳細ボタンをクリックしました")
-            else:
-                logging.info("左パネルのiボタンをクリックしました")
+            self._log_block_page_diagnostics(driver, phase=f"initial-load-{index}")
+            if index < len(navigation_urls):
+                logging.warning("MapFanブロックページを検出。ヘッドレスのまま別URLで再試行します")
+                continue
+
+        logging.error("MapFanのブロック/エラーページを検出しました（ヘッドレス実行のまま終了）")
+        return False
+
+    def _is_session_healthy(self, driver: WebDriver) -> bool:
+        """常駐ブラウザが応答し、ブロックページでないMapFanの画面を表示しているか"""
+        try:
+            if not driver.window_handles:
+                return False
+            if driver.execute_script("return document.readyState") not in ("interactive", "complete"):
+                return False
+            if "mapfan.com" not in (driver.current_url or ""):
+                return False
+            return not self._is_mapfan_block_page(driver, driver.title or "")
+        except Exception:
+            return False
 
-            wait.until(lambda d: d.current_url != previous_url)
-            detail_url = driver.current_url
-            logging.info(f"MapFan詳細URL取得成功: {detail_url}")
-            return detail_url
+    def _reset_session_page(self, driver: WebDriver) -> bool:
+        """常駐ブラウザを地図画面に戻す（前回の検索結果・詳細画面を残さない）。戻せなければFalse"""
+        try:
+            driver.get(self.base_url)
+            WebDriverWait(driver, 12).until(
+                lambda d: d.execute_script("return document.readyState") in ("interactive", "complete")
+            )
+            return self._is_session_healthy(driver)
+        except Exception as e:
+            logging.info(f"常駐セッションを地図画面に戻せなかったため終了します: {e}")
+            return False
 
+    def _detail_page_matches_address(self, driver: WebDriver, address: str, timeout: float = 3.0) -> bool:
+        """
+        詳細画面に検索した住所（市区町村と町名）が表示されているか
+
+        Args:
+            driver (WebDriver): 詳細画面を表示しているドライバー
+            address (str): 検索した住所
+            timeout (float): 詳細画面の描画を待つ時間（秒）
+
+        Returns:
+            bool: 一致を確認できた場合はTrue（住所を解析できない場合はFalse）
+        """
+        from utils.address_parser import parse_address
+        from utils.address_utils import normalize_address
+
+        parsed = parse_address(normalize_address(address))
+        if not parsed.city:
+            return False
+        expected = [part for part in (parsed.city, parsed.town) if part]
+
+        def _matches(d):
+            text = normalize_address(d.find_element(By.TAG_NAME, "body").text or "")
+            text = text.replace(" ", "").replace("\n", "")
+            return all(part in text for part in expected)
+
+        try:
+            return bool(CancellableWait(driver, timeout, poll_frequency=0.2).until(_matches))
         except TimeoutException:
-            if self._is_cancelled():
-                logging.info("MapFan処理をキャンセルしました")
-            else:
-                logging.error("MapFan操作中にタイムアウトが発生しました")
-            if driver is not None:
-                self._log_block_page_diagnostics(driver, phase="timeout")
-            return None
+            return False
+        except CancellationError:
+            raise
         except Exception as e:
-            logging.error(f"MapFan詳細URL取得中にエラーが発生しました: {str(e)}")
-            if driver is not None:
-                self._log_block_page_diagnostics(driver, phase="exception")
-            return None
-        finally:
-            self._active_driver = None
-            if driver is not None and auto_close:
-                try:
-                    driver.quit()
-                except Exception as e:
-                    logging.warning(f"MapFan用WebDriver終了時にエラーが発生しました: {str(e)}")
+            logging.debug(f"MapFan詳細画面の住所を確認できませんでした: {e}")
+            return False
 
-    def _input_address_and_search(self, driver: WebDriver, wait: WebDriverWait, address: str) -> None:
+    def _input_address_and_search(self, driver: WebDriver, wait: WebDriverWait, address: str,
+                                  previous_result=None) -> None:
         self._check_cancel()
         self._log_search_inputs(driver, "左検索ボタン押下前")
         self._dismiss_blocking_overlay(driver)
@@ -273,7 +405,7 @@ class MapfanService:
         if not self._click_left_search_button(driver):
             raise TimeoutException("左側の検索ボタンをクリックできませんでした")
 
-        time.sleep(0.2)
+        cancellable_sleep(0.2)
         self._dismiss_blocking_overlay(driver)
         self._log_search_inputs(driver, "左検索ボタン押下後")
 
@@ -313,7 +445,7 @@ class MapfanService:
                 logging.warning(f"検索欄入力後の値が空でした (試行 {index + 1}/5)")
             except Exception as input_error:
                 logging.warning(f"検索欄入力時に例外が発生しました (試行 {index + 1}/5): {input_error}")
-                time.sleep(0.1)
+                cancellable_sleep(0.1)
 
         if not value_after_input:
             raise TimeoutException("MapFan検索欄への住所入力後、値が反映されませんでした")
@@ -347,7 +479,7 @@ class MapfanService:
             search_input.send_keys(Keys.ENTER)
             logging.info("検索ボタンが見つからないためEnterで検索しました")
 
-        self._wait_for_search_result(driver, wait)
+        self._wait_for_search_result(driver, wait, previous_result=previous_result)
         logging.info("MapFan検索結果の表示を確認しました")
 
     def _click_left_search_button(self, driver: WebDriver) -> bool:
@@ -432,7 +564,7 @@ class MapfanService:
                     return best
             except Exception:
                 pass
-            time.sleep(0.2)
+            cancellable_sleep(0.2)
         return None
 
     def _submit_search_via_js(self, driver: WebDriver, address: str) -> bool:
@@ -501,7 +633,7 @@ class MapfanService:
             if element is not None:
                 logging.info("初期画面候補探索(Python)で入力欄を検出しました")
                 return element
-            time.sleep(0.3)
+            cancellable_sleep(0.3)
         return None
 
     def _find_initial_input_direct(self, driver: WebDriver):
@@ -743,7 +875,9 @@ class MapfanService:
         except Exception:
             pass
 
-        return self._find_first_clickable(driver, self.SEARCH_BUTTON_LOCATORS, wait, timeout_per_locator=1)
+        return self._find_first_clickable(
+            driver, self.SEARCH_BUTTON_LOCATORS, wait, timeout_per_locator=1, group="search_button"
+        )
 
     def _find_neighbor_search_button(self, driver: WebDriver, search_input):
         """検索入力欄の隣接アイコン/ボタンを取得"""
@@ -765,14 +899,16 @@ class MapfanService:
             pass
         return None
 
-    def _click_left_panel_info_button(self, driver: WebDriver, address: str) -> bool:
-        """左パネル検索結果のiボタンを優先クリックする"""
+    def _click_left_panel_info_button(self, driver: WebDriver, address: str, exclude=None) -> bool:
+        """左パネル検索結果のiボタンを優先クリックする（exclude は前回の結果のため押さない）"""
         try:
             key = (address or "").replace(" ", "").replace("　", "")
             key = key[:12] if key else ""
 
             # 即時チェック（最速経路）
             immediate_candidate = self._find_left_panel_info_button(driver, key)
+            if exclude is not None and immediate_candidate == exclude:
+                immediate_candidate = None
             if immediate_candidate is not None:
                 try:
                     t = (immediate_candidate.text or "").strip()
@@ -790,6 +926,8 @@ class MapfanService:
                 self._check_cancel()
                 try:
                     candidate = self._find_left_panel_info_button(driver, key)
+                    if exclude is not None and candidate == exclude:
+                        candidate = None
 
                     if candidate is not None:
                         try:
@@ -804,7 +942,7 @@ class MapfanService:
                 except Exception:
                     pass
 
-                time.sleep(0.1)
+                cancellable_sleep(0.1)
 
             return False
         except Exception as e:
@@ -843,10 +981,35 @@ class MapfanService:
         except Exception:
             return None
 
-    def _wait_for_search_result(self, driver: WebDriver, wait: WebDriverWait) -> None:
+    @staticmethod
+    def _is_stale(element) -> bool:
+        """要素が画面から取り除かれたか"""
+        try:
+            element.is_enabled()
+            return False
+        except StaleElementReferenceException:
+            return True
+
+    def _wait_for_search_result(self, driver: WebDriver, wait: WebDriverWait, previous_result=None) -> None:
+        """
+        検索結果の表示を待つ
+
+        previous_result（検索前に表示されていた結果のiボタン）を渡した場合は、
+        それが取り除かれるか別の結果に置き換わるまで、古い結果を新しい結果として扱いません。
+        """
         end_time = time.time() + 12
         while time.time() < end_time:
             self._check_cancel()
+            if previous_result is not None:
+                if self._is_stale(previous_result):
+                    previous_result = None
+                else:
+                    current = self._find_left_panel_info_button(driver)
+                    if current is not None and current != previous_result:
+                        previous_result = None
+                if previous_result is not None:
+                    cancellable_sleep(0.15)
+                    continue
             try:
                 ready = driver.execute_script(
                     "if (document.querySelector(\"button[aria-label*='詳細'], button[title*='詳細']\")) return true;"
@@ -865,7 +1028,7 @@ class MapfanService:
                     return
             except Exception:
                 pass
-            time.sleep(0.15)
+            cancellable_sleep(0.15)
         raise TimeoutException("MapFan検索結果の表示を確認できませんでした")
 
     def _enter_map_view_if_needed(self, driver: WebDriver) -> None:
@@ -881,7 +1044,7 @@ class MapfanService:
                     driver.execute_script("arguments[0].click();", overlay)
                 except Exception:
                     continue
-            time.sleep(0.2)
+            cancellable_sleep(0.2)
         except Exception:
             pass
 
@@ -953,11 +1116,15 @@ class MapfanService:
         driver: WebDriver,
         locators: List[Tuple[str, str]],
         wait: WebDriverWait,
-        timeout_per_locator: int = 3
+        timeout_per_locator: int = 3,
+        group: Optional[str] = None
     ):
+        # 用途の指定があれば、前回見つかったロケータから試す（実績は locator_stats.json）
+        if group and _load_locator_registry_settings().get("enabled", True):
+            return find_first_clickable(driver, "mapfan", group, locators, timeout_per_locator)
         for by, selector in locators:
             try:
-                return WebDriverWait(driver, timeout_per_locator).until(EC.element_to_be_clickable((by, selector)))
+                return CancellableWait(driver, timeout_per_locator).until(EC.element_to_be_clickable((by, selector)))
             except Exception:
                 continue
         return None
@@ -994,7 +1161,8 @@ def get_mapfan_detail_url(
     debug: bool = True,
     auto_close: Optional[bool] = None,
     force_headless: Optional[bool] = None,
-    cancel_event: Optional[threading.Event] = None
+    cancel_event: Optional[threading.Event] = None,
+    cancel_token: Optional[CancelToken] = None
 ) -> Optional[str]:
     """MapFan詳細URL取得の簡易エントリーポイント"""
     service = MapfanService(debug=debug)
@@ -1002,5 +1170,43 @@ def get_mapfan_detail_url(
         address=address,
         auto_close=auto_close,
         force_headless=force_headless,
-        cancel_event=cancel_event
-    )
\ No newline at end of file
+        cancel_event=cancel_event,
+        cancel_token=cancel_token
+    )
+
+
+def get_cached_mapfan_url(address: str) -> Optional[str]:
+    """
+    キャッシュ済みのMapFan詳細URLを返す（地図ボタンで問い合わせずに開くため）
+
+    Returns:
+        Optional[str]: 詳細URL。キャッシュにない場合はNone
+    """
+    normalized_address = (address or "").strip()
+    if not normalized_address:
+        return None
+    use_direct_url = bool(load_browser_settings().get("mapfan_direct_url", True))
+    return MapfanService(debug=False)._get_cached_detail_url(normalized_address, use_direct_url)
+
+
+def prefetch_mapfan_url(address: str) -> Optional[threading.Thread]:
+    """
+    入力中の住所のMapFan詳細URLをバックグラウンドで解決しておく（HTTPのみ、Seleniumは起動しない）
+
+    市区町村と番地を特定できない入力途中の住所は先読みしません。
+
+    Returns:
+        threading.Thread: 開始したスレッド。先読みしない場合はNone
+    """
+    normalized_address = (address or "").strip()
+    if not normalized_address or not _load_mapfan_url_cache_settings().get("prefetch", True):
+        return None
+    if not load_browser_settings().get("mapfan_direct_url", True):
+        return None
+    # 入力途中の住所は問い合わせない（先行判定と同じく市区町村と番地が揃ってから）
+    ready, reason = is_address_ready(normalized_address)
+    if not ready:
+        logging.debug(f"MapFan URLを先読みしません: {reason}")
+        return None
+    service = MapfanService(debug=False)
+    return get_mapfan_url_cache().prefetch(normalized_address, service._resolve_spot_url_without_selenium)
@@ -0,0 +1,204 @@
+"""
+MapFan用の常駐ブラウザセッション
+
+このモジュールは、MapFanの詳細URLをSeleniumで取得する場合に使うChromeを
+検索のたびに終了せずに地図画面のまま保持し、次の検索では住所の入力からやり直すだけで
+済ませるための機能を提供します（既定では無効）。
+
+主な機能：
+- ヘッドレス設定ごとに1つのドライバーの保持と貸し出し
+- 貸し出し前のヘルスチェック（応答・MapFanの画面・ブロックページの検出）
+- 使用回数上限・未使用時間上限・ヘルスチェック失敗時の作り直し
+
+制限事項：
+- settings.json の mapfan_session.enabled が true の場合のみ有効です
+- 貸し出し中に別の検索が来た場合、その検索は従来どおり新しいブラウザで実行します
+- 有効な間は auto_close の設定に関わらずブラウザを残します（アプリ終了時に閉じます）
+- 預ける前に地図画面へ戻し、常駐ブラウザで取得したURLは詳細画面の住所が一致した場合だけ保存します
+
+使用例：
+    session = get_mapfan_session()
+    driver = session.checkout(headless=True, health_check=service._is_session_healthy)
+    ...
+    session.checkin(driver, healthy=True)
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+DEFAULT_MAPFAN_SESSION_SETTINGS = {
+    "enabled": False,
+    "max_uses": 50,
+    "idle_timeout_seconds": 15 * 60,
+    # 貸し出し中の検索が終わるのを待つ時間（秒）
+    "checkout_wait_seconds": 5,
+}
+
+
+def _load_mapfan_session_settings(path="settings.json"):
+    """
+    settings.json から mapfan_session 設定を読み込み、既定値で補完して返す。
+    """
+    settings = dict(DEFAULT_MAPFAN_SESSION_SETTINGS)
+    try:
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                cfg = json.load(f)
+                settings.update(cfg.get("mapfan_session", {}) or {})
+    except Exception as e:
+        logging.warning(f"MapFanセッションの設定の読み込みに失敗しました: {e}")
+    return settings
+
+
+class _SessionDriver:
+    """保持しているドライバーと使用状況"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+        self.last_used = time.time()
+
+
+class MapfanSession:
+    """MapFan用の常駐ブラウザ（ヘッドレス設定ごとに1つ）"""
+
+    def __init__(self, max_uses: int = 50, idle_timeout_seconds: float = 15 * 60, checkout_wait_seconds: float = 5):
+        """
+        セッションの初期化
+
+        Args:
+            max_uses (int): 1つのブラウザで検索する回数の上限
+            idle_timeout_seconds (float): 使われないまま保持する時間の上限（秒）
+            checkout_wait_seconds (float): 貸し出し中の検索が終わるのを待つ時間（秒）
+        """
+        self.max_uses = max_uses
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.checkout_wait_seconds = checkout_wait_seconds
+        self._locks: Dict[bool, threading.Lock] = {True: threading.Lock(), False: threading.Lock()}
+        self._entries: Dict[bool, Optional[_SessionDriver]] = {True: None, False: None}
+        self._stats = {"warm": 0, "created": 0, "recreated": 0, "busy": 0}
+
+    @staticmethod
+    def _quit(driver) -> None:
+        if driver is None:
+            return
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _is_reusable(self, entry: _SessionDriver, health_check: Callable[[object], bool]) -> bool:
+        if entry.uses >= self.max_uses:
+            logging.info("MapFanセッションの使用回数が上限に達したため作り直します")
+            return False
+        if time.time() - entry.last_used > self.idle_timeout_seconds:
+            logging.info("MapFanセッションが長時間使われていないため作り直します")
+            return False
+        try:
+            return bool(health_check(entry.driver))
+        except Exception as e:
+            logging.info(f"MapFanセッションのヘルスチェックに失敗しました: {e}")
+            return False
+
+    def checkout(self, headless: bool, health_check: Callable[[object], bool]):
+        """
+        保持しているブラウザを貸し出す
+
+        Args:
+            headless (bool): ヘッドレスモードかどうか
+            health_check (callable): ドライバーを受け取り、そのまま検索に使えるか返す関数
+
+        Returns:
+            tuple: (ドライバー, 貸し出せたか)。
+                   (None, True) の場合は呼び出し側で起動して checkin で預ける。
+                   (None, False) の場合は貸し出し中のため、セッションを使わずに検索する
+        """
+        lock = self._locks[bool(headless)]
+        if not lock.acquire(timeout=self.checkout_wait_seconds):
+            self._stats["busy"] += 1
+            logging.info("MapFanセッションが使用中のため、新しいブラウザで検索します")
+            return None, False
+
+        entry = self._entries[bool(headless)]
+        if entry is None:
+            return None, True
+        if not self._is_reusable(entry, health_check):
+            self._entries[bool(headless)] = None
+            self._quit(entry.driver)
+            self._stats["recreated"] += 1
+            return None, True
+        self._stats["warm"] += 1
+        return entry.driver, True
+
+    def checkin(self, headless: bool, driver, healthy: bool = True) -> None:
+        """
+        検索が終わったブラウザを預ける（checkout で貸し出せた場合に必ず呼ぶ）
+
+        Args:
+            headless (bool): ヘッドレスモードかどうか
+            driver: 検索に使ったドライバー（起動できなかった場合はNone）
+            healthy (bool): 次の検索に使えるかどうか（Falseなら終了する）
+        """
+        lock = self._locks[bool(headless)]
+        try:
+            entry = self._entries[bool(headless)]
+            if driver is None or not healthy:
+                self._entries[bool(headless)] = None
+                self._quit(driver)
+                return
+            if entry is None or entry.driver is not driver:
+                entry = self._entries[bool(headless)] = _SessionDriver(driver)
+                self._stats["created"] += 1
+            entry.uses += 1
+            entry.last_used = time.time()
+        finally:
+            lock.release()
+
+    def get_stats(self) -> Dict[str, int]:
+        """再利用・作り直しの回数を返す"""
+        return dict(self._stats)
+
+    def shutdown(self) -> None:
+        """保持しているブラウザを終了する"""
+        for headless in (True, False):
+            entry, self._entries[headless] = self._entries[headless], None
+            if entry is not None:
+                self._quit(entry.driver)
+
+
+_session_instance = None
+_session_instance_lock = threading.Lock()
+
+
+def get_mapfan_session() -> Optional[MapfanSession]:
+    """
+    アプリケーション共通のセッションを返す
+
+    Returns:
+        MapfanSession: セッション。設定で無効な場合はNone
+    """
+    global _session_instance
+    settings = _load_mapfan_session_settings()
+    if not settings.get("enabled"):
+        return None
+    with _session_instance_lock:
+        if _session_instance is None:
+            _session_instance = MapfanSession(
+                int(settings.get("max_uses", 50)),
+                float(settings.get("idle_timeout_seconds", 15 * 60)),
+                float(settings.get("checkout_wait_seconds", 5)),
+            )
+        return _session_instance
+
+
+def shutdown_mapfan_session() -> None:
+    """アプリ終了時に常駐ブラウザを終了する"""
+    global _session_instance
+    with _session_instance_lock:
+        session, _session_instance = _session_instance, None
+    if session is not None:
+        session.shutdown()
@@ -0,0 +1,286 @@
+"""
+MapFan詳細URLのキャッシュと先読み
+
+このモジュールは、住所からMapFanのスポット詳細URLを解決した結果を
+mapfan_url_cache.json に保存し、同じ住所で地図ボタンが押されたときに
+MapFanへ問い合わせずにURLを返すための機能を提供します。
+
+主な機能：
+- 正規化した住所（全角数字・ハイフン・空白の表記ゆれを吸収）によるキー生成
+- 有効期限つきの保存（解決できたURLと、スポットが見つからなかった住所を別の期限で保存）
+- 住所入力が止まった時点でのバックグラウンド先読み（同じ住所の重複実行なし）
+- ヒット/ミス件数の集計
+
+制限事項：
+- settings.json の mapfan_url_cache で有効期限・件数上限・先読みの有無を変更できます
+- 通信エラーなど一時的な失敗や、検索結果と判定できないページ（ブロックページなど）は保存しません
+- 先読みするのは市区町村と番地まで入力された住所だけです
+- 先読みはHTTPでの解決のみで、Seleniumは起動しません
+
+使用例：
+    cache = get_mapfan_url_cache()
+    hit, url = cache.get("東京都千代田区丸の内1-1-1")
+    cache.prefetch("東京都千代田区丸の内1-1-1", resolver)
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+DEFAULT_CACHE_PATH = "mapfan_url_cache.json"
+
+DEFAULT_MAPFAN_URL_CACHE_SETTINGS = {
+    "enabled": True,
+    "path": DEFAULT_CACHE_PATH,
+    # 解決できたURLの有効期限（秒）
+    "ttl_seconds": 30 * 24 * 60 * 60,
+    # スポットが見つからなかった住所の有効期限（秒）
+    "negative_ttl_seconds": 24 * 60 * 60,
+    "max_entries": 2000,
+    "prefetch": True,
+    "prefetch_debounce_ms": 800,
+}
+
+
+def _load_mapfan_url_cache_settings(path="settings.json"):
+    """
+    settings.json から mapfan_url_cache 設定を読み込み、既定値で補完して返す。
+    """
+    settings = dict(DEFAULT_MAPFAN_URL_CACHE_SETTINGS)
+    try:
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                cfg = json.load(f)
+                settings.update(cfg.get("mapfan_url_cache", {}) or {})
+    except Exception as e:
+        logging.warning(f"MapFan URLキャッシュの設定の読み込みに失敗しました: {e}")
+    return settings
+
+
+def build_address_key(address: str) -> Optional[str]:
+    """
+    住所からキャッシュキーを生成する
+
+    Args:
+        address (str): 住所
+
+    Returns:
+        str: 正規化した住所（空白なし）。生成できない場合はNone
+    """
+    from utils.address_utils import normalize_address
+
+    key = normalize_address(address or "").replace(" ", "")
+    return key or None
+
+
+class MapfanUrlCache:
+    """MapFan詳細URLの永続キャッシュ"""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        ttl_seconds: float = DEFAULT_MAPFAN_URL_CACHE_SETTINGS["ttl_seconds"],
+        negative_ttl_seconds: float = DEFAULT_MAPFAN_URL_CACHE_SETTINGS["negative_ttl_seconds"],
+        max_entries: int = DEFAULT_MAPFAN_URL_CACHE_SETTINGS["max_entries"],
+    ):
+        """
+        キャッシュの初期化
+
+        Args:
+            path (str): 保存先のJSONファイルのパス
+            ttl_seconds (float): 解決できたURLの有効期限（秒）
+            negative_ttl_seconds (float): スポットが見つからなかった住所の有効期限（秒）
+            max_entries (int): 保存する件数の上限（超えた分は古いものから削除）
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.max_entries = max_entries
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = self._load()
+        self._inflight: Dict[str, threading.Event] = {}
+        self._stats = {"hits": 0, "negative_hits": 0, "misses": 0, "expired": 0, "stores": 0, "prefetches": 0}
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    return json.load(f).get("entries", {}) or {}
+        except Exception as e:
+            logging.warning(f"MapFan URLキャッシュの読み込みに失敗しました: {e}")
+        return {}
+
+    def _save(self) -> None:
+        """保存（呼び出し側で _lock を取得済みであること）"""
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"entries": self._entries}, f, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            logging.warning(f"MapFan URLキャッシュの保存に失敗しました: {e}")
+
+    def get(self, address: str) -> Tuple[bool, Optional[str]]:
+        """
+        キャッシュから詳細URLを取得します。
+
+        Args:
+            address (str): 住所
+
+        Returns:
+            tuple: (ヒットしたか, URL)。スポットが見つからなかった住所はURLがNone
+        """
+        key = build_address_key(address) if self.enabled else None
+        if key is None:
+            return False, None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return False, None
+            url = entry.get("url")
+            ttl = self.ttl_seconds if url else self.negative_ttl_seconds
+            if time.time() - float(entry.get("stored_at", 0)) > ttl:
+                del self._entries[key]
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                self._save()
+                return False, None
+            self._stats["hits" if url else "negative_hits"] += 1
+        return True, url
+
+    def set(self, address: str, url: Optional[str], source: str) -> bool:
+        """
+        詳細URLをキャッシュに保存します。
+
+        Args:
+            address (str): 住所
+            url (Optional[str]): 詳細URL。スポットが見つからなかった場合はNone
+            source (str): 解決方法（http/selenium）
+
+        Returns:
+            bool: 保存した場合はTrue
+        """
+        key = build_address_key(address) if self.enabled else None
+        if key is None:
+            return False
+
+        with self._lock:
+            self._entries[key] = {"url": url, "source": source, "stored_at": time.time()}
+            overflow = len(self._entries) - max(1, int(self.max_entries))
+            if overflow > 0:
+                oldest = sorted(self._entries, key=lambda k: self._entries[k].get("stored_at", 0))[:overflow]
+                for old_key in oldest:
+                    del self._entries[old_key]
+            self._stats["stores"] += 1
+            self._save()
+        return True
+
+    def invalidate(self, address: str) -> None:
+        """指定した住所のキャッシュを削除します。"""
+        key = build_address_key(address)
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._save()
+
+    def prefetch(self, address: str, resolver: Callable[[str], None]) -> Optional[threading.Thread]:
+        """
+        キャッシュにない住所の解決をバックグラウンドで始める
+
+        Args:
+            address (str): 住所
+            resolver (callable): 住所を受け取り、解決結果をこのキャッシュに保存する関数
+
+        Returns:
+            threading.Thread: 開始したスレッド。キャッシュ済み・実行中の場合はNone
+        """
+        key = build_address_key(address) if self.enabled else None
+        if key is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if key in self._inflight:
+                return None
+            if entry is not None:
+                ttl = self.ttl_seconds if entry.get("url") else self.negative_ttl_seconds
+                if time.time() - float(entry.get("stored_at", 0)) <= ttl:
+                    return None
+            done = self._inflight[key] = threading.Event()
+            self._stats["prefetches"] += 1
+
+        def _run():
+            try:
+                resolver(address)
+            except Exception as e:
+                logging.debug(f"MapFan URLの先読みに失敗しました: {e}")
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+                done.set()
+
+        thread = threading.Thread(target=_run, name="MapfanPrefetch", daemon=True)
+        thread.start()
+        logging.debug(f"MapFan URLを先読みします: {key}")
+        return thread
+
+    def wait_for_prefetch(self, address: str, timeout: float) -> bool:
+        """
+        同じ住所の先読みが実行中なら終わるまで待つ（重複して問い合わせないため）
+
+        Returns:
+            bool: 先読みを待った場合はTrue
+        """
+        key = build_address_key(address)
+        with self._lock:
+            done = self._inflight.get(key)
+        if done is None:
+            return False
+        done.wait(timeout)
+        return True
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        ヒット/ミス件数を返します。
+
+        Returns:
+            Dict[str, float]: 集計値とヒット率
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["negative_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["negative_hits"]) / lookups if lookups else 0.0
+        return stats
+
+
+_cache_instance = None
+_cache_instance_lock = threading.Lock()
+
+
+def get_mapfan_url_cache() -> MapfanUrlCache:
+    """
+    アプリケーション共通のキャッシュインスタンスを返す
+
+    Returns:
+        MapfanUrlCache: キャッシュインスタンス
+    """
+    global _cache_instance
+    with _cache_instance_lock:
+        if _cache_instance is None:
+            settings = _load_mapfan_url_cache_settings()
+            _cache_instance = MapfanUrlCache(
+                settings.get("path") or DEFAULT_CACHE_PATH,
+                float(settings.get("ttl_seconds", DEFAULT_MAPFAN_URL_CACHE_SETTINGS["ttl_seconds"])),
+                float(settings.get("negative_ttl_seconds", DEFAULT_MAPFAN_URL_CACHE_SETTINGS["negative_ttl_seconds"])),
+                int(settings.get("max_entries", DEFAULT_MAPFAN_URL_CACHE_SETTINGS["max_entries"])),
+            )
+            _cache_instance.enabled = bool(settings.get("enabled", True))
+        return _cache_instance
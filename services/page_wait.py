@@ -0,0 +1,284 @@
+"""
+提供判定画面のイベント駆動待機
+
+このモジュールは、固定秒数の time.sleep の代わりに、ページ内へ
+MutationObserver を仕込んで目的の要素の表示・非表示やDOMの変化を
+検出した時点で待機を終える機能を提供します。
+
+主な機能：
+- セレクタの表示/非表示/存在の待機
+- DOM変化（任意の変化・変化の収束）の待機（ポーリング用は最小間隔つき）
+- 画面遷移など観測できない状態のための短周期ポーリング
+- 固定待機と比べた短縮時間の記録とログ出力
+
+制限事項：
+- 1回のスクリプト実行は slice_seconds で区切り、その間にキャンセルを確認します
+- ポーリング間の待機は検索のキャンセルトークン（services.cancellation）で中断します
+- 画面遷移でスクリプトが中断された場合は短い間隔で再試行します
+"""
+
+import time
+import logging
+from typing import Callable, Dict, List, Optional
+
+from services.cancellation import cancellable_sleep
+
+# wait_for_change の最小待機秒数（スピナーやアニメーションで即座に戻り続けないようにする）
+DEFAULT_MIN_CHANGE_INTERVAL = 0.1
+
+# 監視スクリプト（mode: selector / mutation / settle）
+_OBSERVER_SCRIPT = """
+var spec = arguments[0];
+var done = arguments[arguments.length - 1];
+var finished = false, timer = null, quiet = null, observer = null;
+
+function isVisible(el) {
+    if (!el) return false;
+    if (el.tagName === 'DIALOG' && !el.open) return false;
+    var style = window.getComputedStyle(el);
+    if (style.display === 'none' || style.visibility === 'hidden') return false;
+    return el.getClientRects().length > 0;
+}
+
+function match() {
+    for (var i = 0; i < spec.selectors.length; i++) {
+        var elements;
+        try { elements = document.querySelectorAll(spec.selectors[i]); } catch (e) { continue; }
+        if (spec.state === 'present') {
+            if (elements.length) return spec.selectors[i];
+            continue;
+        }
+        var anyVisible = false;
+        for (var j = 0; j < elements.length; j++) {
+            if (isVisible(elements[j])) { anyVisible = true; break; }
+        }
+        if (spec.state === 'visible' && anyVisible) return spec.selectors[i];
+        if (spec.state === 'hidden' && !anyVisible) return spec.selectors[i];
+    }
+    return null;
+}
+
+function finish(value) {
+    if (finished) return;
+    finished = true;
+    if (observer) observer.disconnect();
+    clearTimeout(timer);
+    clearTimeout(quiet);
+    done(value);
+}
+
+if (spec.mode === 'selector') {
+    var initial = match();
+    if (initial !== null) { finish(initial); return; }
+}
+
+observer = new MutationObserver(function () {
+    if (spec.mode === 'mutation') { finish('mutation'); return; }
+    if (spec.mode === 'settle') {
+        clearTimeout(quiet);
+        quiet = setTimeout(function () { finish('settled'); }, spec.quiet_ms);
+        return;
+    }
+    var matched = match();
+    if (matched !== null) finish(matched);
+});
+observer.observe(document.documentElement || document, {
+    childList: true, subtree: true, attributes: true, characterData: true
+});
+if (spec.mode === 'settle') {
+    quiet = setTimeout(function () { finish('settled'); }, spec.quiet_ms);
+}
+timer = setTimeout(function () { finish(null); }, spec.timeout_ms);
+"""
+
+
+def build_result_image_selectors(patterns: Dict[str, Dict]) -> List[str]:
+    """
+    結果画像パターン（src_contains/alt_contains）から待機用のCSSセレクタを作る
+
+    Args:
+        patterns (dict): RESULT_IMAGE_PATTERNS 形式の辞書
+
+    Returns:
+        list: CSSセレクタのリスト
+    """
+    selectors = []
+    for pattern_info in patterns.values():
+        for token in pattern_info.get("src_contains", []):
+            selectors.append(f'img[src*="{token}" i]')
+        for token in pattern_info.get("alt_contains", []):
+            selectors.append(f'img[alt*="{token}"]')
+    return selectors
+
+
+class PageWaiter:
+    """ドライバーごとのイベント駆動待機"""
+
+    def __init__(self, driver, site: str, cancel_check: Optional[Callable[[], None]] = None,
+                 slice_seconds: float = 0.5):
+        """
+        待機の初期化
+
+        Args:
+            driver: WebDriverインスタンス
+            site (str): ログ表示用のサイト識別子（west/east）
+            cancel_check (callable): キャンセル時に例外を送出する関数
+            slice_seconds (float): 1回のスクリプト実行で待機する最大秒数
+        """
+        self.driver = driver
+        self.site = site
+        self.cancel_check = cancel_check or (lambda: None)
+        self.slice_seconds = slice_seconds
+        self.steps: List[Dict] = []
+
+    def _record(self, step: str, started: float, baseline: Optional[float], matched) -> None:
+        elapsed = time.monotonic() - started
+        entry = {"step": step, "elapsed": elapsed, "baseline": baseline, "matched": matched is not None}
+        self.steps.append(entry)
+        if baseline is not None:
+            logging.info(
+                f"待機({self.site}): {step} {elapsed:.2f}秒"
+                f"（固定待機 {baseline:.2f}秒 → 短縮 {baseline - elapsed:+.2f}秒）"
+            )
+        else:
+            logging.debug(f"待機({self.site}): {step} {elapsed:.2f}秒")
+
+    def _observe(self, spec: Dict, timeout: float):
+        """監視スクリプトを slice_seconds ごとに実行し、検出した値を返す"""
+        deadline = time.monotonic() + max(0.0, timeout)
+        while True:
+            self.cancel_check()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            window = min(self.slice_seconds, remaining)
+            try:
+                value = self.driver.execute_async_script(
+                    _OBSERVER_SCRIPT, dict(spec, timeout_ms=int(window * 1000))
+                )
+            except Exception as e:
+                # 画面遷移中はスクリプトが中断されるため少し待って再試行する
+                logging.debug(f"待機({self.site}): 監視スクリプトを再試行します: {str(e)}")
+                cancellable_sleep(min(0.05, max(0.0, deadline - time.monotonic())))
+                continue
+            if value is not None:
+                return value
+
+    def wait_for(self, selectors, state: str = "visible", timeout: float = 10,
+                 step: str = "", baseline: Optional[float] = None) -> Optional[str]:
+        """
+        セレクタのいずれかが指定状態になるまで待機する
+
+        Args:
+            selectors (str | list): CSSセレクタ
+            state (str): "visible" / "hidden" / "present"
+            timeout (float): 最大待機秒数
+            step (str): ログ表示用の工程名
+            baseline (float): 置き換え前の固定待機秒数（短縮時間の記録用）
+
+        Returns:
+            str: 条件を満たしたセレクタ。タイムアウト時はNone
+        """
+        if isinstance(selectors, str):
+            selectors = [selectors]
+        started = time.monotonic()
+        matched = self._observe({"mode": "selector", "selectors": list(selectors), "state": state}, timeout)
+        self._record(step or f"{state}: {selectors[0]}", started, baseline, matched)
+        return matched
+
+    def wait_for_hidden(self, selector: str, timeout: float = 10, step: str = "",
+                        baseline: Optional[float] = None) -> bool:
+        """要素が非表示（または削除）になるまで待機する"""
+        return self.wait_for(selector, "hidden", timeout, step, baseline) is not None
+
+    def wait_for_change(self, timeout: float, step: str = "", baseline: Optional[float] = None,
+                        min_interval: float = DEFAULT_MIN_CHANGE_INTERVAL) -> bool:
+        """
+        DOMに何らかの変化が起きるまで待機する（ポーリングループの待機の置き換え用）
+
+        スピナーやアニメーションなど変化し続ける画面でポーリングループが
+        WebDriverを連続で呼び出さないよう、変化を検出しても min_interval 秒
+        （timeout を上限）が経過するまでは戻りません。
+
+        Args:
+            timeout (float): 最大待機秒数
+            step (str): ログ表示用の工程名
+            baseline (float): 置き換え前の固定待機秒数（短縮時間の記録用）
+            min_interval (float): 最小待機秒数
+
+        Returns:
+            bool: 変化を検出した場合はTrue
+        """
+        started = time.monotonic()
+        matched = self._observe({"mode": "mutation", "selectors": []}, timeout)
+        if matched is not None:
+            remaining = min(min_interval, timeout) - (time.monotonic() - started)
+            if remaining > 0:
+                self.cancel_check()
+                cancellable_sleep(remaining)
+        self._record(step or "DOM変化", started, baseline, matched)
+        return matched is not None
+
+    def settle(self, timeout: float, quiet_ms: int = 50, step: str = "",
+               baseline: Optional[float] = None) -> bool:
+        """
+        DOMの変化が quiet_ms ミリ秒途切れるまで待機する（スクロールやクリック直後の待機の置き換え用）
+
+        Returns:
+            bool: 収束を検出した場合はTrue
+        """
+        started = time.monotonic()
+        matched = self._observe({"mode": "settle", "selectors": [], "quiet_ms": int(quiet_ms)}, timeout)
+        self._record(step or "DOM収束", started, baseline, matched)
+        return matched is not None
+
+    def wait_until(self, predicate: Callable, timeout: float = 10, step: str = "",
+                   baseline: Optional[float] = None, poll: float = 0.05):
+        """
+        画面遷移などDOM監視で捉えられない条件を短周期でポーリングする
+
+        Args:
+            predicate (callable): ドライバーを受け取り、成立時に真値を返す関数
+
+        Returns:
+            条件の戻り値。タイムアウト時はNone
+        """
+        started = time.monotonic()
+        deadline = started + timeout
+        value = None
+        while True:
+            self.cancel_check()
+            try:
+                value = predicate(self.driver)
+            except Exception:
+                value = None
+            if value or time.monotonic() >= deadline:
+                break
+            cancellable_sleep(poll)
+        value = value or None
+        self._record(step or "条件成立", started, baseline, value)
+        return value
+
+    def get_summary(self) -> Dict[str, float]:
+        """
+        記録した待機の合計を返す
+
+        Returns:
+            dict: 待機回数・合計待機秒数・固定待機との差分（短縮秒数）
+        """
+        compared = [s for s in self.steps if s["baseline"] is not None]
+        return {
+            "waits": len(self.steps),
+            "elapsed_sec": round(sum(s["elapsed"] for s in self.steps), 3),
+            "baseline_sec": round(sum(s["baseline"] for s in compared), 3),
+            "saved_sec": round(sum(s["baseline"] - s["elapsed"] for s in compared), 3),
+        }
+
+    def log_summary(self) -> None:
+        """待機の合計をログに出力する"""
+        summary = self.get_summary()
+        if summary["waits"]:
+            logging.info(
+                f"待機({self.site})合計: {summary['waits']}回 {summary['elapsed_sec']}秒"
+                f"（固定待機 {summary['baseline_sec']}秒との差 {summary['saved_sec']:+}秒）"
+            )
@@ -0,0 +1,795 @@
+"""
+提供判定フローのオフライン再生とベンチマーク
+
+このモジュールは、西日本・東日本の提供判定で実際にサイトから受け取った
+HTML・JavaScript・XHR の応答を工程ごとに記録し、ローカルのHTTPサーバーから
+遅延を付けて再生することで、本番サイトにアクセスせずに Selenium のフローを
+試験・計測できるようにする機能を提供します。
+
+主な機能：
+- 記録: Chrome のパフォーマンスログから同一オリジンの応答を取得して保存（工程名つき）
+- 再生: 記録した応答を返すローカルHTTPサーバー（固定遅延・ゆらぎの注入）
+- 開始URLの上書き（driver_pool.set_site_url_override）と外部ホストへの接続遮断
+- ベンチマーク: 経過時間・WebDriverコマンド数・Chromeのピークメモリ・工程別時間の集計
+- キャンセルの計測: 指定した工程でキャンセルし、処理終了までの時間とChromeの残存を確認
+
+制限事項：
+- 記録対象は開始URLと同じオリジンの応答のみです（他ホストの読み込みは再生時に遮断）
+- 応答本文中の絶対URL（https://サイト）はローカルサーバーを向くよう相対パスに置き換えて保存します
+- 同じURLへの複数回のリクエストは記録順に返し、尽きた後は最後の応答を返します
+- ピークメモリは psutil があればそれを、なければ Linux の /proc を参照します
+- 記録時はドライバープールを無効にしてください（パフォーマンスログを有効にして起動するため）
+
+使用例：
+    python -m services.replay_harness record --site west --postal 5300001 --address 大阪府大阪市北区梅田1丁目1-1 -o recordings/west_umeda
+    python -m services.replay_harness serve recordings/west_umeda --latency-ms 80
+    python -m services.replay_harness bench recordings/west_umeda recordings/east_case --iterations 5 --latency-ms 50
+    python -m services.replay_harness cancel-bench recordings/west_umeda --cancel-step candidate_selection
+"""
+
+import os
+import sys
+import json
+import time
+import base64
+import random
+import logging
+import argparse
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+from services.driver_pool import SITE_LANDING_URLS, set_site_url_override
+from services.search_trace import current_trace, finish_trace, start_trace
+
+MANIFEST_NAME = "manifest.json"
+
+# 本文を文字列として保存し、絶対URLを置き換える種類
+_TEXT_MIME_PREFIXES = ("text/", "application/javascript", "application/x-javascript",
+                       "application/json", "application/xhtml+xml", "application/xml", "image/svg+xml")
+_EXTENSIONS = {"text/html": ".html", "text/css": ".css", "application/javascript": ".js",
+               "text/javascript": ".js", "application/json": ".json", "image/png": ".png",
+               "image/gif": ".gif", "image/jpeg": ".jpg", "image/svg+xml": ".svg"}
+
+# 記録・再生中の状態（create_driver からも参照する）
+_harness_state = {"recording_dir": None, "case": None, "offline": False}
+
+
+def apply_harness_options(options) -> None:
+    """
+    記録・再生中の場合にChromeの起動オプションを追加する（各 create_driver から呼ぶ）
+
+    Args:
+        options: ChromeOptions
+    """
+    if _harness_state["recording_dir"]:
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    if _harness_state["offline"]:
+        # 再生サーバー以外のホストへは接続させない
+        options.add_argument("--host-resolver-rules=MAP * ~NOTFOUND, EXCLUDE 127.0.0.1")
+
+
+def attach_replay_recorder(driver, site: str) -> None:
+    """
+    記録中の場合に、現在のトレースへ応答の記録を登録する（記録中でなければ何もしない）
+
+    Args:
+        driver: WebDriverインスタンス（パフォーマンスログ有効で起動したもの）
+        site (str): サイト識別子（west/east）
+    """
+    output_dir = _harness_state["recording_dir"]
+    trace = current_trace()
+    if not output_dir or trace is None:
+        return
+    recorder = ReplayRecorder(driver, site, output_dir, case=_harness_state["case"])
+    trace.add_listener(recorder.on_trace_event)
+    logging.info(f"再生用の記録を開始しました: {output_dir}")
+
+
+def _rewrite_origin(data, origin: str):
+    """本文（str または bytes）中のサイトの絶対URLを相対パスにする"""
+    host = urlsplit(origin).netloc
+    for prefix in (f"https://{host}", f"http://{host}", f"//{host}"):
+        if isinstance(data, bytes):
+            # Shift_JIS 等の本文もそのまま扱えるようバイト列のまま置き換える
+            data = data.replace(prefix.encode("ascii"), b"")
+        else:
+            data = data.replace(prefix, "")
+    return data
+
+
+def _path_of(url: str) -> str:
+    parts = urlsplit(url)
+    return parts.path + (f"?{parts.query}" if parts.query else "")
+
+
+class ReplayRecorder:
+    """パフォーマンスログからの応答の記録"""
+
+    def __init__(self, driver, site: str, output_dir: str, case: Optional[Dict] = None):
+        """
+        記録の初期化
+
+        Args:
+            driver: WebDriverインスタンス
+            site (str): サイト識別子
+            output_dir (str): 記録の保存先ディレクトリ
+            case (dict): 記録した検索の条件（郵便番号・住所）
+        """
+        self.driver = driver
+        self.site = site
+        self.output_dir = output_dir
+        self.case = dict(case or {})
+        self.start_url = SITE_LANDING_URLS[site]
+        parts = urlsplit(self.start_url)
+        self.origin = f"{parts.scheme}://{parts.netloc}"
+        self.step = "browser_start"
+        self.entries: List[Dict] = []
+        self._requests: Dict[str, Dict] = {}
+        self._responses: Dict[str, Dict] = {}
+        os.makedirs(os.path.join(output_dir, "bodies"), exist_ok=True)
+
+    def _same_origin(self, url: str) -> bool:
+        return url.startswith(self.origin + "/") or url == self.origin
+
+    def on_trace_event(self, event: str, step: Optional[str]) -> None:
+        """工程の切り替え時に、それまでの応答を記録する"""
+        self.drain()
+        if event == "finish":
+            self.save()
+        elif step:
+            self.step = step
+
+    def drain(self) -> int:
+        """
+        パフォーマンスログを読み、読み込みが終わった応答の本文を保存する
+
+        Returns:
+            int: 今回記録した応答数
+        """
+        finished = set()
+        for entry in self.driver.get_log("performance"):
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, TypeError, ValueError):
+                continue
+            method = message.get("method")
+            params = message.get("params", {})
+            request_id = params.get("requestId")
+            if method == "Network.requestWillBeSent":
+                request = params.get("request", {})
+                redirect = params.get("redirectResponse")
+                previous = self._requests.get(request_id)
+                if redirect and previous and self._same_origin(previous["url"]):
+                    self._add_entry(previous, redirect.get("status", 302),
+                                    redirect.get("mimeType", ""), b"",
+                                    location=_rewrite_origin(request.get("url", ""), self.origin))
+                self._requests[request_id] = {
+                    "url": request.get("url", ""),
+                    "method": request.get("method", "GET"),
+                }
+            elif method == "Network.responseReceived":
+                response = params.get("response", {})
+                if self._same_origin(response.get("url", "")):
+                    self._responses[request_id] = response
+            elif method == "Network.loadingFinished":
+                finished.add(request_id)
+
+        recorded = 0
+        for request_id in [rid for rid in self._responses if rid in finished]:
+            response = self._responses.pop(request_id)
+            request = self._requests.get(request_id, {"url": response.get("url", ""), "method": "GET"})
+            try:
+                body = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+            except Exception as e:
+                logging.debug(f"応答本文を取得できませんでした: {response.get('url')}: {e}")
+                continue
+            raw = base64.b64decode(body["body"]) if body.get("base64Encoded") else body.get("body", "").encode("utf-8")
+            self._add_entry(request, response.get("status", 200), response.get("mimeType", ""), raw)
+            recorded += 1
+        return recorded
+
+    def _add_entry(self, request: Dict, status: int, mime_type: str, raw: bytes, location: str = "") -> None:
+        index = len(self.entries) + 1
+        mime_type = (mime_type or "application/octet-stream").split(";")[0].strip().lower()
+        if raw and mime_type.startswith(_TEXT_MIME_PREFIXES):
+            raw = _rewrite_origin(raw, self.origin)
+        body_file = ""
+        if raw:
+            body_file = f"bodies/{index:04d}{_EXTENSIONS.get(mime_type, '.bin')}"
+            with open(os.path.join(self.output_dir, body_file), "wb") as f:
+                f.write(raw)
+        self.entries.append({
+            "method": request.get("method", "GET"),
+            "path": _path_of(request.get("url", "")),
+            "status": int(status),
+            "content_type": mime_type,
+            "body": body_file,
+            "location": location,
+            "step": self.step,
+        })
+
+    def save(self) -> str:
+        """記録の一覧（manifest.json）を保存してパスを返す"""
+        manifest = {
+            "site": self.site,
+            "start_path": _path_of(self.start_url),
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "case": self.case,
+            "entries": self.entries,
+        }
+        path = os.path.join(self.output_dir, MANIFEST_NAME)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        logging.info(f"再生用の記録を保存しました: {path}（応答 {len(self.entries)}件）")
+        return path
+
+
+def load_manifest(recording_dir: str) -> Dict:
+    """記録ディレクトリの manifest.json を読み込む"""
+    with open(os.path.join(recording_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class ReplayServer:
+    """記録した応答を返すローカルHTTPサーバー"""
+
+    def __init__(self, recording_dir: str, latency_ms: float = 0, jitter_ms: float = 0,
+                 step_latency_ms: Optional[Dict[str, float]] = None, seed: int = 0):
+        """
+        再生サーバーの初期化
+
+        Args:
+            recording_dir (str): 記録ディレクトリ
+            latency_ms (float): すべての応答に加える遅延（ミリ秒）
+            jitter_ms (float): 遅延に加える 0〜jitter_ms のゆらぎ
+            step_latency_ms (dict): 工程ごとに追加する遅延（例: {"result_detection": 500}）
+            seed (int): ゆらぎの乱数シード（再現性のため）
+        """
+        self.recording_dir = recording_dir
+        self.manifest = load_manifest(recording_dir)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.step_latency_ms = dict(step_latency_ms or {})
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._routes: Dict[tuple, List[Dict]] = defaultdict(list)
+        for entry in self.manifest["entries"]:
+            self._routes[(entry["method"], entry["path"])].append(entry)
+            if "?" in entry["path"]:
+                # クエリ（キャッシュ回避用のタイムスタンプ等）が異なる場合はパスだけで引く
+                self._routes[(entry["method"], entry["path"].split("?")[0])].append(entry)
+        self._served: Dict[tuple, int] = defaultdict(int)
+        self.requests_served = 0
+        self.misses: List[str] = []
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def start_url(self) -> str:
+        return self.base_url + self.manifest["start_path"]
+
+    def reset(self) -> None:
+        """応答の順番と集計を最初に戻す（繰り返し実行の前に呼ぶ）"""
+        with self._lock:
+            self._served.clear()
+            self.requests_served = 0
+            self.misses = []
+
+    def resolve(self, method: str, path: str) -> Optional[Dict]:
+        """
+        リクエストに対して返す記録を選ぶ
+
+        Returns:
+            dict: 記録（見つからない場合はNone）
+        """
+        with self._lock:
+            for key in ((method, path), (method, path.split("?")[0])):
+                entries = self._routes.get(key)
+                if entries:
+                    index = self._served[key]
+                    self._served[key] += 1
+                    self.requests_served += 1
+                    return entries[min(index, len(entries) - 1)]
+            self.misses.append(f"{method} {path}")
+            return None
+
+    def delay_for(self, entry: Dict) -> float:
+        """応答までの遅延（秒）"""
+        with self._lock:
+            jitter = self._random.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0
+        return (self.latency_ms + jitter + self.step_latency_ms.get(entry.get("step"), 0)) / 1000
+
+    def _make_handler(self):
+        server = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _serve(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                entry = server.resolve(self.command, self.path)
+                if entry is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                time.sleep(server.delay_for(entry))
+                body = b""
+                if entry.get("body"):
+                    with open(os.path.join(server.recording_dir, entry["body"]), "rb") as f:
+                        body = f.read()
+                self.send_response(entry.get("status", 200))
+                if entry.get("content_type"):
+                    self.send_header("Content-Type", entry["content_type"])
+                if entry.get("location"):
+                    self.send_header("Location", entry["location"])
+                self.send_header("Cache-Control", "no-store")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            do_GET = do_POST = do_HEAD = _serve
+
+            def log_message(self, format, *args):
+                logging.debug(f"再生サーバー: {format % args}")
+
+        return _Handler
+
+    def start(self) -> str:
+        """
+        サーバーを起動する（空いているポートを使用）
+
+        Returns:
+            str: 開始URL
+        """
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="ReplayServer", daemon=True)
+        self._thread.start()
+        logging.info(f"再生サーバーを起動しました: {self.start_url}（遅延 {self.latency_ms}ms）")
+        return self.start_url
+
+    def stop(self) -> None:
+        """サーバーを停止する"""
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class CommandCounter:
+    """WebDriverコマンド数の計測とChromeのプロセスの追跡"""
+
+    def __init__(self):
+        self.count = 0
+        self.pids = set()
+        self._lock = threading.Lock()
+        self._original = None
+
+    def install(self) -> None:
+        """WebDriver.execute を計測用に差し替える"""
+        from selenium.webdriver.remote.webdriver import WebDriver
+
+        counter = self
+        original = WebDriver.execute
+        self._original = original
+
+        def _counting_execute(driver, driver_command, params=None):
+            with counter._lock:
+                counter.count += 1
+                # 共有の chromedriver に接続したセッションはブラウザのプロセスツリーだけを数える
+                browser_pid = getattr(driver, "browser_pid", None)
+                process = getattr(getattr(driver, "service", None), "process", None)
+                if browser_pid:
+                    counter.pids.add(browser_pid)
+                elif process is not None:
+                    counter.pids.add(process.pid)
+            return original(driver, driver_command, params)
+
+        WebDriver.execute = _counting_execute
+
+    def uninstall(self) -> None:
+        """WebDriver.execute を元に戻す"""
+        if self._original is not None:
+            from selenium.webdriver.remote.webdriver import WebDriver
+            WebDriver.execute = self._original
+            self._original = None
+
+    def reset(self) -> None:
+        with self._lock:
+            self.count = 0
+
+
+def process_tree_rss(pid: int) -> int:
+    """
+    プロセスと子孫プロセスの常駐メモリ（バイト）の合計を返す
+
+    Args:
+        pid (int): 親プロセス（chromedriver）のPID
+    """
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            processes = [root] + root.children(recursive=True)
+            return sum(p.memory_info().rss for p in processes if p.is_running())
+        except psutil.Error:
+            return 0
+
+    # psutil がない場合は /proc を参照する（Linux）
+    children = defaultdict(list)
+    rss_pages = {}
+    for name in os.listdir("/proc") if os.path.isdir("/proc") else []:
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", "r") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            children[int(fields[1])].append(int(name))
+            rss_pages[int(name)] = int(fields[21])
+        except (OSError, IndexError, ValueError):
+            continue
+    total, stack = 0, [pid]
+    while stack:
+        current = stack.pop()
+        total += rss_pages.get(current, 0)
+        stack.extend(children.get(current, []))
+    return total * os.sysconf("SC_PAGE_SIZE")
+
+
+class MemorySampler:
+    """ベンチマーク中のChromeのピークメモリの計測"""
+
+    def __init__(self, counter: CommandCounter, interval: float = 0.1):
+        self.counter = counter
+        self.interval = interval
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            total = sum(process_tree_rss(pid) for pid in list(self.counter.pids))
+            self.peak_bytes = max(self.peak_bytes, total)
+
+    def start(self) -> None:
+        self.peak_bytes = 0
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="MemorySampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> int:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.peak_bytes
+
+
+def _run_flow(site: str, postal_code: str, address: str) -> Dict:
+    """サイトの Selenium フローを直接実行する（キャッシュ・振り分けを通さない）"""
+    if site == "east":
+        from services.area_search_east import search_service_area as search_east
+        return search_east(postal_code, address)
+    from services.area_search import search_service_area_west
+    return search_service_area_west(postal_code, address, engine="selenium")
+
+
+def _close_flow_driver(site: str) -> None:
+    if site == "east":
+        from services.area_search_east import close_global_driver
+    else:
+        from services.area_search import close_global_driver
+    close_global_driver()
+
+
+def record_case(site: str, postal_code: str, address: str, output_dir: str, headless: bool = True) -> Dict:
+    """
+    本番サイトで1件の検索を実行し、再生用に記録する
+
+    Args:
+        site (str): サイト識別子（west/east）
+        postal_code (str): 郵便番号
+        address (str): 住所
+        output_dir (str): 記録の保存先ディレクトリ
+        headless (bool): ヘッドレスで実行するかどうか
+
+    Returns:
+        dict: 検索結果
+    """
+    from services.area_search import get_browser_settings_override, set_browser_settings_override
+
+    previous_override = get_browser_settings_override()
+    set_browser_settings_override({"headless": headless, "show_popup": False, "auto_close": True})
+    _harness_state.update({
+        "recording_dir": output_dir,
+        "case": {"site": site, "postal_code": postal_code, "address": address},
+    })
+    start_trace(site)
+    result = {}
+    try:
+        result = _run_flow(site, postal_code, address)
+        _harness_state["case"]["expected_status"] = result.get("status")
+    finally:
+        finish_trace(result.get("status"), persist=False)
+        _harness_state.update({"recording_dir": None, "case": None})
+        set_browser_settings_override(previous_override)
+        _close_flow_driver(site)
+    return result
+
+
+def run_benchmark(recording_dirs: List[str], iterations: int = 3, latency_ms: float = 0,
+                  jitter_ms: float = 0, headless: bool = True) -> List[Dict]:
+    """
+    記録を再生しながら Selenium のフローを繰り返し実行し、所要時間などを集計する
+
+    Args:
+        recording_dirs (list): 記録ディレクトリ
+        iterations (int): 1記録あたりの実行回数
+        latency_ms (float): 再生サーバーの遅延（ミリ秒）
+        jitter_ms (float): 遅延のゆらぎ（ミリ秒）
+        headless (bool): ヘッドレスで実行するかどうか
+
+    Returns:
+        list: 記録ごとの wall_sec（p50/平均/最大）・WebDriverコマンド数・ピークメモリ・工程別時間・判定一致数
+    """
+    from services.area_search import get_browser_settings_override, set_browser_settings_override
+    from utils.stats_utils import percentile
+
+    previous_override = get_browser_settings_override()
+    set_browser_settings_override({"headless": headless, "show_popup": False, "auto_close": True})
+    _harness_state["offline"] = True
+    counter = CommandCounter()
+    counter.install()
+    reports = []
+    try:
+        for recording_dir in recording_dirs:
+            server = ReplayServer(recording_dir, latency_ms=latency_ms, jitter_ms=jitter_ms)
+            case = server.manifest["case"]
+            site = server.manifest["site"]
+            set_site_url_override(site, server.start())
+            runs = []
+            try:
+                for _ in range(iterations):
+                    server.reset()
+                    counter.reset()
+                    sampler = MemorySampler(counter)
+                    sampler.start()
+                    start_trace(site)
+                    started = time.perf_counter()
+                    status = None
+                    try:
+                        status = _run_flow(site, case["postal_code"], case["address"]).get("status")
+                    finally:
+                        wall = time.perf_counter() - started
+                        trace = finish_trace(status, persist=False)
+                        peak = sampler.stop()
+                        _close_flow_driver(site)
+                        counter.pids.clear()
+                    runs.append({
+                        "wall_sec": wall, "commands": counter.count, "peak_bytes": peak,
+                        "status": status, "spans": trace["spans"], "misses": len(server.misses),
+                    })
+            finally:
+                server.stop()
+                set_site_url_override(site, None)
+
+            step_times = defaultdict(list)
+            for run in runs:
+                for span in run["spans"]:
+                    step_times[span["step"]].append(span["duration_ms"])
+            walls = [run["wall_sec"] for run in runs]
+            reports.append({
+                "recording": recording_dir,
+                "site": site,
+                "iterations": len(runs),
+                "wall_p50_sec": round(percentile(walls, 0.5), 3),
+                "wall_mean_sec": round(sum(walls) / len(walls), 3) if walls else 0.0,
+                "wall_max_sec": round(max(walls), 3) if walls else 0.0,
+                "commands_mean": round(sum(run["commands"] for run in runs) / len(runs), 1) if runs else 0.0,
+                "peak_memory_mb": round(max((run["peak_bytes"] for run in runs), default=0) / 1024 / 1024, 1),
+                "status_matched": sum(1 for run in runs if run["status"] == case.get("expected_status")),
+                "replay_misses": max((run["misses"] for run in runs), default=0),
+                "step_p50_ms": {step: round(percentile(values, 0.5), 1) for step, values in step_times.items()},
+            })
+    finally:
+        counter.uninstall()
+        _harness_state["offline"] = False
+        set_browser_settings_override(previous_override)
+    return reports
+
+
+def run_cancel_benchmark(recording_dirs: List[str], iterations: int = 3, cancel_step: str = "postal_input",
+                         latency_ms: float = 0, jitter_ms: float = 0, headless: bool = True) -> List[Dict]:
+    """
+    記録を再生しながらフローを実行し、指定した工程に入った時点でキャンセルして
+    キャンセルから処理終了までの時間を計測する
+
+    Args:
+        recording_dirs (list): 記録ディレクトリ
+        iterations (int): 1記録あたりの実行回数
+        cancel_step (str): キャンセルする工程名（search_trace.STEP_LABELS のキー）
+        latency_ms (float): 再生サーバーの遅延（ミリ秒）
+        jitter_ms (float): 遅延のゆらぎ（ミリ秒）
+        headless (bool): ヘッドレスで実行するかどうか
+
+    Returns:
+        list: 記録ごとのキャンセルから処理終了までの時間（p50/最大）・キャンセル後に残ったChromeのメモリ
+    """
+    from services.area_search import get_browser_settings_override, set_browser_settings_override
+    from services.cancellation import CancelToken, CancellationError, use_token
+    from utils.stats_utils import percentile
+
+    previous_override = get_browser_settings_override()
+    set_browser_settings_override({"headless": headless, "show_popup": False, "auto_close": True})
+    _harness_state["offline"] = True
+    counter = CommandCounter()
+    counter.install()
+    reports = []
+    try:
+        for recording_dir in recording_dirs:
+            server = ReplayServer(recording_dir, latency_ms=latency_ms, jitter_ms=jitter_ms)
+            case = server.manifest["case"]
+            site = server.manifest["site"]
+            set_site_url_override(site, server.start())
+            runs = []
+            try:
+                for _ in range(iterations):
+                    server.reset()
+                    token = CancelToken()
+                    reached = threading.Event()
+                    outcome: Dict = {}
+
+                    def _flow():
+                        trace = start_trace(site)
+                        trace.add_listener(lambda event, step: reached.set() if step == cancel_step else None)
+                        try:
+                            with use_token(token):
+                                outcome["status"] = _run_flow(site, case["postal_code"], case["address"]).get("status")
+                        except CancellationError:
+                            outcome["status"] = "cancelled"
+                        except Exception as e:
+                            outcome["status"] = f"error: {e}"
+                        finally:
+                            finish_trace(outcome.get("status"), persist=False)
+                            outcome["idle_ms"] = token.mark_idle()
+
+                    thread = threading.Thread(target=_flow, name="CancelBenchmark", daemon=True)
+                    thread.start()
+                    reached.wait(60)
+                    token.cancel(f"ベンチマーク（{cancel_step}）")
+                    thread.join(30)
+                    # 強制終了したプロセスがなくなるまで少し待ってから残存を確認する
+                    time.sleep(0.5)
+                    leftover = sum(process_tree_rss(pid) for pid in list(counter.pids))
+                    _close_flow_driver(site)
+                    counter.pids.clear()
+                    runs.append({
+                        "reached": reached.is_set(), "status": outcome.get("status"),
+                        "idle_ms": outcome.get("idle_ms"), "leftover_bytes": leftover,
+                    })
+            finally:
+                server.stop()
+                set_site_url_override(site, None)
+
+            latencies = [run["idle_ms"] for run in runs if run["idle_ms"] is not None]
+            reports.append({
+                "recording": recording_dir,
+                "site": site,
+                "cancel_step": cancel_step,
+                "iterations": len(runs),
+                "reached": sum(1 for run in runs if run["reached"]),
+                "cancelled": sum(1 for run in runs if run["status"] == "cancelled"),
+                "cancel_to_idle_p50_ms": round(percentile(latencies, 0.5), 1),
+                "cancel_to_idle_max_ms": round(max(latencies), 1) if latencies else 0.0,
+                "leftover_memory_mb": round(max((run["leftover_bytes"] for run in runs), default=0) / 1024 / 1024, 1),
+            })
+    finally:
+        counter.uninstall()
+        _harness_state["offline"] = False
+        set_browser_settings_override(previous_override)
+    return reports
+
+
+def main(argv=None) -> int:
+    """コマンドラインから記録・再生・ベンチマークを実行する"""
+    parser = argparse.ArgumentParser(description="提供判定フローの記録・オフライン再生・ベンチマーク")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    record_parser = subparsers.add_parser("record", help="本番サイトで1件検索して記録します")
+    record_parser.add_argument("--site", choices=["west", "east"], required=True)
+    record_parser.add_argument("--postal", required=True, help="郵便番号")
+    record_parser.add_argument("--address", required=True, help="住所")
+    record_parser.add_argument("-o", "--output", required=True, help="記録の保存先ディレクトリ")
+    record_parser.add_argument("--show-browser", action="store_true", help="ブラウザを表示して実行する")
+    serve_parser = subparsers.add_parser("serve", help="記録を再生するサーバーを起動します")
+    serve_parser.add_argument("recording", help="記録ディレクトリ")
+    serve_parser.add_argument("--latency-ms", type=float, default=0)
+    serve_parser.add_argument("--jitter-ms", type=float, default=0)
+    bench_parser = subparsers.add_parser("bench", help="記録を再生しながらフローを繰り返し実行します")
+    bench_parser.add_argument("recordings", nargs="+", help="記録ディレクトリ")
+    bench_parser.add_argument("--iterations", type=int, default=3)
+    bench_parser.add_argument("--latency-ms", type=float, default=0)
+    bench_parser.add_argument("--jitter-ms", type=float, default=0)
+    bench_parser.add_argument("--show-browser", action="store_true", help="ブラウザを表示して実行する")
+    bench_parser.add_argument("--json", action="store_true", help="JSONで出力する")
+    cancel_parser = subparsers.add_parser("cancel-bench", help="記録を再生しながら途中でキャンセルし、終了までの時間を計測します")
+    cancel_parser.add_argument("recordings", nargs="+", help="記録ディレクトリ")
+    cancel_parser.add_argument("--iterations", type=int, default=3)
+    cancel_parser.add_argument("--cancel-step", default="postal_input", help="キャンセルする工程名")
+    cancel_parser.add_argument("--latency-ms", type=float, default=0)
+    cancel_parser.add_argument("--jitter-ms", type=float, default=0)
+    cancel_parser.add_argument("--show-browser", action="store_true", help="ブラウザを表示して実行する")
+    cancel_parser.add_argument("--json", action="store_true", help="JSONで出力する")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.command == "record":
+        result = record_case(args.site, args.postal, args.address, args.output, headless=not args.show_browser)
+        print(f"記録しました: {args.output}（判定結果: {result.get('status')}）")
+        return 0
+
+    if args.command == "serve":
+        server = ReplayServer(args.recording, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms)
+        site = server.manifest["site"]
+        print(f"再生サーバー: {server.start()}")
+        print(f"アプリから使う場合は環境変数 TELEPHONETOOL_{site.upper()}_URL にこのURLを設定してください（Ctrl+Cで終了）")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.stop()
+        return 0
+
+    if args.command == "cancel-bench":
+        reports = run_cancel_benchmark(args.recordings, args.iterations, args.cancel_step, args.latency_ms,
+                                       args.jitter_ms, headless=not args.show_browser)
+        if args.json:
+            print(json.dumps(reports, ensure_ascii=False, indent=2))
+            return 0
+        for report in reports:
+            print(f"=== {report['recording']}（{report['site']}、{report['cancel_step']}でキャンセル） ===")
+            print(f"実行回数: {report['iterations']}（工程に到達: {report['reached']}、キャンセル完了: {report['cancelled']}）")
+            print(f"キャンセルから処理終了まで: p50={report['cancel_to_idle_p50_ms']}ms / 最大={report['cancel_to_idle_max_ms']}ms")
+            print(f"キャンセル後に残ったChromeのメモリ: {report['leftover_memory_mb']}MB")
+        return 0
+
+    reports = run_benchmark(args.recordings, args.iterations, args.latency_ms, args.jitter_ms,
+                            headless=not args.show_browser)
+    if args.json:
+        print(json.dumps(reports, ensure_ascii=False, indent=2))
+        return 0
+    for report in reports:
+        print(f"=== {report['recording']}（{report['site']}） ===")
+        print(f"実行回数: {report['iterations']}（判定一致: {report['status_matched']}、再生できなかった要求: {report['replay_misses']}）")
+        print(f"経過時間: p50={report['wall_p50_sec']}秒 / 平均={report['wall_mean_sec']}秒 / 最大={report['wall_max_sec']}秒")
+        print(f"WebDriverコマンド数: 平均 {report['commands_mean']}")
+        print(f"Chromeピークメモリ: {report['peak_memory_mb']}MB")
+        print("工程別p50: " + ", ".join(f"{step}={ms}ms" for step, ms in report["step_p50_ms"].items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,323 @@
+"""
+自動操作用ブラウザの通信遮断プロファイル
+
+このモジュールは、提供判定（西日本・東日本）とMapFanの自動操作で起動するChromeについて、
+判定に関係しないアクセス解析タグ・広告・Webフォント・画像などの読み込みを
+CDP の Network.setBlockedURLs でサイトごとに遮断し、検索ごとに遮断件数と
+削減できた通信量（推定）をログに出力する機能を提供します。
+
+主な機能：
+- サイトごとの遮断プロファイル（analytics / ads / fonts / images / media の分類）
+- 分類ごとの許可リスト（西日本の判定結果画像など、遮断してはいけないURL）
+- パフォーマンスログからの遮断件数・読み込み量の集計と推定削減量のログ出力
+- settings.json の request_blocking による有効/無効とプロファイルの上書き
+
+制限事項：
+- 許可リストは Chrome の Network.setBlockedURLs の urlPatterns に対応している場合のみ使えます。
+  非対応の Chrome では、許可リストのある分類は遮断しません（判定に必要な画像を確実に読み込むため）
+- 削減量は遮断した種類ごとに、同じ検索で読み込んだ同種の平均サイズ（なければ既定値）から推定します
+- 再生用の記録中（replay_harness）はパフォーマンスログを記録側に任せ、集計しません
+
+使用例：
+    apply_blocking_options(options)
+    driver = webdriver.Chrome(options=options)
+    apply_blocking_profile(driver, "west", allow={"images": ["img_available"]})
+    ...
+    log_blocking_stats(driver)
+"""
+
+import os
+import json
+import logging
+import weakref
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+# 遮断する分類（ホストはサブドメインを含めて遮断、拡張子はパスの末尾で判定）
+BLOCK_CATEGORIES = {
+    "analytics": {
+        "hosts": [
+            "google-analytics.com", "googletagmanager.com", "analytics.google.com", "clarity.ms",
+            "hotjar.com", "mouseflow.com", "ptengine.jp", "nakanohito.jp", "adobedtm.com",
+            "omtrdc.net", "demdex.net", "yjtag.jp", "treasuredata.com", "bat.bing.com",
+        ],
+        "extensions": [],
+    },
+    "ads": {
+        "hosts": [
+            "doubleclick.net", "googlesyndication.com", "googleadservices.com", "adservice.google.com",
+            "facebook.net", "ads-twitter.com", "criteo.com", "criteo.net", "adnxs.com",
+            "rubiconproject.com", "taboola.com", "outbrain.com", "microad.jp", "i-mobile.co.jp",
+            "logly.co.jp", "ladsp.com",
+        ],
+        "extensions": [],
+    },
+    "fonts": {
+        "hosts": ["fonts.googleapis.com", "fonts.gstatic.com", "use.typekit.net"],
+        "extensions": ["woff", "woff2", "ttf", "otf", "eot"],
+    },
+    "images": {
+        "hosts": [],
+        "extensions": ["png", "jpg", "jpeg", "gif", "webp", "svg", "ico", "bmp"],
+    },
+    "media": {
+        "hosts": [],
+        "extensions": ["mp4", "webm", "ogg", "mp3", "m4a"],
+    },
+}
+
+DEFAULT_BLOCKING_PROFILES = {
+    "west": {"categories": ["analytics", "ads", "fonts", "images", "media"], "allow": {}},
+    "east": {"categories": ["analytics", "ads", "fonts", "images", "media"], "allow": {}},
+    # 地図の操作ボタンがアイコンフォントの場合があるため、MapFanはフォントを遮断しない
+    "mapfan": {"categories": ["analytics", "ads"], "allow": {}},
+}
+
+DEFAULT_BLOCKING_SETTINGS = {
+    "enabled": True,
+    "count_requests": True,
+    "profiles": {},
+}
+
+# 削減量の推定に使う種類ごとの既定サイズ（バイト）
+DEFAULT_RESOURCE_BYTES = {
+    "Image": 20 * 1024,
+    "Font": 40 * 1024,
+    "Script": 30 * 1024,
+    "Stylesheet": 15 * 1024,
+    "Media": 200 * 1024,
+    "XHR": 2 * 1024,
+    "Fetch": 2 * 1024,
+    "Ping": 512,
+    "Other": 5 * 1024,
+}
+
+# 遮断を適用したドライバーとプロファイル（ドライバーの終了とともに消える）
+_applied_profiles = weakref.WeakKeyDictionary()
+
+
+def _load_blocking_settings(path="settings.json"):
+    """
+    settings.json から request_blocking 設定を読み込み、既定値で補完して返す。
+    """
+    settings = dict(DEFAULT_BLOCKING_SETTINGS)
+    try:
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                cfg = json.load(f)
+                settings.update(cfg.get("request_blocking", {}) or {})
+    except Exception as e:
+        logging.warning(f"通信遮断の設定の読み込みに失敗しました: {e}")
+    return settings
+
+
+def get_blocking_profile(site: str, settings: Optional[Dict] = None) -> Dict:
+    """
+    サイトの遮断プロファイルを返す（settings.json の request_blocking.profiles で上書き可能）
+
+    Args:
+        site (str): サイト識別子（west/east/mapfan）
+        settings (dict): request_blocking 設定（省略時は settings.json から読み込む）
+
+    Returns:
+        dict: categories（分類名のリスト）・allow（分類ごとの許可するURLの部分文字列）・
+              hosts / extensions（分類以外に遮断するホスト・拡張子）
+    """
+    if settings is None:
+        settings = _load_blocking_settings()
+    profile = {"categories": [], "allow": {}, "hosts": [], "extensions": []}
+    profile.update(DEFAULT_BLOCKING_PROFILES.get(site, {}))
+    profile.update((settings.get("profiles") or {}).get(site, {}) or {})
+    profile["allow"] = {category: list(tokens) for category, tokens in (profile.get("allow") or {}).items()}
+    return profile
+
+
+def _host_patterns(host: str) -> List[str]:
+    return [f"*://{host}:*/*", f"*://*.{host}:*/*"]
+
+
+def _legacy_host_patterns(host: str) -> List[str]:
+    return [f"*://{host}/*", f"*://*.{host}/*"]
+
+
+def build_block_rules(profile: Dict, allow: Optional[Dict[str, Iterable[str]]] = None) -> Dict:
+    """
+    プロファイルから Network.setBlockedURLs のパターンを組み立てる
+
+    Args:
+        profile (dict): get_blocking_profile の戻り値
+        allow (dict): 呼び出し側で追加する許可リスト（分類名 → URLの部分文字列）
+
+    Returns:
+        dict: url_patterns（許可を先頭にした urlPatterns）・legacy_urls（従来の urls）・
+              legacy_skipped（許可リストがあるため従来の urls では遮断しない分類）
+    """
+    allow_by_category = defaultdict(list)
+    for source in (profile.get("allow") or {}, allow or {}):
+        for category, tokens in source.items():
+            allow_by_category[category].extend(token for token in tokens if token)
+
+    url_patterns, legacy_urls, legacy_skipped = [], [], []
+    for category in profile.get("categories", []):
+        for token in allow_by_category.get(category, []):
+            url_patterns.append({"urlPattern": f"*://*:*/*{token}*", "block": False})
+
+    groups = [(category, BLOCK_CATEGORIES.get(category, {})) for category in profile.get("categories", [])]
+    groups.append(("custom", {"hosts": profile.get("hosts", []), "extensions": profile.get("extensions", [])}))
+    for category, group in groups:
+        patterns, legacy = [], []
+        for host in group.get("hosts", []):
+            patterns.extend(_host_patterns(host))
+            legacy.extend(_legacy_host_patterns(host))
+        for extension in group.get("extensions", []):
+            patterns.append(f"*://*:*/*.{extension}")
+            legacy.extend([f"*.{extension}", f"*.{extension}?*"])
+        url_patterns.extend({"urlPattern": pattern, "block": True} for pattern in patterns)
+        if allow_by_category.get(category):
+            legacy_skipped.append(category)
+        else:
+            legacy_urls.extend(legacy)
+    return {"url_patterns": url_patterns, "legacy_urls": legacy_urls, "legacy_skipped": legacy_skipped}
+
+
+def _is_recording() -> bool:
+    from services.replay_harness import _harness_state
+
+    return bool(_harness_state["recording_dir"])
+
+
+def apply_blocking_options(options) -> None:
+    """
+    遮断件数の集計用にパフォーマンスログ（Networkのみ）を有効にする（各 create_driver から呼ぶ）
+
+    Args:
+        options: ChromeOptions
+    """
+    settings = _load_blocking_settings()
+    if not settings.get("enabled", True) or not settings.get("count_requests", True) or _is_recording():
+        return
+    logging_prefs = dict(options.capabilities.get("goog:loggingPrefs") or {})
+    logging_prefs["performance"] = "ALL"
+    options.set_capability("goog:loggingPrefs", logging_prefs)
+    options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+
+
+def apply_blocking_profile(driver, site: str, allow: Optional[Dict[str, Iterable[str]]] = None) -> Optional[str]:
+    """
+    起動したドライバーにサイトの遮断プロファイルを適用する
+
+    Args:
+        driver: WebDriverインスタンス
+        site (str): サイト識別子（west/east/mapfan）
+        allow (dict): 追加の許可リスト（分類名 → URLの部分文字列）
+
+    Returns:
+        str: 適用方式（urlPatterns / urls）。無効・失敗時はNone
+    """
+    settings = _load_blocking_settings()
+    if not settings.get("enabled", True):
+        return None
+    rules = build_block_rules(get_blocking_profile(site, settings), allow)
+    if not rules["url_patterns"]:
+        return None
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        try:
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urlPatterns": rules["url_patterns"]})
+            mode = "urlPatterns"
+        except Exception:
+            # urlPatterns に対応していない Chrome では urls が必須のため失敗する
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": rules["legacy_urls"]})
+            mode = "urls"
+            if rules["legacy_skipped"]:
+                logging.info(
+                    f"[{site}] Chromeが許可リストに対応していないため、次の分類は遮断しません: "
+                    f"{', '.join(rules['legacy_skipped'])}"
+                )
+    except Exception as e:
+        logging.warning(f"[{site}] 通信遮断の設定に失敗しました: {e}")
+        return None
+
+    _applied_profiles[driver] = {"site": site, "mode": mode, "count": bool(settings.get("count_requests", True))}
+    logging.info(f"[{site}] 通信遮断を設定しました（{mode}、{len(rules['url_patterns'])}パターン）")
+    return mode
+
+
+def summarize_network_log(entries: Iterable[Dict]) -> Dict:
+    """
+    パフォーマンスログから遮断件数・読み込み量・推定削減量を集計する
+
+    Args:
+        entries (list): driver.get_log("performance") の戻り値
+
+    Returns:
+        dict: blocked・blocked_by_type・loaded・loaded_bytes・saved_bytes（推定）
+    """
+    types, blocked_by_type = {}, defaultdict(int)
+    loaded_bytes_by_type, loaded_count_by_type = defaultdict(int), defaultdict(int)
+    loaded = loaded_bytes = 0
+    for entry in entries:
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, TypeError, ValueError):
+            continue
+        method = message.get("method")
+        params = message.get("params", {})
+        request_id = params.get("requestId")
+        if method == "Network.requestWillBeSent":
+            types[request_id] = params.get("type") or "Other"
+        elif method == "Network.loadingFinished":
+            size = int(params.get("encodedDataLength") or 0)
+            resource_type = types.get(request_id, "Other")
+            loaded += 1
+            loaded_bytes += size
+            loaded_bytes_by_type[resource_type] += size
+            loaded_count_by_type[resource_type] += 1
+        elif method == "Network.loadingFailed" and params.get("blockedReason") == "inspector":
+            blocked_by_type[params.get("type") or types.get(request_id, "Other")] += 1
+
+    saved_bytes = 0
+    for resource_type, count in blocked_by_type.items():
+        if loaded_count_by_type.get(resource_type):
+            average = loaded_bytes_by_type[resource_type] / loaded_count_by_type[resource_type]
+        else:
+            average = DEFAULT_RESOURCE_BYTES.get(resource_type, DEFAULT_RESOURCE_BYTES["Other"])
+        saved_bytes += int(average * count)
+    return {
+        "blocked": sum(blocked_by_type.values()),
+        "blocked_by_type": dict(blocked_by_type),
+        "loaded": loaded,
+        "loaded_bytes": loaded_bytes,
+        "saved_bytes": saved_bytes,
+    }
+
+
+def log_blocking_stats(driver) -> Optional[Dict]:
+    """
+    前回の集計以降の遮断件数と推定削減量をログに出力する（検索の終わりに呼ぶ）
+
+    Args:
+        driver: apply_blocking_profile を適用したドライバー
+
+    Returns:
+        dict: summarize_network_log の集計（集計しない場合はNone）
+    """
+    from services.cancellation import current_token
+
+    state = _applied_profiles.get(driver) if driver is not None else None
+    if not state or not state["count"] or _is_recording():
+        return None
+    token = current_token()
+    if token is not None and token.is_cancelled:
+        return None
+    try:
+        stats = summarize_network_log(driver.get_log("performance"))
+    except Exception as e:
+        logging.debug(f"通信ログを取得できませんでした: {e}")
+        return None
+    by_type = ", ".join(f"{resource_type}={count}" for resource_type, count in sorted(stats["blocked_by_type"].items()))
+    logging.info(
+        f"[{state['site']}] 通信遮断: {stats['blocked']}件（推定 {stats['saved_bytes'] / 1024:.0f}KB 削減"
+        f"{'、' + by_type if by_type else ''}）／読み込み {stats['loaded']}件・{stats['loaded_bytes'] / 1024:.0f}KB"
+    )
+    return stats
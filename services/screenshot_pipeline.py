@@ -0,0 +1,369 @@
+"""
+提供判定スクリーンショットの非同期書き込み
+
+このモジュールは、ブラウザから取得した画像データ（PNG）の
+圧縮・ファイル書き込みをバックグラウンドのスレッドで行い、
+検索結果を画像の保存完了を待たずに返せるようにする機能を提供します。
+
+主な機能：
+- 画像データの受け取りと保存先パスの即時返却（書き込みはバックグラウンド）
+- PNG / WebP / JPEG での保存とファイルサイズの上限（画質・解像度を段階的に下げる）
+- 保存完了時のコールバック通知・完了待ち
+- 作業ディレクトリに溜まる debug_*.png 等の保持期間・件数による削除
+
+制限事項：
+- 設定は settings.json の screenshot_pipeline で変更できます（既定はPNG・上限なし）
+- WebP / JPEG への変換と上限の適用には Pillow が必要です（ない場合はPNGのまま保存）
+- アプリ終了時は書き込み待ちの画像を最大数秒まで保存してから終了します
+"""
+
+import os
+import io
+import glob
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+
+from services.search_trace import trace_span
+
+DEFAULT_PIPELINE_SETTINGS = {
+    "format": "png",
+    "quality": 80,
+    "max_bytes": 0,
+    "retention_days": 7,
+    "max_files": 200,
+    "cleanup_interval_seconds": 600,
+}
+
+FORMAT_EXTENSIONS = {"png": ".png", "webp": ".webp", "jpeg": ".jpg", "jpg": ".jpg"}
+DEBUG_SCREENSHOT_PATTERNS = ("debug_*.png", "debug_*.webp", "debug_*.jpg")
+
+
+def _load_pipeline_settings(path="settings.json"):
+    """
+    settings.json から screenshot_pipeline 設定を読み込み、既定値で補完して返す。
+    """
+    settings = dict(DEFAULT_PIPELINE_SETTINGS)
+    try:
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                cfg = json.load(f)
+                settings.update(cfg.get("screenshot_pipeline", {}) or {})
+    except Exception as e:
+        logging.warning(f"スクリーンショット設定の読み込みに失敗しました: {e}")
+    return settings
+
+
+def encode_image(raw_png: bytes, image_format: str = "png", quality: int = 80, max_bytes: int = 0):
+    """
+    PNGの画像データを指定形式に変換し、上限サイズに収める
+
+    Args:
+        raw_png (bytes): ブラウザから取得したPNG
+        image_format (str): 保存形式（png / webp / jpeg）
+        quality (int): WebP / JPEG の初期画質
+        max_bytes (int): ファイルサイズの上限（0は上限なし）
+
+    Returns:
+        tuple: (変換後の画像データ, 実際の形式)。Pillow がない場合は (raw_png, "png")
+    """
+    image_format = (image_format or "png").lower()
+    if image_format == "jpg":
+        image_format = "jpeg"
+    if image_format == "png" and (not max_bytes or len(raw_png) <= max_bytes):
+        return raw_png, "png"
+
+    try:
+        from PIL import Image
+    except ImportError:
+        logging.warning("Pillow がないため、スクリーンショットをPNGのまま保存します")
+        return raw_png, "png"
+
+    image = Image.open(io.BytesIO(raw_png))
+    image.load()
+    if image_format == "jpeg" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    def _encode(target, current_quality):
+        buffer = io.BytesIO()
+        if image_format == "png":
+            target.save(buffer, format="PNG", optimize=True)
+        else:
+            target.save(buffer, format=image_format.upper(), quality=current_quality)
+        return buffer.getvalue()
+
+    current_quality = int(quality)
+    data = _encode(image, current_quality)
+    if not max_bytes:
+        return data, image_format
+
+    # 画質を下げ、それでも収まらなければ解像度を下げる
+    while len(data) > max_bytes and image_format != "png" and current_quality > 40:
+        current_quality -= 15
+        data = _encode(image, current_quality)
+    scaled = image
+    while len(data) > max_bytes and scaled.width > 400:
+        scaled = scaled.resize((int(scaled.width * 0.75), int(scaled.height * 0.75)))
+        data = _encode(scaled, current_quality)
+    return data, image_format
+
+
+def cleanup_debug_screenshots(directory: str = ".", retention_days: float = 7, max_files: int = 200,
+                              patterns=DEBUG_SCREENSHOT_PATTERNS, exclude=()) -> int:
+    """
+    デバッグ用スクリーンショットを保持期間・件数に従って削除する
+
+    Args:
+        directory (str): 対象ディレクトリ
+        retention_days (float): 保持日数（0以下は期間で削除しない）
+        max_files (int): 保持する最大件数（0以下は件数で削除しない）
+        patterns (tuple): 対象ファイルのパターン
+        exclude (iterable): 削除しないファイルの絶対パス
+
+    Returns:
+        int: 削除したファイル数
+    """
+    excluded = {os.path.abspath(path) for path in exclude}
+    files = []
+    for pattern in patterns:
+        for path in glob.glob(os.path.join(directory, pattern)):
+            path = os.path.abspath(path)
+            if path in excluded:
+                continue
+            try:
+                files.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+    files.sort(reverse=True)
+
+    now = time.time()
+    removed = 0
+    for index, (mtime, path) in enumerate(files):
+        expired = retention_days and retention_days > 0 and now - mtime > retention_days * 86400
+        over_limit = max_files and max_files > 0 and index >= max_files
+        if expired or over_limit:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError as e:
+                logging.warning(f"古いスクリーンショットを削除できませんでした: {path}: {e}")
+    if removed:
+        logging.info(f"古いスクリーンショットを {removed} 件削除しました")
+    return removed
+
+
+class _Job:
+    """書き込み待ちのスクリーンショット"""
+
+    def __init__(self, raw_png: bytes, path: str, image_format: str):
+        self.raw_png = raw_png
+        self.path = path
+        self.image_format = image_format
+        self.done = threading.Event()
+        self.ok = False
+        self.callbacks: List[Callable[[Optional[str]], None]] = []
+        self.submitted_at = time.perf_counter()
+
+
+class ScreenshotWriter:
+    """画像の変換・書き込みを行うバックグラウンドスレッド"""
+
+    def __init__(self, settings: Optional[Dict] = None):
+        """
+        書き込みスレッドの初期化（最初の依頼時に起動）
+
+        Args:
+            settings (dict): screenshot_pipeline 設定（省略時は settings.json から読み込む）
+        """
+        self.settings = dict(DEFAULT_PIPELINE_SETTINGS)
+        self.settings.update(settings if settings is not None else _load_pipeline_settings())
+        self._queue: "queue.Queue[Optional[_Job]]" = queue.Queue()
+        self._jobs: Dict[str, _Job] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._last_cleanup = 0.0
+        self.stats = {"written": 0, "failed": 0, "raw_bytes": 0, "written_bytes": 0, "max_latency_ms": 0.0}
+
+    def output_path(self, save_path: str) -> str:
+        """設定の保存形式に合わせた拡張子の絶対パスを返す"""
+        extension = FORMAT_EXTENSIONS.get(str(self.settings.get("format", "png")).lower(), ".png")
+        root, _ = os.path.splitext(os.path.abspath(save_path))
+        return root + extension
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="ScreenshotWriter", daemon=True)
+            self._thread.start()
+
+    def submit(self, raw_png: bytes, save_path: str,
+               callback: Optional[Callable[[Optional[str]], None]] = None) -> str:
+        """
+        画像データの書き込みを依頼する
+
+        Args:
+            raw_png (bytes): PNGの画像データ
+            save_path (str): 保存先（拡張子は設定の形式に置き換える）
+            callback (callable): 保存完了時に呼ぶ関数（引数は保存先、失敗時はNone）
+
+        Returns:
+            str: 保存先の絶対パス（書き込み完了前に返る）
+        """
+        path = self.output_path(save_path)
+        job = _Job(raw_png, path, str(self.settings.get("format", "png")))
+        if callback:
+            job.callbacks.append(callback)
+        with self._lock:
+            self._jobs[path] = job
+            self._ensure_thread()
+        self._queue.put(job)
+        return path
+
+    def is_pending(self, path: str) -> bool:
+        """保存が完了していない画像かどうか"""
+        job = self._jobs.get(os.path.abspath(path))
+        return job is not None and not job.done.is_set()
+
+    def add_done_callback(self, path: str, callback: Callable[[Optional[str]], None]) -> None:
+        """
+        保存完了時に呼ぶ関数を登録する（保存済み・依頼されていない場合はすぐに呼ぶ）
+
+        Args:
+            path (str): submit が返した保存先
+            callback (callable): 保存完了時に呼ぶ関数
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            job = self._jobs.get(path)
+            if job is not None and not job.done.is_set():
+                job.callbacks.append(callback)
+                return
+        ok = job.ok if job is not None else os.path.exists(path)
+        callback(path if ok else None)
+
+    def wait(self, path: str, timeout: Optional[float] = None) -> bool:
+        """
+        画像の保存完了を待つ
+
+        Returns:
+            bool: 保存済みの場合はTrue
+        """
+        job = self._jobs.get(os.path.abspath(path))
+        if job is None:
+            return os.path.exists(path)
+        return job.done.wait(timeout) and job.ok
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """書き込み待ちの画像をすべて保存するまで待つ"""
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if not job.done.is_set()]
+        for job in jobs:
+            if not job.done.wait(max(0.0, deadline - time.monotonic())):
+                return False
+        return True
+
+    def _write(self, job: _Job) -> None:
+        data, actual_format = encode_image(
+            job.raw_png, job.image_format,
+            int(self.settings.get("quality", 80)), int(self.settings.get("max_bytes", 0) or 0)
+        )
+        directory = os.path.dirname(job.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{job.path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, job.path)
+        self.stats["raw_bytes"] += len(job.raw_png)
+        self.stats["written_bytes"] += len(data)
+        if actual_format != job.image_format.lower().replace("jpg", "jpeg"):
+            logging.info(f"スクリーンショットを {actual_format} で保存しました（拡張子は {job.path}）")
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            try:
+                self._write(job)
+                job.ok = True
+                self.stats["written"] += 1
+                latency_ms = (time.perf_counter() - job.submitted_at) * 1000
+                self.stats["max_latency_ms"] = max(self.stats["max_latency_ms"], latency_ms)
+                logging.info(f"スクリーンショットを保存しました: {job.path}（{latency_ms:.0f}ms）")
+            except Exception as e:
+                self.stats["failed"] += 1
+                logging.warning(f"スクリーンショットの保存に失敗しました: {job.path}: {e}")
+            finally:
+                job.raw_png = b""
+                with self._lock:
+                    job.done.set()
+                    callbacks = list(job.callbacks)
+                    # 完了した依頼は状態確認のために最近の分だけ残す
+                    if len(self._jobs) > 100:
+                        for path in [p for p, j in self._jobs.items() if j.done.is_set()][:50]:
+                            self._jobs.pop(path, None)
+                for callback in callbacks:
+                    try:
+                        callback(job.path if job.ok else None)
+                    except Exception as e:
+                        logging.warning(f"スクリーンショット保存通知の処理中にエラー: {e}")
+            self._cleanup_if_due(job.path)
+
+    def _cleanup_if_due(self, latest_path: str) -> None:
+        interval = float(self.settings.get("cleanup_interval_seconds", 600) or 0)
+        now = time.monotonic()
+        if self._last_cleanup and now - self._last_cleanup < interval:
+            return
+        self._last_cleanup = now
+        try:
+            cleanup_debug_screenshots(
+                os.path.dirname(latest_path) or ".",
+                float(self.settings.get("retention_days", 7) or 0),
+                int(self.settings.get("max_files", 200) or 0),
+                exclude=[path for path, job in list(self._jobs.items()) if not job.done.is_set()] + [latest_path],
+            )
+        except Exception as e:
+            logging.warning(f"古いスクリーンショットの削除中にエラー: {e}")
+
+
+_writer: Optional[ScreenshotWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_screenshot_writer() -> ScreenshotWriter:
+    """共有の書き込みスレッドを返す"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = ScreenshotWriter()
+        return _writer
+
+
+@atexit.register
+def _flush_on_exit():
+    if _writer is not None:
+        _writer.flush(timeout=5.0)
+
+
+def save_viewport_screenshot(driver, save_path: str) -> str:
+    """
+    表示中の画面を取得し、保存をバックグラウンドに任せる（driver.save_screenshot の代替）
+
+    Args:
+        driver: WebDriverインスタンス
+        save_path (str): 保存先
+
+    Returns:
+        str: 保存先の絶対パス（保存完了前に返る）
+    """
+    try:
+        with trace_span("screenshot"):
+            return get_screenshot_writer().submit(driver.get_screenshot_as_png(), save_path)
+    except Exception as e:
+        logging.warning(f"スクリーンショットの取得に失敗しました: {e}")
+        return os.path.abspath(save_path)
@@ -0,0 +1,277 @@
+"""
+同じ住所の提供判定の同時実行の集約
+
+このモジュールは、CTIの自動検索・検索ボタン・かんたんモードの検索ダイアログなどから
+ほぼ同時に同じ顧客の提供判定が要求された場合に、ブラウザを起動する検索を1件だけ実行し、
+後から来た要求を実行中の検索に合流させて結果と進捗を共有する機能を提供します。
+
+主な機能：
+- 郵便番号・住所の正規化キー（キャッシュと同じ）による実行中の検索の集約
+- 合流した要求への進捗の配信（合流時には直前の進捗を通知）
+- 呼び出し元ごとのキャンセル（全員がキャンセルした場合だけ検索を中断）
+- トークンを渡さない呼び出し元は、従来のキャンセルフラグ（set_cancel_flag）でキャンセル
+  （従来の西日本の検索と同じく、開始時に残っているフラグはクリアする）
+- 起動・合流・中断の件数の記録
+
+制限事項：
+- 集約するのは同じプロセス内の要求のみです（一括判定の別プロセスは対象外）
+- 検索は専用のスレッドで実行し、呼び出し元のスレッドは結果を待ちます
+- 完了した検索の結果は保持しません（再利用は area_search_cache が行います）
+
+使用例：
+    result = get_search_coordinator().search(postal_code, address, progress_callback, cancel_token=token)
+"""
+
+import copy
+import time
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+from services.cancellation import CancellationError, CancelToken
+
+# トークンを渡さない呼び出し元の、従来のキャンセルフラグの確認間隔（秒）
+LEGACY_FLAG_POLL_SECONDS = 0.1
+
+
+def _legacy_cancel_requested() -> bool:
+    """西日本・東日本の従来のキャンセルフラグのいずれかが立っているか"""
+    from services import area_search, area_search_east
+
+    return area_search.is_cancelled() or area_search_east.is_cancelled()
+
+
+def _clear_legacy_cancel_flags() -> None:
+    """西日本・東日本の従来のキャンセルフラグをクリアする（検索していない間に立てられたものを残さない）"""
+    from services import area_search, area_search_east
+
+    area_search.clear_cancel_flag()
+    area_search_east.clear_cancel_flag()
+
+
+def _copy_error(error: BaseException) -> BaseException:
+    """
+    合流した呼び出し元ごとに送出する例外の複製を返す
+
+    同じ例外オブジェクトを複数のスレッドで送出すると __traceback__ を奪い合うため、
+    呼び出し元ごとに複製し、元の例外を原因（__cause__）として残します。
+    """
+    try:
+        duplicate = copy.copy(error)
+    except Exception:
+        duplicate = RuntimeError(str(error))
+    duplicate.__cause__ = error
+    return duplicate
+
+
+class _Flight:
+    """実行中の1件の検索と合流している呼び出し元"""
+
+    def __init__(self, key: tuple):
+        self.key = key
+        self.token = CancelToken()
+        self.done = threading.Event()
+        self.result: Optional[Dict] = None
+        self.error: Optional[BaseException] = None
+        self.last_progress: Optional[str] = None
+        self.subscribers: Dict[int, tuple] = {}
+        self.callers = 0
+        self.started_at = time.monotonic()
+
+
+class SearchCoordinator:
+    """同じ住所の提供判定を1件にまとめて実行する"""
+
+    def __init__(self, search_func: Optional[Callable] = None,
+                 legacy_cancel_check: Optional[Callable[[], bool]] = None,
+                 legacy_cancel_clear: Optional[Callable[[], None]] = None):
+        """
+        集約の初期化
+
+        Args:
+            search_func (callable): 実際の検索関数（既定は area_search.search_service_area）。
+                (postal_code, address, progress_callback=, force_refresh=, cancel_token=) を受け取る
+            legacy_cancel_check (callable): トークンを渡さない呼び出し元のキャンセル判定
+                （既定は area_search / area_search_east のキャンセルフラグ）
+            legacy_cancel_clear (callable): トークンを渡さない呼び出し元の開始時にフラグをクリアする関数
+        """
+        self._search_func = search_func
+        self._legacy_cancel_check = legacy_cancel_check or _legacy_cancel_requested
+        self._legacy_cancel_clear = legacy_cancel_clear or _clear_legacy_cancel_flags
+        self._lock = threading.Lock()
+        self._flights: Dict[tuple, _Flight] = {}
+        self._next_id = 0
+        self._stats = {"started": 0, "joined": 0, "abandoned": 0}
+
+    def _get_search_func(self) -> Callable:
+        if self._search_func is None:
+            from services.area_search import search_service_area
+            return search_service_area
+        return self._search_func
+
+    @staticmethod
+    def _notify(callback: Optional[Callable[[str], None]], message: str) -> None:
+        if callback is None:
+            return
+        try:
+            callback(message)
+        except Exception as e:
+            # 呼び出し元の進捗処理の失敗（キャンセル済みなど）は検索に影響させない
+            logging.debug(f"検索の進捗通知でエラー: {e}")
+
+    def _broadcast(self, flight: _Flight, message: str) -> None:
+        with self._lock:
+            flight.last_progress = message
+            callbacks = [callback for callback, _ in flight.subscribers.values()]
+        for callback in callbacks:
+            self._notify(callback, message)
+
+    def _run(self, flight: _Flight, postal_code: str, address: str, force_refresh: bool,
+             browser_overrides: Optional[Dict] = None) -> None:
+        try:
+            extra = {"browser_overrides": browser_overrides} if browser_overrides else {}
+            flight.result = self._get_search_func()(
+                postal_code,
+                address,
+                progress_callback=lambda message: self._broadcast(flight, message),
+                force_refresh=force_refresh,
+                cancel_token=flight.token,
+                **extra,
+            )
+        except BaseException as e:
+            flight.error = e
+        finally:
+            with self._lock:
+                if self._flights.get(flight.key) is flight:
+                    del self._flights[flight.key]
+                wakes = [wake for _, wake in flight.subscribers.values()]
+            flight.done.set()
+            for wake in wakes:
+                wake.set()
+            if flight.callers > 1:
+                logging.info(
+                    f"同じ住所の検索結果を{flight.callers}件の要求で共有しました"
+                    f"（{time.monotonic() - flight.started_at:.1f}秒）"
+                )
+
+    def _leave(self, flight: _Flight, subscriber_id: int) -> None:
+        """呼び出し元を外し、誰も待っていない検索は中断する"""
+        with self._lock:
+            flight.subscribers.pop(subscriber_id, None)
+            abandoned = not flight.subscribers and not flight.done.is_set()
+            if abandoned:
+                self._stats["abandoned"] += 1
+                if self._flights.get(flight.key) is flight:
+                    del self._flights[flight.key]
+        if abandoned:
+            flight.token.cancel("全ての要求がキャンセルされました")
+
+    def search(self, postal_code: str, address: str, progress_callback: Optional[Callable[[str], None]] = None,
+               force_refresh: bool = False, cancel_token: Optional[CancelToken] = None,
+               browser_overrides: Optional[Dict] = None) -> Dict:
+        """
+        提供判定を実行する。同じ住所の検索が実行中の場合はその結果を待つ
+
+        Args:
+            postal_code (str): 郵便番号
+            address (str): 住所
+            progress_callback (callable): 進捗状況を通知するコールバック関数
+            force_refresh (bool): Trueの場合はキャッシュを使わずに検索する（実行中の検索には合流する）
+            cancel_token (CancelToken): この呼び出し元のキャンセルトークン
+                （省略時は従来のキャンセルフラグでこの呼び出し元をキャンセルする）
+            browser_overrides (dict): 検索を起動する場合に適用する browser_settings の上書き
+                （実行中の検索に合流した場合は、起動した呼び出し元の設定のまま）
+
+        Returns:
+            dict: 検索結果（呼び出し元ごとの複製）
+
+        Raises:
+            CancellationError: この呼び出し元がキャンセルした場合
+        """
+        from services.area_search_cache import build_cache_key
+
+        key = build_cache_key(postal_code, address)
+        if key is None:
+            extra = {"browser_overrides": browser_overrides} if browser_overrides else {}
+            return self._get_search_func()(
+                postal_code, address, progress_callback=progress_callback,
+                force_refresh=force_refresh, cancel_token=cancel_token, **extra,
+            )
+        legacy = cancel_token is None
+        if legacy:
+            # 合流した検索は専用のトークンで動くため、従来のフラグはこの呼び出し元のトークンに移す。
+            # CTIのボタンは検索していない間もフラグを立てるため、従来の西日本の検索と同じく
+            # 開始時に残っているフラグはクリアし、開始後に立てられたものだけをキャンセルとして扱う
+            self._legacy_cancel_clear()
+            cancel_token = CancelToken()
+        cancel_token.raise_if_cancelled()
+
+        wake = threading.Event()
+        with self._lock:
+            flight = self._flights.get(key)
+            start = flight is None or flight.token.is_cancelled
+            if start:
+                flight = _Flight(key)
+                self._flights[key] = flight
+                self._stats["started"] += 1
+            else:
+                self._stats["joined"] += 1
+            self._next_id += 1
+            subscriber_id = self._next_id
+            flight.subscribers[subscriber_id] = (progress_callback, wake)
+            flight.callers += 1
+            last_progress = flight.last_progress
+
+        if start:
+            threading.Thread(
+                target=self._run, args=(flight, postal_code, address, force_refresh, browser_overrides),
+                name="SearchFlight", daemon=True,
+            ).start()
+        else:
+            logging.info(
+                f"同じ住所の検索が実行中のため合流します（{time.monotonic() - flight.started_at:.1f}秒経過）"
+            )
+            if last_progress:
+                self._notify(progress_callback, last_progress)
+
+        cancel_token.add_callback(wake.set)
+        while not wake.wait(LEGACY_FLAG_POLL_SECONDS if legacy else None):
+            if self._legacy_cancel_check():
+                cancel_token.cancel("キャンセルフラグ")
+
+        if cancel_token.is_cancelled:
+            self._leave(flight, subscriber_id)
+            raise CancellationError("検索がキャンセルされました")
+        with self._lock:
+            flight.subscribers.pop(subscriber_id, None)
+        if flight.error is not None:
+            raise _copy_error(flight.error)
+        return dict(flight.result) if isinstance(flight.result, dict) else flight.result
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        集約の件数を返す
+
+        Returns:
+            dict: started（検索を起動）・joined（実行中の検索に合流）・abandoned（全員キャンセルで中断）・running
+        """
+        with self._lock:
+            return dict(self._stats, running=len(self._flights))
+
+
+_coordinator: Optional[SearchCoordinator] = None
+_coordinator_lock = threading.Lock()
+
+
+def get_search_coordinator() -> SearchCoordinator:
+    """
+    アプリケーション共通の集約インスタンスを返す
+
+    Returns:
+        SearchCoordinator: 集約インスタンス
+    """
+    global _coordinator
+    with _coordinator_lock:
+        if _coordinator is None:
+            _coordinator = SearchCoordinator()
+        return _coordinator
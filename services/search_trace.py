@@ -0,0 +1,488 @@
+"""
+提供判定の工程別所要時間の記録
+
+このモジュールは、西日本・東日本の提供判定をブラウザ起動・ページ表示・
+郵便番号入力・住所候補選択・番地/号ダイアログ・結果判定・スクリーンショットの
+工程に区切って所要時間を計測し、ローカルのSQLite（任意でJSONL）に記録する機能と、
+期間・サイト・工程ごとのパーセンタイルを集計する機能を提供します。
+
+主な機能：
+- 検索ごとのトレースと工程（スパン）の記録（スレッドごとに現在の検索を保持）
+- 工程の切り替え（trace_mark）と入れ子の計測（trace_span）
+- SQLite / JSONL への保存と古い記録の削除
+- 期間指定での p50 / p90 / p99 集計とコマンドライン表示
+
+制限事項：
+- settings.json の search_trace.enabled が false の場合は記録しません
+- 住所・郵便番号は記録しません（サイト・工程・時刻・所要時間・結果区分のみ）
+- trace_span で計測した工程（スクリーンショット）は、その時点の工程の時間にも含まれます
+
+使用例：
+    python -m services.search_trace report --since 2026-10-01 --until 2026-10-16
+    python -m services.search_trace report --site west --json
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import argparse
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+
+from utils.stats_utils import percentile
+
+DEFAULT_TRACE_SETTINGS = {
+    "enabled": True,
+    "db_path": "search_traces.db",
+    "jsonl_path": "",
+    "retention_days": 90,
+}
+
+# 工程名と表示名（表示順）
+STEP_LABELS = {
+    "prepare": "住所解析",
+    "browser_start": "ブラウザ起動",
+    "page_load": "ページ表示",
+    "postal_input": "郵便番号入力",
+    "candidate_selection": "住所候補選択",
+    "banchi_dialog": "番地ダイアログ",
+    "gou_dialog": "号ダイアログ",
+    "result_detection": "結果判定",
+    "screenshot": "スクリーンショット",
+    "http_search": "HTTP判定",
+    "total": "合計",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS traces (
+    trace_id TEXT PRIMARY KEY,
+    site TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    duration_ms REAL NOT NULL,
+    status TEXT,
+    cached INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS spans (
+    trace_id TEXT NOT NULL,
+    site TEXT NOT NULL,
+    step TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    duration_ms REAL NOT NULL,
+    ok INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_spans_site_step_started ON spans (site, step, started_at);
+CREATE INDEX IF NOT EXISTS idx_traces_started ON traces (started_at);
+"""
+
+
+def _load_trace_settings(path="settings.json"):
+    """
+    settings.json から search_trace 設定を読み込み、既定値で補完して返す。
+    """
+    settings = dict(DEFAULT_TRACE_SETTINGS)
+    try:
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                cfg = json.load(f)
+                settings.update(cfg.get("search_trace", {}) or {})
+    except Exception as e:
+        logging.warning(f"トレース設定の読み込みに失敗しました: {e}")
+    return settings
+
+
+class SearchTrace:
+    """1回の提供判定の工程別所要時間"""
+
+    def __init__(self, site: str = "unknown"):
+        """
+        トレースの開始
+
+        Args:
+            site (str): サイト識別子（west/east/west_http など。判定後に変更できる）
+        """
+        self.trace_id = uuid.uuid4().hex
+        self.site = site
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.spans: List[Dict] = []
+        self._current: Optional[Dict] = None
+        self._listeners: List[Callable[[str, Optional[str]], None]] = []
+
+    def add_listener(self, listener: Callable[[str, Optional[str]], None]) -> None:
+        """
+        工程の切り替え・終了時に呼ぶ関数を登録する
+
+        Args:
+            listener (callable): (イベント "mark"/"finish", 新しい工程名) を受け取る関数
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, event: str, step: Optional[str]) -> None:
+        for listener in list(self._listeners):
+            try:
+                listener(event, step)
+            except Exception as e:
+                logging.warning(f"トレースの通知処理中にエラー: {e}")
+
+    def _open(self, step: str) -> Dict:
+        return {
+            "step": step,
+            "started_at": self.started_at + (time.perf_counter() - self._started),
+            "_started": time.perf_counter(),
+            "ok": True,
+        }
+
+    def _close(self, span: Dict, ok: bool = True) -> None:
+        span["duration_ms"] = round((time.perf_counter() - span.pop("_started")) * 1000, 3)
+        span["ok"] = ok
+        self.spans.append(span)
+
+    def mark(self, step: str) -> None:
+        """
+        現在の工程を終え、次の工程の計測を始める
+
+        Args:
+            step (str): 工程名（STEP_LABELS のキー）
+        """
+        if self._current is not None:
+            if self._current["step"] == step:
+                return
+            self._close(self._current)
+        self._notify("mark", step)
+        self._current = self._open(step)
+
+    @contextmanager
+    def span(self, step: str):
+        """
+        現在の工程とは別に、囲んだ処理の所要時間を記録する
+
+        Args:
+            step (str): 工程名
+        """
+        span = self._open(step)
+        try:
+            yield
+        except BaseException:
+            self._close(span, ok=False)
+            raise
+        self._close(span)
+
+    def finish(self, status: Optional[str] = None, cached: bool = False, ok: bool = True) -> Dict:
+        """
+        トレースを終了し、記録用の辞書を返す
+
+        Args:
+            status (str): 判定結果の区分
+            cached (bool): キャッシュから返した場合はTrue
+            ok (bool): 例外で終了した場合はFalse（最後の工程を失敗として記録）
+
+        Returns:
+            dict: trace_id・site・started_at・duration_ms・status・cached・spans
+        """
+        if self._current is not None:
+            self._close(self._current, ok=ok)
+            self._current = None
+        self._notify("finish", None)
+        return {
+            "trace_id": self.trace_id,
+            "site": self.site,
+            "started_at": self.started_at,
+            "duration_ms": round((time.perf_counter() - self._started) * 1000, 3),
+            "status": status,
+            "cached": bool(cached),
+            "spans": list(self.spans),
+        }
+
+
+class TraceStore:
+    """トレースの保存と集計"""
+
+    def __init__(self, db_path: str = DEFAULT_TRACE_SETTINGS["db_path"], jsonl_path: str = ""):
+        """
+        保存先の初期化
+
+        Args:
+            db_path (str): SQLiteファイルのパス
+            jsonl_path (str): あわせて追記するJSONLファイルのパス（空の場合は書かない）
+        """
+        self.db_path = db_path
+        self.jsonl_path = jsonl_path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def record(self, trace: Dict) -> None:
+        """
+        トレースを保存する
+
+        Args:
+            trace (dict): SearchTrace.finish の戻り値
+        """
+        span_rows = [
+            (trace["trace_id"], trace["site"], span["step"], span["started_at"],
+             span["duration_ms"], 1 if span["ok"] else 0)
+            for span in trace["spans"]
+        ]
+        span_rows.append(
+            (trace["trace_id"], trace["site"], "total", trace["started_at"], trace["duration_ms"], 1)
+        )
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO traces (trace_id, site, started_at, duration_ms, status, cached) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (trace["trace_id"], trace["site"], trace["started_at"], trace["duration_ms"],
+                     trace.get("status"), 1 if trace.get("cached") else 0),
+                )
+                self._conn.executemany(
+                    "INSERT INTO spans (trace_id, site, step, started_at, duration_ms, ok) VALUES (?, ?, ?, ?, ?, ?)",
+                    span_rows,
+                )
+            if self.jsonl_path:
+                with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(trace, ensure_ascii=False) + "\n")
+
+    def prune(self, retention_days: float) -> int:
+        """
+        保持期間を過ぎたトレースを削除する
+
+        Returns:
+            int: 削除したトレース数
+        """
+        if not retention_days or retention_days <= 0:
+            return 0
+        cutoff = time.time() - retention_days * 86400
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM spans WHERE started_at < ?", (cutoff,))
+            return self._conn.execute("DELETE FROM traces WHERE started_at < ?", (cutoff,)).rowcount
+
+    def iter_durations(self, since: Optional[float] = None, until: Optional[float] = None,
+                       site: Optional[str] = None, include_cached: bool = False):
+        """
+        期間内の工程ごとの所要時間を返す
+
+        Yields:
+            tuple: (site, step, duration_ms)
+        """
+        query = (
+            "SELECT s.site, s.step, s.duration_ms FROM spans s JOIN traces t ON t.trace_id = s.trace_id "
+            "WHERE s.ok = 1"
+        )
+        params: List = []
+        if since is not None:
+            query += " AND t.started_at >= ?"
+            params.append(since)
+        if until is not None:
+            query += " AND t.started_at < ?"
+            params.append(until)
+        if site:
+            query += " AND s.site = ?"
+            params.append(site)
+        if not include_cached:
+            query += " AND t.cached = 0"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        yield from rows
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def build_report(rows: Iterable) -> List[Dict]:
+    """
+    所要時間をサイト・工程ごとに集計する
+
+    Args:
+        rows (iterable): (site, step, duration_ms) の並び
+
+    Returns:
+        list: site・step・count・p50_ms・p90_ms・p99_ms・max_ms の辞書（サイト・工程順）
+    """
+    grouped: Dict[tuple, List[float]] = {}
+    for site, step, duration_ms in rows:
+        grouped.setdefault((site, step), []).append(duration_ms)
+
+    step_order = {step: index for index, step in enumerate(STEP_LABELS)}
+    report = []
+    for (site, step), values in sorted(
+        grouped.items(), key=lambda item: (item[0][0], step_order.get(item[0][1], len(step_order)), item[0][1])
+    ):
+        report.append({
+            "site": site,
+            "step": step,
+            "count": len(values),
+            "p50_ms": round(percentile(values, 0.5), 1),
+            "p90_ms": round(percentile(values, 0.9), 1),
+            "p99_ms": round(percentile(values, 0.99), 1),
+            "max_ms": round(max(values), 1),
+        })
+    return report
+
+
+# --- 検索中のトレース（スレッドごと） ---
+_local = threading.local()
+_store: Optional[TraceStore] = None
+_store_lock = threading.Lock()
+
+
+def get_trace_store() -> Optional[TraceStore]:
+    """設定に従った共有の保存先を返す（無効の場合はNone）"""
+    global _store
+    settings = _load_trace_settings()
+    if not settings.get("enabled", True):
+        return None
+    with _store_lock:
+        if _store is None:
+            try:
+                _store = TraceStore(settings.get("db_path") or DEFAULT_TRACE_SETTINGS["db_path"],
+                                    settings.get("jsonl_path") or "")
+                _store.prune(float(settings.get("retention_days", 90) or 0))
+            except Exception as e:
+                logging.warning(f"トレースの保存先を開けませんでした: {e}")
+                return None
+        return _store
+
+
+def start_trace(site: str = "unknown") -> SearchTrace:
+    """
+    現在のスレッドで検索のトレースを開始する
+
+    Args:
+        site (str): サイト識別子
+
+    Returns:
+        SearchTrace: 開始したトレース
+    """
+    trace = SearchTrace(site)
+    _local.trace = trace
+    return trace
+
+
+def current_trace() -> Optional[SearchTrace]:
+    """現在のスレッドで計測中のトレースを返す"""
+    return getattr(_local, "trace", None)
+
+
+def set_trace_site(site: str) -> None:
+    """現在のトレースのサイト識別子を設定する"""
+    trace = current_trace()
+    if trace is not None:
+        trace.site = site
+
+
+def trace_mark(step: str) -> None:
+    """現在のトレースの工程を切り替える（トレースがない場合は何もしない）"""
+    trace = current_trace()
+    if trace is not None:
+        trace.mark(step)
+
+
+@contextmanager
+def trace_span(step: str):
+    """現在のトレースに囲んだ処理の所要時間を記録する（トレースがない場合は何もしない）"""
+    trace = current_trace()
+    if trace is None:
+        yield
+        return
+    with trace.span(step):
+        yield
+
+
+def finish_trace(status: Optional[str] = None, cached: bool = False, ok: bool = True,
+                 persist: bool = True) -> Optional[Dict]:
+    """
+    現在のトレースを終了して保存する
+
+    Args:
+        status (str): 判定結果の区分
+        cached (bool): キャッシュから返した場合はTrue
+        ok (bool): 例外で終了した場合はFalse
+        persist (bool): Falseの場合は保存せずに返す（ベンチマーク用）
+
+    Returns:
+        dict: 記録したトレース（トレースがない場合はNone）
+    """
+    trace = current_trace()
+    if trace is None:
+        return None
+    _local.trace = None
+    record = trace.finish(status, cached, ok)
+    spans = ", ".join(f"{span['step']}={span['duration_ms']:.0f}ms" for span in record["spans"])
+    logging.info(f"工程別所要時間({record['site']}): 合計 {record['duration_ms']:.0f}ms [{spans}]")
+    store = get_trace_store() if persist else None
+    if store is not None:
+        try:
+            store.record(record)
+        except Exception as e:
+            logging.warning(f"トレースの保存に失敗しました: {e}")
+    return record
+
+
+def _parse_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    return datetime.strptime(value, "%Y-%m-%d").timestamp()
+
+
+def format_report(report: List[Dict]) -> str:
+    """集計結果を表形式の文字列にする"""
+    lines = [f"{'サイト':<10}{'工程':<14}{'件数':>6}{'p50(ms)':>10}{'p90(ms)':>10}{'p99(ms)':>10}{'最大(ms)':>10}"]
+    for row in report:
+        lines.append(
+            f"{row['site']:<10}{STEP_LABELS.get(row['step'], row['step']):<14}{row['count']:>6}"
+            f"{row['p50_ms']:>10.1f}{row['p90_ms']:>10.1f}{row['p99_ms']:>10.1f}{row['max_ms']:>10.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    """コマンドラインから工程別の所要時間を集計する"""
+    settings = _load_trace_settings()
+    parser = argparse.ArgumentParser(description="提供判定の工程別所要時間を集計します")
+    parser.add_argument("--db", default=settings.get("db_path"), help="トレースのSQLiteファイル")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    report_parser = subparsers.add_parser("report", help="サイト・工程ごとの p50/p90/p99 を表示します")
+    report_parser.add_argument("--since", help="開始日（YYYY-MM-DD、この日を含む）")
+    report_parser.add_argument("--until", help="終了日（YYYY-MM-DD、この日を含む）")
+    report_parser.add_argument("--site", help="サイト（west / east / west_http / cache）")
+    report_parser.add_argument("--include-cached", action="store_true", help="キャッシュから返した検索も含める")
+    report_parser.add_argument("--json", action="store_true", help="JSONで出力する")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        print(f"トレースが見つかりません: {args.db}")
+        return 1
+
+    store = TraceStore(args.db)
+    try:
+        until = _parse_date(args.until)
+        if until is not None:
+            until = (datetime.fromtimestamp(until) + timedelta(days=1)).timestamp()
+        report = build_report(store.iter_durations(
+            _parse_date(args.since), until, args.site, args.include_cached
+        ))
+    finally:
+        store.close()
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    elif report:
+        print(format_report(report))
+    else:
+        print("指定した期間のトレースはありません")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+入力中の郵便番号・住所による先行提供判定
+
+このモジュールは、オペレーターが郵便番号と住所を入力し終えた時点で
+検索ボタンを押す前に提供判定を始めておき、後で検索ボタンが押されたときに
+入力が同じであれば実行中・完了済みの結果を使い回すための判定と状態管理を提供します。
+
+主な機能：
+- 先行判定を始めてよい入力かどうかの確認（郵便番号7桁・市区町村と番地・郵便番号との整合）
+- 入力の同一性の判定（キャッシュと同じ正規化キーで比較）
+- 先行判定の状態（実行中/完了）と結果の保持
+
+制限事項：
+- 設定 speculative_area_search が true の場合のみ画面から使われます（既定は無効）
+- 入力が変わった先行判定は画面側で取り消し、結果は使いません
+- 画面側は表示中の検索とは別のワーカーで、常にヘッドレスで先行判定を実行します
+  （ブラウザは判定後に終了し、表示中の検索のブラウザとして残しません）
+- 取り消し・失敗（cancelled / error）の結果は使い回しません
+"""
+
+import time
+import logging
+from typing import Dict, Optional, Tuple
+
+DEFAULT_DEBOUNCE_MS = 1500
+
+# 先行判定に適用する browser_settings の上書き（ヘッドレスで起動し、判定後にブラウザを終了する）
+SPECULATIVE_BROWSER_OVERRIDES = {"headless": True, "keep_browser": False}
+
+# 使い回さない結果の区分
+_DISCARDED_STATUSES = ("cancelled", "error")
+
+
+def build_search_key(postal_code: str, address: str) -> Optional[tuple]:
+    """
+    入力の同一性を判定するためのキーを返す（全角・空白・表記ゆれを吸収）
+
+    Returns:
+        tuple: キャッシュと同じ正規化キー。生成できない場合はNone
+    """
+    from services.area_search_cache import build_cache_key
+
+    return build_cache_key(postal_code, address)
+
+
+def is_address_ready(address: str) -> Tuple[bool, str]:
+    """
+    住所が市区町村と番地まで入力されているかを確認する（MapFanの先読みと共通）
+
+    Args:
+        address (str): 住所
+
+    Returns:
+        tuple: (市区町村と番地を特定できた場合はTrue, 理由)
+    """
+    from utils.address_parser import parse_address
+    from utils.address_utils import normalize_address
+
+    address = normalize_address(address or "").strip()
+    if not address:
+        return False, "住所が未入力です"
+    parsed = parse_address(address)
+    if not parsed.city:
+        return False, "市区町村を特定できません"
+    if not parsed.number and not parsed.block:
+        return False, "番地が入力されていません"
+    return True, ""
+
+
+def is_search_ready(postal_code: str, address: str) -> Tuple[bool, str]:
+    """
+    先行判定を始めてよい入力かどうかを確認する
+
+    Args:
+        postal_code (str): 郵便番号
+        address (str): 住所
+
+    Returns:
+        tuple: (開始してよい場合はTrue, 理由)
+    """
+    from utils.address_utils import normalize_address
+    from utils.postal_index import check_postal_address
+
+    postal_clean = normalize_address(postal_code or "").replace("-", "").strip()
+    if len(postal_clean) != 7 or not postal_clean.isdigit():
+        return False, "郵便番号が7桁ではありません"
+
+    ready, reason = is_address_ready(address)
+    if not ready:
+        return False, reason
+    address = normalize_address(address or "").strip()
+
+    check = check_postal_address(postal_clean, address)
+    if check["consistent"] is False:
+        return False, f"郵便番号と住所が一致しません（{check['message']}）"
+    return True, ""
+
+
+class SpeculativeSearch:
+    """1件の先行判定の状態"""
+
+    def __init__(self, postal_code: str, address: str, worker=None):
+        """
+        先行判定の開始
+
+        Args:
+            postal_code (str): 郵便番号
+            address (str): 住所
+            worker: 検索を実行しているワーカー（画面側のオブジェクト）
+        """
+        self.postal_code = postal_code
+        self.address = address
+        self.key = build_search_key(postal_code, address)
+        self.worker = worker
+        self.result: Optional[Dict] = None
+        self.started_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+
+    @property
+    def is_done(self) -> bool:
+        return self.result is not None
+
+    def matches(self, postal_code: str, address: str) -> bool:
+        """入力が先行判定を始めたときと同じかどうか"""
+        return self.key is not None and self.key == build_search_key(postal_code, address)
+
+    def complete(self, result: Dict) -> bool:
+        """
+        先行判定の結果を記録する
+
+        Returns:
+            bool: 使い回せる結果の場合はTrue
+        """
+        self.finished_at = time.monotonic()
+        if not isinstance(result, dict) or result.get("status") in _DISCARDED_STATUSES:
+            logging.info(f"先行判定の結果は使い回しません: {result.get('status') if isinstance(result, dict) else result}")
+            return False
+        self.result = result
+        logging.info(
+            f"先行判定が完了しました: {result.get('status')}（{self.finished_at - self.started_at:.1f}秒）"
+        )
+        return True
+
+    def saved_seconds(self) -> float:
+        """検索ボタンが押された時点までに先行して進んでいた秒数"""
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return max(0.0, end - self.started_at)
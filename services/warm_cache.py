@@ -0,0 +1,293 @@
+"""
+提供判定サイト用の永続キャッシュプロファイル
+
+このモジュールは、NTT西日本・東日本の提供判定で起動するChromeに、chrome_data/ 配下の
+自動操作専用プロファイルを割り当て、サイトのJavaScript・CSSなどのディスクキャッシュを
+検索やアプリの再起動をまたいで再利用するための機能を提供します（既定では無効）。
+
+主な機能：
+- サイトごとのプロファイル（同時起動に備えて複数）の割り当てと使用中の判定
+- ディスクキャッシュの容量上限の指定
+- 起動直後のCookie・ストレージの消去（キャッシュ以外は検索ごとに持ち越さない）
+- 初回ページ読み込み時間の計測（キャッシュなしとキャッシュありの比較）
+
+制限事項：
+- settings.json の warm_cache.enabled が true の場合のみ有効です
+- プロファイルは同時に1つのChromeしか使えないため、すべて使用中の場合は従来どおり
+  キャッシュなしで起動します
+- 容量上限はプロファイル1つあたりの値です（合計は max_profiles 倍まで増えます）
+- MapFan（web_driver.create_driver）は対象外です
+
+使用例：
+    with warm_cache_profile(options, "west") as profile:
+        driver, _ = start_chrome(options)
+        profile.prepare(driver)
+    python -m services.warm_cache bench --site west --iterations 3
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+DEFAULT_WARM_CACHE_SETTINGS = {
+    "enabled": False,
+    "profile_dir": os.path.join("chrome_data", "automation"),
+    "cache_size_mb": 256,
+    "max_profiles": 3,
+}
+
+# 永続プロファイルでは使わない起動オプション（キャッシュを捨てる・プロファイルを使い捨てにする）
+_COLD_ARGUMENTS = ("--incognito", "--guest", "--disable-application-cache", "--aggressive-cache-discard")
+
+# 起動直後に消去するストレージ（HTTPキャッシュは残す）
+_CLEARED_STORAGE_TYPES = "local_storage,session_storage,indexeddb,websql,service_workers,cache_storage,file_systems"
+
+# 起動中（Chromeがロックを作るまで）の予約済みプロファイル
+_reserved = set()
+_reserved_lock = threading.Lock()
+
+
+def _load_warm_cache_settings(path="settings.json"):
+    """
+    settings.json から warm_cache 設定を読み込み、既定値で補完して返す。
+    """
+    settings = dict(DEFAULT_WARM_CACHE_SETTINGS)
+    try:
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                cfg = json.load(f)
+                settings.update(cfg.get("warm_cache", {}) or {})
+    except Exception as e:
+        logging.warning(f"キャッシュプロファイルの設定の読み込みに失敗しました: {e}")
+    return settings
+
+
+def is_profile_in_use(profile_dir: str) -> bool:
+    """
+    プロファイルを他のChromeが使用中かどうか（Chromeのロックファイルで判定）
+
+    Args:
+        profile_dir (str): ユーザーデータディレクトリ
+
+    Returns:
+        bool: 使用中ならTrue
+    """
+    if sys.platform == "win32":
+        lock_path = os.path.join(profile_dir, "lockfile")
+        if not os.path.exists(lock_path):
+            return False
+        try:
+            # 使用中のChromeが開いている間は削除できない（削除できた場合は前回の異常終了の残り）
+            os.remove(lock_path)
+            return False
+        except OSError:
+            return True
+
+    try:
+        target = os.readlink(os.path.join(profile_dir, "SingletonLock"))
+    except OSError:
+        return False
+    try:
+        os.kill(int(target.rsplit("-", 1)[-1]), 0)
+        return True
+    except ValueError:
+        return False
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+def _reserve_profile(site: str, settings: Dict) -> Optional[str]:
+    base_dir = os.path.abspath(settings.get("profile_dir") or DEFAULT_WARM_CACHE_SETTINGS["profile_dir"])
+    with _reserved_lock:
+        for index in range(1, max(1, int(settings.get("max_profiles", 1))) + 1):
+            profile_dir = os.path.join(base_dir, f"{site}-{index}")
+            if profile_dir in _reserved or is_profile_in_use(profile_dir):
+                continue
+            _reserved.add(profile_dir)
+            return profile_dir
+    return None
+
+
+def _site_origin(site: str) -> str:
+    from services.driver_pool import get_site_url
+
+    parts = urlsplit(get_site_url(site))
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def clear_session_state(driver, site: str) -> None:
+    """
+    永続プロファイルに残ったCookie・ストレージを消去する（HTTPキャッシュは残す）
+
+    Args:
+        driver: WebDriverインスタンス
+        site (str): サイト識別子（west/east）
+    """
+    try:
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        driver.execute_cdp_cmd(
+            "Storage.clearDataForOrigin",
+            {"origin": _site_origin(site), "storageTypes": _CLEARED_STORAGE_TYPES},
+        )
+    except Exception as e:
+        logging.warning(f"[{site}] キャッシュプロファイルのCookie・ストレージの消去に失敗しました: {e}")
+
+
+class WarmCacheProfile:
+    """1回の起動に割り当てたプロファイル（無効・空きなしの場合は profile_dir がNone）"""
+
+    def __init__(self, site: str, profile_dir: Optional[str] = None):
+        self.site = site
+        self.profile_dir = profile_dir
+
+    def prepare(self, driver) -> None:
+        """起動したドライバーのCookie・ストレージを消去する（プロファイルを使っていなければ何もしない）"""
+        if self.profile_dir and driver is not None:
+            clear_session_state(driver, self.site)
+
+
+def apply_profile_options(options, profile_dir: str, cache_size_mb: float) -> None:
+    """
+    Chromeオプションを永続プロファイル用に書き換える
+
+    Args:
+        options: ChromeOptions
+        profile_dir (str): ユーザーデータディレクトリ
+        cache_size_mb (float): ディスクキャッシュの上限（MB）
+    """
+    arguments: List[str] = options.arguments
+    arguments[:] = [arg for arg in arguments if arg not in _COLD_ARGUMENTS and not arg.startswith("--user-data-dir=")]
+    options.add_argument(f"--user-data-dir={profile_dir}")
+    options.add_argument(f"--disk-cache-size={int(cache_size_mb * 1024 * 1024)}")
+
+
+@contextmanager
+def warm_cache_profile(options, site: str, settings: Optional[Dict] = None):
+    """
+    空いているプロファイルを予約してChromeオプションに設定する（Chromeの起動を囲んで使う）
+
+    Args:
+        options: ChromeOptions
+        site (str): サイト識別子（west/east）
+        settings (dict): warm_cache 設定（省略時は settings.json から読み込む）
+
+    Yields:
+        WarmCacheProfile: 割り当てたプロファイル
+    """
+    if settings is None:
+        settings = _load_warm_cache_settings()
+    profile_dir = _reserve_profile(site, settings) if settings.get("enabled") else None
+    if settings.get("enabled") and profile_dir is None:
+        logging.info(f"[{site}] キャッシュプロファイルがすべて使用中のため、キャッシュなしで起動します")
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+        apply_profile_options(options, profile_dir, float(settings.get("cache_size_mb", 256)))
+        logging.info(f"[{site}] キャッシュプロファイルを使用します: {profile_dir}")
+    try:
+        yield WarmCacheProfile(site, profile_dir)
+    finally:
+        if profile_dir:
+            with _reserved_lock:
+                _reserved.discard(profile_dir)
+
+
+def _measure_first_load(site: str, profile_dir: Optional[str], headless: bool) -> Dict:
+    """Chromeを起動してサイトの開始ページを1回読み込み、読み込み時間と転送量を返す"""
+    from selenium.webdriver.chrome.options import Options
+    from services.driver_bootstrap import start_chrome
+    from services.driver_pool import get_site_url
+
+    options = Options()
+    if headless:
+        options.add_argument('--headless=new')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    if profile_dir:
+        apply_profile_options(options, profile_dir, DEFAULT_WARM_CACHE_SETTINGS["cache_size_mb"])
+    driver, _ = start_chrome(options)
+    try:
+        if profile_dir:
+            clear_session_state(driver, site)
+        started = time.perf_counter()
+        driver.get(get_site_url(site))
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        transferred = driver.execute_script(
+            "return performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'))"
+            ".reduce((total, entry) => total + (entry.transferSize || 0), 0);"
+        )
+        return {"load_ms": elapsed_ms, "transfer_bytes": int(transferred or 0)}
+    finally:
+        driver.quit()
+
+
+def run_first_load_benchmark(site: str = "west", iterations: int = 3, headless: bool = True) -> Dict:
+    """
+    キャッシュなし（現在の起動）とキャッシュあり（永続プロファイル）の初回ページ読み込みを比べる
+
+    Args:
+        site (str): サイト識別子（west/east）
+        iterations (int): それぞれの計測回数
+        headless (bool): ヘッドレスで起動するかどうか
+
+    Returns:
+        dict: cold / warm それぞれの読み込み時間（p50・最大）と転送量（p50）
+    """
+    from utils.stats_utils import percentile
+
+    cold = [_measure_first_load(site, None, headless) for _ in range(iterations)]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        profile_dir = os.path.join(temp_dir, f"{site}-1")
+        _measure_first_load(site, profile_dir, headless)  # キャッシュを作る
+        warm = [_measure_first_load(site, profile_dir, headless) for _ in range(iterations)]
+
+    def _summary(runs):
+        loads = [run["load_ms"] for run in runs]
+        return {
+            "load_p50_ms": round(percentile(loads, 0.5), 1),
+            "load_max_ms": round(max(loads, default=0.0), 1),
+            "transfer_p50_kb": round(percentile([run["transfer_bytes"] for run in runs], 0.5) / 1024, 1),
+        }
+
+    return {"site": site, "iterations": iterations, "cold": _summary(cold), "warm": _summary(warm)}
+
+
+def main(argv=None) -> int:
+    """コマンドラインから初回ページ読み込みを計測する"""
+    parser = argparse.ArgumentParser(description="提供判定サイト用キャッシュプロファイルの計測")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    bench_parser = subparsers.add_parser("bench", help="キャッシュなし・ありで開始ページの読み込み時間を比べます")
+    bench_parser.add_argument("--site", choices=["west", "east"], default="west")
+    bench_parser.add_argument("--iterations", type=int, default=3)
+    bench_parser.add_argument("--show-browser", action="store_true", help="ブラウザを表示して実行する")
+    bench_parser.add_argument("--json", action="store_true", help="JSONで出力する")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    from services.driver_bootstrap import shutdown_chrome_bootstrap
+
+    try:
+        report = run_first_load_benchmark(args.site, args.iterations, headless=not args.show_browser)
+    finally:
+        shutdown_chrome_bootstrap()
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return 0
+    for label, key in (("キャッシュなし（現在）", "cold"), ("キャッシュあり", "warm")):
+        summary = report[key]
+        print(f"{label}: p50={summary['load_p50_ms']}ms / 最大={summary['load_max_ms']}ms / "
+              f"転送量 p50={summary['transfer_p50_kb']}KB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
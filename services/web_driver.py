@@ -14,7 +14,6 @@ import re
 import subprocess
 from pathlib import Path
 from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from webdriver_manager.chrome import ChromeDriverManager
 from webdriver_manager.core.os_manager import ChromeType
@@ -136,14 +135,27 @@ def _find_chrome_binary() -> str:
     return ""
 
 
+def _get_cached_version_output(executable_path: str) -> str:
+    """--version の出力を返す（起動準備が有効な場合はファイルの更新日時・サイズが同じ間キャッシュする）"""
+    from services.driver_bootstrap import get_chrome_bootstrap
+
+    bootstrap = get_chrome_bootstrap()
+    if bootstrap is None:
+        return _get_binary_version_output(executable_path)
+    return bootstrap.get_version(executable_path)
+
+
 def _get_chrome_major_version() -> int:
-    chrome_binary = _find_chrome_binary()
-    version_text = _get_binary_version_output(chrome_binary)
+    from services.driver_bootstrap import get_chrome_bootstrap
+
+    bootstrap = get_chrome_bootstrap()
+    chrome_binary = bootstrap.find_chrome_binary() if bootstrap is not None else _find_chrome_binary()
+    version_text = _get_cached_version_output(chrome_binary)
     return _extract_major_version(version_text)
 
 
 def _get_chromedriver_major_version(chromedriver_path: str) -> int:
-    version_text = _get_binary_version_output(chromedriver_path)
+    version_text = _get_cached_version_output(chromedriver_path)
     return _extract_major_version(version_text)
 
 
@@ -185,26 +197,40 @@ window.chrome = window.chrome || { runtime: {} };
         pass
 
 
-def create_driver(headless=False, page_load_strategy: str = "normal"):
+def _check_cancellation(token=None):
+    """キャンセルトークン（なければ西日本検索のキャンセルフラグ）を確認する"""
+    if token is not None:
+        token.raise_if_cancelled()
+        return
+    try:
+        from services.area_search import check_cancellation
+    except ImportError:
+        return  # area_searchモジュールが利用できない場合はスキップ
+    check_cancellation()
+
+
+def create_driver(headless=False, page_load_strategy: str = "normal", cancel_token=None, blocking_site=None):
     """
     Chrome WebDriverを作成する
     
     Args:
         headless (bool): ヘッドレスモードで実行するかどうか
+        cancel_token (CancelToken): キャンセル時にドライバーを終了するトークン。
+            Noneの場合は現在のスレッドに結び付いたトークンを使う
+        blocking_site (str): 通信遮断プロファイルのサイト識別子（Noneの場合は遮断しない）
         
     Returns:
         WebDriver: 作成されたWebDriverインスタンス
     """
+    from services.cancellation import current_token
+
+    token = cancel_token or current_token()
     try:
         logging.getLogger("WDM").setLevel(logging.WARNING)
         logging.getLogger("webdriver_manager").setLevel(logging.WARNING)
 
         # キャンセルチェック（ドライバー作成開始時）
-        try:
-            from services.area_search import check_cancellation
-            check_cancellation()
-        except (ImportError, NameError):
-            pass  # area_searchモジュールが利用できない場合はスキップ
+        _check_cancellation(token)
         
         # Chromeオプションの設定
         chrome_options = Options()
@@ -251,55 +277,34 @@ def create_driver(headless=False, page_load_strategy: str = "normal"):
         }
         chrome_options.add_experimental_option('prefs', prefs)
         
+        # 記録・再生（replay_harness）中の追加オプション
+        from services.replay_harness import apply_harness_options
+        apply_harness_options(chrome_options)
+        if blocking_site:
+            from services.request_blocking import apply_blocking_options
+            apply_blocking_options(chrome_options)
+        
         # キャンセルチェック（オプション設定後）
-        try:
-            from services.area_search import check_cancellation
-            check_cancellation()
-        except (ImportError, NameError):
-            pass
+        _check_cancellation(token)
         
-        driver = None
-        driver_source = "selenium-manager"
-
-        # 同梱ドライバ（バージョン一致時のみ）→ Selenium Manager の順で起動
+        # 同梱ドライバ（バージョン一致時のみ）→ Selenium Manager の順で解決し、共有サービスで起動
+        # （解決結果は driver_bootstrap がファイルの更新日時・サイズをキーにキャッシュする）
         try:
-            bundled_driver = _find_bundled_chromedriver()
-            if bundled_driver and _use_bundled_driver_by_default():
-                chrome_major = _get_chrome_major_version()
-                driver_major = _get_chromedriver_major_version(bundled_driver)
-                if chrome_major and driver_major and chrome_major == driver_major:
-                    service = Service(executable_path=bundled_driver)
-                    logging.info(f"同梱ChromeDriverを使用: {bundled_driver}")
-                    driver = webdriver.Chrome(service=service, options=chrome_options)
-                    driver_source = "bundled"
-                else:
-                    logging.info(
-                        f"同梱ChromeDriverをスキップ: browser={chrome_major}, driver={driver_major}"
-                    )
-            elif bundled_driver:
-                logging.info("同梱ChromeDriverは未使用（既定: Selenium Manager優先）。必要なら USE_BUNDLED_CHROMEDRIVER=1 を指定")
-
-            if driver is None:
-                driver = webdriver.Chrome(options=chrome_options)
-                driver_source = "selenium-manager"
+            from services.driver_bootstrap import start_chrome
+            driver, driver_source = start_chrome(chrome_options)
         except Exception as manager_error:
             logging.warning(f"Chrome起動で例外。Selenium Managerへフォールバックします: {str(manager_error)}")
             driver = webdriver.Chrome(options=chrome_options)
             driver_source = "selenium-manager-fallback"
         
-        # キャンセルチェック（ドライバー起動直前）
-        try:
-            from services.area_search import check_cancellation
-            check_cancellation()
-        except (ImportError, NameError):
-            pass
+        # キャンセル時にプロセスごと終了できるよう登録してからキャンセルチェック（ドライバー作成直後）
+        if token is not None:
+            token.register_driver(driver)
+        _check_cancellation(token)
         
-        # キャンセルチェック（ドライバー作成直後）
-        try:
-            from services.area_search import check_cancellation
-            check_cancellation()
-        except (ImportError, NameError):
-            pass
+        if blocking_site:
+            from services.request_blocking import apply_blocking_profile
+            apply_blocking_profile(driver, blocking_site)
         
         # タイムアウト設定
         driver.set_page_load_timeout(60)
@@ -0,0 +1,71 @@
+"""
+住所類似度計算のテストモジュール
+
+このモジュールは、ビット並列の編集距離が従来の行列方式と一致すること、
+打ち切り・完全一致判定・一括評価の動作、および速度をテストします。
+"""
+
+import random
+
+from utils.address_matcher import (
+    AddressMatcher,
+    _matrix_similarity,
+    levenshtein_distance,
+    run_benchmark,
+    similarity,
+)
+from utils.string_utils import calculate_similarity, normalize_string
+
+
+def test_distance_matches_matrix_implementation():
+    """ランダムな文字列で従来方式と同じ類似度になること"""
+    rng = random.Random(0)
+    alphabet = "大字東西1-町丁目"
+    for _ in range(500):
+        a = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 70)))
+        b = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 70)))
+        assert abs(similarity(a, b) - _matrix_similarity(a, b)) < 1e-12
+
+
+def test_distance_cutoff():
+    """上限を超える場合は上限+1で打ち切ること"""
+    assert levenshtein_distance("kitten", "sitting") == 3
+    assert levenshtein_distance("kitten", "sitting", max_distance=3) == 3
+    assert levenshtein_distance("kitten", "sitting", max_distance=2) == 3
+    assert levenshtein_distance("a", "abcdef", max_distance=1) == 2
+    assert similarity("abcd", "wxyz", min_similarity=0.5) < 0.5
+
+
+def test_calculate_similarity_keeps_behavior():
+    """calculate_similarity は従来どおり大文字小文字を区別しないこと"""
+    assert calculate_similarity("ABC", "abc") == 1.0
+    assert calculate_similarity("", "abc") == 0.0
+    assert abs(calculate_similarity("梅田1丁目", "梅田2丁目") - 0.8) < 1e-12
+
+
+def test_best_match_prefers_exact_and_ranks_batch():
+    """完全一致を優先し、それ以外は最も類似度の高い候補を返すこと"""
+    matcher = AddressMatcher("大阪府大阪市北区梅田1丁目", city_weighted=True)
+    candidates = ["大阪府大阪市北区梅田2丁目", "大阪府大阪市北区梅田１丁目", "大阪府堺市堺区"]
+
+    assert matcher.best_match(candidates) == (1, 1.0)
+
+    scores = matcher.score_batch(candidates)
+    assert scores[1] == 1.0
+    assert scores[0] > scores[2]
+
+    index, value = matcher.best_match(["京都府京都市左京区", "兵庫県神戸市中央区"], threshold=0.9)
+    assert index is None
+    assert value < 0.9
+
+
+def test_best_match_removes_aza_prefix():
+    """字/大字の有無は正規化により一致と判定されること"""
+    matcher = AddressMatcher("北海道上川郡東神楽町大字志比内", normalize_string)
+    assert matcher.best_match(["北海道上川郡東神楽町志比内", "北海道上川郡東神楽町南"]) == (0, 1.0)
+
+
+def test_benchmark_faster_than_matrix():
+    """長い字/大字の候補リストで従来方式より高速であること"""
+    result = run_benchmark(candidate_count=80, repeat=2)
+    assert result["fast_sec"] < result["legacy_sec"]
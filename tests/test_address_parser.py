@@ -0,0 +1,99 @@
+"""
+市区町村辞書による住所分割のテストモジュール
+
+このモジュールは、市区町村名の最長一致（郡・政令市の区・「市」「町」を含む名前）、
+番地・接頭/接尾記号・建物部分の分割、一括分割と市区町村表の生成をテストします。
+"""
+
+from services.area_search import is_east_japan
+from services.area_search_east import split_address as split_address_east
+from utils.address_parser import (
+    Gazetteer,
+    ParsedAddress,
+    build_municipality_table,
+    parse_address,
+    parse_addresses,
+    run_benchmark,
+)
+from utils.address_utils import split_address as split_address_utils
+
+
+def test_city_names_containing_city_characters():
+    """「市」「町」「村」を含む市区町村名を正しく切り出すこと"""
+    cases = {
+        "東京都町田市原町田4-1-1": ("町田市", "原町田"),
+        "千葉県市川市市川1-1-1": ("市川市", "市川"),
+        "広島県廿日市市串戸4丁目9-32": ("廿日市市", "串戸"),
+        "山梨県西八代郡市川三郷町市川大門1": ("西八代郡市川三郷町", "市川大門"),
+        "富山県中新川郡上市町横法音寺": ("中新川郡上市町", "横法音寺"),
+        "大阪府大阪市北区梅田1丁目2-3": ("大阪市北区", "梅田"),
+    }
+    for address, (city, town) in cases.items():
+        result = parse_address(address)
+        assert (result.city, result.town) == (city, town), address
+        assert result.municipality_code
+
+
+def test_prefecture_inferred_from_city():
+    """都道府県が省略されても市区町村名が一意なら補完すること"""
+    result = parse_address("京都市左京区岩倉1")
+    assert result.prefecture == "京都府"
+    assert result.city == "京都市左京区"
+    assert is_east_japan("札幌市中央区北1条西2丁目")
+    assert not is_east_japan("府中市本町1-2")
+
+
+def test_number_tokens():
+    """番地・号・接頭/接尾記号・建物部分を分割すること"""
+    result = parse_address("岡山県岡山市北区東古松甲12-3ア")
+    assert (result.number_prefix, result.number, result.number_suffix) == ("甲", "12-3", "ア")
+
+    result = parse_address("愛知県名古屋市中区栄三丁目5番12号 栄ビル")
+    assert (result.town, result.block, result.number, result.building_id) == ("栄", "3", "5-12", "栄ビル")
+
+    result = parse_address("兵庫県川西市萩原台西1-3-4")
+    assert (result.block, result.number) == ("", "1-3-4")
+
+    result = parse_address("東京都港区六本木6-10-1 六本木ヒルズ")
+    assert (result.block, result.number, result.building_id) == ("6", "10-1", "六本木ヒルズ")
+
+    result = parse_address("北海道札幌市中央区北1条西2丁目3-4")
+    assert (result.town, result.block, result.number) == ("北1条西", "2", "3-4")
+
+
+def test_shared_result_type():
+    """西日本・東日本・共通ユーティリティが同じ結果型を返すこと"""
+    address = "東京都港区芝公園４丁目２－８"
+    east = split_address_east(address)
+    utils_result = split_address_utils(address)
+    assert isinstance(east, ParsedAddress)
+    assert east.to_dict() == utils_result.to_dict()
+    assert east["block"] == "4"
+    assert east.get("number") == "2-8"
+    assert east.get("unknown", "x") == "x"
+    assert east.base_address == "東京都港区芝公園4丁目"
+    assert split_address_utils("住所不明") is None
+
+
+def test_bulk_and_table_build(tmp_path):
+    """一括分割と市区町村表の生成・読み込みができること"""
+    table = tmp_path / "municipalities.tsv"
+    rows = [
+        ("01101", "北海道", "札幌市中央区", "サッポロシチュウオウク"),
+        ("01101", "北海道", "札幌市中央区", "サッポロシチュウオウク"),
+        ("06301", "山形県", "東村山郡山辺町", "ヒガシムラヤマグンヤマノベマチ"),
+    ]
+    assert build_municipality_table(rows, str(table)) == 2
+
+    gazetteer = Gazetteer.load(str(table))
+    results = parse_addresses(["札幌市北1条西2丁目", "山形県山辺町山辺1", "札幌市北1条西2丁目"], gazetteer)
+    assert results[0] is results[2]
+    assert (results[0].prefecture, results[0].city) == ("北海道", "札幌市")
+    assert (results[1].city, results[1].municipality_code) == ("山辺町", "06301")
+
+
+def test_benchmark_runs():
+    """ベンチマークが全件を分割し、辞書で市区町村を判定できること"""
+    result = run_benchmark(2000)
+    assert result["addresses"] == 2000
+    assert result["gazetteer_hit_ratio"] == 1.0
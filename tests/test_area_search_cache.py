@@ -0,0 +1,65 @@
+"""
+提供エリア検索キャッシュのテストモジュール
+
+このモジュールは、検索結果キャッシュのキー生成・有効期限・集計をテストします。
+"""
+
+import time
+import sqlite3
+
+from services.area_search_cache import AreaSearchCache, build_cache_key
+
+
+def _available_result():
+    return {
+        "status": "available",
+        "message": "提供可能",
+        "details": {"判定結果": "OK"},
+        "screenshot": "not_exists.png",
+    }
+
+
+def test_build_cache_key_normalizes_address():
+    """表記ゆれのある住所が同じキーになること"""
+    key1 = build_cache_key("530-0001", "大阪府大阪市北区梅田１－２－３")
+    key2 = build_cache_key("5300001", "大阪府大阪市北区梅田 1-2-3")
+    assert key1 == key2
+    assert key1[0] == "5300001"
+
+
+def test_cache_hit_and_miss(tmp_path):
+    """保存した結果がヒットし、未保存の住所はミスになること"""
+    cache = AreaSearchCache(str(tmp_path / "cache.db"))
+    assert cache.get("5300001", "大阪府大阪市北区梅田1-2-3") is None
+
+    assert cache.set("5300001", "大阪府大阪市北区梅田1-2-3", _available_result())
+    result = cache.get("530-0001", "大阪府大阪市北区梅田１－２－３")
+    assert result["status"] == "available"
+    assert result["cached"] is True
+    assert "screenshot" not in result
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["stores"] == 1
+
+
+def test_cache_ttl_per_status(tmp_path):
+    """判定結果ごとの有効期限が適用されること"""
+    db_path = str(tmp_path / "cache.db")
+    cache = AreaSearchCache(db_path, {"failure": 60})
+    cache.set("5300001", "大阪府大阪市北区梅田1-2-3", {"status": "failure", "message": "判定失敗"})
+
+    # 保存時刻を有効期限より前にずらす
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE area_cache SET timestamp = ?", (time.time() - 120,))
+
+    assert cache.get("5300001", "大阪府大阪市北区梅田1-2-3") is None
+    assert cache.get_stats()["expired"] == 1
+
+
+def test_cache_skips_error_results(tmp_path):
+    """error / cancelled の結果は保存しないこと"""
+    cache = AreaSearchCache(str(tmp_path / "cache.db"))
+    assert not cache.set("5300001", "大阪府大阪市北区梅田1-2-3", {"status": "error", "message": "x"})
+    assert not cache.set("5300001", "大阪府大阪市北区梅田1-2-3", {"status": "cancelled", "message": "x"})
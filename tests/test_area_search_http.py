@@ -0,0 +1,194 @@
+"""
+NTT西日本HTTPエンジンのテストモジュール
+
+このモジュールは、記録した画面構成を返すローカルの代替サーバーに対して
+HTTPエンジンの画面遷移と判定、想定外画面でのフォールバックをテストします。
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from services import area_search
+from services.area_search import normalize_address, split_address
+from services.area_search_http import UnexpectedResponseError, search_service_area_west_http
+
+CART_PAGE = """
+<html><body>
+<form action="/cart/zip" method="post">
+  <input type="hidden" name="token" value="abc">
+  <input type="text" id="id_tak_tx_ybk_yb" name="zip" value="">
+  <button id="id_tak_bt_ybk_jks" name="search" value="1">検索</button>
+</form>
+</body></html>
+"""
+
+CANDIDATE_PAGE = """
+<html><body>
+<div id="addressSelectModal"><ul>
+  <li><a href="/cart/address?code=A2">大阪府大阪市北区梅田２丁目</a></li>
+  <li><a href="{href}">大阪府大阪市北区梅田１丁目</a></li>
+</ul></div>
+</body></html>
+"""
+
+BANCHI_PAGE = """
+<html><body>
+<dialog id="DIALOG_ID01" open>
+  <a href="/cart/banchi?n=1">１</a>
+  <a href="/cart/banchi?n=2">２</a>
+  <a href="/cart/banchi?n=0">（番地なし）</a>
+</dialog>
+</body></html>
+"""
+
+GOU_PAGE = """
+<html><body>
+<dialog id="DIALOG_ID02" open>
+  <a href="/cart/gou?n=3">３</a>
+  <a href="/cart/gou?n=0">（号なし）</a>
+</dialog>
+</body></html>
+"""
+
+CONFIRM_PAGE = """
+<html><body>
+<form action="/cart/result" method="post">
+  <input type="hidden" name="step" value="confirm">
+  <button id="id_tak_bt_nx" name="next" value="1">次へ</button>
+</form>
+</body></html>
+"""
+
+RESULT_PAGE = """
+<html><body>
+<img src="/img/img_cart_fv.png" alt="">
+<img src="/img/img_available_03.png" alt="提供可能">
+</body></html>
+"""
+
+
+def _start_server(routes, requests_log):
+    """パスとクエリに応じて記録済みのHTMLを返すサーバーを起動する"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, method):
+            parsed = urlparse(self.path)
+            body = None
+            if method == "POST":
+                length = int(self.headers.get("Content-Length", 0))
+                body = parse_qs(self.rfile.read(length).decode("utf-8"))
+            requests_log.append((method, self.path, body))
+            page = routes.get((method, parsed.path + (f"?{parsed.query}" if parsed.query else "")))
+            if callable(page):
+                page = page(body)
+            status = 200 if page is not None else 404
+            payload = (page or "not found").encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            self._reply("GET")
+
+        def do_POST(self):
+            self._reply("POST")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def _routes(candidate_href="/cart/address?code=A1"):
+    def _zip_page(body):
+        if body.get("zip") != ["5300001"] or body.get("token") != ["abc"] or body.get("search") != ["1"]:
+            return None
+        return CANDIDATE_PAGE.format(href=candidate_href)
+
+    return {
+        ("GET", "/cart/"): CART_PAGE,
+        ("POST", "/cart/zip"): _zip_page,
+        ("GET", "/cart/address?code=A1"): BANCHI_PAGE,
+        ("GET", "/cart/banchi?n=2"): GOU_PAGE,
+        ("GET", "/cart/gou?n=3"): CONFIRM_PAGE,
+        ("POST", "/cart/result"): RESULT_PAGE,
+    }
+
+
+def test_http_engine_follows_flow_to_result():
+    """郵便番号送信から番地・号の選択を経て提供可能と判定すること"""
+    requests_log = []
+    server, base_url = _start_server(_routes(), requests_log)
+    try:
+        parts = split_address(normalize_address("大阪府大阪市北区梅田1丁目2-3"))
+        result = search_service_area_west_http("5300001", parts, show_popup=False, base_url=base_url)
+    finally:
+        server.shutdown()
+
+    assert result["status"] == "available"
+    assert result["show_popup"] is False
+    assert "screenshot" not in result
+    visited = [(method, path) for method, path, _ in requests_log]
+    assert visited == [
+        ("GET", "/cart/"),
+        ("POST", "/cart/zip"),
+        ("GET", "/cart/address?code=A1"),
+        ("GET", "/cart/banchi?n=2"),
+        ("GET", "/cart/gou?n=3"),
+        ("POST", "/cart/result"),
+    ]
+
+
+def test_http_engine_keeps_shared_pool_between_searches():
+    """検索終了後も共有の接続プールが残り、判定結果が定義を共有しないこと"""
+    import services.area_search_http as area_search_http
+
+    server, base_url = _start_server(_routes(), [])
+    try:
+        parts = split_address(normalize_address("大阪府大阪市北区梅田1丁目2-3"))
+        result = search_service_area_west_http("5300001", parts, base_url=base_url)
+        assert len(area_search_http._shared_adapter.poolmanager.pools) > 0
+    finally:
+        server.shutdown()
+
+    result["details"]["備考"] = "changed"
+    assert area_search.RESULT_IMAGE_PATTERNS["available"]["details"].get("備考") != "changed"
+
+
+def test_http_engine_rejects_javascript_links():
+    """遷移先URLを持たない候補リンクは想定外として例外になること"""
+    server, base_url = _start_server(_routes("javascript:void(0)"), [])
+    try:
+        parts = split_address(normalize_address("大阪府大阪市北区梅田1丁目2-3"))
+        with pytest.raises(UnexpectedResponseError):
+            search_service_area_west_http("5300001", parts, base_url=base_url)
+    finally:
+        server.shutdown()
+
+
+def test_west_search_falls_back_to_selenium(monkeypatch):
+    """HTTPエンジンで判定できない場合はブラウザでの検索に進むこと"""
+    import services.area_search_http as area_search_http
+
+    def _unexpected(*args, **kwargs):
+        raise UnexpectedResponseError("想定外の画面")
+
+    def _stop_before_browser(*args, **kwargs):
+        raise RuntimeError("browser path reached")
+
+    monkeypatch.setattr(area_search_http, "search_service_area_west_http", _unexpected)
+    monkeypatch.setattr(area_search, "get_driver_pool", lambda *args, **kwargs: None)
+    monkeypatch.setattr(area_search, "create_driver", _stop_before_browser)
+    monkeypatch.setattr(area_search, "close_global_driver", lambda: None)
+
+    result = area_search.search_service_area_west("530-0001", "大阪府大阪市北区梅田1丁目2-3", engine="http")
+
+    assert result["status"] == "failure"
+    assert "browser path reached" in result["details"]["備考"]
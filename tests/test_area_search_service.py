@@ -0,0 +1,111 @@
+"""
+地域検索サービスのテストモジュール
+
+このモジュールは、一括取り込み、WALモードの長寿命接続と索引、
+電話番号順のページ取得、LRU＋有効期限のキャッシュをテストします。
+"""
+
+import sqlite3
+
+from services.area_search_service import AreaSearchService, LRUCache, read_phone_csv
+
+
+def _service(tmp_path):
+    service = AreaSearchService(str(tmp_path / "area.db"))
+    service.import_areas(
+        [("27", "大阪府", "オオサカフ"), ("13", "東京都", "トウキョウト")],
+        [("27127", "27", "大阪市北区", "オオサカシキタク"),
+         ("27100", "27", "大阪市", "オオサカシ"),
+         ("13103", "13", "港区", "ミナトク")],
+    )
+    return service
+
+
+def test_connection_is_reused_in_wal_mode(tmp_path, monkeypatch):
+    """接続を1つだけ開き、WALモードと市区町村の索引を使うこと"""
+    connects = []
+    original_connect = sqlite3.connect
+
+    def counting_connect(*args, **kwargs):
+        connects.append(args)
+        return original_connect(*args, **kwargs)
+
+    monkeypatch.setattr(sqlite3, "connect", counting_connect)
+    service = _service(tmp_path)
+    try:
+        assert [city["name"] for city in service.get_cities("27")] == ["大阪市", "大阪市北区"]
+        assert [p["name"] for p in service.get_prefectures()] == ["大阪府", "東京都"]
+        service.search_by_area("27", "27127")
+        assert len(connects) == 1
+
+        conn = service._connect()
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT code, name FROM cities WHERE prefecture_code = ? ORDER BY kana", ("27",)
+        ).fetchall()
+        assert "idx_cities_prefecture_kana" in " ".join(str(row) for row in plan)
+    finally:
+        service.close()
+
+
+def test_phone_import_and_paging(tmp_path):
+    """電話番号データを一括で取り込み、電話番号順にページ単位で取得できること"""
+    service = _service(tmp_path)
+    try:
+        rows = [(f"06-{i:04d}-0000", "27127", "NTT西日本", "") for i in range(250)]
+        rows.append(("０３１２３４５６７８", "13103", "NTT東日本", "本社"))
+        assert service.import_phone_numbers(rows, chunk_size=100) == 251
+        assert service.count_by_area("27127") == 250
+
+        pages = list(service.iter_area_pages("27", "27127", page_size=100))
+        assert [len(page) for page in pages] == [100, 100, 50]
+        numbers = [record["phone_number"] for page in pages for record in page]
+        assert numbers == sorted(numbers) and len(set(numbers)) == 250
+        assert pages[0][0]["area"] == "大阪府大阪市北区"
+
+        result = service.search_by_area("13", "13103")
+        assert result == [{"phone_number": "0312345678", "area": "東京都港区", "carrier": "NTT東日本", "note": "本社"}]
+        assert service.search_by_area("13", "27127") == []
+    finally:
+        service.close()
+
+
+def test_phone_import_skips_unknown_city_codes(tmp_path):
+    """未登録の市区町村コードの行は読み飛ばし、残りの行は取り込むこと"""
+    service = _service(tmp_path)
+    try:
+        rows = [
+            ("06-0000-0001", "27127", "NTT西日本", ""),
+            ("06-0000-0002", "99999", "NTT西日本", ""),
+            ("03-0000-0003", "13103", "NTT東日本", ""),
+        ]
+        skipped = []
+        assert service.import_phone_numbers(rows, skipped=skipped) == 2
+        assert skipped == [rows[1]]
+        assert service.count_by_area("27127") == 1
+        assert service.count_by_area("13103") == 1
+    finally:
+        service.close()
+
+
+def test_read_phone_csv_accepts_japanese_headers(tmp_path):
+    """日本語の見出しのCSVを読み込めること"""
+    path = tmp_path / "phones.csv"
+    path.write_text("電話番号,市区町村コード,事業者\n0612345678,27127,NTT西日本\n", encoding="utf-8")
+    assert list(read_phone_csv(str(path))) == [("0612345678", "27127", "NTT西日本", "")]
+
+
+def test_lru_cache_eviction_and_ttl():
+    """最も使われていない項目から削除し、期限切れは返さないこと"""
+    now = [0.0]
+    cache = LRUCache(max_size=2, ttl_seconds=10, clock=lambda: now[0])
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+    now[0] = 10
+    assert cache.get("a") is None
+    assert len(cache) == 1
@@ -0,0 +1,76 @@
+"""
+提供エリア一括判定のテストモジュール
+
+このモジュールは、ブラウザを使わない判定関数で
+入力読み込み・逐次書き込み・再開・集計をテストします。
+"""
+
+import json
+
+from services.batch_area_search import run_batch, read_input_rows, SiteRateLimiter
+
+
+def _fake_search(row, force_refresh=False, headless=True):
+    return {
+        "row": row["row"],
+        "postal_code": row["postal_code"],
+        "address": row["address"],
+        "status": "available",
+        "result": {"status": "available", "message": "提供可能"},
+        "cached": False,
+        "latency_sec": 0.01,
+        "finished_at": "2024-01-01T00:00:00",
+    }
+
+
+def _write_csv(path, rows):
+    lines = ["郵便番号,住所"] + [f"{postal},{address}" for postal, address in rows]
+    path.write_text("\n".join(lines), encoding="utf-8")
+
+
+def test_read_input_rows_csv_and_jsonl(tmp_path):
+    """CSV/JSONLの列名の違いを吸収して読み込めること"""
+    csv_path = tmp_path / "list.csv"
+    _write_csv(csv_path, [("530-0001", "大阪府大阪市北区梅田1-2-3")])
+    jsonl_path = tmp_path / "list.jsonl"
+    jsonl_path.write_text(
+        json.dumps({"postal_code": "1000001", "address": "東京都千代田区千代田1-1"}, ensure_ascii=False) + "\n",
+        encoding="utf-8"
+    )
+
+    assert list(read_input_rows(str(csv_path)))[0]["postal_code"] == "530-0001"
+    assert list(read_input_rows(str(jsonl_path)))[0]["address"] == "東京都千代田区千代田1-1"
+
+
+def test_run_batch_streams_and_resumes(tmp_path):
+    """結果が逐次書き込まれ、再実行時は完了済みの行をスキップすること"""
+    input_path = tmp_path / "list.csv"
+    _write_csv(input_path, [
+        ("530-0001", "大阪府大阪市北区梅田1-2-3"),
+        ("100-0001", "東京都千代田区千代田1-1"),
+        ("600-8001", "京都府京都市下京区四条通1"),
+    ])
+    output_path = tmp_path / "results.jsonl"
+    # 1行目だけ完了済み、途中で中断した書きかけ行が残っている状態
+    output_path.write_text(
+        json.dumps(_fake_search({"row": 1, "postal_code": "", "address": ""}), ensure_ascii=False) + "\n{\"row\": 2",
+        encoding="utf-8"
+    )
+
+    report = run_batch(str(input_path), str(output_path), workers=2,
+                       search_func=_fake_search, use_processes=False)
+
+    assert report["processed"] == 2
+    assert report["skipped"] == 1
+    assert report["status_counts"] == {"available": 2}
+    rows = [json.loads(line)["row"] for line in output_path.read_text(encoding="utf-8").splitlines()
+            if line.strip().endswith("}")]
+    assert sorted(rows) == [1, 2, 3]
+
+
+def test_rate_limiter_spaces_requests_per_site():
+    """同じサイトの連続実行は指定間隔で予約されること"""
+    limiter = SiteRateLimiter({"west": 60})
+    assert limiter.reserve("west") == 0.0
+    assert 0.9 < limiter.reserve("west") <= 1.0
+    assert limiter.reserve("east") == 0.0
@@ -0,0 +1,131 @@
+"""
+アプリ再起動をまたいだブラウザ再利用のテストモジュール
+
+このモジュールは、ブラウザを起動せずに、接続先の記録と終了済みの記録の削除、
+応答しないブラウザの終了、接続し直したドライバーの受け渡しをテストします。
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from services import browser_sessions
+
+
+class _FakeDriver:
+    def __init__(self, address="127.0.0.1:9222", pid=None):
+        self.capabilities = {"goog:chromeOptions": {"debuggerAddress": address}}
+        self.browser_pid = pid
+        self.window_handles = ["main"]
+        self.commands = []
+        self.quit_called = False
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.commands.append(cmd)
+        return {}
+
+    def quit(self):
+        self.quit_called = True
+
+
+@pytest.fixture
+def state_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "browser_sessions.json")
+    settings = dict(browser_sessions.DEFAULT_SESSION_REUSE_SETTINGS, enabled=True, state_path=path,
+                    previous_app_wait=0)
+    monkeypatch.setattr(browser_sessions, "_load_session_reuse_settings", lambda: settings)
+    monkeypatch.setattr(browser_sessions, "_restored", {})
+    monkeypatch.setattr(browser_sessions, "_handed_off", False)
+    return path
+
+
+def _read(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["browsers"]
+
+
+def test_register_prunes_exited_browsers(state_path):
+    """起動したブラウザを記録し、終了済みのブラウザの記録は削除すること"""
+    browser_sessions.register_browser(_FakeDriver("127.0.0.1:9001", pid=999999999), "west", headless=True)
+    browser_sessions.register_browser(_FakeDriver("127.0.0.1:9002", pid=os.getpid()), "east", headless=False)
+
+    browsers = _read(state_path)
+    assert list(browsers) == ["127.0.0.1:9002"]
+    entry = browsers["127.0.0.1:9002"]
+    assert entry["site"] == "east" and entry["headless"] is False
+    assert entry["pid"] == os.getpid() and entry["app_pid"] == os.getpid()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="sleep コマンドで代わりのプロセスを起動するため")
+def test_unresponsive_browser_is_reaped(state_path):
+    """デバッグ接続に応答しないブラウザは接続し直さずに終了し、記録から削除すること"""
+    process = subprocess.Popen(["sleep", "30"])
+    try:
+        browser_sessions._write_state(state_path, {
+            "127.0.0.1:1": {"site": "west", "headless": True, "pid": process.pid, "app_pid": 999999999},
+        })
+        assert browser_sessions.restore_browsers() == 0
+        assert process.wait(timeout=5) != 0
+        assert _read(state_path) == {}
+        assert browser_sessions.claim_restored_driver("west", True) == (None, False)
+    finally:
+        if process.poll() is None:
+            process.kill()
+
+
+def test_claim_matches_site_and_headless(state_path):
+    """接続し直したドライバーはサイトとヘッドレス設定が一致する検索にだけ渡し、表示ありはCookieを消去すること"""
+    headless = _FakeDriver()
+    visible = _FakeDriver()
+    browser_sessions._restored[("west", True)] = [(headless, True)]
+    browser_sessions._restored[("west", False)] = [(visible, False)]
+
+    assert browser_sessions.claim_restored_driver("east", True) == (None, False)
+    assert browser_sessions.claim_restored_driver("west", False) == (visible, False)
+    assert visible.commands == ["Network.clearBrowserCookies"]
+    assert browser_sessions.claim_restored_driver("west", True) == (headless, True)
+    assert headless.commands == []
+    assert browser_sessions.claim_restored_driver("west", True) == (None, False)
+
+
+def test_handoff_keeps_restored_browsers(state_path):
+    """再起動で引き継いだ後は、アプリ終了時にブラウザを終了しないこと"""
+    driver = _FakeDriver()
+    browser_sessions._restored[("east", True)] = [(driver, True)]
+    assert browser_sessions.handoff_browsers() >= 1
+    browser_sessions.shutdown_browser_sessions()
+    assert not driver.quit_called
+
+
+def test_handoff_quits_unrecorded_browsers(state_path, monkeypatch):
+    """記録できなかったブラウザは手放さずに終了し、記録したブラウザだけを残すこと"""
+    from services import area_search, area_search_east, driver_pool
+
+    recorded = _FakeDriver("127.0.0.1:9003", pid=os.getpid())
+    browser_sessions.register_browser(recorded, "west", headless=True)
+    unrecorded = _FakeDriver("127.0.0.1:9004", pid=None)
+    browser_sessions.register_browser(unrecorded, "west", headless=True)
+    visible = _FakeDriver("127.0.0.1:9005", pid=None)
+
+    monkeypatch.setattr(driver_pool, "detach_idle_drivers", lambda: [recorded, unrecorded])
+    monkeypatch.setattr(area_search, "global_driver", visible)
+    monkeypatch.setattr(area_search_east, "global_driver", None)
+
+    assert browser_sessions.handoff_browsers() == 1
+    assert not recorded.quit_called
+    assert unrecorded.quit_called and visible.quit_called
+    assert area_search.global_driver is None
+
+
+def test_detach_is_opt_in(monkeypatch):
+    """既定の設定では detach 起動しないこと"""
+    from selenium.webdriver.chrome.options import Options
+
+    monkeypatch.setattr(browser_sessions, "_load_session_reuse_settings",
+                        lambda: dict(browser_sessions.DEFAULT_SESSION_REUSE_SETTINGS))
+    options = Options()
+    browser_sessions.detach_options(options)
+    assert "detach" not in options.experimental_options
@@ -0,0 +1,151 @@
+"""
+検索ごとのキャンセルトークンのテストモジュール
+
+このモジュールは、キャンセル時に待機が即座に中断されること、同時に動く検索同士で
+キャンセルが混ざらないこと、登録したドライバーのプロセスツリーが終了することをテストします。
+"""
+
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from services import area_search
+from services.cancellation import (
+    CancellableWait,
+    CancellationError,
+    CancelToken,
+    kill_process_tree,
+    use_token,
+)
+
+_SLEEPER = [sys.executable, "-c", "import time; time.sleep(60)"]
+
+
+def _is_alive(pid):
+    """プロセスが動いているか（終了済み・ゾンビはFalse）"""
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except (OSError, IndexError):
+        return False
+
+
+class _FakeDriver:
+    """service.process.pid だけを持つドライバー"""
+
+    def __init__(self, process):
+        self.service = type("Service", (), {"process": process})()
+
+
+def _cancel_later(token, delay=0.05):
+    timer = threading.Timer(delay, token.cancel, args=("テスト",))
+    timer.start()
+    return timer
+
+
+def test_wait_wakes_immediately():
+    """キャンセルすると待機中の処理が100ms未満で戻り、処理終了までの時間を記録すること"""
+    token = CancelToken()
+    _cancel_later(token)
+    started = time.perf_counter()
+    with pytest.raises(CancellationError):
+        token.wait(10)
+    assert time.perf_counter() - started < 1.0
+    latency = token.mark_idle()
+    assert latency is not None and latency < 100
+
+    # キャンセルされていないトークンの mark_idle は何も記録しない
+    assert CancelToken().mark_idle() is None
+
+
+def test_cancellable_wait_interrupts_polling():
+    """CancellableWait のポーリング待機がキャンセルで中断されること"""
+    token = CancelToken()
+    _cancel_later(token)
+    started = time.perf_counter()
+    with use_token(token):
+        with pytest.raises(CancellationError):
+            CancellableWait(object(), 10, poll_frequency=5).until(lambda d: False)
+    assert token.mark_idle() < 100
+    assert time.perf_counter() - started < 1.0
+
+
+def test_no_cross_talk_between_searches():
+    """別スレッドの検索のキャンセルや従来のキャンセルフラグの影響を受けないこと"""
+    first, second = CancelToken(), CancelToken()
+    results = {}
+    ready = threading.Barrier(3)
+
+    def _search(name, token):
+        with use_token(token):
+            ready.wait()
+            ready.wait()
+            try:
+                area_search.check_cancellation()
+                results[name] = "continued"
+            except CancellationError:
+                results[name] = "cancelled"
+
+    threads = [threading.Thread(target=_search, args=("first", first)),
+               threading.Thread(target=_search, args=("second", second))]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    first.cancel("1件目だけ取り消し")
+    area_search.set_cancel_flag()
+    try:
+        ready.wait()
+        for thread in threads:
+            thread.join(5)
+    finally:
+        area_search.clear_cancel_flag()
+    assert results == {"first": "cancelled", "second": "continued"}
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="/proc でプロセスの終了を確認するため")
+def test_kill_process_tree():
+    """子プロセスごと終了すること"""
+    parent = subprocess.Popen(
+        [sys.executable, "-c",
+         "import subprocess, sys, time\n"
+         f"child = subprocess.Popen({_SLEEPER!r})\n"
+         "print(child.pid, flush=True)\n"
+         "time.sleep(60)"],
+        stdout=subprocess.PIPE, text=True,
+    )
+    child_pid = int(parent.stdout.readline())
+    assert _is_alive(child_pid)
+
+    kill_process_tree(parent.pid)
+    parent.wait(5)
+    deadline = time.monotonic() + 5
+    while _is_alive(child_pid) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not _is_alive(child_pid)
+
+
+def test_registered_driver_is_killed_on_cancel():
+    """登録したドライバーはキャンセルで終了し、登録を外したドライバーは終了しないこと"""
+    process = subprocess.Popen(_SLEEPER)
+    kept = subprocess.Popen(_SLEEPER)
+    try:
+        token = CancelToken()
+        token.register_driver(_FakeDriver(kept))
+        token.release_drivers()
+        token.register_driver(_FakeDriver(process))
+        token.cancel("テスト")
+        assert process.wait(5) is not None
+        assert kept.poll() is None
+
+        # キャンセル済みのトークンに登録したドライバーはその場で終了する
+        late = subprocess.Popen(_SLEEPER)
+        token.register_driver(_FakeDriver(late))
+        assert late.wait(5) is not None
+    finally:
+        for proc in (process, kept):
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
@@ -0,0 +1,114 @@
+"""
+CTI画面へのアクセス方法（バックエンド）のテストモジュール
+
+このモジュールは、Windowsの user32 / kernel32 の代わりに偽の関数を使い、
+WinEventフックの登録に失敗・遅延した場合の定期確認への切り替えと、
+遅れて登録されたフックの解除をテストします。
+"""
+
+import ctypes
+import threading
+from ctypes import wintypes
+
+import pytest
+
+from services.cti_backends import Win32PollingBackend, WinEventHookBackend
+
+
+class _FakeUser32:
+    """フックの登録結果と登録の遅延を指定できる user32"""
+
+    def __init__(self, hook_ok=True, delay=None):
+        self.hook_ok = hook_ok
+        self.delay = delay
+        self.registered = []
+        self.unhooked = []
+        self.quit = threading.Event()
+
+    def GetWindowThreadProcessId(self, window, pid_ref):
+        return 0
+
+    def SetWinEventHook(self, event_min, event_max, module, proc, pid, thread, flags):
+        if self.delay is not None:
+            self.delay.wait(5)
+        handle = len(self.registered) + 1 if self.hook_ok else 0
+        self.registered.append(handle)
+        return handle
+
+    def UnhookWinEvent(self, hook):
+        self.unhooked.append(hook)
+
+    def PeekMessageW(self, msg_ref, hwnd, msg_min, msg_max, remove):
+        return 0
+
+    def GetMessageW(self, msg_ref, hwnd, msg_min, msg_max):
+        self.quit.wait(5)
+        return 0
+
+    def PostThreadMessageW(self, thread_id, message, wparam, lparam):
+        self.quit.set()
+        return 1
+
+
+class _FakeKernel32:
+    def GetCurrentThreadId(self):
+        return threading.get_ident()
+
+
+def _backend(user32, monkeypatch):
+    polled = []
+    monkeypatch.setattr(Win32PollingBackend, "watch", lambda self, window, notify: polled.append(window))
+    monkeypatch.setattr(Win32PollingBackend, "unwatch", lambda self: None)
+    backend = WinEventHookBackend.__new__(WinEventHookBackend)
+    backend._ctypes = ctypes
+    backend._wintypes = wintypes
+    backend._user32 = user32
+    backend._kernel32 = _FakeKernel32()
+    backend._proc_type = lambda callback: callback
+    backend._hook_thread = None
+    backend._hook_state = None
+    return backend, polled
+
+
+@pytest.fixture
+def short_ready_wait(monkeypatch):
+    """watch がフックの登録を待つ時間を短くする"""
+    original_wait = threading.Event.wait
+    monkeypatch.setattr(threading.Event, "wait",
+                        lambda self, timeout=None: original_wait(self, 0.05 if timeout == 2.0 else timeout))
+
+
+def test_fallback_is_decided_per_watch(monkeypatch):
+    """フックの登録に失敗した監視だけ定期確認になり、次の監視では改めてフックを使うこと"""
+    user32 = _FakeUser32(hook_ok=False)
+    backend, polled = _backend(user32, monkeypatch)
+
+    backend.watch(100, lambda kind, handle: None)
+    assert backend.event_driven is False
+    assert polled == [100]
+
+    user32.hook_ok = True
+    backend.watch(200, lambda kind, handle: None)
+    assert backend.event_driven is True
+    assert polled == [100]
+    backend.unwatch()
+    assert user32.quit.is_set()
+
+
+def test_late_hooks_are_removed_after_timeout(monkeypatch, short_ready_wait):
+    """登録が時間内に終わらなかったフックは、後から登録されても解除してスレッドを終了すること"""
+    delay = threading.Event()
+    user32 = _FakeUser32(delay=delay)
+    backend, polled = _backend(user32, monkeypatch)
+
+    backend.watch(100, lambda kind, handle: None)
+    assert backend.event_driven is False
+    assert polled == [100]
+    hook_threads = [t for t in threading.enumerate() if t.name == "CTIWinEventHook"]
+    assert len(hook_threads) == 1
+
+    delay.set()
+    hook_threads[0].join(5)
+    assert not hook_threads[0].is_alive()
+    assert sorted(user32.unhooked) == sorted(user32.registered)
+    assert not user32.quit.is_set()
@@ -0,0 +1,165 @@
+"""
+CTI状態監視のテストモジュール
+
+このモジュールは、メモリ上のCTI画面（FakeCTIBackend）で、状態変化の検出
+（発信中→通話中の自動処理・通話時間の閾値・通話終了）と、アクションボタンによる
+キャンセル、ウィンドウの再検出、通知待ちの間に状態を読み直さないことをテストします。
+"""
+
+import threading
+import time
+
+import pytest
+
+from services.cti_backends import FakeCTIBackend
+from services.cti_status_monitor import CTIStatus, CTIStatusMonitor, run_benchmark
+
+
+def _wait_until(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+@pytest.fixture
+def make_monitor():
+    monitors = []
+
+    def _make(backend, **callbacks):
+        monitor = CTIStatusMonitor(backend=backend, **callbacks)
+        monitor.enable_auto_processing = True
+        monitor.call_duration_threshold = 0
+        monitor.event_fallback_interval = 60
+        monitor.start_monitoring()
+        monitors.append(monitor)
+        assert _wait_until(lambda: monitor.current_status == CTIStatus.WAITING)
+        return monitor
+
+    yield _make
+    for monitor in monitors:
+        monitor.stop_monitoring()
+
+
+def test_dialing_to_talking_and_call_ended(make_monitor):
+    """発信中→通話中で自動処理を1回実行し、通話中→待ち受け中で通話終了を通知すること"""
+    backend = FakeCTIBackend()
+    started, ended = threading.Event(), threading.Event()
+    calls = []
+    monitor = make_monitor(
+        backend,
+        on_dialing_to_talking_callback=lambda: calls.append("auto"),
+        on_talking_started_callback=started.set,
+        on_call_ended_callback=ended.set,
+    )
+    assert backend.watched_window == backend.window
+
+    backend.set_status_text("発信中")
+    assert _wait_until(lambda: monitor.current_status == CTIStatus.DIALING)
+    backend.set_status_text("通話中")
+    assert started.wait(3)
+    assert _wait_until(lambda: calls == ["auto"])
+    assert monitor.is_processing
+
+    backend.set_status_text("待ち受け中")
+    assert ended.wait(3)
+    assert calls == ["auto"]
+
+
+def test_waiting_to_talking_does_not_trigger(make_monitor):
+    """発信中を経由しない通話中では自動処理を実行しないこと"""
+    backend = FakeCTIBackend()
+    calls = []
+    monitor = make_monitor(backend, on_dialing_to_talking_callback=lambda: calls.append("auto"))
+
+    backend.set_status_text("通話中")
+    assert _wait_until(lambda: monitor.current_status == CTIStatus.TALKING)
+    time.sleep(0.05)
+    assert calls == []
+
+
+def test_call_duration_threshold():
+    """通話時間の閾値を過ぎても通話中なら自動処理を実行し、先に終話した場合は実行しないこと"""
+    backend = FakeCTIBackend()
+    triggered = threading.Event()
+    monitor = CTIStatusMonitor(on_dialing_to_talking_callback=triggered.set, backend=backend)
+    monitor.enable_auto_processing = True
+    monitor.call_duration_threshold = 0.1
+    monitor.event_fallback_interval = 60
+    monitor.start_monitoring()
+    try:
+        assert _wait_until(lambda: monitor.current_status == CTIStatus.WAITING)
+        backend.set_status_text("発信中")
+        assert _wait_until(lambda: monitor.current_status == CTIStatus.DIALING)
+        backend.set_status_text("通話中")
+        assert not triggered.wait(0.05)
+        assert triggered.wait(3)
+
+        triggered.clear()
+        monitor.is_processing = False
+        backend.set_status_text("待ち受け中")
+        backend.set_status_text("発信中")
+        assert _wait_until(lambda: monitor.current_status == CTIStatus.DIALING)
+        backend.set_status_text("通話中")
+        assert _wait_until(lambda: monitor.current_status == CTIStatus.TALKING)
+        backend.set_status_text("待ち受け中")
+        assert not triggered.wait(0.3)
+    finally:
+        monitor.stop_monitoring()
+
+
+def test_action_button_press_cancels_processing(make_monitor):
+    """アクションボタンの押下で処理をキャンセルし、他のコントロールの押下は無視すること"""
+    backend = FakeCTIBackend()
+    cancelled = []
+    monitor = make_monitor(backend, on_cancel_processing_callback=cancelled.append)
+    monitor.is_processing = True
+
+    backend._emit("press", backend.status_handle)
+    time.sleep(0.05)
+    assert cancelled == []
+
+    backend.press_button("NG")
+    assert _wait_until(lambda: cancelled == ["NG"])
+    assert monitor.is_processing is False
+
+
+def test_redetects_reopened_window(make_monitor):
+    """ウィンドウが閉じられたら、開き直したウィンドウを再検出して監視すること"""
+    backend = FakeCTIBackend()
+    monitor = make_monitor(backend)
+    monitor.window_redetect_interval = 0.05
+    old_window = backend.window
+
+    backend.close_window()
+    assert _wait_until(lambda: monitor.window_handle is None)
+    new_window = backend.open_window()
+    assert _wait_until(lambda: backend.watched_window == new_window)
+    assert new_window != old_window
+
+    backend.set_status_text("発信中")
+    assert _wait_until(lambda: monitor.current_status == CTIStatus.DIALING)
+
+
+def test_event_driven_idle_does_not_read_status(make_monitor):
+    """通知で検出する場合、状態が変わらない間は状態表示を読み直さないこと"""
+    backend = FakeCTIBackend()
+    monitor = make_monitor(backend)
+    reads, wakeups = backend.text_reads, monitor.loop_wakeups
+
+    time.sleep(0.3)
+
+    assert backend.text_reads == reads
+    assert monitor.loop_wakeups == wakeups
+
+
+def test_benchmark_event_faster_than_polling():
+    """ベンチマークで、通知による検出が定期的な確認より速く、待機中の動作が少ないこと"""
+    event = run_benchmark(True, iterations=5, idle_seconds=0.3, poll_interval=0.05)
+    polling = run_benchmark(False, iterations=5, idle_seconds=0.3, poll_interval=0.05)
+
+    assert event["detected"] == polling["detected"] == 5
+    assert event["latency_p50_ms"] < polling["latency_p50_ms"]
+    assert event["idle_wakeups_per_sec"] < polling["idle_wakeups_per_sec"]
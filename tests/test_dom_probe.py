@@ -0,0 +1,76 @@
+"""
+一括DOM取得のテストモジュール
+
+このモジュールは、ブラウザを起動せずに偽ドライバーで
+1回の通信で取得した値が要素ごとの問い合わせなしに使えることをテストします。
+"""
+
+from selenium.webdriver.remote.webelement import WebElement
+
+from services.area_search import find_best_address_match
+from services.dom_probe import ProbedElement, any_visible, probe_elements
+
+
+class FakeDriver:
+    """execute_script の呼び出し回数を数える偽ドライバー"""
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.calls = []
+
+    def execute_script(self, script, *args):
+        self.calls.append(args)
+        return [dict(entry, element=WebElement(self, entry["id"])) for entry in self.entries]
+
+    def execute(self, *args, **kwargs):
+        raise AssertionError("要素ごとの問い合わせは発生しないはず")
+
+
+def test_probe_returns_cached_metadata():
+    """テキスト・表示状態・属性を追加の通信なしで返すこと"""
+    driver = FakeDriver([
+        {"id": "e1", "visible": True, "text": "提供可能", "attrs": {"src": "https://x/img_available_03.png", "alt": "提供可能"}},
+        {"id": "e2", "visible": False, "text": "", "attrs": {"src": "https://x/logo.png", "alt": None}},
+    ])
+
+    images = probe_elements(driver, "img", ("src", "alt"))
+
+    assert len(driver.calls) == 1
+    assert driver.calls[0] == ("img", ["src", "alt"], False, None)
+    assert [image.id for image in images] == ["e1", "e2"]
+    assert isinstance(images[0], WebElement)
+    assert images[0].is_displayed() is True
+    assert images[0].get_attribute("src").endswith("img_available_03.png")
+    assert images[1].is_displayed() is False
+    assert images[1].get_attribute("alt") is None
+    assert len(driver.calls) == 1
+
+
+def test_probed_candidates_work_with_address_matching():
+    """住所候補の選択に要素ごとのtext取得が不要であること"""
+    driver = FakeDriver([
+        {"id": "c1", "visible": True, "text": "大阪府大阪市北区梅田２丁目", "attrs": {}},
+        {"id": "c2", "visible": True, "text": "大阪府大阪市北区梅田１丁目", "attrs": {}},
+    ])
+
+    candidates = probe_elements(driver, "#addressSelectModal ul li a")
+    best, similarity = find_best_address_match("大阪府大阪市北区梅田1丁目", candidates)
+
+    assert isinstance(best, ProbedElement)
+    assert best.id == "c2"
+    assert similarity > 0.9
+    assert len(driver.calls) == 1
+
+
+def test_any_visible_uses_single_query():
+    """複数セレクタの表示判定を、結合せずに1回の通信で行うこと"""
+
+    class VisibleDriver(FakeDriver):
+        def execute_script(self, script, *args):
+            self.calls.append(args)
+            return True
+
+    driver = VisibleDriver([])
+
+    assert any_visible(driver, [".loading", "div:has-text(読込)", ".spinner"]) is True
+    assert driver.calls == [([".loading", "div:has-text(読込)", ".spinner"],)]
@@ -0,0 +1,188 @@
+"""
+Chrome起動準備のキャッシュのテストモジュール
+
+このモジュールは、バイナリのバージョンとドライバーの解決結果がディスクにキャッシュされ、
+ファイルが更新されたら取り直されること、共有サービスのブラウザのPIDを特定できること、
+起動時間が集計されることをテストします。
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.selenium_manager import SeleniumManager
+
+from services import web_driver
+from services.cancellation import _driver_pid, find_child_process
+from services.driver_bootstrap import ChromeBootstrap
+
+
+def _write_binary(path, content="v1"):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return str(path)
+
+
+def test_version_is_cached_until_binary_changes(tmp_path, monkeypatch):
+    """--version はファイルが変わるまで再実行せず、キャッシュはファイルに残ること"""
+    calls = []
+
+    def _fake_version(path):
+        calls.append(path)
+        return "ChromeDriver 120.0.6099.109"
+
+    monkeypatch.setattr(web_driver, "_get_binary_version_output", _fake_version)
+    binary = _write_binary(tmp_path / "chromedriver")
+    cache_path = str(tmp_path / "bootstrap.json")
+
+    bootstrap = ChromeBootstrap(cache_path=cache_path)
+    assert bootstrap.get_version(binary) == "ChromeDriver 120.0.6099.109"
+    assert bootstrap.get_version(binary) == "ChromeDriver 120.0.6099.109"
+    assert ChromeBootstrap(cache_path=cache_path).get_version(binary) == "ChromeDriver 120.0.6099.109"
+    assert len(calls) == 1
+
+    _write_binary(binary, "v2-updated")
+    ChromeBootstrap(cache_path=cache_path).get_version(binary)
+    assert len(calls) == 2
+
+    # 存在しないバイナリは実行しない
+    assert bootstrap.get_version(str(tmp_path / "missing")) == ""
+    assert len(calls) == 2
+
+
+def test_driver_resolution_is_cached(tmp_path, monkeypatch):
+    """Selenium Manager の解決結果を再利用し、ブラウザが更新されたら解決し直すこと"""
+    chrome = _write_binary(tmp_path / "chrome")
+    driver = _write_binary(tmp_path / "chromedriver")
+    calls = []
+
+    def _fake_driver_location(self, options):
+        calls.append(options)
+        options.binary_location = chrome
+        return driver
+
+    monkeypatch.setattr(SeleniumManager, "driver_location", _fake_driver_location)
+    monkeypatch.setattr(web_driver, "_find_bundled_chromedriver", lambda: "")
+    cache_path = str(tmp_path / "bootstrap.json")
+
+    assert ChromeBootstrap(cache_path=cache_path).resolve_driver(Options()) == (driver, "selenium-manager")
+    options = Options()
+    assert ChromeBootstrap(cache_path=cache_path).resolve_driver(options) == (driver, "selenium-manager")
+    assert options.binary_location == chrome
+    assert len(calls) == 1
+
+    _write_binary(chrome, "chrome-auto-updated")
+    ChromeBootstrap(cache_path=cache_path).resolve_driver(Options())
+    assert len(calls) == 2
+
+
+def test_startup_is_recorded(tmp_path, monkeypatch):
+    """起動ごとに時間を記録し、集計できること"""
+    bootstrap = ChromeBootstrap(cache_path=None)
+    monkeypatch.setattr(bootstrap, "resolve_driver", lambda options: ("chromedriver", "selenium-manager"))
+    monkeypatch.setattr(bootstrap, "_attach", lambda driver_path, options: "driver")
+
+    assert bootstrap.start_chrome(Options()) == ("driver", "selenium-manager")
+    bootstrap.start_chrome(Options())
+    stats = bootstrap.get_startup_stats()
+    assert stats["count"] == 2
+    assert stats["total_p50_ms"] >= stats["session_p50_ms"] >= 0
+
+
+def test_chrome_binary_is_found_once(monkeypatch):
+    """Chrome本体の探索は見つかった後は起動のたびに行わないこと"""
+    calls = []
+
+    def _fake_find():
+        calls.append(1)
+        return "C:/Chrome/chrome.exe" if len(calls) > 1 else ""
+
+    monkeypatch.setattr(web_driver, "_find_chrome_binary", _fake_find)
+    bootstrap = ChromeBootstrap(cache_path=None)
+    assert bootstrap.find_chrome_binary() == ""
+    assert bootstrap.find_chrome_binary() == "C:/Chrome/chrome.exe"
+    assert bootstrap.find_chrome_binary() == "C:/Chrome/chrome.exe"
+    assert len(calls) == 2
+
+
+def test_cancel_never_targets_shared_service():
+    """共有サービスのセッションでブラウザのPIDが不明でも、共有の chromedriver を終了対象にしないこと"""
+
+    class _Process:
+        pid = 4321
+
+    class _SharedSession:
+        service = None
+        shared_service = type("Service", (), {"process": _Process()})()
+        browser_pid = None
+
+    session = _SharedSession()
+    assert _driver_pid(session) is None
+    session.browser_pid = 1234
+    assert _driver_pid(session) == 1234
+
+
+def test_unknown_browser_pid_uses_dedicated_service(monkeypatch):
+    """ブラウザのPIDを特定できない場合は専用のサービスで起動し直し、以降も共有サービスを使わないこと"""
+    from services import cancellation, driver_bootstrap
+
+    class _Process:
+        pid = 4321
+
+        def poll(self):
+            return None
+
+    class _FakeShared:
+        def __init__(self, service, options):
+            self.shared_service = service
+            self.browser_pid = None
+            self.capabilities = {"chrome": {"userDataDir": "/tmp/profile"}}
+            self.quit_called = False
+            attached.append(self)
+
+        def quit(self):
+            self.quit_called = True
+
+    attached, dedicated = [], []
+    service = type("Service", (), {"process": _Process()})()
+    monkeypatch.setattr(driver_bootstrap, "SharedServiceChrome", _FakeShared)
+    monkeypatch.setattr(cancellation, "find_child_process", lambda pid, marker: None)
+    bootstrap = ChromeBootstrap(cache_path=None)
+    monkeypatch.setattr(bootstrap, "resolve_driver", lambda options: ("chromedriver", "selenium-manager"))
+    monkeypatch.setattr(bootstrap, "_get_service", lambda driver_path: service)
+    monkeypatch.setattr(bootstrap, "_start_dedicated",
+                        lambda driver_path, options: dedicated.append(driver_path) or "dedicated-driver")
+
+    assert bootstrap.start_chrome(Options()) == ("dedicated-driver", "selenium-manager")
+    assert len(attached) == 1 and attached[0].quit_called
+    assert bootstrap.start_chrome(Options()) == ("dedicated-driver", "selenium-manager")
+    assert len(attached) == 1
+    assert dedicated == ["chromedriver", "chromedriver"]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="/proc でコマンドラインを参照するため")
+def test_find_child_process():
+    """子孫のうちコマンドラインに目印を含むプロセスを特定できること"""
+    parent = subprocess.Popen(
+        [sys.executable, "-c",
+         "import subprocess, sys, time\n"
+         "child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)', '--user-data-dir=/tmp/scoped_dir_1'])\n"
+         "print(child.pid, flush=True)\n"
+         "time.sleep(60)"],
+        stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        child_pid = int(parent.stdout.readline())
+        # 子プロセスの起動直後はコマンドラインが置き換わっていない場合がある
+        deadline = time.time() + 5
+        while find_child_process(parent.pid, "/tmp/scoped_dir_1") is None and time.time() < deadline:
+            time.sleep(0.05)
+        assert find_child_process(parent.pid, "/tmp/scoped_dir_1") == child_pid
+        assert find_child_process(parent.pid, "/tmp/other_dir") is None
+    finally:
+        os.kill(child_pid, 9)
+        parent.kill()
+        parent.wait()
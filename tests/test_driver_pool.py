@@ -0,0 +1,134 @@
+"""
+ドライバープールのテストモジュール
+
+このモジュールは、ブラウザを起動せずに偽ドライバーで
+プールの貸し出し・返却・作り直しをテストします。
+"""
+
+import time
+
+from services.driver_pool import DriverPool
+
+
+class FakeDriver:
+    """テスト用の偽ドライバー"""
+
+    def __init__(self):
+        self.visited = []
+        self.cookies_cleared = 0
+        self.quit_called = False
+        self.healthy = True
+        self.window_handles = ["main"]
+        self.switch_to = self
+
+    def window(self, handle):
+        pass
+
+    def set_page_load_timeout(self, value):
+        pass
+
+    def set_script_timeout(self, value):
+        pass
+
+    def implicitly_wait(self, value):
+        pass
+
+    def get(self, url):
+        self.visited.append(url)
+
+    def delete_all_cookies(self):
+        self.cookies_cleared += 1
+
+    def execute_script(self, script):
+        if not self.healthy:
+            raise RuntimeError("browser is gone")
+        return "complete"
+
+    def quit(self):
+        self.quit_called = True
+
+
+def _wait_until(predicate, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def _make_pool(created, **kwargs):
+    def factory(headless=False):
+        driver = FakeDriver()
+        created.append(driver)
+        return driver
+    return DriverPool("west", factory, **kwargs)
+
+
+def test_acquire_returns_prewarmed_driver():
+    """補充後は表示済みのドライバーが貸し出されること"""
+    created = []
+    pool = _make_pool(created)
+    assert pool.acquire() == (None, False)
+    assert _wait_until(lambda: pool.get_stats()["idle"] == 1)
+
+    driver, prewarmed = pool.acquire()
+    assert prewarmed is True
+    assert driver.visited == ["https://flets-w.com/cart/"]
+    pool.shutdown()
+
+
+def test_release_resets_driver():
+    """返却したドライバーがリセットされて再利用されること"""
+    created = []
+    pool = _make_pool(created, size=1)
+    driver = FakeDriver()
+    pool.adopt(driver)
+    pool.release(driver)
+    assert _wait_until(lambda: pool.get_stats()["idle"] == 1)
+    assert driver.cookies_cleared == 1
+
+    reused, prewarmed = pool.acquire()
+    assert reused is driver and prewarmed
+    pool.shutdown()
+
+
+def test_unhealthy_driver_is_recycled():
+    """ヘルスチェックに失敗したドライバーは終了されること"""
+    created = []
+    pool = _make_pool(created, size=1)
+    pool.prewarm_async()
+    assert _wait_until(lambda: pool.get_stats()["idle"] == 1)
+    created[0].healthy = False
+
+    driver, _ = pool.acquire()
+    assert driver is None
+    assert created[0].quit_called
+    assert pool.get_stats()["recycled"] == 1
+    pool.shutdown()
+
+
+def test_max_uses_triggers_recycle():
+    """使用回数上限に達したドライバーは再利用されないこと"""
+    created = []
+    pool = _make_pool(created, size=1, max_uses=1)
+    driver = FakeDriver()
+    pool.adopt(driver)
+    pool.release(driver)
+    assert _wait_until(lambda: driver.quit_called)
+    pool.shutdown()
+
+
+def test_detach_idle_keeps_drivers_open():
+    """再起動で引き継ぐ場合は待機中のドライバーを終了せずに外し、補充も止めること"""
+    created = []
+    pool = _make_pool(created)
+    pool.acquire()
+    assert _wait_until(lambda: pool.get_stats()["idle"] == 1)
+
+    detached = pool.detach_idle()
+    assert detached == created[:1]
+    assert not detached[0].quit_called
+    assert pool.acquire() == (None, False)
+    time.sleep(0.05)
+    assert len(created) == 1
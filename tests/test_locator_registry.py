@@ -0,0 +1,82 @@
+"""
+ロケータ実績のテストモジュール
+
+このモジュールは、ブラウザを起動せずに偽ドライバーで、最後に成功したロケータを
+先頭にした試行順序、実績の保存と、まとめて調べる探索での採用順をテストします。
+"""
+
+from services.locator_registry import LocatorRegistry, find_first_clickable
+
+LOCATORS = [
+    ("xpath", "//button[@aria-label='詳細']"),
+    ("id", "info-button"),
+    ("css selector", "button[class*='info']"),
+]
+
+
+class _FakeDriver:
+    """execute_script でロケータごとの一致を返すドライバー"""
+
+    def __init__(self, visible):
+        self.visible = set(visible)
+        self.probes = 0
+
+    def execute_script(self, script, probes):
+        self.probes += 1
+        return [[index, f"element:{value}"] for index, (_, value) in enumerate(probes) if value in self.visible]
+
+
+def test_last_winner_is_tried_first(tmp_path):
+    """最後に成功したロケータが先頭になり、実績が再読み込み後も残ること"""
+    path = str(tmp_path / "locator_stats.json")
+    registry = LocatorRegistry(path)
+    assert registry.order("mapfan", "detail_button", LOCATORS) == LOCATORS
+
+    registry.record("mapfan", "detail_button", LOCATORS[0], False)
+    registry.record("mapfan", "detail_button", LOCATORS[2], True, 120.0)
+    reloaded = LocatorRegistry(path)
+    assert reloaded.order("mapfan", "detail_button", LOCATORS) == [LOCATORS[2], LOCATORS[0], LOCATORS[1]]
+    assert reloaded.order("mapfan", "search_button", LOCATORS) == LOCATORS
+
+    rows = reloaded.get_stats("mapfan")
+    assert rows[0]["locator"] == "css selector=button[class*='info']"
+    assert rows[0]["successes"] == 1 and rows[0]["avg_ms"] == 120.0
+    assert reloaded.get_stats("west") == []
+
+
+def test_race_prefers_ranked_locator(tmp_path):
+    """まとめて調べた結果から順位の高いロケータを採用し、次回はそれを先頭にすること"""
+    registry = LocatorRegistry(str(tmp_path / "locator_stats.json"))
+    driver = _FakeDriver({'[id="info-button"]', "button[class*='info']"})
+
+    # 先頭のロケータが現れないため、待ってから2番目を採用する
+    element = find_first_clickable(driver, "mapfan", "detail_button", LOCATORS, 0.1, registry=registry, race=True)
+    assert element == 'element:[id="info-button"]'
+    assert driver.probes > 1
+    assert registry.order("mapfan", "detail_button", LOCATORS)[0] == LOCATORS[1]
+
+    # 次回は先頭で見つかるため、1回の呼び出しで採用する
+    driver.probes = 0
+    element = find_first_clickable(driver, "mapfan", "detail_button", LOCATORS, 5, registry=registry, race=True)
+    assert element == 'element:[id="info-button"]'
+    assert driver.probes == 1
+
+    missing = find_first_clickable(_FakeDriver(set()), "mapfan", "detail_button", LOCATORS, 0.05,
+                                   registry=registry, race=True)
+    assert missing is None
+    stats = {row["locator"]: row for row in registry.get_stats("mapfan")}
+    assert stats["xpath=//button[@aria-label='詳細']"]["failures"] == 2
+
+
+def test_unsupported_locator_uses_sequential_search(tmp_path, monkeypatch):
+    """まとめて調べられないロケータを含む場合は、スクリプトを実行せずに順に試すこと"""
+    from selenium.webdriver.support import expected_conditions as EC
+
+    registry = LocatorRegistry(str(tmp_path / "locator_stats.json"))
+    driver = _FakeDriver({"info"})
+    locators = [("link text", "詳細"), ("id", "info-button")]
+    monkeypatch.setattr(EC, "element_to_be_clickable", lambda locator: lambda d: f"element:{locator[1]}")
+
+    element = find_first_clickable(driver, "mapfan", "detail_button", locators, 0.05, registry=registry, race=True)
+    assert element == "element:詳細"
+    assert driver.probes == 0
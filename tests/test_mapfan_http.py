@@ -0,0 +1,126 @@
+"""
+MapFanスポットURLのHTTP解決のテストモジュール
+
+このモジュールは、ローカルの代替サーバーで大きさの異なるページを返し、
+リンクが見つかった時点での打ち切り、分割位置をまたぐリンクの検出、
+接続の再利用をテストします。
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from services.mapfan_http import CHUNK_SIZE, SpotLinkScanner, resolve_spot_url
+
+SPOT_PATH = "/map/spots/A,1234,5678,90"
+LINK = f'<a href="{SPOT_PATH}">詳細</a>'.encode("utf-8")
+
+
+HEAD = "<html><head><title>住所検索 | MapFan</title></head>\n".encode("utf-8")
+BLOCKED = (
+    "<html><head><title>ERROR: The request could not be satisfied</title></head>"
+    "<body>Generated by cloudfront (CloudFront)</body></html>"
+).encode("utf-8")
+
+
+def _page(size, link_at=None):
+    filler = "<div>住所の検索結果</div>\n".encode("utf-8")
+    body = (HEAD + filler * (size // len(filler) + 1))[:size]
+    if link_at is None:
+        return body
+    return body[:link_at] + LINK + body[link_at:]
+
+
+PAGES = {
+    "/small": _page(2 * 1024, link_at=100),
+    "/large-early": _page(2 * 1024 * 1024, link_at=1024),
+    "/large-late": _page(512 * 1024, link_at=512 * 1024 - 10),
+    "/split": _page(64 * 1024, link_at=CHUNK_SIZE - 15),
+    "/none": _page(256 * 1024),
+    "/blocked": BLOCKED,
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        type(self).connections += 1
+
+    def do_GET(self):
+        body = PAGES[self.path]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_scanner_finds_link_across_chunks():
+    """1バイトずつ届いてもリンクの終わりまで揃った時点で検出すること"""
+    scanner = SpotLinkScanner()
+    found = [scanner.feed(bytes([byte])) for byte in _page(300, link_at=200)]
+    first = next(index for index, path in enumerate(found) if path)
+    assert found[first] == SPOT_PATH
+    # 閉じ引用符が届いた時点で検出する
+    assert first == 200 + len(LINK.split(b'"')[0]) + 1 + len(SPOT_PATH)
+
+    tail = SpotLinkScanner()
+    assert tail.feed(f"xx{SPOT_PATH}".encode()) is None
+    assert tail.finish() == SPOT_PATH
+
+
+def test_stops_reading_after_match(server_url):
+    """大きいページでもリンクが見つかった時点で読み込みを打ち切ること"""
+    result = resolve_spot_url(f"{server_url}/large-early", base_url="https://mapfan.com")
+    assert result["url"] == f"https://mapfan.com{SPOT_PATH}"
+    assert result["bytes_read"] <= 2 * CHUNK_SIZE
+    assert result["time_to_match_ms"] is not None
+
+    late = resolve_spot_url(f"{server_url}/large-late")
+    assert late["url"].endswith(SPOT_PATH)
+    assert late["bytes_read"] >= 512 * 1024 - 10
+
+    split = resolve_spot_url(f"{server_url}/split")
+    assert split["url"].endswith(SPOT_PATH)
+
+    missing = resolve_spot_url(f"{server_url}/none")
+    assert missing["url"] is None and missing["time_to_match_ms"] is None
+    assert missing["results_page"] is True
+    assert missing["bytes_read"] == len(PAGES["/none"])
+
+
+def test_small_pages_reuse_connection(server_url):
+    """残りが小さいページは読み切って、次の解決で同じ接続を使うこと"""
+    resolve_spot_url(f"{server_url}/small")
+    before = _Handler.connections
+    for _ in range(3):
+        assert resolve_spot_url(f"{server_url}/small")["url"].endswith(SPOT_PATH)
+    assert _Handler.connections == before
+
+
+def test_block_page_is_not_a_results_page(server_url):
+    """リンクのないブロックページは検索結果ページと判定しないこと"""
+    blocked = resolve_spot_url(f"{server_url}/blocked")
+    assert blocked["url"] is None
+    assert blocked["results_page"] is False
@@ -0,0 +1,173 @@
+"""
+MapFan用常駐ブラウザセッションのテストモジュール
+
+このモジュールは、ブラウザを起動せずに偽ドライバーで、常駐ブラウザの貸し出し・
+ヘルスチェック失敗時の作り直しと、2回目以降の検索で起動と地図画面の表示を
+省略することをテストします。
+"""
+
+import threading
+
+import pytest
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+
+from services import mapfan_service
+from services.mapfan_session import MapfanSession
+from services.mapfan_url_cache import MapfanUrlCache
+
+
+class _FakeDriver:
+    def __init__(self):
+        self.current_url = "https://mapfan.com/map"
+        self.quit_called = False
+
+    def implicitly_wait(self, value):
+        pass
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_checkout_reuses_and_recreates():
+    """預けたブラウザを貸し出し、ヘルスチェックに失敗したら終了して作り直させること"""
+    session = MapfanSession(max_uses=2)
+    assert session.checkout(True, lambda d: True) == (None, True)
+    driver = _FakeDriver()
+    session.checkin(True, driver)
+
+    assert session.checkout(True, lambda d: True) == (driver, True)
+    session.checkin(True, driver)
+    # 使用回数の上限
+    assert session.checkout(True, lambda d: True) == (None, True)
+    assert driver.quit_called
+    session.checkin(True, None)
+
+    blocked = _FakeDriver()
+    assert session.checkout(False, lambda d: True) == (None, True)
+    session.checkin(False, blocked)
+    assert session.checkout(False, lambda d: False) == (None, True)
+    assert blocked.quit_called
+    session.checkin(False, None)
+    assert session.get_stats()["recreated"] == 2
+
+
+def test_busy_session_falls_back():
+    """貸し出し中は待ってもセッションを使わずに検索させること"""
+    session = MapfanSession(checkout_wait_seconds=0.05)
+    assert session.checkout(True, lambda d: True) == (None, True)
+    result = []
+    thread = threading.Thread(target=lambda: result.append(session.checkout(True, lambda d: True)))
+    thread.start()
+    thread.join(2)
+    assert result == [(None, False)]
+    session.checkin(True, _FakeDriver())
+
+
+@pytest.fixture
+def fake_service(tmp_path, monkeypatch):
+    session = MapfanSession()
+    created, opened, searched, resets = [], [], [], []
+    monkeypatch.setattr(mapfan_service, "get_mapfan_session", lambda: session)
+    monkeypatch.setattr(mapfan_service, "get_mapfan_url_cache", lambda: MapfanUrlCache(str(tmp_path / "c.json")))
+    monkeypatch.setattr(mapfan_service, "load_browser_settings", lambda: {"mapfan_direct_url": False})
+
+    def fake_create_driver(**kwargs):
+        driver = _FakeDriver()
+        created.append(driver)
+        return driver
+
+    def fake_open(self, driver, headless):
+        opened.append(driver)
+        driver.current_url = "https://mapfan.com/map"
+        return True
+
+    def fake_search(self, driver, wait, address, previous_result=None):
+        first_attempt = address not in searched
+        searched.append(address)
+        if address.startswith("失敗") and first_attempt:
+            raise TimeoutException("検索欄が見つかりません")
+        driver.current_url = f"https://mapfan.com/map/words/{address}"
+
+    def fake_click(self, driver, address, exclude=None):
+        driver.current_url = f"https://mapfan.com/map/spots/A,{len(searched)}"
+        return True
+
+    def fake_reset(self, driver):
+        resets.append(driver.current_url)
+        driver.current_url = "https://mapfan.com/map"
+        return True
+
+    monkeypatch.setattr(mapfan_service, "create_driver", fake_create_driver)
+    monkeypatch.setattr(mapfan_service.MapfanService, "_open_map_page", fake_open)
+    monkeypatch.setattr(mapfan_service.MapfanService, "_input_address_and_search", fake_search)
+    monkeypatch.setattr(mapfan_service.MapfanService, "_click_left_panel_info_button", fake_click)
+    monkeypatch.setattr(mapfan_service.MapfanService, "_reset_session_page", fake_reset)
+    monkeypatch.setattr(mapfan_service.MapfanService, "_detail_page_matches_address",
+                        lambda self, d, address: "別の住所" not in address)
+    monkeypatch.setattr(mapfan_service.MapfanService, "_is_session_healthy", lambda self, d: not d.quit_called)
+    service = mapfan_service.MapfanService(debug=False)
+    service.resets = resets
+    return service, created, opened
+
+
+def test_warm_session_skips_launch_and_navigation(fake_service):
+    """2回目以降は起動と地図画面の表示を省略し、失敗時は地図画面を開き直して再試行すること"""
+    service, created, opened = fake_service
+    assert service.get_detail_url_from_address("東京都千代田区1", auto_close=True, force_headless=True)
+    assert service.get_detail_url_from_address("東京都千代田区2", auto_close=True, force_headless=True)
+    assert len(created) == 1 and len(opened) == 1
+    assert not created[0].quit_called
+
+    url = service.get_detail_url_from_address("失敗する住所", force_headless=True)
+    assert url.startswith("https://mapfan.com/map/spots/")
+    assert len(created) == 1 and len(opened) == 2
+    # 詳細画面のまま預けず、毎回地図画面に戻している
+    assert len(service.resets) == 3
+    assert all("/map/spots/" in url for url in service.resets)
+
+
+def test_warm_url_is_cached_only_when_detail_matches(fake_service, tmp_path, monkeypatch):
+    """常駐ブラウザで取得したURLは、詳細画面の住所が一致しない場合は保存しないこと"""
+    service, created, opened = fake_service
+    cache = MapfanUrlCache(str(tmp_path / "warm.json"))
+    monkeypatch.setattr(mapfan_service, "get_mapfan_url_cache", lambda: cache)
+
+    assert service.get_detail_url_from_address("東京都千代田区1", force_headless=True)
+    assert service.get_detail_url_from_address("別の住所の東京都千代田区2", force_headless=True)
+    assert len(created) == 1
+    assert cache.get("東京都千代田区1")[0] is True
+    assert cache.get("別の住所の東京都千代田区2") == (False, None)
+
+
+class _Element:
+    def __init__(self, stale=False):
+        self.stale = stale
+
+    def is_enabled(self):
+        if self.stale:
+            raise StaleElementReferenceException("stale")
+        return True
+
+
+def test_wait_for_search_result_ignores_previous_result(monkeypatch):
+    """前回の結果のiボタンが取り除かれるまでは、検索結果が表示されたとみなさないこと"""
+    service = mapfan_service.MapfanService(debug=False)
+    old = _Element()
+    checks, checks_before_stale = [], []
+
+    class _Driver:
+        def execute_script(self, script, *args):
+            checks.append(script)
+            return True
+
+    def fake_find(self, driver, key=""):
+        if len(checks_before_stale) < 3:
+            checks_before_stale.append(1)
+            return old
+        old.stale = True
+        return None
+
+    monkeypatch.setattr(mapfan_service.MapfanService, "_find_left_panel_info_button", fake_find)
+    service._wait_for_search_result(_Driver(), None, previous_result=old)
+    assert len(checks_before_stale) == 3
+    assert len(checks) == 1
@@ -0,0 +1,111 @@
+"""
+MapFan詳細URLキャッシュのテストモジュール
+
+このモジュールは、MapFanへ問い合わせずに、住所キーの正規化・有効期限・保存件数の上限・
+スポットが見つからなかった住所の保存と、先読みの重複防止をテストします。
+"""
+
+import json
+import threading
+
+from services import mapfan_service
+from services.mapfan_url_cache import MapfanUrlCache, build_address_key
+
+SPOT_URL = "https://mapfan.com/map/spots/A,1,2,3"
+
+
+def _stored_at(path, key, stored_at):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    data["entries"][key]["stored_at"] = stored_at
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def test_build_address_key_normalizes_address():
+    """全角数字・ハイフン・空白の表記ゆれが同じキーになること"""
+    assert build_address_key("大阪府大阪市北区梅田１－２－３") == build_address_key(" 大阪府大阪市北区梅田 1-2-3 ")
+    assert build_address_key("  ") is None
+
+
+def test_entries_persist_and_expire(tmp_path):
+    """保存したURLとスポットなしの住所が再読み込み後も使え、それぞれの有効期限で消えること"""
+    path = str(tmp_path / "mapfan_url_cache.json")
+    cache = MapfanUrlCache(path, ttl_seconds=3600, negative_ttl_seconds=60)
+    cache.set("東京都千代田区丸の内1-1-1", SPOT_URL, "http")
+    cache.set("東京都千代田区丸の内9-9-9", None, "http")
+
+    reloaded = MapfanUrlCache(path, ttl_seconds=3600, negative_ttl_seconds=60)
+    assert reloaded.get("東京都千代田区丸の内１－１－１") == (True, SPOT_URL)
+    assert reloaded.get("東京都千代田区丸の内9-9-9") == (True, None)
+
+    _stored_at(path, "東京都千代田区丸の内9-9-9", 0)
+    _stored_at(path, "東京都千代田区丸の内1-1-1", 10 ** 10)
+    expired = MapfanUrlCache(path, ttl_seconds=3600, negative_ttl_seconds=60)
+    assert expired.get("東京都千代田区丸の内9-9-9") == (False, None)
+    assert expired.get("東京都千代田区丸の内1-1-1") == (True, SPOT_URL)
+    stats = expired.get_stats()
+    assert stats["expired"] == 1 and stats["entries"] == 1
+
+
+def test_oldest_entries_are_trimmed(tmp_path):
+    """件数の上限を超えたら古いものから削除すること"""
+    cache = MapfanUrlCache(str(tmp_path / "cache.json"), max_entries=2)
+    for number in range(3):
+        cache.set(f"東京都千代田区丸の内{number}", SPOT_URL, "http")
+    assert cache.get("東京都千代田区丸の内0") == (False, None)
+    assert cache.get("東京都千代田区丸の内2") == (True, SPOT_URL)
+
+
+def test_service_uses_cache_and_prefetch(tmp_path, monkeypatch):
+    """先読み中の住所は結果を待って重複して問い合わせず、スポットなしの住所は次回問い合わせないこと"""
+    cache = MapfanUrlCache(str(tmp_path / "cache.json"))
+    monkeypatch.setattr(mapfan_service, "get_mapfan_url_cache", lambda: cache)
+    monkeypatch.setattr(mapfan_service, "load_browser_settings", lambda: {"mapfan_direct_url": True})
+
+    release = threading.Event()
+    fetched = []
+
+    def fake_fetch(self, words_url):
+        fetched.append(words_url)
+        release.wait(5)
+        return {"url": SPOT_URL if "1-1-1" in words_url else None, "results_page": True}
+
+    monkeypatch.setattr(mapfan_service.MapfanService, "_fetch_spot_url", fake_fetch)
+    service = mapfan_service.MapfanService(debug=False)
+
+    thread = mapfan_service.prefetch_mapfan_url("東京都千代田区丸の内1-1-1")
+    assert mapfan_service.prefetch_mapfan_url("東京都千代田区丸の内１－１－１") is None
+    release.set()
+    assert service.get_detail_url_from_address("東京都千代田区丸の内1-1-1") == SPOT_URL
+    thread.join(5)
+    assert len(fetched) == 1
+    assert mapfan_service.get_cached_mapfan_url("東京都千代田区丸の内1-1-1") == SPOT_URL
+
+    words_url = service.get_detail_url_from_address("東京都千代田区丸の内9-9-9")
+    assert words_url.startswith("https://mapfan.com/map/words/")
+    assert service.get_detail_url_from_address("東京都千代田区丸の内9-9-9") == words_url
+    assert len(fetched) == 2
+
+
+def test_partial_address_and_unrecognised_page_are_not_cached(tmp_path, monkeypatch):
+    """入力途中の住所は先読みせず、検索結果と判定できないページはスポットなしとして保存しないこと"""
+    cache = MapfanUrlCache(str(tmp_path / "cache.json"))
+    monkeypatch.setattr(mapfan_service, "get_mapfan_url_cache", lambda: cache)
+    monkeypatch.setattr(mapfan_service, "load_browser_settings", lambda: {"mapfan_direct_url": True})
+    fetched = []
+
+    def fake_fetch(self, words_url):
+        fetched.append(words_url)
+        return {"url": None, "results_page": False}
+
+    monkeypatch.setattr(mapfan_service.MapfanService, "_fetch_spot_url", fake_fetch)
+
+    assert mapfan_service.prefetch_mapfan_url("東京都千代田区") is None
+    assert mapfan_service.prefetch_mapfan_url("東京都千代田区丸の内") is None
+    assert fetched == []
+
+    service = mapfan_service.MapfanService(debug=False)
+    words_url = service.get_detail_url_from_address("東京都千代田区丸の内9-9-9")
+    assert words_url.startswith("https://mapfan.com/map/words/")
+    assert cache.get("東京都千代田区丸の内9-9-9") == (False, None)
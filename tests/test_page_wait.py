@@ -0,0 +1,102 @@
+"""
+イベント駆動待機のテストモジュール
+
+このモジュールは、ブラウザを起動せずに偽ドライバーで
+監視スクリプトの分割実行・再試行・キャンセル・短縮時間の集計をテストします。
+"""
+
+import time
+
+import pytest
+
+from services.area_search import RESULT_IMAGE_PATTERNS
+from services.page_wait import PageWaiter, build_result_image_selectors
+
+
+class FakeDriver:
+    """execute_async_script の戻り値を順に返す偽ドライバー"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.specs = []
+        self.current_url = "about:blank"
+
+    def execute_async_script(self, script, spec):
+        self.specs.append(spec)
+        response = self.responses.pop(0) if self.responses else None
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def test_wait_for_returns_matched_selector():
+    """監視スクリプトが検出したセレクタを返し、固定待機との差を記録すること"""
+    driver = FakeDriver(["#DIALOG_ID01"])
+    waiter = PageWaiter(driver, "west")
+
+    matched = waiter.wait_for(["#DIALOG_ID01", "#id_tak_bt_nx"], timeout=5, step="番地", baseline=1)
+
+    assert matched == "#DIALOG_ID01"
+    assert driver.specs[0]["mode"] == "selector"
+    assert driver.specs[0]["state"] == "visible"
+    assert driver.specs[0]["timeout_ms"] <= 500
+    summary = waiter.get_summary()
+    assert summary["waits"] == 1
+    assert summary["baseline_sec"] == 1
+    assert summary["saved_sec"] > 0.5
+
+
+def test_wait_retries_after_navigation_error():
+    """画面遷移でスクリプトが失敗しても再試行して検出すること"""
+    driver = FakeDriver([RuntimeError("script interrupted"), None, "settled"])
+    waiter = PageWaiter(driver, "east", slice_seconds=0.01)
+
+    assert waiter.settle(1, step="スクロール") is True
+    assert len(driver.specs) == 3
+    assert driver.specs[-1]["quiet_ms"] == 50
+
+
+def test_wait_times_out_and_checks_cancellation():
+    """タイムアウト時はNoneを返し、分割ごとにキャンセルを確認すること"""
+    waiter = PageWaiter(FakeDriver([]), "west", slice_seconds=0.01)
+    assert waiter.wait_for_change(0.02) is False
+
+    calls = []
+
+    def cancel_check():
+        calls.append(1)
+        if len(calls) > 3:
+            raise RuntimeError("cancelled")
+
+    waiter = PageWaiter(FakeDriver([]), "west", cancel_check=cancel_check, slice_seconds=0.01)
+    with pytest.raises(RuntimeError):
+        waiter.wait_for_hidden("#DIALOG_ID02", timeout=5)
+    assert len(calls) == 4
+
+
+def test_wait_for_change_enforces_min_interval():
+    """DOMが変化し続けても最小間隔が経過するまでは戻らないこと"""
+    driver = FakeDriver(["mutation"])
+    waiter = PageWaiter(driver, "west")
+
+    started = time.monotonic()
+    assert waiter.wait_for_change(1, min_interval=0.1) is True
+    assert time.monotonic() - started >= 0.09
+    assert len(driver.specs) == 1
+
+
+def test_wait_until_polls_predicate():
+    """DOM監視できない条件はポーリングで待機すること"""
+    driver = FakeDriver([])
+    waiter = PageWaiter(driver, "east")
+    driver.current_url = "https://flets.com/cao/InputAddressNum"
+
+    assert waiter.wait_until(lambda d: "InputAddressNum" in d.current_url, timeout=1, baseline=2)
+    assert waiter.get_summary()["saved_sec"] > 1.5
+
+
+def test_result_image_selectors_cover_patterns():
+    """結果画像パターンごとのセレクタが生成されること"""
+    selectors = build_result_image_selectors(RESULT_IMAGE_PATTERNS)
+    assert 'img[src*="img_available_03.png" i]' in selectors
+    assert any(s.startswith("img[alt*=") for s in selectors)
@@ -0,0 +1,87 @@
+"""
+郵便番号索引のテストモジュール
+
+このモジュールは、KEN_ALL 形式の CSV からの索引生成（複数行の町域・注記の除去）、
+メモリマップした索引の検索、郵便番号と住所の整合性チェックと東西判定をテストします。
+"""
+
+from services.area_search import is_east_japan
+from utils.postal_index import (
+    PostalIndex,
+    build_postal_index,
+    check_postal_address,
+    read_ken_all,
+    run_benchmark,
+)
+
+KEN_ALL_ROWS = [
+    '27127,"530  ","5300001","ｵｵｻｶﾌ","ｵｵｻｶｼｷﾀｸ","ｳﾒﾀﾞ","大阪府","大阪市北区","梅田",0,0,1,0,0,0',
+    '27127,"530  ","5300000","ｵｵｻｶﾌ","ｵｵｻｶｼｷﾀｸ","ｲｶﾆｹｲｻｲｶﾞﾅｲﾊﾞｱｲ","大阪府","大阪市北区","以下に掲載がない場合",0,0,0,0,0,0',
+    '01101,"060  ","0600042","ﾎｯｶｲﾄﾞｳ","ｻｯﾎﾟﾛｼﾁｭｳｵｳｸ","ｵｵﾄﾞｵﾘﾆｼ","北海道","札幌市中央区","大通西（１～１９丁目、",1,0,1,0,0,0',
+    '01101,"060  ","0600042","ﾎｯｶｲﾄﾞｳ","ｻｯﾎﾟﾛｼﾁｭｳｵｳｸ","ｵｵﾄﾞｵﾘﾆｼ","北海道","札幌市中央区","２０丁目）",1,0,1,0,0,0',
+    '13208,"182  ","1820000","ﾄｳｷｮｳﾄ","ﾁｮｳﾌｼ","","東京都","調布市","",0,0,0,0,0,0',
+    '13208,"182  ","1820000","ﾄｳｷｮｳﾄ","ﾁｮｳﾌｼ","","東京都","調布市","",0,0,0,0,0,0',
+]
+
+
+def _build(tmp_path):
+    source = tmp_path / "KEN_ALL.CSV"
+    source.write_bytes("\r\n".join(KEN_ALL_ROWS).encode("cp932"))
+    path = tmp_path / "postal_index.bin"
+    count = build_postal_index(read_ken_all(str(source)), str(path))
+    return count, PostalIndex(str(path))
+
+
+def test_build_and_lookup(tmp_path):
+    """KEN_ALL 形式の CSV から索引を作り、郵便番号で町域を引けること"""
+    count, index = _build(tmp_path)
+    try:
+        assert count == 4
+        assert len(index) == 4
+
+        entries = index.lookup("530-0001")
+        assert [(e.prefecture, e.city, e.town) for e in entries] == [("大阪府", "大阪市北区", "梅田")]
+        assert entries[0].municipality_code == "27127"
+
+        # 括弧書きが複数行に分かれた町域は結合して括弧を除く
+        assert index.lookup("０６０００４２")[0].town == "大通西"
+        # 「以下に掲載がない場合」は町域なし
+        assert index.lookup("5300000")[0].address == "大阪府大阪市北区"
+
+        assert index.lookup("9999999") == []
+        assert index.lookup("123") == []
+        assert "1820000" in index
+        assert "1820001" not in index
+    finally:
+        index.close()
+
+
+def test_postal_address_consistency():
+    """郵便番号と住所の都道府県・市区町村の不一致を検出すること"""
+    result = check_postal_address("530-0001", "大阪府大阪市北区梅田1丁目")
+    assert result["known"] and result["consistent"] is True
+
+    # 政令市の区の省略は一致とみなす
+    assert check_postal_address("5300001", "大阪府大阪市梅田1丁目")["consistent"] is True
+
+    result = check_postal_address("5300001", "東京都港区芝公園4丁目")
+    assert result["consistent"] is False
+    assert result["level"] == "prefecture"
+    assert "大阪府大阪市北区" in result["message"]
+
+    assert check_postal_address("5300001", "大阪府堺市堺区")["level"] == "city"
+    assert check_postal_address("0000000", "大阪府大阪市北区")["known"] is False
+
+
+def test_routing_uses_postal_code():
+    """住所だけでは都道府県が決まらない場合に郵便番号で東西を判定すること"""
+    assert is_east_japan("府中市府中町1-1", "183-0055") is True
+    assert is_east_japan("府中市府中町1-1", "726-0005") is False
+
+
+def test_benchmark_runs():
+    """ベンチマークが生成・読み込み・検索の時間を返すこと"""
+    result = run_benchmark(lookups=2000)
+    assert result["records"] > 100000
+    assert result["lookups_per_sec"] > 0
+    assert result["hit_ratio"] > 0.5
@@ -0,0 +1,173 @@
+"""
+オフライン再生ハーネスのテストモジュール
+
+このモジュールは、パフォーマンスログからの応答の記録（工程名・絶対URLの置き換え・
+リダイレクト）、再生サーバーの応答順・遅延注入、開始URLの上書きをテストします。
+"""
+
+import http.client
+import json
+import os
+import time
+
+from services import replay_harness
+from services.driver_pool import get_site_url, set_site_url_override
+from services.replay_harness import ReplayRecorder, ReplayServer, load_manifest, process_tree_rss
+from services.search_trace import SearchTrace
+
+
+def _log(method, **params):
+    return {"message": json.dumps({"message": {"method": method, "params": params}})}
+
+
+class _FakeDriver:
+    """パフォーマンスログとCDPの応答本文だけを返すドライバー"""
+
+    def __init__(self, batches, bodies):
+        self.batches = list(batches)
+        self.bodies = bodies
+
+    def get_log(self, kind):
+        assert kind == "performance"
+        return self.batches.pop(0) if self.batches else []
+
+    def execute_cdp_cmd(self, command, params):
+        assert command == "Network.getResponseBody"
+        return self.bodies[params["requestId"]]
+
+
+def _record(tmp_path):
+    origin = "https://flets-w.com"
+    page = '<html><script src="https://flets-w.com/cart/app.js"></script>住所</html>'
+    batches = [
+        [
+            _log("Network.requestWillBeSent", requestId="1", request={"url": origin + "/cart", "method": "GET"}),
+            _log("Network.requestWillBeSent", requestId="1", request={"url": origin + "/cart/", "method": "GET"},
+                 redirectResponse={"status": 301}),
+            _log("Network.responseReceived", requestId="1",
+                 response={"url": origin + "/cart/", "status": 200, "mimeType": "text/html"}),
+            _log("Network.loadingFinished", requestId="1"),
+            _log("Network.requestWillBeSent", requestId="2", request={"url": "https://cdn.example.com/x.js", "method": "GET"}),
+            _log("Network.responseReceived", requestId="2",
+                 response={"url": "https://cdn.example.com/x.js", "status": 200, "mimeType": "application/javascript"}),
+            _log("Network.loadingFinished", requestId="2"),
+            _log("Network.requestWillBeSent", requestId="3", request={"url": origin + "/cart/api?ts=1", "method": "POST"}),
+            _log("Network.responseReceived", requestId="3",
+                 response={"url": origin + "/cart/api?ts=1", "status": 200, "mimeType": "application/json"}),
+        ],
+        [
+            _log("Network.loadingFinished", requestId="3"),
+            _log("Network.requestWillBeSent", requestId="4", request={"url": origin + "/cart/api?ts=2", "method": "POST"}),
+            _log("Network.responseReceived", requestId="4",
+                 response={"url": origin + "/cart/api?ts=2", "status": 200, "mimeType": "application/json"}),
+            _log("Network.loadingFinished", requestId="4"),
+        ],
+    ]
+    bodies = {
+        "1": {"body": page, "base64Encoded": False},
+        "3": {"body": '{"step": 1}', "base64Encoded": False},
+        "4": {"body": '{"step": 2}', "base64Encoded": False},
+    }
+    trace = SearchTrace("west")
+    recorder = ReplayRecorder(_FakeDriver(batches, bodies), "west", str(tmp_path),
+                              case={"postal_code": "5300001", "address": "大阪府大阪市北区梅田1丁目1-1"})
+    trace.add_listener(recorder.on_trace_event)
+    trace.mark("page_load")
+    trace.mark("postal_input")
+    trace.finish("available")
+    return load_manifest(str(tmp_path))
+
+
+def test_recorder_saves_same_origin_responses(tmp_path):
+    """同一オリジンの応答だけを工程名つきで記録し、絶対URLを相対パスにすること"""
+    manifest = _record(tmp_path)
+
+    assert manifest["site"] == "west"
+    assert manifest["start_path"] == "/cart/"
+    assert manifest["case"]["postal_code"] == "5300001"
+    entries = manifest["entries"]
+    assert [(e["method"], e["path"], e["status"]) for e in entries] == [
+        ("GET", "/cart", 301), ("GET", "/cart/", 200), ("POST", "/cart/api?ts=1", 200), ("POST", "/cart/api?ts=2", 200)
+    ]
+    assert entries[0]["location"] == "/cart/"
+    # 読み込み完了が次の工程で届いた応答は、受け取った時点の工程で記録する
+    assert [e["step"] for e in entries] == ["browser_start", "browser_start", "page_load", "page_load"]
+    with open(os.path.join(tmp_path, entries[1]["body"]), "rb") as f:
+        html = f.read().decode("utf-8")
+    assert 'src="/cart/app.js"' in html
+
+
+def test_server_replays_in_order_with_latency(tmp_path):
+    """記録順に応答し、遅延を注入し、記録にない要求は404として数えること"""
+    _record(tmp_path)
+    with ReplayServer(str(tmp_path), latency_ms=60) as server:
+        host, port = server.base_url.replace("http://", "").split(":")
+        connection = http.client.HTTPConnection(host, int(port), timeout=5)
+
+        started = time.perf_counter()
+        connection.request("GET", "/cart")
+        response = connection.getresponse()
+        response.read()
+        assert response.status == 301
+        assert response.getheader("Location") == "/cart/"
+        assert time.perf_counter() - started >= 0.06
+
+        # クエリが違っても同じパスの記録を順番に返し、尽きたら最後の応答を返す
+        bodies = []
+        for ts in ("9", "10", "11"):
+            connection.request("POST", f"/cart/api?ts={ts}", body=b"zip=5300001")
+            response = connection.getresponse()
+            bodies.append(json.loads(response.read()))
+        assert bodies == [{"step": 1}, {"step": 2}, {"step": 2}]
+
+        connection.request("GET", "/unknown.js")
+        response = connection.getresponse()
+        response.read()
+        assert response.status == 404
+        assert server.misses == ["GET /unknown.js"]
+        assert server.requests_served == 4
+
+        server.reset()
+        connection.request("POST", "/cart/api?ts=1")
+        assert json.loads(connection.getresponse().read()) == {"step": 1}
+        connection.close()
+
+
+def test_site_url_override(monkeypatch):
+    """開始URLを上書き・環境変数で差し替えられること"""
+    monkeypatch.delenv("TELEPHONETOOL_EAST_URL", raising=False)
+    assert get_site_url("east") == "https://flets.com/app_new/cao/"
+    monkeypatch.setenv("TELEPHONETOOL_EAST_URL", "http://127.0.0.1:8001/app_new/cao/")
+    assert get_site_url("east") == "http://127.0.0.1:8001/app_new/cao/"
+    set_site_url_override("east", "http://127.0.0.1:9000/app_new/cao/")
+    try:
+        assert get_site_url("east") == "http://127.0.0.1:9000/app_new/cao/"
+    finally:
+        set_site_url_override("east", None)
+    assert get_site_url("east") == "http://127.0.0.1:8001/app_new/cao/"
+
+
+def test_harness_options_and_memory(monkeypatch):
+    """記録・再生中だけ起動オプションを追加し、プロセスのメモリを取得できること"""
+
+    class _Options:
+        def __init__(self):
+            self.arguments, self.capabilities = [], {}
+
+        def add_argument(self, value):
+            self.arguments.append(value)
+
+        def set_capability(self, name, value):
+            self.capabilities[name] = value
+
+    options = _Options()
+    replay_harness.apply_harness_options(options)
+    assert options.arguments == [] and options.capabilities == {}
+
+    monkeypatch.setitem(replay_harness._harness_state, "recording_dir", "recordings/x")
+    monkeypatch.setitem(replay_harness._harness_state, "offline", True)
+    replay_harness.apply_harness_options(options)
+    assert options.capabilities["goog:loggingPrefs"] == {"performance": "ALL"}
+    assert options.arguments[0].startswith("--host-resolver-rules=")
+
+    assert process_tree_rss(os.getpid()) > 0
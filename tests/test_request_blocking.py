@@ -0,0 +1,101 @@
+"""
+通信遮断プロファイルのテストモジュール
+
+このモジュールは、遮断パターンの組み立て（許可リストの優先と従来方式での扱い）、
+Chromeの対応状況に応じた適用方式の切り替え、遮断件数・推定削減量の集計をテストします。
+"""
+
+import json
+
+from services.area_search import _result_image_allowlist
+from services.request_blocking import (
+    apply_blocking_profile,
+    build_block_rules,
+    get_blocking_profile,
+    log_blocking_stats,
+    summarize_network_log,
+)
+
+
+class _FakeDriver:
+    """execute_cdp_cmd の呼び出しを記録するドライバー"""
+
+    def __init__(self, supports_url_patterns=True, log=None):
+        self.supports_url_patterns = supports_url_patterns
+        self.commands = []
+        self.log = log or []
+
+    def execute_cdp_cmd(self, cmd, params):
+        if cmd == "Network.setBlockedURLs" and "urls" not in params and not self.supports_url_patterns:
+            raise RuntimeError("invalid argument: Failed to deserialize params.urls")
+        self.commands.append((cmd, params))
+        return {}
+
+    def get_log(self, log_type):
+        entries, self.log = self.log, []
+        return entries
+
+
+def _event(method, **params):
+    return {"message": json.dumps({"message": {"method": method, "params": params}})}
+
+
+def test_allowlist_precedes_blocking():
+    """許可リストは遮断より先に並び、従来方式では許可リストのある分類を遮断しないこと"""
+    profile = get_blocking_profile("west", settings={})
+    rules = build_block_rules(profile, allow={"images": _result_image_allowlist()})
+
+    allowed = [p["urlPattern"] for p in rules["url_patterns"] if not p["block"]]
+    first_block = next(i for i, p in enumerate(rules["url_patterns"]) if p["block"])
+    assert "*://*:*/*img_available_03.png*" in allowed
+    assert first_block == len(allowed)
+    assert {"urlPattern": "*://*:*/*.png", "block": True} in rules["url_patterns"]
+
+    assert rules["legacy_skipped"] == ["images"]
+    assert "*.png" not in rules["legacy_urls"]
+    assert "*.woff2" in rules["legacy_urls"]
+    assert "*://*.google-analytics.com/*" in rules["legacy_urls"]
+
+
+def test_profile_override_from_settings():
+    """settings.json のプロファイルで分類と追加のホストを変更できること"""
+    settings = {"profiles": {"mapfan": {"categories": ["fonts"], "hosts": ["tracker.example.jp"]}}}
+    rules = build_block_rules(get_blocking_profile("mapfan", settings=settings))
+    assert "*://tracker.example.jp/*" in rules["legacy_urls"]
+    assert "*.woff" in rules["legacy_urls"]
+    assert not any("doubleclick" in url for url in rules["legacy_urls"])
+
+
+def test_apply_falls_back_to_legacy_urls():
+    """urlPatterns に対応していない Chrome では従来の urls で遮断すること"""
+    modern = _FakeDriver()
+    assert apply_blocking_profile(modern, "east") == "urlPatterns"
+    assert modern.commands[-1][1].keys() == {"urlPatterns"}
+
+    legacy = _FakeDriver(supports_url_patterns=False)
+    assert apply_blocking_profile(legacy, "west", allow={"images": ["img_available"]}) == "urls"
+    assert "*.png" not in legacy.commands[-1][1]["urls"]
+
+
+def test_blocked_requests_are_counted():
+    """遮断件数と、同種の読み込み平均サイズからの推定削減量を集計すること"""
+    log = [
+        _event("Network.requestWillBeSent", requestId="1", type="Font"),
+        _event("Network.loadingFinished", requestId="1", encodedDataLength=30000),
+        _event("Network.requestWillBeSent", requestId="2", type="Font"),
+        _event("Network.loadingFailed", requestId="2", type="Font", blockedReason="inspector"),
+        _event("Network.requestWillBeSent", requestId="3", type="Script"),
+        _event("Network.loadingFailed", requestId="3", type="Script", blockedReason="inspector"),
+        _event("Network.requestWillBeSent", requestId="4", type="XHR"),
+        _event("Network.loadingFailed", requestId="4", type="XHR", errorText="net::ERR_FAILED"),
+    ]
+    stats = summarize_network_log(log)
+    assert stats["blocked"] == 2
+    assert stats["blocked_by_type"] == {"Font": 1, "Script": 1}
+    assert stats["loaded"] == 1 and stats["loaded_bytes"] == 30000
+    assert stats["saved_bytes"] == 30000 + 30 * 1024
+
+    driver = _FakeDriver(log=log)
+    apply_blocking_profile(driver, "east")
+    assert log_blocking_stats(driver)["blocked"] == 2
+    assert log_blocking_stats(_FakeDriver(log=log)) is None
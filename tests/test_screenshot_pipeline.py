@@ -0,0 +1,98 @@
+"""
+スクリーンショット非同期保存のテストモジュール
+
+このモジュールは、書き込みスレッドによる保存・完了通知・完了待ち、
+保存中の画像がキャッシュから落とされないこと、古いデバッグ画像の削除をテストします。
+"""
+
+import os
+import threading
+import time
+
+from services.area_search_cache import AreaSearchCache
+from services.screenshot_pipeline import (
+    ScreenshotWriter,
+    cleanup_debug_screenshots,
+    encode_image,
+)
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+
+
+def test_submit_returns_before_write_and_notifies(tmp_path):
+    """保存先をすぐに返し、書き込み完了後にコールバックが呼ばれること"""
+    writer = ScreenshotWriter({"format": "png", "cleanup_interval_seconds": 3600})
+    gate = threading.Event()
+    original_write = writer._write
+
+    def _slow_write(job):
+        gate.wait(2.0)
+        original_write(job)
+
+    writer._write = _slow_write
+    notified = []
+    path = writer.submit(PNG_BYTES, str(tmp_path / "debug_available.png"), callback=notified.append)
+
+    assert path == str(tmp_path / "debug_available.png")
+    assert writer.is_pending(path)
+    assert not os.path.exists(path)
+
+    late = []
+    writer.add_done_callback(path, late.append)
+    gate.set()
+    assert writer.wait(path, timeout=2.0)
+    assert writer.flush(timeout=2.0)
+
+    with open(path, "rb") as f:
+        assert f.read() == PNG_BYTES
+    assert not writer.is_pending(path)
+    assert notified == [path]
+    assert late == [path]
+    assert writer.stats["written"] == 1
+
+    # 保存済みの場合は登録時にすぐ呼ばれる
+    immediate = []
+    writer.add_done_callback(path, immediate.append)
+    assert immediate == [path]
+
+
+def test_png_passthrough_without_limit():
+    """PNG保存で上限がない場合は再圧縮しないこと"""
+    assert encode_image(PNG_BYTES, "png", 80, 0) == (PNG_BYTES, "png")
+
+
+def test_cache_keeps_pending_screenshot(tmp_path, monkeypatch):
+    """保存中のスクリーンショットはキャッシュ読み出し時に削除扱いにしないこと"""
+    import services.area_search_cache as cache_module
+
+    pending_path = str(tmp_path / "debug_pending.png")
+    monkeypatch.setattr(cache_module, "_is_screenshot_pending", lambda path: path == pending_path)
+
+    cache = AreaSearchCache(db_path=str(tmp_path / "cache.db"))
+    result = {"status": "available", "message": "提供可能", "screenshot": pending_path}
+    assert cache.set("5300001", "大阪府大阪市北区梅田1丁目1-1", result)
+    assert cache.get("5300001", "大阪府大阪市北区梅田1丁目1-1")["screenshot"] == pending_path
+
+    result["screenshot"] = str(tmp_path / "debug_missing.png")
+    cache.set("5300001", "大阪府大阪市北区梅田1丁目1-1", result)
+    assert "screenshot" not in cache.get("5300001", "大阪府大阪市北区梅田1丁目1-1")
+
+
+def test_cleanup_debug_screenshots(tmp_path):
+    """保持期間を過ぎた画像と上限件数を超えた古い画像を削除すること"""
+    now = time.time()
+    for index in range(5):
+        path = tmp_path / f"debug_result_{index}.png"
+        path.write_bytes(PNG_BYTES)
+        os.utime(path, (now - index * 60, now - index * 60))
+    expired = tmp_path / "debug_expired.png"
+    expired.write_bytes(PNG_BYTES)
+    os.utime(expired, (now - 10 * 86400, now - 10 * 86400))
+    other = tmp_path / "map.png"
+    other.write_bytes(PNG_BYTES)
+
+    removed = cleanup_debug_screenshots(str(tmp_path), retention_days=7, max_files=3)
+
+    assert removed == 3
+    remaining = sorted(p.name for p in tmp_path.iterdir())
+    assert remaining == ["debug_result_0.png", "debug_result_1.png", "debug_result_2.png", "map.png"]
@@ -0,0 +1,181 @@
+"""
+同じ住所の提供判定の集約のテストモジュール
+
+このモジュールは、同時に要求された同じ住所の検索が1件にまとめられ、結果と進捗が
+共有されること、呼び出し元ごとのキャンセル、例外の共有をテストします。
+"""
+
+import threading
+import time
+
+from services.cancellation import CancellationError, CancelToken
+from services.search_coordinator import SearchCoordinator
+
+POSTAL = "530-0001"
+ADDRESS = "大阪府大阪市北区梅田1丁目1-1"
+
+
+class _BlockingSearch:
+    """release されるまで戻らない検索関数"""
+
+    def __init__(self, result=None, error=None):
+        self.calls = []
+        self.tokens = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.result = result or {"status": "available", "message": "提供可能"}
+        self.error = error
+
+    def __call__(self, postal_code, address, progress_callback=None, force_refresh=False, cancel_token=None):
+        self.calls.append((postal_code, address))
+        self.tokens.append(cancel_token)
+        progress_callback("郵便番号を入力中...")
+        self.started.set()
+        while not self.release.wait(0.01):
+            if cancel_token.is_cancelled:
+                raise CancellationError("検索がキャンセルされました")
+        if self.error is not None:
+            raise self.error
+        return dict(self.result)
+
+
+def _start(coordinator, results, name, postal=POSTAL, address=ADDRESS, token=None, progress=None):
+    def _target():
+        try:
+            results[name] = coordinator.search(postal, address, progress_callback=progress, cancel_token=token)
+        except Exception as e:
+            results[name] = e
+
+    thread = threading.Thread(target=_target)
+    thread.start()
+    return thread
+
+
+def _wait_joined(coordinator):
+    deadline = time.monotonic() + 5
+    while not coordinator.get_stats()["joined"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_identical_searches_share_one_run():
+    """同じ住所（表記ゆれ含む）の同時要求は1回だけ検索し、結果と直前の進捗を共有すること"""
+    search = _BlockingSearch()
+    coordinator = SearchCoordinator(search)
+    results, progress = {}, {"first": [], "second": []}
+
+    first = _start(coordinator, results, "first", progress=progress["first"].append)
+    assert search.started.wait(5)
+    second = _start(coordinator, results, "second", postal="5300001", address="大阪府大阪市北区梅田１丁目１－１",
+                    progress=progress["second"].append)
+    _wait_joined(coordinator)
+    search.release.set()
+    first.join(5)
+    second.join(5)
+
+    assert len(search.calls) == 1
+    assert results["first"]["status"] == results["second"]["status"] == "available"
+    assert results["first"] is not results["second"]
+    assert progress["first"] == progress["second"] == ["郵便番号を入力中..."]
+    assert coordinator.get_stats() == {"started": 1, "joined": 1, "abandoned": 0, "running": 0}
+
+
+def test_different_addresses_run_separately():
+    """住所が違う要求はそれぞれ検索すること"""
+    search = _BlockingSearch()
+    search.release.set()
+    coordinator = SearchCoordinator(search)
+    assert coordinator.search(POSTAL, ADDRESS)["status"] == "available"
+    assert coordinator.search(POSTAL, "大阪府大阪市北区梅田1丁目1-2")["status"] == "available"
+    assert len(search.calls) == 2
+
+
+def test_cancel_detaches_only_the_caller():
+    """1件のキャンセルは他の要求に影響せず、全員がキャンセルした場合だけ検索を中断すること"""
+    search = _BlockingSearch()
+    coordinator = SearchCoordinator(search)
+    results = {}
+    first_token, second_token = CancelToken(), CancelToken()
+
+    first = _start(coordinator, results, "first", token=first_token)
+    assert search.started.wait(5)
+    second = _start(coordinator, results, "second", token=second_token)
+    _wait_joined(coordinator)
+
+    first_token.cancel("1件目の取り消し")
+    first.join(5)
+    assert isinstance(results["first"], CancellationError)
+    assert not search.tokens[0].is_cancelled
+
+    second_token.cancel("2件目の取り消し")
+    second.join(5)
+    assert isinstance(results["second"], CancellationError)
+    assert search.tokens[0].is_cancelled
+    assert coordinator.get_stats()["abandoned"] == 1
+
+
+def test_error_is_shared():
+    """検索の例外は合流した全ての要求に送出されること"""
+    search = _BlockingSearch(error=RuntimeError("ブラウザの起動に失敗"))
+    coordinator = SearchCoordinator(search)
+    results = {}
+    first = _start(coordinator, results, "first")
+    assert search.started.wait(5)
+    second = _start(coordinator, results, "second")
+    _wait_joined(coordinator)
+    search.release.set()
+    first.join(5)
+    second.join(5)
+    assert isinstance(results["first"], RuntimeError)
+    assert isinstance(results["second"], RuntimeError)
+    # 呼び出し元ごとに別の例外オブジェクトを送出し、元の例外を原因として残す
+    assert results["first"] is not results["second"]
+    assert results["first"].__cause__ is results["second"].__cause__ is search.error
+
+
+def test_legacy_cancel_flag_cancels_callers_without_token():
+    """トークンを渡さない呼び出し元は従来のキャンセルフラグで中断されること"""
+    search = _BlockingSearch()
+    flag = threading.Event()
+    coordinator = SearchCoordinator(search, legacy_cancel_check=flag.is_set, legacy_cancel_clear=flag.clear)
+    results = {}
+
+    first = _start(coordinator, results, "first")
+    assert search.started.wait(5)
+    flag.set()
+    first.join(5)
+
+    assert isinstance(results["first"], CancellationError)
+    assert search.tokens[0].is_cancelled
+    assert coordinator.get_stats()["abandoned"] == 1
+
+
+def test_stale_legacy_cancel_flag_is_cleared_on_start():
+    """検索していない間に立てられた従来のキャンセルフラグでは、トークンなしの検索を中断しないこと"""
+    from services import area_search, area_search_east
+
+    search = _BlockingSearch()
+    search.release.set()
+    area_search.set_cancel_flag()
+    area_search_east.set_cancel_flag()
+    try:
+        assert SearchCoordinator(search).search(POSTAL, ADDRESS)["status"] == "available"
+        assert not area_search.is_cancelled()
+        assert not area_search_east.is_cancelled()
+    finally:
+        area_search.clear_cancel_flag()
+        area_search_east.clear_cancel_flag()
+
+
+def test_browser_overrides_are_passed_to_the_search():
+    """検索を起動した呼び出し元の browser_settings の上書きが検索関数に渡ること"""
+    calls = []
+
+    def search(postal_code, address, progress_callback=None, force_refresh=False, cancel_token=None,
+               browser_overrides=None):
+        calls.append(browser_overrides)
+        return {"status": "available"}
+
+    coordinator = SearchCoordinator(search)
+    coordinator.search(POSTAL, ADDRESS, browser_overrides={"headless": True})
+    coordinator.search(POSTAL, ADDRESS)
+    assert calls == [{"headless": True}, None]
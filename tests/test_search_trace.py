@@ -0,0 +1,103 @@
+"""
+工程別所要時間の記録のテストモジュール
+
+このモジュールは、工程の切り替え・入れ子の計測、SQLiteへの保存、
+期間・サイト指定でのパーセンタイル集計とコマンドライン表示をテストします。
+"""
+
+import json
+import time
+from datetime import datetime
+
+import pytest
+
+from services import search_trace
+from services.search_trace import SearchTrace, TraceStore, build_report
+
+
+def test_marks_and_spans():
+    """工程を切り替えた順に記録し、入れ子の計測は別に記録すること"""
+    trace = SearchTrace("west")
+    trace.mark("browser_start")
+    trace.mark("page_load")
+    with trace.span("screenshot"):
+        time.sleep(0.01)
+    trace.mark("page_load")  # 同じ工程の再指定は続けて計測する
+    with pytest.raises(RuntimeError):
+        with trace.span("screenshot"):
+            raise RuntimeError("撮影失敗")
+    record = trace.finish("available")
+
+    assert [(s["step"], s["ok"]) for s in record["spans"]] == [
+        ("browser_start", True), ("screenshot", True), ("screenshot", False), ("page_load", True)
+    ]
+    page_load = record["spans"][-1]
+    assert page_load["duration_ms"] >= record["spans"][1]["duration_ms"]
+    assert record["status"] == "available"
+    assert record["duration_ms"] >= page_load["duration_ms"]
+
+
+def test_store_and_report(tmp_path):
+    """保存したトレースをサイト・工程ごとにパーセンタイル集計すること"""
+    store = TraceStore(str(tmp_path / "traces.db"), str(tmp_path / "traces.jsonl"))
+    try:
+        for index in range(1, 101):
+            store.record({
+                "trace_id": f"west-{index}", "site": "west", "started_at": 1000.0 + index,
+                "duration_ms": float(index * 10), "status": "available", "cached": False,
+                "spans": [
+                    {"step": "page_load", "started_at": 1000.0 + index, "duration_ms": float(index), "ok": True},
+                    {"step": "result_detection", "started_at": 1000.0 + index, "duration_ms": 5.0, "ok": index != 1},
+                ],
+            })
+        store.record({
+            "trace_id": "cache-1", "site": "cache", "started_at": 1200.0, "duration_ms": 1.0,
+            "status": "available", "cached": True, "spans": [],
+        })
+
+        report = build_report(store.iter_durations())
+        rows = {(row["site"], row["step"]): row for row in report}
+        assert [row["step"] for row in report] == ["page_load", "result_detection", "total"]
+        assert rows[("west", "page_load")]["p50_ms"] == 50.0
+        assert rows[("west", "page_load")]["p90_ms"] == 90.0
+        assert rows[("west", "page_load")]["p99_ms"] == 99.0
+        # 失敗した工程は集計しない
+        assert rows[("west", "result_detection")]["count"] == 99
+
+        windowed = build_report(store.iter_durations(since=1051.0, until=1061.0, site="west"))
+        assert {row["step"]: row["count"] for row in windowed}["page_load"] == 10
+
+        with_cache = build_report(store.iter_durations(include_cached=True))
+        assert ("cache", "total") in {(row["site"], row["step"]) for row in with_cache}
+    finally:
+        store.close()
+
+    lines = (tmp_path / "traces.jsonl").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 101
+    assert json.loads(lines[0])["trace_id"] == "west-1"
+
+
+def test_module_trace_is_recorded(tmp_path, monkeypatch):
+    """スレッドの現在のトレースを終了すると保存され、コマンドラインで集計できること"""
+    db_path = str(tmp_path / "traces.db")
+    store = TraceStore(db_path)
+    monkeypatch.setattr(search_trace, "get_trace_store", lambda: store)
+
+    # トレースがない場合は何もしない
+    search_trace.trace_mark("page_load")
+    with search_trace.trace_span("screenshot"):
+        pass
+    assert search_trace.finish_trace("available") is None
+
+    search_trace.start_trace()
+    search_trace.trace_mark("prepare")
+    search_trace.set_trace_site("east")
+    search_trace.trace_mark("postal_input")
+    record = search_trace.finish_trace("unavailable")
+    assert record["site"] == "east"
+    assert search_trace.current_trace() is None
+    store.close()
+
+    today = datetime.now().strftime("%Y-%m-%d")
+    assert search_trace.main(["--db", db_path, "report", "--since", today, "--until", today, "--json"]) == 0
+    assert search_trace.main(["--db", str(tmp_path / "missing.db"), "report"]) == 1
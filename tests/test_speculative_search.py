@@ -0,0 +1,82 @@
+"""
+先行提供判定のテストモジュール
+
+このモジュールは、先行判定を始めてよい入力の判定、入力の同一性の判定、
+結果の使い回し可否をテストします。
+"""
+
+from services.speculative_search import SpeculativeSearch, is_search_ready
+
+
+def test_search_ready():
+    """郵便番号7桁・市区町村と番地・郵便番号との整合がそろった入力だけを開始対象にすること"""
+    assert is_search_ready("530-0001", "大阪府大阪市北区梅田1丁目1-1") == (True, "")
+    assert is_search_ready("５３０－０００１", "大阪府大阪市北区梅田１丁目１－１")[0] is True
+
+    assert is_search_ready("530-00", "大阪府大阪市北区梅田1丁目1-1")[0] is False
+    assert is_search_ready("530-0001", "")[0] is False
+    assert is_search_ready("530-0001", "大阪府大阪市北区梅田")[0] is False
+    ready, reason = is_search_ready("530-0001", "東京都港区芝公園4丁目2-8")
+    assert ready is False
+    assert "一致しません" in reason
+
+
+def test_matches_and_complete():
+    """表記ゆれは同じ入力とみなし、取り消し・エラーの結果は使い回さないこと"""
+    speculative = SpeculativeSearch("530-0001", "大阪府大阪市北区梅田1丁目1-1")
+    assert speculative.matches("5300001", "大阪府大阪市北区梅田１丁目１－１")
+    assert not speculative.matches("530-0001", "大阪府大阪市北区梅田1丁目1-2")
+    assert not speculative.is_done
+
+    assert speculative.complete({"status": "cancelled"}) is False
+    assert not speculative.is_done
+    assert speculative.complete({"status": "available", "message": "提供可能"}) is True
+    assert speculative.is_done
+    assert speculative.result["status"] == "available"
+    assert speculative.saved_seconds() >= 0
+
+
+class _FakeDriver:
+    """起動直後の設定で失敗する偽ドライバー"""
+
+    def __init__(self):
+        self.quit_called = False
+
+    def set_page_load_timeout(self, value):
+        raise RuntimeError("stop after launch")
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_speculative_search_does_not_park_browser(monkeypatch):
+    """先行判定のブラウザは判定後に終了し、表示中の検索のブラウザを置き換え・終了しないこと"""
+    from services import area_search, area_search_east
+    from services.speculative_search import SPECULATIVE_BROWSER_OVERRIDES
+
+    visible = _FakeDriver()
+    launched = []
+
+    def fake_create_driver(*args, **kwargs):
+        driver = _FakeDriver()
+        launched.append(driver)
+        return driver
+
+    for module in (area_search, area_search_east):
+        monkeypatch.setattr(module, "global_driver", visible)
+        monkeypatch.setattr(module, "get_driver_pool", lambda *args, **kwargs: None)
+        monkeypatch.setattr(module, "claim_restored_driver", lambda *args, **kwargs: (None, False))
+        monkeypatch.setattr(module, "create_driver", fake_create_driver)
+        monkeypatch.setattr(module, "attach_replay_recorder", lambda *args, **kwargs: None)
+    monkeypatch.setattr(area_search, "get_browser_settings_override",
+                        lambda: dict(SPECULATIVE_BROWSER_OVERRIDES, auto_close=True))
+    monkeypatch.setattr(area_search_east, "get_browser_settings_override",
+                        lambda: dict(SPECULATIVE_BROWSER_OVERRIDES, auto_close=True))
+
+    area_search.search_service_area_west("530-0001", "大阪府大阪市北区梅田1丁目1-1", engine="selenium")
+    area_search_east.search_service_area("105-0011", "東京都港区芝公園4丁目2-8")
+
+    assert len(launched) == 2
+    assert all(driver.quit_called for driver in launched)
+    assert area_search.global_driver is visible and area_search_east.global_driver is visible
+    assert not visible.quit_called
@@ -0,0 +1,23 @@
+"""
+集計処理ユーティリティのテストモジュール
+
+このモジュールは、最近順位法によるパーセンタイルの計算をテストします。
+"""
+
+from utils.stats_utils import percentile
+
+
+def test_percentile_uses_nearest_rank():
+    """ceil(p*n) 番目の値を補間せずに返すこと"""
+    values = [15, 20, 35, 40, 50]
+    assert percentile(values, 0.05) == 15
+    assert percentile(values, 0.3) == 20
+    assert percentile(values, 0.4) == 20
+    assert percentile(values, 0.5) == 35
+    assert percentile(values, 1.0) == 50
+    assert percentile(reversed(values), 0.0) == 15
+
+
+def test_percentile_of_empty_values():
+    """値がない場合は0.0を返すこと"""
+    assert percentile([], 0.9) == 0.0
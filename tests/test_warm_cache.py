@@ -0,0 +1,95 @@
+"""
+提供判定サイト用キャッシュプロファイルのテストモジュール
+
+このモジュールは、起動オプションの書き換え、使用中のプロファイルを避けた割り当て、
+起動直後のCookie・ストレージの消去をテストします。
+"""
+
+import os
+import sys
+
+import pytest
+from selenium.webdriver.chrome.options import Options
+
+from services.warm_cache import is_profile_in_use, warm_cache_profile
+
+
+def _settings(tmp_path, **overrides):
+    settings = {"enabled": True, "profile_dir": str(tmp_path), "cache_size_mb": 64, "max_profiles": 2}
+    settings.update(overrides)
+    return settings
+
+
+def _cold_options():
+    options = Options()
+    for argument in ("--incognito", "--guest", "--disable-application-cache", "--aggressive-cache-discard", "--lang=ja-JP"):
+        options.add_argument(argument)
+    return options
+
+
+class _FakeDriver:
+    def __init__(self):
+        self.commands = []
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.commands.append((cmd, params))
+        return {}
+
+
+def test_options_use_persistent_profile(tmp_path):
+    """キャッシュを捨てる起動オプションを外し、プロファイルと容量上限を指定すること"""
+    options = _cold_options()
+    with warm_cache_profile(options, "west", _settings(tmp_path)) as profile:
+        assert profile.profile_dir == os.path.join(str(tmp_path), "west-1")
+        assert os.path.isdir(profile.profile_dir)
+    assert options.arguments == [
+        "--lang=ja-JP",
+        f"--user-data-dir={profile.profile_dir}",
+        f"--disk-cache-size={64 * 1024 * 1024}",
+    ]
+
+    disabled = _cold_options()
+    with warm_cache_profile(disabled, "west", _settings(tmp_path, enabled=False)) as profile:
+        assert profile.profile_dir is None
+    assert "--incognito" in disabled.arguments
+
+
+def test_profiles_in_use_are_skipped(tmp_path):
+    """起動中・使用中のプロファイルは割り当てず、空きがなければキャッシュなしで起動すること"""
+    settings = _settings(tmp_path)
+    with warm_cache_profile(Options(), "east", settings) as first:
+        with warm_cache_profile(Options(), "east", settings) as second:
+            with warm_cache_profile(Options(), "east", settings) as third:
+                assert first.profile_dir.endswith("east-1")
+                assert second.profile_dir.endswith("east-2")
+                assert third.profile_dir is None
+    with warm_cache_profile(Options(), "east", settings) as again:
+        assert again.profile_dir.endswith("east-1")
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Linux の SingletonLock で判定するため")
+def test_chrome_lock_detection(tmp_path):
+    """Chromeのロックが生きているプロセスを指す場合だけ使用中とみなすこと"""
+    assert not is_profile_in_use(str(tmp_path))
+    os.symlink(f"host-{os.getpid()}", tmp_path / "SingletonLock")
+    assert is_profile_in_use(str(tmp_path))
+    os.remove(tmp_path / "SingletonLock")
+    os.symlink("host-999999999", tmp_path / "SingletonLock")
+    assert not is_profile_in_use(str(tmp_path))
+
+
+def test_prepare_clears_cookies_and_storage(tmp_path):
+    """プロファイルを使った起動ではCookieとサイトのストレージを消去し、HTTPキャッシュは残すこと"""
+    driver = _FakeDriver()
+    with warm_cache_profile(Options(), "west", _settings(tmp_path)) as profile:
+        profile.prepare(driver)
+    assert driver.commands[0] == ("Network.clearBrowserCookies", {})
+    cmd, params = driver.commands[1]
+    assert cmd == "Storage.clearDataForOrigin"
+    assert params["origin"] == "https://flets-w.com"
+    assert "cookies" not in params["storageTypes"] and "cache_storage" in params["storageTypes"]
+
+    untouched = _FakeDriver()
+    with warm_cache_profile(Options(), "west", _settings(tmp_path, enabled=False)) as profile:
+        profile.prepare(untouched)
+    assert untouched.commands == []
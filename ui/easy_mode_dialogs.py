@@ -12,7 +12,7 @@ from PySide6.QtCore import Qt, QThread, Signal, QEvent, QMetaObject, Q_ARG, QTim
 from PySide6.QtGui import QFont, QIntValidator, QPalette, QColor
 import datetime
 import logging
-from services.area_search import search_service_area, normalize_address
+from services.area_search import normalize_address
 from utils.string_utils import convert_to_full_width
 import threading
 from PySide6.QtWidgets import QApplication
@@ -322,8 +322,9 @@ class AddressInfoDialog(QDialog):
             postal_code = data['original_postal_code']
             address = data['original_address']
             
-            # 検索を実行
-            result = search_service_area(postal_code, address)
+            # 検索を実行（同じ住所の検索が実行中の場合は合流して結果を共有する）
+            from services.search_coordinator import get_search_coordinator
+            result = get_search_coordinator().search(postal_code, address)
             logging.info(f"★★★ 検索結果: {result} ★★★")
             
             # 結果を表示
@@ -58,76 +58,6 @@ from ui.update_dialog import UpdateDialog
 from services.area_search import search_service_area
 
 
-class CancelWorker(QObject):
-    """
-    キャンセル処理を並列実行するワーカークラス
-    TelephoneTeikyou-crossの高速キャンセル方式を適用
-    """
-    finished = Signal()
-    progress = Signal(str)  # 進捗報告用シグナルを追加
-    
-    def __init__(self, worker_to_cancel=None):
-        """
-        ワーカーの初期化
-        
-        Args:
-            worker_to_cancel: キャンセル対象のワーカーオブジェクト
-        """
-        super().__init__()
-        self.worker_to_cancel = worker_to_cancel
-        self.is_cancelled = False
-    
-    def cancel(self):
-        """
-        キャンセル処理を実行（cleanup_threadから呼び出し用）
-        """
-        self.is_cancelled = True
-        if self.worker_to_cancel and hasattr(self.worker_to_cancel, 'cancel'):
-            self.worker_to_cancel.cancel()
-    
-    def run(self):
-        """
-        軽量化されたキャンセル処理を実行
-        TelephoneTeikyou-crossの高速方式を採用
-        """
-        try:
-            logging.info("★★★ 並列キャンセル処理を開始します ★★★")
-            self.progress.emit("キャンセル処理を実行中...")
-            
-            # ワーカーのキャンセル処理
-            if self.worker_to_cancel and hasattr(self.worker_to_cancel, 'cancel'):
-                logging.info("- ワーカーのキャンセル処理を実行")
-                self.worker_to_cancel.cancel()
-                
-            # キャンセルフラグの設定
-            try:
-                from services.area_search import set_cancel_flag, clear_cancel_flag
-                set_cancel_flag()
-                logging.info("- エリア検索のキャンセルフラグを設定しました")
-            except ImportError:
-                pass
-            
-            try:
-                from services.area_search_east import set_cancel_flag, clear_cancel_flag
-                set_cancel_flag()
-                logging.info("- 東日本エリア検索のキャンセルフラグを設定しました")
-            except ImportError:
-                pass
-            
-            # 短時間の待機で完了確認（TelephoneTeikyou-crossと同様）
-            import time
-            time.sleep(0.5)  # 500ms待機
-            
-            self.progress.emit("キャンセル処理完了")
-            logging.info("★★★ 並列キャンセル処理が完了しました ★★★")
-            
-        except Exception as e:
-            logging.error(f"並列キャンセル処理中にエラー: {str(e)}")
-        finally:
-            self.is_cancelled = True
-            self.finished.emit()
-
-
 class CustomComboBox(QComboBox):
     """スクロールでの値変更を防止するカスタムコンボボックス"""
     def wheelEvent(self, event):
@@ -144,6 +74,8 @@ class MainWindow(QMainWindow, MainWindowFunctions):
     
     # カスタムシグナル：CTI自動処理用
     trigger_auto_search = Signal()
+    # バックグラウンドで保存していたスクリーンショットの保存完了通知
+    screenshot_ready = Signal(str)
 
     class _TextChangeCommand(QUndoCommand):
         """テキスト変更用のUndoコマンド"""
@@ -277,11 +209,6 @@ class MainWindow(QMainWindow, MainWindowFunctions):
         self._shared_ui_state = {}
         self._is_restoring_mode_state = False
         
-        # キャンセル処理関連の初期化
-        self.cancel_worker = None
-        self.cancel_thread = None
-        self.cancel_timer = None
-
         # 検索スレッド関連（QObject.thread() メソッド名と衝突しないよう明示初期化）
         self.thread = None
         self.worker = None
@@ -356,6 +283,13 @@ class MainWindow(QMainWindow, MainWindowFunctions):
         else:
             self.init_easy_mode()
         
+        # 前回のアプリが残した提供判定ブラウザに接続し直す
+        try:
+            from services.browser_sessions import restore_browsers_async
+            restore_browsers_async()
+        except Exception as e:
+            logging.error(f"前回のブラウザの再利用エラー: {str(e)}")
+        
         # 電話ボタン監視の初期化と開始
         self.phone_monitor = PhoneButtonMonitor(self.fetch_cti_data)
         self.phone_monitor.start_monitoring()
@@ -952,6 +886,7 @@ ND：{nd}
         
         # CTI自動処理用のシグナル・スロット接続
         self.trigger_auto_search.connect(self.auto_search_service_area)
+        self.screenshot_ready.connect(self.on_screenshot_ready)
         
         # カウントダウン表示用のラベル
         self.countdown_label = QLabel()
@@ -1219,7 +1154,9 @@ ND：{nd}
                 
                 def run(self):
                     try:
-                        result = search_service_area(self.postal_code, self.address)
+                        # 同じ住所の検索が実行中の場合は合流して結果を共有する
+                        from services.search_coordinator import get_search_coordinator
+                        result = get_search_coordinator().search(self.postal_code, self.address)
                         self.finished.emit(result)
                     except Exception as e:
                         self.error.emit(str(e))
@@ -2414,8 +2351,15 @@ ND：{nd}
             self.postal_code_input.textChanged.connect(self.convert_to_half_width)
             self.list_postal_code_input.textChanged.connect(self.format_postal_code)
             self.list_postal_code_input.textChanged.connect(self.convert_to_half_width)
+            self.postal_code_input.textChanged.connect(self.prefill_address_from_postal_code)
+            self.list_postal_code_input.textChanged.connect(self.prefill_address_from_postal_code)
             self.address_input.textChanged.connect(self.convert_to_full_width)
             self.list_address_input.textChanged.connect(self.convert_to_full_width)
+            # 入力が止まったら検索ボタンを押す前に提供判定を始めておく（設定で有効な場合）
+            self.postal_code_input.textChanged.connect(self.schedule_speculative_search)
+            self.address_input.textChanged.connect(self.schedule_speculative_search)
+            # 入力が止まったら地図ボタン用のMapFan詳細URLを先読みしておく
+            self.address_input.textChanged.connect(self.schedule_mapfan_prefetch)
             self.era_combo.currentTextChanged.connect(self.update_year_combo)
             
             # 名前とフリガナのバリデーション用のシグナル
@@ -2454,6 +2398,10 @@ ND：{nd}
             
             # ボタンのシグナル接続
             self.area_search_btn.clicked.connect(self.search_service_area)
+            # Shift+クリック、または右クリックメニューでキャッシュを使わずに再検索する
+            self.area_search_btn.setToolTip("Shift+クリック: キャッシュを使わずに再検索")
+            self.area_search_btn.setContextMenuPolicy(Qt.CustomContextMenu)
+            self.area_search_btn.customContextMenuRequested.connect(self.show_area_search_menu)
             self.map_btn.clicked.connect(self.open_street_view)
         else:
             # 誘導モード用のシグナル設定
@@ -2821,34 +2769,7 @@ ND：{nd}
             
             # 検索スレッドとワーカーをクリーンアップ
             self.cleanup_thread()
-            
-            # キャンセルスレッドとワーカーをクリーンアップ
-            if hasattr(self, 'cancel_worker') and self.cancel_worker:
-                try:
-                    self.cancel_worker.deleteLater()
-                except:
-                    pass
-                self.cancel_worker = None
-                
-            if hasattr(self, 'cancel_thread') and self.cancel_thread:
-                try:
-                    if hasattr(self.cancel_thread, 'isRunning') and callable(self.cancel_thread.isRunning):
-                        if self.cancel_thread.isRunning():
-                            self.cancel_thread.quit()
-                            self.cancel_thread.wait(2000)
-                    self.cancel_thread.deleteLater()
-                except Exception as e:
-                    logging.error(f"キャンセルスレッドの終了処理エラー: {str(e)}")
-                self.cancel_thread = None
-            
-            # キャンセルタイマーを停止
-            if hasattr(self, 'cancel_timer') and self.cancel_timer:
-                try:
-                    self.cancel_timer.stop()
-                    self.cancel_timer.deleteLater()
-                except:
-                    pass
-                self.cancel_timer = None
+            self.cleanup_speculative_thread()
             
             # すべてのアクティブな検索スレッドを停止
             if hasattr(self, 'active_search_threads'):
@@ -2879,6 +2800,34 @@ ND：{nd}
                 except Exception as e:
                     logging.error(f"CTI状態監視の停止エラー: {str(e)}")
             
+            # 待機中の提供判定ブラウザを終了
+            try:
+                from services.driver_pool import shutdown_driver_pools
+                shutdown_driver_pools()
+            except Exception as e:
+                logging.error(f"ドライバープールの終了エラー: {str(e)}")
+            
+            # 提供判定ブラウザを終了（再起動で引き継いだ場合は残す）
+            try:
+                from services.browser_sessions import shutdown_browser_sessions
+                shutdown_browser_sessions()
+            except Exception as e:
+                logging.error(f"提供判定ブラウザの終了エラー: {str(e)}")
+            
+            # MapFan用の常駐ブラウザを終了
+            try:
+                from services.mapfan_session import shutdown_mapfan_session
+                shutdown_mapfan_session()
+            except Exception as e:
+                logging.error(f"MapFanセッションの終了エラー: {str(e)}")
+            
+            # 共有ChromeDriverサービスを停止
+            try:
+                from services.driver_bootstrap import shutdown_chrome_bootstrap
+                shutdown_chrome_bootstrap()
+            except Exception as e:
+                logging.error(f"共有ChromeDriverサービスの停止エラー: {str(e)}")
+            
             logging.info("アプリケーション終了処理が完了しました")
             event.accept()
             
@@ -3069,6 +3018,10 @@ ND：{nd}
             else:
                 screenshot_path = "debug_screenshot.png"
             
+            # バックグラウンドで保存中の場合は完了を少し待つ
+            from services.screenshot_pipeline import get_screenshot_writer
+            get_screenshot_writer().wait(screenshot_path, timeout=3.0)
+            
             if not os.path.exists(screenshot_path):
                 QMessageBox.warning(
                     self,
@@ -3127,6 +3080,8 @@ ND：{nd}
     def search_service_area(self):
         """提供エリア検索を開始"""
         is_auto_processing = hasattr(self, 'is_auto_processing') and self.is_auto_processing
+        # Shift+クリック・再検索メニューの場合はキャッシュを使わない（自動処理では常にキャッシュを使う）
+        force_refresh = self.take_force_refresh_request() and not is_auto_processing
         refresh_before_area_search = self.settings.get('refresh_address_from_cti_before_area_search', True)
 
         should_refresh_from_cti = is_auto_processing or refresh_before_area_search
@@ -3171,8 +3126,16 @@ ND：{nd}
             except ImportError:
                 pass
             
-            # 既存のスレッドとワーカーをクリーンアップ
-            self.cleanup_thread()
+            # 同じ入力の先行判定（実行中・完了済み）があれば引き継ぐ
+            # （キャッシュを使わない再検索では、キャッシュ由来の可能性がある先行判定を使わない）
+            if force_refresh:
+                self.discard_speculative_search()
+                speculative = None
+            else:
+                speculative = self.take_speculative_search(postal_code, address)
+            if speculative is None:
+                # 既存のスレッドとワーカーをクリーンアップ
+                self.cleanup_thread()
             
             # CTI監視システムに検索開始を通知（処理フラグ設定）
             if hasattr(self, 'cti_status_monitor') and self.cti_status_monitor:
@@ -3222,8 +3185,15 @@ ND：{nd}
             # プログレスバーを表示
             self.progress_bar.setVisible(True)
             
-            # 検索ステータスを更新
-            self.area_result_label.setText("提供エリア: 検索を開始します...")
+            # 検索ステータスを更新（分割した市区町村と判定サイトを表示）
+            from utils.address_parser import parse_address
+            parsed_address = parse_address(address)
+            area_hint = ""
+            if parsed_address.city:
+                site_name = {"east": "NTT東日本", "west": "NTT西日本"}.get(parsed_address.region, "")
+                area_hint = f"（{parsed_address.prefecture or ''}{parsed_address.city} / {site_name}）" if site_name \
+                    else f"（{parsed_address.city}）"
+            self.area_result_label.setText(f"提供エリア: 検索を開始します{area_hint}...")
             self.area_result_label.setStyleSheet("""
                 QLabel {
                     font-size: 14px;
@@ -3235,8 +3205,16 @@ ND：{nd}
                 }
             """)
             
+            if speculative is not None and speculative.is_done:
+                logging.info(f"先行判定の結果を使用します（{speculative.saved_seconds():.1f}秒分を先行）")
+                QTimer.singleShot(0, lambda result=speculative.result: self.on_search_completed(result))
+                return
+            if speculative is not None:
+                logging.info(f"実行中の先行判定を引き継ぎました（{speculative.saved_seconds():.1f}秒経過）")
+                return
+            
             # ワーカーを作成
-            self.worker = ServiceAreaSearchWorker(postal_code, address)
+            self.worker = ServiceAreaSearchWorker(postal_code, address, force_refresh=force_refresh)
             self.worker.finished.connect(self.on_search_completed)
             self.worker.progress.connect(self.update_search_progress)
             
@@ -3270,10 +3248,138 @@ ND：{nd}
                 # 手動実行時のみメッセージボックスを表示
                 QMessageBox.critical(self, "エラー", f"検索の開始に失敗しました: {str(e)}")
 
+    def schedule_speculative_search(self, *_):
+        """
+        郵便番号・住所の変更時に先行判定を予約する（入力が止まってから開始）
+
+        入力が変わった場合は、実行中・完了済みの先行判定を破棄します。
+        """
+        if not self.settings.get('speculative_area_search', False):
+            return
+        speculative = getattr(self, '_speculative_search', None)
+        if speculative is not None and not speculative.matches(
+            self.postal_code_input.text().strip(), self.address_input.text().strip()
+        ):
+            self.discard_speculative_search()
+
+        if not hasattr(self, '_speculative_timer'):
+            self._speculative_timer = QTimer(self)
+            self._speculative_timer.setSingleShot(True)
+            self._speculative_timer.timeout.connect(self.start_speculative_search)
+        from services.speculative_search import DEFAULT_DEBOUNCE_MS
+        self._speculative_timer.start(int(self.settings.get('speculative_area_search_debounce_ms', DEFAULT_DEBOUNCE_MS)))
+
+    def start_speculative_search(self):
+        """入力が確定していれば、画面に表示しない先行判定をバックグラウンドで開始する"""
+        from services.speculative_search import SPECULATIVE_BROWSER_OVERRIDES, SpeculativeSearch, is_search_ready
+
+        postal_code = self.postal_code_input.text().strip()
+        address = self.address_input.text().strip()
+        # 検索中（表示中の検索・取り消し待ちの先行判定）や自動処理中は始めない
+        if getattr(self, 'worker', None) is not None or getattr(self, 'is_auto_processing', False):
+            return
+        if getattr(self, '_speculative_worker', None) is not None:
+            return
+        speculative = getattr(self, '_speculative_search', None)
+        if speculative is not None and speculative.matches(postal_code, address):
+            return
+        ready, reason = is_search_ready(postal_code, address)
+        if not ready:
+            logging.debug(f"先行判定を開始しません: {reason}")
+            return
+
+        # 表示中の検索とは別の枠で実行し、入力中にブラウザが表示されないよう常にヘッドレスで起動する
+        # （表示中の検索の worker/thread を使うと、CTIのキャンセル操作などが先行判定を検索中と誤認する）。
+        # 見えないブラウザを残さないよう、判定が終わったらブラウザを終了する
+        self._speculative_worker = ServiceAreaSearchWorker(
+            postal_code, address, browser_overrides=dict(SPECULATIVE_BROWSER_OVERRIDES)
+        )
+        self._speculative_worker.finished.connect(self.on_speculative_search_finished)
+        self._speculative_thread = QThread()
+        self._speculative_worker.moveToThread(self._speculative_thread)
+        self._speculative_thread.started.connect(self._speculative_worker.run)
+        self._speculative_thread.finished.connect(self._speculative_thread.deleteLater)
+        self._speculative_search = SpeculativeSearch(postal_code, address, self._speculative_worker)
+        self._speculative_thread.start()
+        logging.info(f"先行判定を開始しました: {postal_code} {address}")
+
+    def on_speculative_search_finished(self, result):
+        """引き継がれなかった先行判定の完了時の処理（結果を保持してスレッドを片付ける）"""
+        worker = self.sender()
+        speculative = getattr(self, '_speculative_search', None)
+        if speculative is not None and speculative.worker is worker:
+            if not speculative.complete(result):
+                self._speculative_search = None
+        if worker is not None and worker is getattr(self, '_speculative_worker', None):
+            self.cleanup_speculative_thread()
+            # 取り消し待ちの間に入力が確定していれば、改めて先行判定を予約する
+            if getattr(self, '_speculative_search', None) is None:
+                self.schedule_speculative_search()
+
+    def cleanup_speculative_thread(self):
+        """先行判定のスレッドを終了し、参照をクリアする"""
+        worker = getattr(self, '_speculative_worker', None)
+        thread = getattr(self, '_speculative_thread', None)
+        self._speculative_worker = None
+        self._speculative_thread = None
+        if worker is not None:
+            worker.cancel()
+        if thread is not None:
+            try:
+                thread.quit()
+                # 取り消し済みの検索はブラウザを終了して戻るため、終了まで待つ
+                thread.wait()
+            except RuntimeError:
+                pass  # deleteLater で破棄済み
+
+    def discard_speculative_search(self):
+        """入力が変わった先行判定を破棄する（実行中の場合は取り消しを要求するだけで待たない）"""
+        speculative = getattr(self, '_speculative_search', None)
+        self._speculative_search = None
+        if speculative is None:
+            return
+        if not speculative.is_done and speculative.worker is getattr(self, '_speculative_worker', None):
+            speculative.worker.cancel()
+        logging.info("入力が変わったため先行判定を破棄しました")
+
+    def take_speculative_search(self, postal_code, address):
+        """
+        検索開始時に、同じ入力の先行判定を引き継ぐ
+
+        実行中の先行判定は、この時点で表示中の検索（self.worker / self.thread）に昇格させます。
+
+        Returns:
+            SpeculativeSearch: 引き継いだ先行判定（完了済み、または表示中の検索として継続）。ない場合はNone
+        """
+        speculative = getattr(self, '_speculative_search', None)
+        if speculative is None:
+            return None
+        if not speculative.matches(postal_code, address):
+            self.discard_speculative_search()
+            return None
+        self._speculative_search = None
+        if speculative.is_done:
+            return speculative
+        if speculative.worker is not getattr(self, '_speculative_worker', None):
+            return None
+        # 実行中の先行判定を表示中の検索として扱う
+        self.cleanup_thread()
+        self.worker = self._speculative_worker
+        self.thread = self._speculative_thread
+        self._speculative_worker = None
+        self._speculative_thread = None
+        try:
+            speculative.worker.finished.disconnect(self.on_speculative_search_finished)
+        except (RuntimeError, TypeError):
+            pass
+        speculative.worker.finished.connect(self.on_search_completed)
+        speculative.worker.progress.connect(self.update_search_progress)
+        return speculative
+
     def cancel_search(self):
         """
         検索をキャンセルする
-        TelephoneTeikyou-crossの高速キャンセル方式を適用
+        検索ごとのキャンセルトークンで待機中の処理を即座に中断する
         """
         try:
             logging.info("=== 検索キャンセル処理開始 ===")
@@ -3304,18 +3410,18 @@ ND：{nd}
                 self.restart_btn.show()
             
             # バックエンド処理のキャンセル
-            if hasattr(self, 'worker') and self.worker:
-                self.worker.cancel()
+            # （トークンで待機を即座に中断してブラウザを終了し、ワーカーが返す
+            #  cancelled の結果を on_search_completed で受けて画面を戻す）
+            if not (hasattr(self, 'worker') and self.worker):
+                self.reset_search_button()
+                return
+            self.worker.cancel()
                 
-            # 並列キャンセル処理を開始（メインスレッドから実行）
+            # 結果が返らない場合の安全策として、一定時間後に強制リセットを確認する
             if threading.current_thread() == threading.main_thread():
-                # メインスレッドから呼び出された場合
-                self.start_parallel_cancel()
-                # 2秒後にキャンセルが完了していない場合の自動リセット処理（高速化のため短縮）
                 QTimer.singleShot(5000, self.check_cancel_timeout)
             else:
                 # 別スレッドから呼び出された場合はシグナルを使用
-                QMetaObject.invokeMethod(self, "start_parallel_cancel", Qt.QueuedConnection)
                 QMetaObject.invokeMethod(self, "schedule_cancel_timeout", Qt.QueuedConnection)
                 
         except Exception as e:
@@ -3329,283 +3435,10 @@ ND：{nd}
         キャンセルタイムアウト処理をスケジュール（メインスレッド専用）
         """
         try:
-            QTimer.singleShot(5000, self.check_cancel_timeout)  # 高速化のため2秒に短縮
+            QTimer.singleShot(5000, self.check_cancel_timeout)
         except Exception as e:
             logging.error(f"キャンセルタイムアウトスケジュール中にエラー: {str(e)}")
     
-    @Slot()
-    def start_parallel_cancel(self):
-        """
-        並列キャンセル処理を開始
-        UIの応答性を維持するため、キャンセル処理を別スレッドで実行
-        TelephoneTeikyou-crossの軽量方式を採用
-        """
-        try:
-            # 既存のキャンセルスレッドがある場合は終了
-            self.cleanup_cancel_thread()
-            
-            # キャンセルワーカーを作成
-            self.cancel_worker = CancelWorker(worker_to_cancel=self.worker)
-            
-            # キャンセル用スレッドを作成
-            self.cancel_thread = QThread()
-            self.cancel_worker.moveToThread(self.cancel_thread)
-            
-            # シグナルとスロットを接続
-            self.cancel_thread.started.connect(self.cancel_worker.run)
-            self.cancel_worker.finished.connect(self.on_cancel_completed)
-            self.cancel_worker.progress.connect(self.update_cancel_progress)
-            self.cancel_worker.finished.connect(self.cancel_thread.quit)
-            self.cancel_worker.finished.connect(self.cancel_worker.deleteLater)
-            self.cancel_thread.finished.connect(self.cancel_thread.deleteLater)
-            
-            # キャンセルスレッドを開始
-            self.cancel_thread.start()
-            logging.info("並列キャンセル処理を開始しました")
-            
-        except Exception as e:
-            logging.error(f"並列キャンセル処理の開始に失敗: {str(e)}")
-            # フォールバック：同期的にキャンセル処理を実行
-            self.fallback_cancel()
-    
-    def cleanup_cancel_thread(self):
-        """
-        キャンセル用スレッドとワーカーをクリーンアップ
-        """
-        try:
-            # ワーカーをキャンセル
-            if hasattr(self, 'cancel_worker') and self.cancel_worker:
-                try:
-                    self.cancel_worker.cancel()
-                    logging.debug("ワーカーをキャンセルしました")
-                except Exception as e:
-                    logging.error(f"ワーカーキャンセル中にエラー: {str(e)}")
-                
-            # スレッドを終了
-            if hasattr(self, 'cancel_thread') and self.cancel_thread:
-                try:
-                    if self.cancel_thread.isRunning():
-                        self.cancel_thread.quit()
-                        if not self.cancel_thread.wait(3000):  # 最大3秒待機（TelephoneTeikyou-crossと同じ）
-                            logging.warning("スレッドが正常に終了しませんでした。強制終了します")
-                            self.cancel_thread.terminate()
-                        else:
-                            logging.debug("スレッドを正常に終了しました")
-                    else:
-                        logging.debug("スレッドは既に停止しています")
-                except Exception as e:
-                    logging.error(f"スレッド終了中にエラー: {str(e)}")
-                    
-            # 参照をクリア
-            self.cancel_worker = None
-            self.cancel_thread = None
-            
-        except Exception as e:
-            logging.error(f"スレッドクリーンアップ中にエラー: {str(e)}")
-            # エラー時でも参照をクリア
-            self.cancel_worker = None
-            self.cancel_thread = None
-    
-    def fallback_cancel(self):
-        """
-        フォールバック用の同期キャンセル処理
-        """
-        try:
-            logging.info("フォールバックキャンセル処理を実行")
-            if hasattr(self, 'worker') and self.worker:
-                self.worker.cancel()
-            
-            # キャンセルフラグの設定
-            try:
-                from services.area_search import set_cancel_flag, clear_cancel_flag
-                set_cancel_flag()
-            except ImportError:
-                pass
-                
-            try:
-                from services.area_search_east import set_cancel_flag, clear_cancel_flag
-                set_cancel_flag()
-            except ImportError:
-                pass
-            
-            # メインスレッドでタイマーを開始
-            QTimer.singleShot(500, self.on_cancel_completed)
-        except Exception as e:
-            logging.error(f"フォールバックキャンセル処理中にエラー: {str(e)}")
-            # エラー時も強制的にキャンセル完了処理を実行
-            try:
-                self.on_cancel_completed()
-            except Exception as complete_error:
-                logging.error(f"強制キャンセル完了処理中にもエラー: {str(complete_error)}")
-    
-    def update_cancel_progress(self, message):
-        """
-        キャンセル進捗の更新
-        
-        Args:
-            message (str): 進捗メッセージ
-        """
-        try:
-            logging.info(f"キャンセル進捗: {message}")
-            # プログレスバーがある場合は更新
-            if hasattr(self, 'progress_bar') and self.progress_bar:
-                self.progress_bar.setFormat(message)
-        except Exception as e:
-            logging.error(f"キャンセル進捗更新中にエラー: {str(e)}")
-    
-    @Slot()
-    def check_cancel_timeout(self):
-        """
-        キャンセルタイムアウトをチェックし、必要に応じて強制リセット
-        TelephoneTeikyou-crossの高速方式を適用
-        """
-        try:
-            logging.info("キャンセルタイムアウトチェックを実行")
-            
-            # まだキャンセル処理中の場合は強制リセット
-            if hasattr(self, 'area_search_btn') and self.area_search_btn.text() == "キャンセル中...":
-                logging.warning("キャンセル処理が5秒以上継続：強制リセットを実行")
-                self.reset_search_button()
-                
-                # キャンセルスレッドの強制クリーンアップ
-                self.cleanup_cancel_thread()
-                
-                # 結果ラベルを更新
-                if hasattr(self, 'area_result_label'):
-                    self.area_result_label.setText("提供エリア: キャンセル完了（タイムアウト）")
-                    self.area_result_label.setStyleSheet("""
-                        QLabel {
-                            font-size: 14px;
-                            padding: 5px;
-                            border: 1px solid #E74C3C;
-                            border-radius: 4px;
-                            background-color: #FADBD8;
-                            color: #E74C3C;
-                        }
-                    """)
-            else:
-                logging.info("キャンセル処理は正常に完了済みです")
-                
-        except Exception as e:
-            logging.error(f"キャンセルタイムアウトチェック中にエラー: {str(e)}")
-            # エラー時も強制リセット
-            try:
-                self.reset_search_button()
-            except Exception as reset_error:
-                logging.error(f"強制リセット中にもエラー: {str(reset_error)}")
-
-    def on_cancel_completed(self):
-        """
-        キャンセル処理完了時の処理
-        TelephoneTeikyou-cross完全準拠の高速実装
-        """
-        try:
-            logging.info("★★★ キャンセル処理が完了しました ★★★")
-            
-            # ★★★ キャンセル完了時にフラグを明示的にクリア ★★★
-            try:
-                from services.area_search import set_cancel_flag, clear_cancel_flag
-                clear_cancel_flag()
-                logging.info("キャンセル完了：西日本エリア検索のキャンセルフラグをクリアしました")
-            except ImportError:
-                pass
-            
-            try:
-                from services.area_search_east import set_cancel_flag, clear_cancel_flag
-                clear_cancel_flag()
-                logging.info("キャンセル完了：東日本エリア検索のキャンセルフラグをクリアしました")
-            except ImportError:
-                pass
-            
-            # キャンセルスレッドのクリーンアップ
-            self.cleanup_cancel_thread()
-            
-            # UI状態をリセット
-            self.reset_search_button()
-            
-            logging.info("キャンセル完了処理が終了しました")
-            
-        except Exception as e:
-            logging.error(f"キャンセル完了処理中にエラー: {str(e)}")
-            # エラー時も強制的にUI状態をリセット
-            try:
-                self.reset_search_button()
-            except Exception as reset_error:
-                logging.error(f"強制UI状態リセット中にもエラー: {str(reset_error)}")
-    
-    def on_cancel_timeout(self):
-        """
-        キャンセル処理がタイムアウトした場合の処理
-        """
-        try:
-            logging.warning("★★★ キャンセル処理がタイムアウトしました - 強制リセットを実行します ★★★")
-            
-            # 強制的にスレッドとワーカーをクリーンアップ
-            try:
-                self.cleanup_thread()
-            except Exception as cleanup_error:
-                logging.error(f"強制クリーンアップ中にエラー: {str(cleanup_error)}")
-            
-            # キャンセルワーカーとスレッドも強制終了
-            if hasattr(self, 'cancel_worker') and self.cancel_worker is not None:
-                try:
-                    self.cancel_worker.deleteLater()
-                except:
-                    pass
-                self.cancel_worker = None
-                
-            if hasattr(self, 'cancel_thread') and self.cancel_thread is not None:
-                try:
-                    from PySide6.QtCore import QThread
-                    if isinstance(self.cancel_thread, QThread):
-                        if self.cancel_thread.isRunning():
-                            logging.info("キャンセルスレッドを強制終了します")
-                            self.cancel_thread.terminate()
-                            self.cancel_thread.wait(1000)
-                        self.cancel_thread.deleteLater()
-                    else:
-                        logging.warning(f"cancel_threadが不正な型です: {type(self.cancel_thread)}")
-                except Exception as e:
-                    logging.error(f"キャンセルスレッド終了中にエラー: {str(e)}")
-                self.cancel_thread = None
-            
-            # 強制的にボタンを元に戻す
-            self.reset_search_button()
-            
-            # タイマーをクリーンアップ
-            if self.cancel_timer:
-                try:
-                    self.cancel_timer.deleteLater()
-                except:
-                    pass
-                self.cancel_timer = None
-            
-            # 結果ラベルを更新
-            if hasattr(self, 'area_result_label'):
-                self.area_result_label.setText("提供エリア: キャンセル（タイムアウト）")
-                self.area_result_label.setStyleSheet("""
-                    QLabel {
-                        font-size: 14px;
-                        padding: 5px;
-                        border: 1px solid #E74C3C;
-                        border-radius: 4px;
-                        background-color: #FFEBEE;
-                        color: #E74C3C;
-                    }
-                """)
-            
-            logging.info("★★★ 強制リセットが完了しました ★★★")
-            
-        except Exception as e:
-            logging.error(f"キャンセルタイムアウト処理中にエラー: {str(e)}")
-            # 最後の手段として基本的なリセットのみ実行
-            try:
-                if hasattr(self, 'area_search_btn'):
-                    self.area_search_btn.setText("提供エリア検索")
-                    self.area_search_btn.setEnabled(True)
-            except:
-                pass
-
     def reset_search_button(self):
         """検索ボタンを初期状態に戻す"""
         # ★★★ ボタンリセット時にもキャンセルフラグをクリア ★★★
@@ -3802,9 +3635,17 @@ ND：{nd}
                 QMessageBox.information(self, "提供判定結果", details_text)
                 
             # スクリーンショットの保存（自動表示はしない）
-            if "screenshot" in result and os.path.exists(result["screenshot"]):
-                self.screenshot_path = result["screenshot"]
-                logging.info(f"スクリーンショットを保存しました: {result['screenshot']}")
+            screenshot = result.get("screenshot")
+            if screenshot and os.path.exists(screenshot):
+                self.screenshot_path = screenshot
+                logging.info(f"スクリーンショットを保存しました: {screenshot}")
+            elif screenshot:
+                # 保存中の場合は完了後にボタンを有効にする（完了通知は書き込みスレッドから届く）
+                from services.screenshot_pipeline import get_screenshot_writer
+                self.screenshot_path = screenshot
+                get_screenshot_writer().add_done_callback(
+                    screenshot, lambda path: self.screenshot_ready.emit(path or "")
+                )
                     
         except Exception as e:
             logging.error(f"検索完了処理中にエラーが発生: {str(e)}")
@@ -4551,6 +4392,13 @@ ND：{nd}
                 if hasattr(self, 'phone_monitor') and self.phone_monitor:
                     self.phone_monitor.stop_monitoring()
                 
+                # 提供判定ブラウザは終了せず、再起動後のアプリに引き継ぐ
+                try:
+                    from services.browser_sessions import handoff_browsers
+                    handoff_browsers()
+                except Exception as e:
+                    logging.error(f"ブラウザの引き継ぎエラー: {str(e)}")
+                
                 logging.info("アプリケーションを再起動します...")
                 
                 # 実行ファイルのパスを正しく取得
@@ -4664,11 +4512,17 @@ class ServiceAreaSearchWorker(QObject):
     finished = Signal(dict)  # 検索結果を通知するシグナル
     progress = Signal(str)   # 進捗状況を通知するシグナル
     
-    def __init__(self, postal_code, address):
+    def __init__(self, postal_code, address, force_refresh=False, browser_overrides=None):
         super().__init__()
         self.postal_code = postal_code
         self.address = address
+        self.force_refresh = force_refresh
+        # この検索だけに適用する browser_settings の上書き（先行判定のヘッドレス実行など）
+        self.browser_overrides = browser_overrides
         self._is_cancelled = False
+        # この検索専用のキャンセルトークン（同時に動く先行判定などには影響しない）
+        from services.cancellation import CancelToken
+        self.cancel_token = CancelToken()
         self._progress_steps = [
             {"message": "住所情報を解析中...", "weight": 5},
             {"message": "NTT西日本のサイトにアクセス中...", "weight": 10},
@@ -4683,24 +4537,9 @@ class ServiceAreaSearchWorker(QObject):
         self._accumulated_progress = 0
     
     def cancel(self):
-        """検索をキャンセルする"""
+        """検索をキャンセルする（待機中の処理を即座に起こし、ブラウザをプロセスごと終了する）"""
         self._is_cancelled = True
-        
-        # area_searchモジュールのキャンセルフラグを設定
-        try:
-            from services.area_search import set_cancel_flag, clear_cancel_flag
-            set_cancel_flag()
-            logging.info("ServiceAreaSearchWorker: area_searchのキャンセルフラグを設定しました")
-        except ImportError as e:
-            logging.warning(f"ServiceAreaSearchWorker: area_searchのキャンセルフラグ設定に失敗: {e}")
-        
-        # area_search_eastモジュールのキャンセルフラグを設定
-        try:
-            from services.area_search_east import set_cancel_flag, clear_cancel_flag
-            set_cancel_flag()
-            logging.info("ServiceAreaSearchWorker: area_search_eastのキャンセルフラグを設定しました")
-        except ImportError as e:
-            logging.warning(f"ServiceAreaSearchWorker: area_search_eastのキャンセルフラグ設定に失敗: {e}")
+        self.cancel_token.cancel("画面からの取り消し")
     
     def _update_progress(self, message=None):
         """
@@ -4755,43 +4594,13 @@ class ServiceAreaSearchWorker(QObject):
     
     def run(self):
         """提供エリア検索を実行し、結果をシグナルで通知する"""
+        from services.cancellation import CancellationError
+
         try:
-            # 開始前にキャンセルフラグをチェック
-            try:
-                from services.area_search import is_cancelled
-                if is_cancelled():
-                    logging.info("検索開始前にキャンセルが検出されました")
-                    raise CancellationError("検索がキャンセルされました")
-            except ImportError:
-                pass
-            
-            try:
-                from services.area_search_east import is_cancelled
-                if is_cancelled():
-                    logging.info("検索開始前にキャンセルが検出されました（東日本）")
-                    raise CancellationError("検索がキャンセルされました")
-            except ImportError:
-                pass
-            
-            # ワーカー自体のキャンセルフラグもチェック
-            if self._is_cancelled:
-                logging.info("ワーカーレベルでキャンセルが検出されました")
+            # 開始前にキャンセルをチェック
+            if self._is_cancelled or self.cancel_token.is_cancelled:
+                logging.info("検索開始前にキャンセルが検出されました")
                 raise CancellationError("検索がキャンセルされました")
-            
-            # キャンセルフラグを初期化（まだキャンセルされていない場合のみ）
-            try:
-                from services.area_search import is_cancelled, clear_cancel_flag
-                if not is_cancelled():
-                    clear_cancel_flag()
-            except ImportError:
-                pass
-            
-            try:
-                from services.area_search_east import is_cancelled, clear_cancel_flag
-                if not is_cancelled():
-                    clear_cancel_flag()
-            except ImportError:
-                pass
                 
             # 進捗状況を通知するコールバック関数を定義
             def progress_callback(message):
@@ -4799,35 +4608,22 @@ class ServiceAreaSearchWorker(QObject):
                     raise CancellationError("検索がキャンセルされました")
                 self._update_progress(message)
 
-            # 検索を実行
-            result = search_service_area(
+            # 検索を実行（同じ住所の検索が実行中の場合は合流して結果を共有する）
+            from services.search_coordinator import get_search_coordinator
+            result = get_search_coordinator().search(
                 self.postal_code,
                 self.address,
-                progress_callback=progress_callback
+                progress_callback=progress_callback,
+                force_refresh=self.force_refresh,
+                cancel_token=self.cancel_token,
+                browser_overrides=self.browser_overrides
             )
             
             # 結果処理前の最終キャンセルチェック（競合状態回避）
-            if self._is_cancelled:
+            if self._is_cancelled or result.get("status") == "cancelled":
                 logging.info("検索結果処理前にキャンセルが検出されました")
                 raise CancellationError("検索がキャンセルされました")
             
-            # 外部キャンセルフラグもチェック
-            try:
-                from services.area_search import is_cancelled
-                if is_cancelled():
-                    logging.info("検索結果処理前に外部キャンセルが検出されました")
-                    raise CancellationError("検索がキャンセルされました")
-            except ImportError:
-                pass
-            
-            try:
-                from services.area_search_east import is_cancelled
-                if is_cancelled():
-                    logging.info("検索結果処理前に東日本キャンセルが検出されました")
-                    raise CancellationError("検索がキャンセルされました")
-            except ImportError:
-                pass
-            
             logging.info(f"★★★ 検索結果を返却します: {result.get('status', 'unknown')} ★★★")
             
             # 検索完了時に100%を表示
@@ -4842,11 +4638,21 @@ class ServiceAreaSearchWorker(QObject):
         except CancellationError as e:
             logging.info("検索がキャンセルされました")
             self.progress.emit("検索がキャンセルされました (0%)")
+            self.cancel_token.mark_idle()
             self.finished.emit({
                 "status": "cancelled",
                 "message": "検索がキャンセルされました"
             })
         except Exception as e:
+            if self.cancel_token.is_cancelled:
+                # キャンセルでブラウザを終了した後の通信エラー
+                logging.info(f"キャンセル後の例外を無視します: {str(e)}")
+                self.cancel_token.mark_idle()
+                self.finished.emit({
+                    "status": "cancelled",
+                    "message": "検索がキャンセルされました"
+                })
+                return
             logging.error(f"検索処理中にエラーが発生: {str(e)}")
             self.progress.emit("エラーが発生しました (0%)")
             self.finished.emit({
@@ -10,7 +10,6 @@ import logging
 import json
 import os
 import re
-import threading
 from PySide6.QtWidgets import QMessageBox, QApplication, QWidget, QProgressBar, QListView, QDialog, QVBoxLayout, QLabel, QPushButton
 from PySide6.QtCore import QTimer, QThread, Signal, QObject, Qt, QEventLoop
 from PySide6.QtGui import QFont
@@ -19,6 +18,7 @@ from PySide6.QtWidgets import QMessageBox, QApplication
 from ui.settings_dialog import SettingsDialog
 from services import area_search
 from services import oneclick
+from services.cancellation import CancelToken
 from services.mapfan_service import MapfanService
 from utils.format_utils import (format_phone_number, format_phone_number_without_hyphen,
                                format_postal_code, convert_to_half_width)
@@ -35,20 +35,23 @@ class ServiceAreaSearchWorker(QThread):
         finished (Signal): 検索完了時に発火する信号
         postal_code (str): 検索対象の郵便番号
         address (str): 検索対象の住所
+        force_refresh (bool): キャッシュを使わずに再検索するか
     """
     finished = Signal(dict)
     
-    def __init__(self, postal_code, address):
+    def __init__(self, postal_code, address, force_refresh=False):
         """
         コンストラクタ
         
         Args:
             postal_code (str): 検索対象の郵便番号
             address (str): 検索対象の住所
+            force_refresh (bool): キャッシュを使わずに再検索するか
         """
         super().__init__()
         self.postal_code = postal_code
         self.address = address
+        self.force_refresh = force_refresh
         self.driver = None
         self._is_running = True
     
@@ -65,8 +68,11 @@ class ServiceAreaSearchWorker(QThread):
                 return
                 
             logging.info("★★★ ServiceAreaSearchWorker: 提供エリア検索を開始します ★★★")
-            # 提供エリア検索を実行
-            result = area_search.search_service_area(self.postal_code, self.address)
+            # 提供エリア検索を実行（同じ住所の検索が実行中の場合は合流して結果を共有する）
+            from services.search_coordinator import get_search_coordinator
+            result = get_search_coordinator().search(
+                self.postal_code, self.address, force_refresh=self.force_refresh
+            )
             
             if not self._is_running:
                 logging.info("ServiceAreaSearchWorker: スレッドが停止状態のため結果を返しません")
@@ -113,16 +119,12 @@ class MapfanUrlWorker(QThread):
         self.address = address
         self.mapfan_headless = mapfan_headless
         self.auto_close = auto_close
-        self.cancel_event = threading.Event()
+        self.cancel_token = CancelToken()
         self._service: MapfanService | None = None
 
     def cancel(self):
-        self.cancel_event.set()
-        try:
-            if self._service is not None:
-                self._service.request_cancel()
-        except Exception:
-            pass
+        # 待機中の処理を起こし、起動済みのブラウザをプロセスごと終了する
+        self.cancel_token.cancel("MapFan処理の取り消し")
 
     def run(self):
         try:
@@ -131,12 +133,12 @@ class MapfanUrlWorker(QThread):
                 address=self.address,
                 auto_close=self.auto_close,
                 force_headless=self.mapfan_headless,
-                cancel_event=self.cancel_event,
+                cancel_token=self.cancel_token,
             )
-            self.finished.emit(url, self.cancel_event.is_set())
+            self.finished.emit(url, self.cancel_token.is_cancelled)
         except Exception as e:
             logging.error(f"MapFanワーカーで例外が発生: {e}")
-            self.finished.emit(None, self.cancel_event.is_set())
+            self.finished.emit(None, self.cancel_token.is_cancelled)
         finally:
             self._service = None
 
@@ -189,6 +191,13 @@ class MainWindowFunctions:
                 logging.info("MapFan検索をスキップ: 住所情報が未入力です")
                 return None
 
+            # 解決済み・先読み済みの住所は問い合わせずに返す
+            from services.mapfan_service import get_cached_mapfan_url
+            cached_url = get_cached_mapfan_url(address)
+            if cached_url:
+                logging.info(f"MapFan詳細URLをキャッシュから取得しました: {cached_url}")
+                return cached_url
+
             if hasattr(self, 'statusBar'):
                 self.statusBar().showMessage("MapFanで住所検索中...", 2000)
 
@@ -212,6 +221,30 @@ class MainWindowFunctions:
             logging.error(f"MapFan詳細URL取得中にエラー: {str(e)}")
             return None
 
+    def schedule_mapfan_prefetch(self, *_):
+        """住所の変更時にMapFan詳細URLの先読みを予約する（入力が止まってから開始）"""
+        from services.mapfan_url_cache import _load_mapfan_url_cache_settings
+
+        settings = _load_mapfan_url_cache_settings()
+        if not settings.get("enabled", True) or not settings.get("prefetch", True):
+            return
+        if not hasattr(self, '_mapfan_prefetch_timer'):
+            self._mapfan_prefetch_timer = QTimer(self)
+            self._mapfan_prefetch_timer.setSingleShot(True)
+            self._mapfan_prefetch_timer.timeout.connect(self.start_mapfan_prefetch)
+        self._mapfan_prefetch_timer.start(int(settings.get("prefetch_debounce_ms", 800)))
+
+    def start_mapfan_prefetch(self):
+        """入力が止まった住所のMapFan詳細URLをバックグラウンドで解決しておく"""
+        try:
+            address = self.address_input.text().strip()
+            if not address:
+                return
+            from services.mapfan_service import prefetch_mapfan_url
+            prefetch_mapfan_url(address)
+        except Exception as e:
+            logging.debug(f"MapFan URLの先読みを開始できませんでした: {e}")
+
     def _get_mapfan_url_with_progress_dialog(self, address: str, mapfan_headless: bool, auto_close: bool = False):
         worker = MapfanUrlWorker(address=address, mapfan_headless=mapfan_headless, auto_close=auto_close)
         self._mapfan_worker = worker
@@ -495,6 +528,36 @@ ND：{nd}
             formatted_text = format_postal_code(current_text)
             self._apply_text_preserving_cursor(sender, formatted_text, preserve_by_digits=True)
     
+    def prefill_address_from_postal_code(self):
+        """郵便番号が7桁になったら、空の住所欄に郵便番号索引の住所を入力する"""
+        sender = self.sender()
+        if not sender:
+            return
+        address_field = {
+            getattr(self, 'postal_code_input', None): getattr(self, 'address_input', None),
+            getattr(self, 'list_postal_code_input', None): getattr(self, 'list_address_input', None),
+        }.get(sender)
+        if address_field is None or address_field.text().strip():
+            return
+        if len(re.sub(r'\D', '', sender.text())) != 7:
+            return
+
+        from utils.postal_index import lookup_postal_code
+
+        entries = lookup_postal_code(sender.text())
+        if not entries:
+            return
+        # 町域が1つに定まる場合は町域まで、複数の場合は共通する市区町村までを入力する
+        if len(entries) == 1:
+            prefill = entries[0].address
+        else:
+            cities = {f"{entry.prefecture}{entry.city}" for entry in entries}
+            if len(cities) != 1:
+                return
+            prefill = cities.pop()
+        address_field.setText(prefill)
+        logging.info(f"郵便番号から住所を入力しました: {prefill}")
+
     def convert_to_half_width(self):
         """全角文字を半角に変換する処理"""
         sender = self.sender()
@@ -1289,7 +1352,9 @@ ND：{nd}
             
             # ワーカースレッドを作成して開始
             logging.info("★★★ 新しいワーカースレッドを作成します ★★★")
-            self.search_worker = ServiceAreaSearchWorker(postal_code, address)
+            self.search_worker = ServiceAreaSearchWorker(
+                postal_code, address, force_refresh=self.take_force_refresh_request()
+            )
             
             # finishedシグナルの接続を確実に行う
             try:
@@ -1305,6 +1370,42 @@ ND：{nd}
             logging.error(f"★★★ 提供エリア検索の開始中にエラーが発生: {e} ★★★")
             QMessageBox.critical(self, "エラー", f"提供エリア検索の開始中にエラーが発生しました: {e}")
 
+    def take_force_refresh_request(self):
+        """
+        今回の提供エリア検索でキャッシュを使わないかを返す
+
+        Shiftキーを押しながらの検索ボタンクリック、または検索ボタンの右クリックメニュー
+        「キャッシュを使わずに再検索」の場合にTrueを返します。
+
+        Returns:
+            bool: キャッシュを使わずに再検索する場合はTrue
+        """
+        requested = getattr(self, '_force_refresh_next_search', False)
+        self._force_refresh_next_search = False
+        return requested or bool(QApplication.keyboardModifiers() & Qt.ShiftModifier)
+
+    def search_service_area_without_cache(self):
+        """キャッシュを使わずに提供エリアを再検索する"""
+        logging.info("キャッシュを使わずに提供エリアを再検索します")
+        self._force_refresh_next_search = True
+        self.search_service_area()
+
+    def show_area_search_menu(self, pos):
+        """
+        提供エリア検索ボタンの右クリックメニューを表示する
+
+        Args:
+            pos (QPoint): ボタン上のクリック位置
+        """
+        from PySide6.QtWidgets import QMenu
+
+        menu = QMenu(self)
+        action = menu.addAction("キャッシュを使わずに再検索")
+        # 検索中（キャンセルボタン表示中）は再検索できない
+        action.setEnabled(self.area_search_btn.text() == "提供エリア検索")
+        action.triggered.connect(self.search_service_area_without_cache)
+        menu.exec(self.area_search_btn.mapToGlobal(pos))
+
     def refresh_address_from_cti(self) -> bool:
         """CTI上の住所で入力欄を更新する"""
         try:
@@ -1517,6 +1618,14 @@ ND：{nd}
         else:
             self.screenshot_btn.setEnabled(False)
 
+    def on_screenshot_ready(self, screenshot_path):
+        """バックグラウンドで保存していたスクリーンショットの保存完了時の処理"""
+        # 保存中に次の検索が始まっていた場合は古い結果の通知として無視する
+        if not screenshot_path or screenshot_path != getattr(self, "screenshot_path", None):
+            return
+        logging.info(f"スクリーンショットを保存しました: {screenshot_path}")
+        self.update_screenshot_button(screenshot_path)
+
     def show_screenshot(self):
         """スクリーンショットを表示する"""
         try:
@@ -1526,6 +1635,10 @@ ND：{nd}
             else:
                 screenshot_path = "debug_screenshot.png"
             
+            # バックグラウンドで保存中の場合は完了を少し待つ
+            from services.screenshot_pipeline import get_screenshot_writer
+            get_screenshot_writer().wait(screenshot_path, timeout=3.0)
+            
             # ファイルが存在するか確認
             if not os.path.exists(screenshot_path):
                 QMessageBox.warning(
@@ -330,6 +330,17 @@ ND：{nd}
         self.cti_refresh_before_area_search_checkbox.setChecked(current_refresh_before_area_search)
         self.cti_refresh_before_area_search_checkbox.setToolTip("無効にすると、提供判定検索開始時は現在入力欄にある郵便番号・住所をそのまま使用します")
         cti_monitor_layout.addWidget(self.cti_refresh_before_area_search_checkbox)
+
+        # 入力中の先行提供判定
+        self.speculative_area_search_checkbox = QCheckBox("郵便番号・住所の入力が止まったら提供判定を先に始める")
+        self.speculative_area_search_checkbox.setChecked(
+            parent.settings.get('speculative_area_search', False) if hasattr(parent, 'settings') else False
+        )
+        self.speculative_area_search_checkbox.setToolTip(
+            "有効にすると、入力が確定した時点でバックグラウンドで提供判定を始め、"
+            "検索ボタンを押したときに同じ入力であればその結果を使います（先行判定のブラウザは常にヘッドレスで起動します）"
+        )
+        cti_monitor_layout.addWidget(self.speculative_area_search_checkbox)
         
         # CTI監視間隔設定
         cti_interval_layout = QHBoxLayout()
@@ -680,6 +691,7 @@ ND：{nd}
                     self.cti_monitoring_checkbox.setChecked(cti_monitoring_enabled)
                     self.cti_auto_processing_checkbox.setChecked(cti_auto_processing_enabled)
                     self.cti_refresh_before_area_search_checkbox.setChecked(cti_refresh_before_area_search)
+                    self.speculative_area_search_checkbox.setChecked(settings.get('speculative_area_search', False))
                     self.cti_interval_spin.setValue(int(cti_monitor_interval * 1000))  # 秒をミリ秒に変換
                     self.cti_cooldown_spin.setValue(int(cti_auto_processing_cooldown))
                     
@@ -815,6 +827,7 @@ ND：{nd}
                 'enable_cti_monitoring': self.cti_monitoring_checkbox.isChecked(),
                 'enable_auto_cti_processing': self.cti_auto_processing_checkbox.isChecked(),
                 'refresh_address_from_cti_before_area_search': self.cti_refresh_before_area_search_checkbox.isChecked(),
+                'speculative_area_search': self.speculative_area_search_checkbox.isChecked(),
                 'cti_monitor_interval': self.cti_interval_spin.value() / 1000.0,  # ミリ秒を秒に変換
                 'cti_auto_processing_cooldown': float(self.cti_cooldown_spin.value()),
                 'call_duration_threshold': self.call_duration_spin.value()
@@ -963,6 +976,7 @@ ND：{nd}
             'enable_cti_monitoring': self.cti_monitoring_checkbox.isChecked(),
             'enable_auto_cti_processing': self.cti_auto_processing_checkbox.isChecked(),
             'refresh_address_from_cti_before_area_search': self.cti_refresh_before_area_search_checkbox.isChecked(),
+            'speculative_area_search': self.speculative_area_search_checkbox.isChecked(),
             'cti_monitor_interval': self.cti_interval_spin.value() / 1000.0,  # ミリ秒を秒に変換
             'cti_auto_processing_cooldown': float(self.cti_cooldown_spin.value()),
             'call_duration_threshold': self.call_duration_spin.value()
@@ -10,7 +10,7 @@
 - ログ出力
 
 制限事項：
-- 地域検索は最大100件まで表示
+- 地域検索の結果はバックグラウンドで100件ずつ読み込んで追加表示
 - 電話番号は10桁まで入力可能
 - 検索結果は最大100件まで表示
 """
@@ -29,7 +29,7 @@ from PySide6.QtWidgets import (
     QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView,
     QDialog, QFormLayout, QSpinBox, QCheckBox, QDialogButtonBox
 )
-from PySide6.QtCore import Qt, QTimer, QThread, Signal
+from PySide6.QtCore import Qt, QTimer, QThread, Signal, QObject
 from PySide6.QtGui import QAction, QIcon, QFont
 
 from .base_window import BaseWindow
@@ -40,6 +40,40 @@ from ..utils.logger import setup_logger
 from ..utils.settings import load_settings, save_settings
 from version import check_version
 
+class AreaPageLoader(QObject):
+    """地域検索の結果をページ単位で読み込むワーカー"""
+
+    page_loaded = Signal(list)
+    finished = Signal(int)
+    failed = Signal(str)
+
+    def __init__(self, service: AreaSearchService, prefecture: str, city: str, page_size: int = 100):
+        super().__init__()
+        self.service = service
+        self.prefecture = prefecture
+        self.city = city
+        self.page_size = page_size
+        self._cancelled = False
+
+    def cancel(self):
+        """読み込みを中断する（次のページの取得前に停止）"""
+        self._cancelled = True
+
+    def run(self):
+        """ページを順に取得して通知する"""
+        total = 0
+        try:
+            for page in self.service.iter_area_pages(self.prefecture, self.city, self.page_size):
+                if self._cancelled:
+                    break
+                total += len(page)
+                self.page_loaded.emit(page)
+        except Exception as e:
+            logging.error(f"地域検索の読み込み中にエラーが発生しました: {str(e)}")
+            self.failed.emit(str(e))
+        self.finished.emit(total)
+
+
 class SimpleModeWindow(BaseWindow):
     """シンプルモードのメインウィンドウクラス"""
     
@@ -47,9 +81,13 @@ class SimpleModeWindow(BaseWindow):
         """ウィンドウの初期化"""
         super().__init__()
         self.setWindowTitle("電話番号検索ツール - シンプルモード")
+        self.area_service = AreaSearchService()
+        self.area_loader = None
+        self.area_thread = None
         self.setup_ui()
         self.setup_connections()
         self.load_settings()
+        self.load_prefectures()
         
     def setup_ui(self):
         """UIの初期設定"""
@@ -173,21 +211,82 @@ class SimpleModeWindow(BaseWindow):
         phone_number = self.result_table.item(row, 0).text()
         self.copy_to_clipboard(phone_number)
         
+    def load_prefectures(self):
+        """都道府県コンボボックスの設定"""
+        for prefecture in self.area_service.get_prefectures():
+            self.prefecture_combo.addItem(prefecture["name"], prefecture["code"])
+
     def update_city_combo(self, prefecture: str):
         """市区町村コンボボックスの更新"""
         self.city_combo.clear()
         self.city_combo.addItem("市区町村を選択", "")
         
-        # TODO: 市区町村データの取得と設定
+        for city in self.area_service.get_cities(prefecture):
+            self.city_combo.addItem(city["name"], city["code"])
         
     def search_by_area(self, prefecture: str, city: str):
-        """地域による検索"""
+        """地域による検索（結果はバックグラウンドでページ単位に読み込んで追加表示）"""
         try:
-            # TODO: 地域検索の実装
-            pass
+            self.stop_area_loader()
+            self.result_table.setRowCount(0)
+            self.statusBar().showMessage("地域検索中...")
+
+            self.area_loader = AreaPageLoader(self.area_service, prefecture, city)
+            self.area_thread = QThread()
+            self.area_loader.moveToThread(self.area_thread)
+            self.area_thread.started.connect(self.area_loader.run)
+            self.area_loader.page_loaded.connect(self.append_area_page)
+            self.area_loader.failed.connect(
+                lambda message: QMessageBox.critical(self, "エラー", "検索中にエラーが発生しました。")
+            )
+            self.area_loader.finished.connect(self.on_area_search_finished)
+            self.area_loader.finished.connect(self.area_thread.quit)
+            self.area_thread.finished.connect(self.area_loader.deleteLater)
+            self.area_thread.finished.connect(self.area_thread.deleteLater)
+            self.area_thread.start()
         except Exception as e:
             logging.error(f"地域検索中にエラーが発生しました: {str(e)}")
             QMessageBox.critical(self, "エラー", "検索中にエラーが発生しました。")
+
+    def stop_area_loader(self):
+        """実行中の地域検索の読み込みを中断する"""
+        if self.area_loader is not None:
+            self.area_loader.cancel()
+            try:
+                self.area_loader.page_loaded.disconnect(self.append_area_page)
+                self.area_loader.finished.disconnect(self.on_area_search_finished)
+            except (RuntimeError, TypeError):
+                pass
+        thread = self.area_thread
+        self.area_loader = None
+        self.area_thread = None
+        if thread is not None:
+            try:
+                if thread.isRunning():
+                    # 読み込みは次のページの取得前に止まるため、終了まで待ってから参照を外す
+                    # （実行中のQThreadを破棄するとアプリケーションが異常終了する）
+                    thread.quit()
+                    thread.wait()
+            except RuntimeError:
+                pass  # 読み込み完了後に deleteLater で破棄済み
+
+    def append_area_page(self, page: List[Dict[str, str]]):
+        """読み込んだ1ページ分の結果をテーブルに追加する"""
+        self.result_table.setUpdatesEnabled(False)
+        try:
+            start = self.result_table.rowCount()
+            self.result_table.setRowCount(start + len(page))
+            for offset, record in enumerate(page):
+                values = (record["phone_number"], record["area"], record["carrier"], record["note"])
+                for column, value in enumerate(values):
+                    self.result_table.setItem(start + offset, column, QTableWidgetItem(value))
+        finally:
+            self.result_table.setUpdatesEnabled(True)
+        self.statusBar().showMessage(f"地域検索中... {self.result_table.rowCount()}件")
+
+    def on_area_search_finished(self, total: int):
+        """地域検索の読み込み完了時の処理"""
+        self.statusBar().showMessage(f"地域検索が完了しました: {total}件")
             
     def search_by_phone(self, phone_number: str):
         """電話番号による検索"""
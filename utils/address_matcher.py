@@ -0,0 +1,321 @@
+"""
+住所候補の高速類似度計算モジュール
+
+このモジュールは、提供エリア検索の住所候補の並べ替えに使う
+類似度計算（レーベンシュタイン距離）を高速に行う機能を提供します。
+
+主な機能：
+- ビット並列（Myers/Hyyrö）による編集距離と打ち切り
+- 正規化済み文字列の完全一致判定（ハッシュ）を先に行う
+- 1つの入力住所に対する候補リストの一括評価
+- 従来の行列方式との比較ベンチマーク
+
+使用例：
+    python -m utils.address_matcher
+"""
+
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from utils.string_utils import normalize_string
+
+
+def _build_peq(pattern: str) -> Dict[str, int]:
+    """文字ごとの出現位置ビットマスクを作る"""
+    peq: Dict[str, int] = {}
+    for index, char in enumerate(pattern):
+        peq[char] = peq.get(char, 0) | (1 << index)
+    return peq
+
+
+def _myers_distance(pattern: str, peq: Dict[str, int], text: str, max_distance: Optional[int] = None) -> int:
+    """
+    ビット並列法で編集距離を計算する（pattern は peq の元の文字列）
+
+    Args:
+        pattern (str): 比較元の文字列
+        peq (dict): _build_peq(pattern) の結果
+        text (str): 比較先の文字列
+        max_distance (int): この値を超えることが確定した時点で打ち切る
+
+    Returns:
+        int: 編集距離。打ち切った場合は max_distance + 1
+    """
+    m = len(pattern)
+    n = len(text)
+    if m == 0:
+        return n
+    if n == 0:
+        return m
+
+    mask = (1 << m) - 1
+    high = 1 << (m - 1)
+    pv = mask
+    mv = 0
+    score = m
+    for position, char in enumerate(text, start=1):
+        eq = peq.get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+        # 残りの文字で減らせる距離は最大でも残り文字数
+        if max_distance is not None and score - (n - position) > max_distance:
+            return max_distance + 1
+    return score
+
+
+def levenshtein_distance(str1: str, str2: str, max_distance: Optional[int] = None) -> int:
+    """
+    2つの文字列の編集距離を計算する
+
+    Args:
+        str1 (str): 比較する文字列1
+        str2 (str): 比較する文字列2
+        max_distance (int): この値を超える場合は max_distance + 1 を返す
+
+    Returns:
+        int: 編集距離
+    """
+    if str1 == str2:
+        return 0
+    if max_distance is not None and abs(len(str1) - len(str2)) > max_distance:
+        return max_distance + 1
+    # 短い方をビットマスク側にする
+    if len(str1) > len(str2):
+        str1, str2 = str2, str1
+    return _myers_distance(str1, _build_peq(str1), str2, max_distance)
+
+
+def similarity(str1: str, str2: str, min_similarity: Optional[float] = None) -> float:
+    """
+    編集距離から類似度（0.0～1.0）を計算する
+
+    Args:
+        str1 (str): 比較する文字列1
+        str2 (str): 比較する文字列2
+        min_similarity (float): これ未満になることが確定した時点で打ち切る
+
+    Returns:
+        float: 類似度。打ち切った場合は min_similarity 未満の値（正確な値ではない）
+    """
+    if not str1 or not str2:
+        return 0.0
+    if str1 == str2:
+        return 1.0
+    if min_similarity is not None and min_similarity > 1.0:
+        return 0.0
+    max_len = max(len(str1), len(str2))
+    max_distance = None
+    if min_similarity is not None and min_similarity > 0:
+        max_distance = int((1.0 - min_similarity) * max_len + 1e-9)
+    distance = levenshtein_distance(str1, str2, max_distance)
+    return 1.0 - (distance / max_len)
+
+
+class AddressMatcher:
+    """1つの入力住所に対する候補の一括評価"""
+
+    def __init__(self, input_address: str, normalize: Callable[[str], str] = normalize_string,
+                 city_weighted: bool = False):
+        """
+        評価の初期化
+
+        Args:
+            input_address (str): 入力された住所
+            normalize (callable): 住所の正規化関数
+            city_weighted (bool): 「市」で分割し、都道府県＋市の一致（0.6）と
+                町名の類似度（0.4）で評価するか
+        """
+        self.normalize = normalize
+        self.city_weighted = city_weighted
+        self.input_normalized = normalize(input_address) or ""
+        self._input_tokens = set(self.input_normalized.split())
+        # 類似度は calculate_similarity と同じく小文字化して比較する
+        self._input_lower = self.input_normalized.lower()
+        self._normalized_cache: Dict[str, str] = {}
+        self._peq_cache: Dict[str, Dict[str, int]] = {}
+
+        input_parts = self.input_normalized.split('市')
+        self._input_city = input_parts[0] + '市' if len(input_parts) == 2 else None
+        self._input_town = input_parts[1].lower() if len(input_parts) == 2 else None
+
+    def _normalized(self, candidate_address: str) -> str:
+        normalized = self._normalized_cache.get(candidate_address)
+        if normalized is None:
+            normalized = self.normalize(candidate_address) or ""
+            self._normalized_cache[candidate_address] = normalized
+        return normalized
+
+    def _similarity(self, pattern: str, text: str, min_similarity: Optional[float]) -> float:
+        """入力側の文字列をビットマスクとして再利用して類似度を計算する"""
+        if not pattern or not text:
+            return 0.0
+        if pattern == text:
+            return 1.0
+        if min_similarity is not None and min_similarity > 1.0:
+            return 0.0
+        max_len = max(len(pattern), len(text))
+        max_distance = None
+        if min_similarity is not None and min_similarity > 0:
+            max_distance = int((1.0 - min_similarity) * max_len + 1e-9)
+            if abs(len(pattern) - len(text)) > max_distance:
+                return 1.0 - (max_distance + 1) / max_len
+        peq = self._peq_cache.get(pattern)
+        if peq is None:
+            peq = self._peq_cache[pattern] = _build_peq(pattern)
+        return 1.0 - _myers_distance(pattern, peq, text, max_distance) / max_len
+
+    def score(self, candidate_address: str, min_similarity: Optional[float] = None) -> float:
+        """
+        候補の類似度を計算する（is_address_match と同じ基準）
+
+        Args:
+            candidate_address (str): 候補の住所
+            min_similarity (float): これ未満の候補は打ち切る
+
+        Returns:
+            float: 類似度（完全一致は1.0）
+        """
+        candidate = self._normalized(candidate_address)
+        if candidate == self.input_normalized:
+            return 1.0
+
+        candidate_parts = candidate.split('市')
+        if self.city_weighted and self._input_town is not None and len(candidate_parts) == 2:
+            city_score = 0.6 if self._input_city == candidate_parts[0] + '市' else 0.0
+            town_min = None
+            if min_similarity is not None:
+                town_min = (min_similarity - city_score) / 0.4
+            similarity_value = city_score + self._similarity(
+                self._input_town, candidate_parts[1].lower(), town_min
+            ) * 0.4
+        else:
+            similarity_value = self._similarity(self._input_lower, candidate.lower(), min_similarity)
+
+        # 空白区切りの共通部分の割合（is_address_match の補助判定）
+        if similarity_value < 0.8 and self._input_tokens:
+            common = self._input_tokens & set(candidate.split())
+            part_similarity = len(common) / len(self._input_tokens)
+            if part_similarity >= 0.8:
+                return part_similarity
+        return similarity_value
+
+    def score_batch(self, candidate_addresses: Sequence[str],
+                    min_similarity: Optional[float] = None) -> List[float]:
+        """
+        候補リストをまとめて評価する
+
+        Args:
+            candidate_addresses (list): 候補の住所
+            min_similarity (float): これ未満の候補は打ち切る
+
+        Returns:
+            list: 候補ごとの類似度
+        """
+        return [self.score(candidate, min_similarity) for candidate in candidate_addresses]
+
+    def best_match(self, candidate_addresses: Sequence[str],
+                   threshold: float = 0.5) -> Tuple[Optional[int], float]:
+        """
+        最も類似度の高い候補を探す。完全一致はハッシュで先に探し、
+        それ以外はその時点の最高値を下限として打ち切りながら評価する。
+
+        Args:
+            candidate_addresses (list): 候補の住所
+            threshold (float): 採用する最低限の類似度
+
+        Returns:
+            tuple: (候補のインデックス, 類似度)。しきい値未満の場合は (None, 最高類似度)
+        """
+        normalized = [self._normalized(candidate) for candidate in candidate_addresses]
+        exact_index = {text: index for index, text in reversed(list(enumerate(normalized)))}
+        if self.input_normalized in exact_index:
+            return exact_index[self.input_normalized], 1.0
+
+        best_index = None
+        best_similarity = -1.0
+        for index, candidate in enumerate(candidate_addresses):
+            value = self.score(candidate, best_similarity if best_similarity > 0 else None)
+            if value > best_similarity:
+                best_index = index
+                best_similarity = value
+        if best_index is not None and best_similarity >= threshold:
+            return best_index, best_similarity
+        return None, best_similarity
+
+
+def _matrix_similarity(str1: str, str2: str) -> float:
+    """従来の (n+1)×(m+1) 行列による類似度（ベンチマークの比較用）"""
+    if not str1 or not str2:
+        return 0.0
+    len1, len2 = len(str1), len(str2)
+    matrix = [[0 for _ in range(len2 + 1)] for _ in range(len1 + 1)]
+    for i in range(len1 + 1):
+        matrix[i][0] = i
+    for j in range(len2 + 1):
+        matrix[0][j] = j
+    for i in range(1, len1 + 1):
+        for j in range(1, len2 + 1):
+            cost = 0 if str1[i-1] == str2[j-1] else 1
+            matrix[i][j] = min(matrix[i-1][j] + 1, matrix[i][j-1] + 1, matrix[i-1][j-1] + cost)
+    return 1.0 - (matrix[len1][len2] / max(len1, len2))
+
+
+def run_benchmark(candidate_count: int = 300, repeat: int = 3) -> Dict[str, float]:
+    """
+    字/大字を含む長い候補リストで従来方式と比較する
+
+    Args:
+        candidate_count (int): 候補数
+        repeat (int): 計測回数（最小値を採用）
+
+    Returns:
+        dict: 従来方式・新方式の所要秒数と速度比
+    """
+    input_address = "北海道上川郡東神楽町大字志比内字東神楽第二十三区域一丁目"
+    candidates = [
+        f"北海道上川郡東神楽町大字志比内字{'東西南北'[i % 4]}{i}線{i % 7}号第{i % 13}区域"
+        for i in range(candidate_count)
+    ]
+    normalized_input = normalize_string(input_address)
+
+    def _legacy():
+        best = -1.0
+        for candidate in candidates:
+            best = max(best, _matrix_similarity(normalized_input, normalize_string(candidate)))
+        return best
+
+    def _fast():
+        return AddressMatcher(input_address).best_match(candidates, threshold=0.0)[1]
+
+    timings = {}
+    for name, func in (("legacy", _legacy), ("fast", _fast)):
+        elapsed = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            elapsed.append(time.perf_counter() - started)
+        timings[name] = min(elapsed)
+
+    return {
+        "candidates": candidate_count,
+        "legacy_sec": round(timings["legacy"], 4),
+        "fast_sec": round(timings["fast"], 4),
+        "speedup": round(timings["legacy"] / timings["fast"], 1) if timings["fast"] > 0 else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    result = run_benchmark()
+    print("=== 住所類似度ベンチマーク ===")
+    print(f"候補数: {result['candidates']}")
+    print(f"従来方式: {result['legacy_sec']}秒 / 新方式: {result['fast_sec']}秒（{result['speedup']}倍）")
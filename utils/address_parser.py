@@ -0,0 +1,646 @@
+"""
+市区町村辞書による住所分割モジュール
+
+このモジュールは、全都道府県・市区町村（郡・政令市の区を含む）の
+接頭辞トライを使い、住所を左から1回の走査で
+都道府県・市区町村・町名・丁目・番地・接頭/接尾記号・建物部分に分割する機能を提供します。
+
+主な機能：
+- 同梱の市区町村表（utils/data/municipalities.tsv）の読み込みとトライ構築
+- 市区町村名の最長一致（「市」「町」「村」を含む市区町村名も正しく分割）
+- 都道府県が省略された住所の都道府県の補完（市区町村名が一意な場合）
+- 西日本・東日本・画面で共通の分割結果（ParsedAddress）
+- 住所リストの一括分割
+- 日本郵便の KEN_ALL.CSV からの市区町村表の再生成
+- 10万件の住所での分割速度ベンチマーク
+
+制限事項：
+- 市区町村表にない市区町村は従来の正規表現（郡＋町村、市区町村）で分割します
+- 町名は辞書を持たないため、数字・丁目・番地の位置で区切ります
+
+使用例：
+    python -m utils.address_parser build KEN_ALL.CSV
+    python -m utils.address_parser split 住所リスト.csv
+    python -m utils.address_parser bench 100000
+"""
+
+import argparse
+import csv
+import logging
+import os
+import random
+import re
+import sys
+import time
+import unicodedata
+from dataclasses import asdict, dataclass, fields
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "municipalities.tsv")
+
+PREFECTURES = (
+    "北海道", "青森県", "岩手県", "宮城県", "秋田県", "山形県", "福島県",
+    "茨城県", "栃木県", "群馬県", "埼玉県", "千葉県", "東京都", "神奈川県",
+    "新潟県", "富山県", "石川県", "福井県", "山梨県", "長野県", "岐阜県",
+    "静岡県", "愛知県", "三重県", "滋賀県", "京都府", "大阪府", "兵庫県",
+    "奈良県", "和歌山県", "鳥取県", "島根県", "岡山県", "広島県", "山口県",
+    "徳島県", "香川県", "愛媛県", "高知県", "福岡県", "佐賀県", "長崎県",
+    "熊本県", "大分県", "宮崎県", "鹿児島県", "沖縄県",
+)
+
+# 東日本（NTT東日本エリア）の都道府県
+EAST_JAPAN_PREFECTURES = frozenset(PREFECTURES[:14] + ("新潟県", "山梨県", "長野県"))
+
+# 辞書引きの際に同一視する表記ゆれ（入力側の文字 → 辞書側の文字）
+_LOOKUP_FOLD = {"ヶ": "ケ", "ヵ": "カ", "ゞ": "ゝ"}
+
+_FALLBACK_CITY_PATTERN = re.compile(r'^(.+?郡.+?[町村]|.+?[市区町村])')
+_ZEN_TO_HAN = str.maketrans('０１２３４５６７８９－−', '0123456789--')
+_KANJI_DIGITS = {'〇': 0, '一': 1, '二': 2, '三': 3, '四': 4, '五': 5, '六': 6, '七': 7, '八': 8, '九': 9}
+_SYMBOL_PREFIXES = "甲乙丙丁"
+# 番地の区切り（長いものから判定する）
+_NUMBER_SEPARATORS = ("番地の", "番地", "番", "の", "-")
+# 数字の後に続く場合は町名の一部とみなす語（例：北1条西、4線、第2地割）
+_TOWN_COUNTERS = ("条", "線", "地割", "番町", "区")
+
+_TERMINAL = ""
+
+
+@dataclass
+class ParsedAddress:
+    """
+    住所の分割結果
+
+    従来の split_address の辞書と同じキーで参照できます（address_parts['town'] / .get('number')）。
+    """
+    prefecture: Optional[str] = None
+    city: Optional[str] = None
+    town: str = ""
+    block: str = ""
+    number: Optional[str] = None
+    number_prefix: Optional[str] = None
+    number_suffix: Optional[str] = None
+    building_id: str = ""
+    municipality_code: Optional[str] = None
+
+    def __getitem__(self, key: str):
+        if key not in _FIELD_NAMES:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        if key not in _FIELD_NAMES:
+            return default
+        return getattr(self, key)
+
+    def keys(self):
+        return list(_FIELD_NAMES)
+
+    def to_dict(self) -> Dict[str, Optional[str]]:
+        return asdict(self)
+
+    @property
+    def base_address(self) -> str:
+        """番地を除いた基本住所（都道府県＋市区町村＋町名＋丁目）"""
+        base = f"{self.prefecture or ''}{self.city or ''}{self.town}"
+        if self.block:
+            base += f"{self.block}丁目"
+        return base
+
+    @property
+    def region(self) -> Optional[str]:
+        """判定サイト（east/west）。都道府県が不明な場合はNone"""
+        if not self.prefecture:
+            return None
+        return "east" if self.prefecture in EAST_JAPAN_PREFECTURES else "west"
+
+
+_FIELD_NAMES = tuple(field.name for field in fields(ParsedAddress))
+
+
+def _fold(char: str) -> str:
+    return _LOOKUP_FOLD.get(char, char)
+
+
+def _trie_insert(trie: Dict, word: str, value) -> None:
+    node = trie
+    for char in word:
+        node = node.setdefault(_fold(char), {})
+    node.setdefault(_TERMINAL, value)
+
+
+def _trie_longest(trie: Dict, text: str, start: int) -> Tuple[Optional[object], int]:
+    """text[start:] の先頭で最も長く一致する語の値と終了位置を返す"""
+    node = trie
+    found = None
+    end = start
+    for index in range(start, len(text)):
+        node = node.get(_fold(text[index]))
+        if node is None:
+            break
+        if _TERMINAL in node:
+            found = node[_TERMINAL]
+            end = index + 1
+    return found, end
+
+
+def _designated_city(name: str) -> Optional[str]:
+    """政令市の区（例：札幌市中央区）から市名を返す"""
+    match = re.match(r'^(.+?市)(.+区)$', name)
+    return match.group(1) if match else None
+
+
+def _county_alias(name: str) -> Optional[str]:
+    """郡部の町村（例：東村山郡山辺町）から郡を除いた名前を返す"""
+    match = re.match(r'^.+?郡(.+[町村])$', name)
+    return match.group(1) if match else None
+
+
+class Gazetteer:
+    """都道府県・市区町村の接頭辞トライ"""
+
+    def __init__(self, entries: Iterable[Tuple[str, str, str, str]]):
+        """
+        トライの構築
+
+        Args:
+            entries (iterable): (団体コード, 都道府県, 市区町村, 市区町村カナ) の並び
+        """
+        self.prefecture_trie: Dict = {}
+        for prefecture in PREFECTURES:
+            _trie_insert(self.prefecture_trie, prefecture, prefecture)
+
+        self.city_tries: Dict[str, Dict] = {prefecture: {} for prefecture in PREFECTURES}
+        self.global_trie: Dict = {}
+        self.entries: List[Tuple[str, str, str, str]] = []
+
+        aliases: Dict[Tuple[str, str], set] = {}
+        for code, prefecture, city, kana in entries:
+            if prefecture not in self.city_tries:
+                continue
+            self.entries.append((code, prefecture, city, kana))
+            names = [(city, code)]
+            parent = _designated_city(city)
+            if parent:
+                names.append((parent, None))
+            for name, name_code in names:
+                _trie_insert(self.city_tries[prefecture], name, (name, name_code))
+                self._add_global(name, prefecture, name_code)
+            alias = _county_alias(city)
+            if alias:
+                aliases.setdefault((prefecture, alias), set()).add(code)
+
+        # 郡を省略した表記は、同じ都道府県内で一意な場合のみ登録する
+        for (prefecture, alias), codes in aliases.items():
+            if len(codes) == 1:
+                code = next(iter(codes))
+                _trie_insert(self.city_tries[prefecture], alias, (alias, code))
+                self._add_global(alias, prefecture, code)
+
+    def _add_global(self, name: str, prefecture: str, code: Optional[str]) -> None:
+        node = self.global_trie
+        for char in name:
+            node = node.setdefault(_fold(char), {})
+        node.setdefault(_TERMINAL, {})[prefecture] = (name, code)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_TABLE_PATH) -> "Gazetteer":
+        """
+        市区町村表（TSV）を読み込む
+
+        Args:
+            path (str): 市区町村表のパス
+
+        Returns:
+            Gazetteer: 構築済みのトライ
+        """
+        entries = []
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip() or line.startswith("#"):
+                        continue
+                    columns = line.rstrip("\n").split("\t")
+                    if len(columns) >= 4:
+                        entries.append(tuple(columns[:4]))
+        except OSError as e:
+            logging.warning(f"市区町村表の読み込みに失敗しました（従来の分割規則のみを使用します）: {e}")
+        return cls(entries)
+
+    def match_prefecture(self, text: str, start: int = 0) -> Tuple[Optional[str], int]:
+        """先頭の都道府県名と終了位置を返す"""
+        prefecture, end = _trie_longest(self.prefecture_trie, text, start)
+        return prefecture, end
+
+    def match_city(self, text: str, start: int, prefecture: Optional[str]):
+        """
+        市区町村名を最長一致で探す
+
+        Args:
+            text (str): 住所
+            start (int): 市区町村名の開始位置
+            prefecture (str): 都道府県（Noneの場合は全国から探す）
+
+        Returns:
+            tuple: (都道府県, 市区町村コード, 終了位置)。見つからない場合は (prefecture, None, start)
+        """
+        if prefecture:
+            found, end = _trie_longest(self.city_tries.get(prefecture, {}), text, start)
+            if found is None:
+                return prefecture, None, start
+            return prefecture, found[1], end
+
+        found, end = _trie_longest(self.global_trie, text, start)
+        if not found:
+            return None, None, start
+        if len(found) == 1:
+            inferred, (_, code) = next(iter(found.items()))
+            return inferred, code, end
+        # 同名の市区町村が複数の都道府県にある場合は都道府県を補完しない
+        return None, None, end
+
+
+_gazetteer: Optional[Gazetteer] = None
+
+
+def get_gazetteer() -> Gazetteer:
+    """同梱の市区町村表から作ったトライを返す（初回のみ読み込み）"""
+    global _gazetteer
+    if _gazetteer is None:
+        started = time.perf_counter()
+        _gazetteer = Gazetteer.load()
+        logging.info(
+            f"市区町村表を読み込みました: {len(_gazetteer.entries)}件"
+            f"（{(time.perf_counter() - started) * 1000:.1f}ms）"
+        )
+    return _gazetteer
+
+
+def _is_kana(char: str) -> bool:
+    return 'ぁ' <= char <= 'ん' or 'ァ' <= char <= 'ヶ'
+
+
+def _is_symbol_prefix(text: str, index: int) -> bool:
+    """text[index] が番地の接頭記号（甲乙丙丁、単独のイロハ等）かどうか"""
+    char = text[index]
+    if char in _SYMBOL_PREFIXES:
+        return True
+    return _is_kana(char) and (index == 0 or not _is_kana(text[index - 1]))
+
+
+def _read_digits(text: str, index: int) -> Tuple[str, int]:
+    end = index
+    while end < len(text) and '0' <= text[end] <= '9':
+        end += 1
+    return text[index:end], end
+
+
+def _read_kanji_block(text: str, index: int) -> Tuple[Optional[str], int]:
+    """漢数字の丁目（例：四丁目、十二丁目）を読み取る"""
+    end = index
+    while end < len(text) and (text[end] in _KANJI_DIGITS or text[end] == '十'):
+        end += 1
+    if end == index or not text.startswith("丁目", end):
+        return None, index
+    numerals = text[index:end]
+    if '十' in numerals:
+        tens, _, ones = numerals.partition('十')
+        value = (_KANJI_DIGITS.get(tens, 0) if tens else 1) * 10 + (_KANJI_DIGITS.get(ones, 0) if ones else 0)
+    else:
+        value = 0
+        for numeral in numerals:
+            value = value * 10 + _KANJI_DIGITS[numeral]
+    return str(value), end + 2
+
+
+def _clean_town(town: str) -> str:
+    town = town.replace("大字", "").strip()
+    if town.startswith("字"):
+        town = town[1:]
+    return town.replace("字", "").strip(" -")
+
+
+def _split_tail(text: str, parsed: ParsedAddress) -> None:
+    """市区町村より後ろ（町名・丁目・番地・建物）を1回の走査で分割する"""
+    length = len(text)
+    index = 0
+    town_end = None
+    # 町名：数字、漢数字の丁目、番地の接頭記号の手前まで
+    while index < length:
+        char = text[index]
+        if '0' <= char <= '9':
+            _, end = _read_digits(text, index)
+            if any(text.startswith(counter, end) for counter in _TOWN_COUNTERS):
+                index = end
+                continue
+            town_end = index
+            break
+        if char in _KANJI_DIGITS or char == '十':
+            block, end = _read_kanji_block(text, index)
+            if block is not None:
+                parsed.town = _clean_town(text[:index])
+                parsed.block = block
+                index = end
+                break
+        if index + 1 < length and '0' <= text[index + 1] <= '9' and _is_symbol_prefix(text, index):
+            town_end = index
+            parsed.number_prefix = char
+            index += 1
+            break
+        index += 1
+
+    if town_end is None and not parsed.block:
+        # 数字がない住所：末尾の単独の記号は番地の接頭記号とみなす
+        stripped = text.rstrip()
+        if stripped and _is_symbol_prefix(stripped, len(stripped) - 1):
+            parsed.number_prefix = stripped[-1]
+            stripped = stripped[:-1]
+        parsed.town = _clean_town(stripped)
+        return
+    if town_end is not None:
+        parsed.town = _clean_town(text[:town_end])
+
+    # 丁目・番地：数字の並びを区切り（-、番、番地、の、号）ごとに読む
+    tokens: List[str] = []
+    while index < length:
+        while not tokens and index < length and text[index] in " -":
+            index += 1
+        if not tokens and parsed.number_prefix is None and index + 1 < length \
+                and '0' <= text[index + 1] <= '9' and _is_symbol_prefix(text, index):
+            parsed.number_prefix = text[index]
+            index += 1
+        digits, end = _read_digits(text, index)
+        if not digits:
+            break
+        index = end
+        if not parsed.block and not tokens and text.startswith("丁目", index):
+            parsed.block = digits
+            index += 2
+            continue
+        tokens.append(digits)
+        if text.startswith("号", index):
+            index += 1
+            break
+        next_index = None
+        for separator in _NUMBER_SEPARATORS:
+            if text.startswith(separator, index):
+                after = index + len(separator)
+                if after < length and '0' <= text[after] <= '9':
+                    next_index = after
+                elif separator != "-":
+                    index = after
+                break
+        if next_index is None:
+            break
+        index = next_index
+
+    if len(tokens) >= 3 and not parsed.block:
+        # 1-2-3 形式は、先頭の数値が町名側にも現れる場合のみ丁目とみなす
+        first = tokens[0]
+        variants = {first, first.translate(str.maketrans('0123456789', '０１２３４５６７８９'))}
+        kanji = {'1': '一', '2': '二', '3': '三', '4': '四', '5': '五',
+                 '6': '六', '7': '七', '8': '八', '9': '九', '10': '十'}.get(first)
+        if kanji:
+            variants.add(kanji)
+        if any(variant in parsed.town for variant in variants):
+            parsed.block = first
+            tokens = tokens[1:]
+    if tokens:
+        parsed.number = "-".join(tokens)
+
+    # 番地直後の単独のかな（例：12ア、12-ア）は接尾記号
+    rest = text[index:]
+    suffix_match = re.match(r'^-?([ァ-ヶぁ-ん])(?:$|[\s-])', rest)
+    if parsed.number and suffix_match:
+        parsed.number_suffix = suffix_match.group(1)
+        rest = rest[suffix_match.end():]
+
+    building = rest.strip(" -")
+    for marker in ("号室", "室"):
+        if building.endswith(marker):
+            building = building[:-len(marker)]
+            break
+    parsed.building_id = building.strip()
+
+
+def _prepare(address: str) -> str:
+    """分割前の表記ゆれの統一（全角数字・ハイフン・空白）"""
+    text = address.replace('　', ' ').strip().translate(_ZEN_TO_HAN)
+    # 数字に挟まれた長音符はハイフンとみなす
+    if 'ー' in text:
+        text = re.sub(r'(?<=\d)ー(?=\d)', '-', text)
+    return text
+
+
+def parse_address(address: str, gazetteer: Optional[Gazetteer] = None) -> ParsedAddress:
+    """
+    住所を分割する
+
+    Args:
+        address (str): 分割する住所
+        gazetteer (Gazetteer): 使用するトライ（省略時は同梱の市区町村表）
+
+    Returns:
+        ParsedAddress: 分割結果（常に返す）。判定できなかった項目は既定値
+            （None または空文字）のまま
+    """
+    gazetteer = gazetteer or get_gazetteer()
+    text = _prepare(address or "")
+    parsed = ParsedAddress()
+
+    prefecture, index = gazetteer.match_prefecture(text)
+    if prefecture is None:
+        # 「〇〇県」の表記揺れ等で辞書にない場合は従来どおり末尾の文字で判定する
+        match = re.match(r'^(.+?[都道府県])', text)
+        if match and gazetteer.match_city(text, 0, None)[2] == 0:
+            prefecture, index = match.group(1), match.end()
+    while index < len(text) and text[index] == ' ':
+        index += 1
+
+    city_start = index
+    prefecture, code, index = gazetteer.match_city(text, city_start, prefecture)
+    parsed.prefecture = prefecture
+    if index > city_start:
+        parsed.city = text[city_start:index]
+        parsed.municipality_code = code
+    else:
+        fallback = _FALLBACK_CITY_PATTERN.match(text[city_start:])
+        if fallback is None:
+            if prefecture:
+                parsed.city = text[city_start:] or None
+            return parsed
+        parsed.city = fallback.group(1)
+        index = city_start + fallback.end()
+
+    _split_tail(text[index:].strip(), parsed)
+    return parsed
+
+
+def parse_addresses(addresses: Iterable[str], gazetteer: Optional[Gazetteer] = None) -> List[ParsedAddress]:
+    """
+    住所リストを一括で分割する（同じ住所は1回だけ分割する）
+
+    Args:
+        addresses (iterable): 住所の並び
+        gazetteer (Gazetteer): 使用するトライ
+
+    Returns:
+        list: 住所ごとの ParsedAddress（入力と同じ順序）
+    """
+    gazetteer = gazetteer or get_gazetteer()
+    memo: Dict[str, ParsedAddress] = {}
+    results = []
+    for address in addresses:
+        parsed = memo.get(address)
+        if parsed is None:
+            parsed = memo[address] = parse_address(address, gazetteer)
+        results.append(parsed)
+    return results
+
+
+def read_ken_all(path: str, encoding: str = "cp932"):
+    """
+    日本郵便の KEN_ALL.CSV から市区町村を読み出す
+
+    Args:
+        path (str): KEN_ALL.CSV のパス
+        encoding (str): 文字コード（配布ファイルは Shift_JIS）
+
+    Yields:
+        tuple: (団体コード, 都道府県, 市区町村, 市区町村カナ)
+    """
+    with open(path, "r", encoding=encoding, newline="") as f:
+        for row in csv.reader(f):
+            if len(row) < 8:
+                continue
+            yield row[0], row[6], row[7], unicodedata.normalize("NFKC", row[4])
+
+
+def build_municipality_table(rows: Iterable[Tuple[str, str, str, str]], output_path: str = DEFAULT_TABLE_PATH,
+                             source: str = "KEN_ALL.CSV") -> int:
+    """
+    市区町村表（団体コード順のTSV）を生成する
+
+    Args:
+        rows (iterable): (団体コード, 都道府県, 市区町村, 市区町村カナ) の並び（重複可）
+        output_path (str): 出力先
+        source (str): ヘッダーに記録する元データ名
+
+    Returns:
+        int: 出力した市区町村数
+    """
+    municipalities: Dict[str, Tuple[str, str, str]] = {}
+    for code, prefecture, city, kana in rows:
+        if code and prefecture in PREFECTURES and city:
+            municipalities.setdefault(code, (prefecture, city, kana))
+
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output_path, "w", encoding="utf-8", newline="\n") as f:
+        f.write(f"# 市区町村表（団体コード\t都道府県\t市区町村\t市区町村カナ）元データ: {source}\n")
+        f.write("# 再生成: python -m utils.address_parser build KEN_ALL.CSV\n")
+        for code in sorted(municipalities):
+            prefecture, city, kana = municipalities[code]
+            f.write(f"{code}\t{prefecture}\t{city}\t{kana}\n")
+    return len(municipalities)
+
+
+def _generate_addresses(gazetteer: Gazetteer, count: int, seed: int = 0) -> List[str]:
+    """ベンチマーク用に市区町村表から様々な書式の住所を生成する"""
+    rng = random.Random(seed)
+    towns = ["本町", "大字山寺字子安", "中央", "字東", "緑ケ丘", "新町", "旭町", "梅田", "東"]
+    entries = gazetteer.entries or [("00000", "東京都", "港区", "")]
+    addresses = []
+    for _ in range(count):
+        _, prefecture, city, _ = rng.choice(entries)
+        town = rng.choice(towns)
+        form = rng.randrange(6)
+        a, b, c = rng.randint(1, 9), rng.randint(1, 40), rng.randint(1, 30)
+        if form == 0:
+            tail = f"{town}{a}丁目{b}-{c}"
+        elif form == 1:
+            tail = f"{town}{a}丁目{b}番{c}号 {town}ハイツ{c}0{a}号室"
+        elif form == 2:
+            tail = f"{town}{b}番地"
+        elif form == 3:
+            tail = f"{town}甲{b}-{c}"
+        elif form == 4:
+            tail = f"{town}{a}-{b}-{c}"
+        else:
+            tail = f"{town}{b}イ"
+        addresses.append(f"{prefecture}{city}{tail}")
+    return addresses
+
+
+def run_benchmark(count: int = 100000, seed: int = 0) -> Dict[str, float]:
+    """
+    生成した住所で分割速度を計測する
+
+    Args:
+        count (int): 住所数
+        seed (int): 住所生成の乱数シード
+
+    Returns:
+        dict: 件数・所要秒数・1件あたりの時間・市区町村を辞書で判定できた割合
+    """
+    gazetteer = get_gazetteer()
+    addresses = _generate_addresses(gazetteer, count, seed)
+
+    started = time.perf_counter()
+    results = [parse_address(address, gazetteer) for address in addresses]
+    elapsed = time.perf_counter() - started
+
+    resolved = sum(1 for result in results if result.municipality_code)
+    return {
+        "addresses": count,
+        "elapsed_sec": round(elapsed, 3),
+        "per_address_us": round(elapsed / count * 1_000_000, 2) if count else 0.0,
+        "per_second": round(count / elapsed) if elapsed > 0 else 0,
+        "gazetteer_hit_ratio": round(resolved / count, 4) if count else 0.0,
+    }
+
+
+def main(argv=None) -> int:
+    """コマンドラインから市区町村表の生成・住所リストの分割・ベンチマークを実行する"""
+    parser = argparse.ArgumentParser(description="市区町村辞書による住所分割")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="KEN_ALL.CSV から市区町村表を生成します")
+    build_parser.add_argument("ken_all", help="日本郵便の KEN_ALL.CSV")
+    build_parser.add_argument("--output", default=DEFAULT_TABLE_PATH, help="出力先")
+
+    split_parser = subparsers.add_parser("split", help="住所リストを分割してTSVで出力します")
+    split_parser.add_argument("input", help="入力ファイル（CSV または JSONL。住所の列が必要）")
+
+    bench_parser = subparsers.add_parser("bench", help="分割速度を計測します")
+    bench_parser.add_argument("count", nargs="?", type=int, default=100000, help="住所数")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        total = build_municipality_table(read_ken_all(args.ken_all), args.output,
+                                         source=os.path.basename(args.ken_all))
+        print(f"市区町村表を生成しました: {args.output}（{total}件）")
+        return 0
+
+    if args.command == "split":
+        from services.batch_area_search import read_input_rows
+
+        rows = list(read_input_rows(args.input))
+        writer = csv.writer(sys.stdout, delimiter="\t", lineterminator="\n")
+        writer.writerow(["row", "address"] + list(_FIELD_NAMES))
+        for row, parsed in zip(rows, parse_addresses(row["address"] for row in rows)):
+            writer.writerow([row["row"], row["address"]] + [parsed[name] or "" for name in _FIELD_NAMES])
+        return 0
+
+    result = run_benchmark(args.count)
+    print("=== 住所分割ベンチマーク ===")
+    print(f"住所数: {result['addresses']}")
+    print(f"所要時間: {result['elapsed_sec']}秒（1件あたり {result['per_address_us']}µs、{result['per_second']}件/秒）")
+    print(f"市区町村の辞書一致率: {result['gazetteer_hit_ratio'] * 100:.2f}%")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
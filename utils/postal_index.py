@@ -0,0 +1,458 @@
+"""
+郵便番号の索引モジュール
+
+このモジュールは、日本郵便の KEN_ALL 形式の CSV から作った
+郵便番号順のバイナリ索引（utils/data/postal_index.bin）をメモリマップで開き、
+7桁の郵便番号から都道府県・市区町村・町域の候補を二分探索で引く機能を提供します。
+
+主な機能：
+- KEN_ALL.CSV の読み込み（複数行に分かれた町域の結合、括弧書き・「以下に掲載がない場合」の除去）
+- 郵便番号順の固定長レコードと文字列領域からなる索引ファイルの生成
+- メモリマップによる読み込みと O(log n) の検索
+- 郵便番号と住所の整合性チェック（ブラウザ起動前の確認）
+- 索引の生成時間・読み込み時間・検索速度のベンチマーク
+
+制限事項：
+- 事業所の個別郵便番号（JIGYOSYO.CSV）は含みません（未登録の郵便番号は「不明」として扱います）
+- 索引ファイルがない場合、検索は常に空の結果を返します
+
+使用例：
+    python -m utils.postal_index build KEN_ALL.CSV
+    python -m utils.postal_index lookup 530-0001
+    python -m utils.postal_index bench
+"""
+
+import argparse
+import csv
+import logging
+import mmap
+import os
+import random
+import re
+import struct
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "postal_index.bin")
+
+_MAGIC = b"PCIX"
+_VERSION = 1
+# magic, version, 予約, レコード数, レコード位置, 市区町村表の位置と長さ, 町域文字列の位置と長さ
+_HEADER = struct.Struct("<4sHHIIIIII")
+# 郵便番号, 市区町村番号, 町域文字列の位置, 町域文字列の長さ
+_RECORD = struct.Struct("<IHIH")
+_CODE = struct.Struct("<I")
+
+_NO_TOWN_MARKERS = ("以下に掲載がない場合",)
+
+
+@dataclass(frozen=True)
+class PostalEntry:
+    """郵便番号に対応する町域"""
+    postal_code: str
+    prefecture: str
+    city: str
+    town: str
+    municipality_code: str = ""
+
+    @property
+    def address(self) -> str:
+        return f"{self.prefecture}{self.city}{self.town}"
+
+
+def _clean_postal_code(postal_code: str) -> Optional[int]:
+    """郵便番号を7桁の整数にする（7桁でない場合はNone）"""
+    digits = re.sub(r'\D', '', (postal_code or "").translate(str.maketrans('０１２３４５６７８９', '0123456789')))
+    if len(digits) != 7:
+        return None
+    return int(digits)
+
+
+class PostalIndex:
+    """メモリマップした郵便番号索引"""
+
+    def __init__(self, path: str):
+        """
+        索引ファイルを開く
+
+        Args:
+            path (str): 索引ファイルのパス
+
+        Raises:
+            ValueError: 索引ファイルの形式が不正な場合
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        (magic, version, _, count, records_offset, muni_offset, muni_length,
+         strings_offset, strings_length) = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC or version != _VERSION:
+            self.close()
+            raise ValueError(f"郵便番号索引の形式が不正です: {path}")
+        self._count = count
+        self._records_offset = records_offset
+        self._strings_offset = strings_offset
+        self._strings_end = strings_offset + strings_length
+        # 市区町村表は2千件程度のため、開く時点で展開しておく
+        self._municipalities: List[Tuple[str, str, str]] = []
+        block = self._mm[muni_offset:muni_offset + muni_length].decode("utf-8")
+        for line in block.splitlines():
+            code, prefecture, city = line.split("\t")
+            self._municipalities.append((code, prefecture, city))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        """索引ファイルを閉じる"""
+        try:
+            self._mm.close()
+        finally:
+            self._file.close()
+
+    def _code_at(self, position: int) -> int:
+        return _CODE.unpack_from(self._mm, self._records_offset + position * _RECORD.size)[0]
+
+    def _lower_bound(self, code: int) -> int:
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._code_at(middle) < code:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def lookup(self, postal_code: str) -> List[PostalEntry]:
+        """
+        郵便番号から町域の候補を引く
+
+        Args:
+            postal_code (str): 郵便番号（ハイフン・全角数字可）
+
+        Returns:
+            list: PostalEntry のリスト（未登録・7桁でない場合は空）
+        """
+        code = _clean_postal_code(postal_code)
+        if code is None:
+            return []
+        entries = []
+        position = self._lower_bound(code)
+        while position < self._count:
+            record_code, muni_index, town_offset, town_length = _RECORD.unpack_from(
+                self._mm, self._records_offset + position * _RECORD.size
+            )
+            if record_code != code:
+                break
+            start = self._strings_offset + town_offset
+            town = self._mm[start:start + town_length].decode("utf-8")
+            municipality_code, prefecture, city = self._municipalities[muni_index]
+            entries.append(PostalEntry(f"{code:07d}", prefecture, city, town, municipality_code))
+            position += 1
+        return entries
+
+    def __contains__(self, postal_code: str) -> bool:
+        code = _clean_postal_code(postal_code)
+        if code is None:
+            return False
+        position = self._lower_bound(code)
+        return position < self._count and self._code_at(position) == code
+
+
+_index: Optional[PostalIndex] = None
+_index_loaded = False
+_index_lock = threading.Lock()
+
+
+def get_postal_index() -> Optional[PostalIndex]:
+    """同梱の郵便番号索引を返す（初回のみ開く。ファイルがない場合はNone）"""
+    global _index, _index_loaded
+    with _index_lock:
+        if not _index_loaded:
+            _index_loaded = True
+            started = time.perf_counter()
+            try:
+                _index = PostalIndex(DEFAULT_INDEX_PATH)
+                logging.info(
+                    f"郵便番号索引を読み込みました: {len(_index)}件"
+                    f"（{(time.perf_counter() - started) * 1000:.1f}ms）"
+                )
+            except (OSError, ValueError) as e:
+                logging.warning(f"郵便番号索引を読み込めませんでした（郵便番号の事前確認を行いません）: {e}")
+                _index = None
+        return _index
+
+
+def lookup_postal_code(postal_code: str) -> List[PostalEntry]:
+    """
+    同梱の索引で郵便番号から町域の候補を引く
+
+    Args:
+        postal_code (str): 郵便番号
+
+    Returns:
+        list: PostalEntry のリスト（索引がない場合は空）
+    """
+    index = get_postal_index()
+    return index.lookup(postal_code) if index else []
+
+
+def _city_matches(entry_city: str, city: str) -> bool:
+    """政令市の区の省略・郡の省略を許して市区町村名を比較する"""
+    if not city:
+        return True
+    return entry_city == city or entry_city.startswith(city) or entry_city.endswith(city) or city.startswith(entry_city)
+
+
+def check_postal_address(postal_code: str, address: str) -> Dict:
+    """
+    郵便番号と住所の整合性を確認する
+
+    Args:
+        postal_code (str): 郵便番号
+        address (str): 住所
+
+    Returns:
+        dict: 確認結果
+            - known: 郵便番号が索引に登録されているか
+            - consistent: 住所と一致するか（判定できない場合はNone）
+            - level: 不一致の粒度（"prefecture" / "city"、一致時はNone）
+            - candidates: 郵便番号に対応する PostalEntry のリスト
+            - message: 利用者向けの説明
+    """
+    from utils.address_parser import parse_address
+
+    candidates = lookup_postal_code(postal_code)
+    result = {"known": bool(candidates), "consistent": None, "level": None,
+              "candidates": candidates, "message": ""}
+    if not candidates:
+        return result
+
+    parsed = parse_address(address or "")
+    if not parsed.prefecture:
+        return result
+
+    expected = "、".join(sorted({f"{entry.prefecture}{entry.city}" for entry in candidates}))
+    same_prefecture = [entry for entry in candidates if entry.prefecture == parsed.prefecture]
+    if not same_prefecture:
+        result.update(consistent=False, level="prefecture",
+                      message=f"郵便番号 {candidates[0].postal_code} は {expected} の郵便番号です（住所: {parsed.prefecture}）")
+        return result
+    if not any(_city_matches(entry.city, parsed.city) for entry in same_prefecture):
+        result.update(consistent=False, level="city",
+                      message=f"郵便番号 {candidates[0].postal_code} は {expected} の郵便番号です（住所: {parsed.prefecture}{parsed.city}）")
+        return result
+    result["consistent"] = True
+    return result
+
+
+def infer_prefecture(postal_code: str) -> Optional[str]:
+    """郵便番号から都道府県を返す（候補が1つの都道府県に定まらない場合はNone）"""
+    prefectures = {entry.prefecture for entry in lookup_postal_code(postal_code)}
+    return prefectures.pop() if len(prefectures) == 1 else None
+
+
+def _clean_town(town: str) -> str:
+    """KEN_ALL の町域名から括弧書き・注記を除く"""
+    if town in _NO_TOWN_MARKERS or town.endswith("の次に番地がくる場合"):
+        return ""
+    if town.endswith("一円") and len(town) > 2:
+        return ""
+    return re.sub(r'（.*', '', town)
+
+
+def read_ken_all(path: str, encoding: str = "cp932"):
+    """
+    日本郵便の KEN_ALL.CSV から町域を読み出す
+
+    Args:
+        path (str): KEN_ALL.CSV のパス
+        encoding (str): 文字コード（配布ファイルは Shift_JIS）
+
+    Yields:
+        tuple: (郵便番号7桁, 団体コード, 都道府県, 市区町村, 町域)
+    """
+    pending = None
+    with open(path, "r", encoding=encoding, newline="") as f:
+        for row in csv.reader(f):
+            if len(row) < 9:
+                continue
+            if pending is not None:
+                # 括弧が閉じるまでの行は同じ町域の続き
+                if row[2] == pending[2]:
+                    pending[8] += row[8]
+                    if "）" in row[8]:
+                        yield pending[2], pending[0], pending[6], pending[7], _clean_town(pending[8])
+                        pending = None
+                    continue
+                yield pending[2], pending[0], pending[6], pending[7], _clean_town(pending[8])
+                pending = None
+            if "（" in row[8] and "）" not in row[8]:
+                pending = list(row)
+                continue
+            yield row[2], row[0], row[6], row[7], _clean_town(row[8])
+    if pending is not None:
+        yield pending[2], pending[0], pending[6], pending[7], _clean_town(pending[8])
+
+
+def build_postal_index(rows: Iterable[Tuple[str, str, str, str, str]], output_path: str = DEFAULT_INDEX_PATH) -> int:
+    """
+    郵便番号索引ファイルを生成する
+
+    Args:
+        rows (iterable): (郵便番号7桁, 団体コード, 都道府県, 市区町村, 町域) の並び（重複可）
+        output_path (str): 出力先
+
+    Returns:
+        int: 出力したレコード数
+    """
+    municipalities: Dict[Tuple[str, str, str], int] = {}
+    strings: Dict[str, int] = {}
+    heap = bytearray()
+    records = set()
+    for postal_code, municipality_code, prefecture, city, town in rows:
+        code = _clean_postal_code(postal_code)
+        if code is None or not prefecture or not city:
+            continue
+        muni_key = (municipality_code, prefecture, city)
+        muni_index = municipalities.setdefault(muni_key, len(municipalities))
+        town_bytes = town.encode("utf-8")
+        offset = strings.get(town)
+        if offset is None:
+            offset = strings[town] = len(heap)
+            heap += town_bytes
+        records.add((code, muni_index, offset, len(town_bytes)))
+
+    muni_block = "".join(f"{code}\t{prefecture}\t{city}\n"
+                         for (code, prefecture, city), _ in sorted(municipalities.items(), key=lambda item: item[1]))
+    muni_bytes = muni_block.encode("utf-8")
+    ordered = sorted(records)
+
+    records_offset = _HEADER.size
+    muni_offset = records_offset + len(ordered) * _RECORD.size
+    strings_offset = muni_offset + len(muni_bytes)
+
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{output_path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, 0, len(ordered), records_offset,
+                             muni_offset, len(muni_bytes), strings_offset, len(heap)))
+        for record in ordered:
+            f.write(_RECORD.pack(*record))
+        f.write(muni_bytes)
+        f.write(heap)
+    os.replace(temp_path, output_path)
+    return len(ordered)
+
+
+def _iter_index_rows(index: PostalIndex):
+    """索引の全レコードを build_postal_index の入力形式で返す（ベンチマーク用）"""
+    for position in range(len(index)):
+        code, muni_index, town_offset, town_length = _RECORD.unpack_from(
+            index._mm, index._records_offset + position * _RECORD.size
+        )
+        start = index._strings_offset + town_offset
+        municipality_code, prefecture, city = index._municipalities[muni_index]
+        yield f"{code:07d}", municipality_code, prefecture, city, index._mm[start:start + town_length].decode("utf-8")
+
+
+def run_benchmark(lookups: int = 100000, path: str = DEFAULT_INDEX_PATH, seed: int = 0) -> Dict[str, float]:
+    """
+    索引の生成・読み込み・検索の速度を計測する
+
+    Args:
+        lookups (int): 検索回数
+        path (str): 元にする索引ファイル
+        seed (int): 検索する郵便番号の乱数シード
+
+    Returns:
+        dict: レコード数・生成秒数・読み込みミリ秒・検索件数/秒
+    """
+    source = PostalIndex(path)
+    try:
+        rows = list(_iter_index_rows(source))
+    finally:
+        source.close()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        rebuilt_path = os.path.join(temp_dir, "postal_index.bin")
+        started = time.perf_counter()
+        count = build_postal_index(rows, rebuilt_path)
+        build_sec = time.perf_counter() - started
+
+        started = time.perf_counter()
+        index = PostalIndex(rebuilt_path)
+        load_ms = (time.perf_counter() - started) * 1000
+        try:
+            rng = random.Random(seed)
+            codes = [rng.choice(rows)[0] if rng.random() < 0.8 else f"{rng.randrange(10000000):07d}"
+                     for _ in range(lookups)]
+            started = time.perf_counter()
+            hits = sum(1 for code in codes if index.lookup(code))
+            lookup_sec = time.perf_counter() - started
+        finally:
+            index.close()
+
+    return {
+        "records": count,
+        "file_bytes": os.path.getsize(path),
+        "build_sec": round(build_sec, 3),
+        "load_ms": round(load_ms, 2),
+        "lookups": lookups,
+        "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+        "lookups_per_sec": round(lookups / lookup_sec) if lookup_sec > 0 else 0,
+    }
+
+
+def main(argv=None) -> int:
+    """コマンドラインから索引の生成・検索・ベンチマークを実行する"""
+    parser = argparse.ArgumentParser(description="郵便番号索引")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="KEN_ALL.CSV から索引を生成します")
+    build_parser.add_argument("ken_all", help="日本郵便の KEN_ALL.CSV")
+    build_parser.add_argument("--output", default=DEFAULT_INDEX_PATH, help="出力先")
+
+    lookup_parser = subparsers.add_parser("lookup", help="郵便番号を検索します")
+    lookup_parser.add_argument("postal_code", help="郵便番号")
+
+    bench_parser = subparsers.add_parser("bench", help="生成・読み込み・検索の速度を計測します")
+    bench_parser.add_argument("lookups", nargs="?", type=int, default=100000, help="検索回数")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        started = time.perf_counter()
+        total = build_postal_index(read_ken_all(args.ken_all), args.output)
+        print(f"郵便番号索引を生成しました: {args.output}（{total}件、{time.perf_counter() - started:.2f}秒）")
+        return 0
+
+    if args.command == "lookup":
+        entries = lookup_postal_code(args.postal_code)
+        if not entries:
+            print("該当する町域がありません")
+            return 1
+        for entry in entries:
+            print(f"{entry.postal_code}\t{entry.prefecture}\t{entry.city}\t{entry.town}")
+        return 0
+
+    result = run_benchmark(args.lookups)
+    print("=== 郵便番号索引ベンチマーク ===")
+    print(f"レコード数: {result['records']}（{result['file_bytes'] / 1024 / 1024:.1f}MB）")
+    print(f"生成: {result['build_sec']}秒 / 読み込み: {result['load_ms']}ms")
+    print(f"検索: {result['lookups']}回（一致率 {result['hit_ratio'] * 100:.1f}%）、{result['lookups_per_sec']}件/秒")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+"""
+集計処理ユーティリティ
+
+このモジュールは、所要時間の集計レポート（検索トレース・一括判定・
+ベンチマーク）で共通に使う統計処理の関数を提供します。
+"""
+
+import math
+from typing import Iterable
+
+
+def percentile(values: Iterable[float], ratio: float) -> float:
+    """
+    最近順位法（nearest-rank）でパーセンタイルを求める
+
+    昇順に並べた n 件のうち ceil(ratio * n) 番目（1始まり）の値を返します。
+    値の補間は行いません。
+
+    Args:
+        values (iterable): 集計する値
+        ratio (float): 0〜1 の割合（例：p90 は 0.9）
+
+    Returns:
+        float: パーセンタイル値。値がない場合は0.0
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = math.ceil(ratio * len(ordered))
+    return ordered[min(len(ordered), max(1, rank)) - 1]
@@ -79,42 +79,10 @@ def calculate_similarity(str1, str2):
     if not str1 or not str2:
         return 0.0
     
-    # 文字列を正規化（全角→半角、大文字→小文字）
-    str1 = str1.lower()
-    str2 = str2.lower()
-    
-    # レーベンシュタイン距離を計算
-    len1 = len(str1)
-    len2 = len(str2)
-    
-    # 行列を初期化
-    matrix = [[0 for _ in range(len2 + 1)] for _ in range(len1 + 1)]
-    
-    # 行列の初期値を設定
-    for i in range(len1 + 1):
-        matrix[i][0] = i
-    for j in range(len2 + 1):
-        matrix[0][j] = j
-    
-    # レーベンシュタイン距離を計算
-    for i in range(1, len1 + 1):
-        for j in range(1, len2 + 1):
-            cost = 0 if str1[i-1] == str2[j-1] else 1
-            matrix[i][j] = min(
-                matrix[i-1][j] + 1,      # 削除
-                matrix[i][j-1] + 1,      # 挿入
-                matrix[i-1][j-1] + cost  # 置換
-            )
-    
-    # 類似度を計算（0.0～1.0）
-    max_len = max(len1, len2)
-    if max_len == 0:
-        return 1.0
-    
-    distance = matrix[len1][len2]
-    similarity = 1.0 - (distance / max_len)
-    
-    return similarity
+    from utils.address_matcher import similarity
+
+    # 大文字→小文字に揃えてビット並列の編集距離で計算する
+    return similarity(str1.lower(), str2.lower())
 
 
 def validate_name(text):